@@ -0,0 +1,5 @@
+"""Agendador embutido de tarefas periódicas de manutenção.
+
+As tarefas são registradas com o decorador ``agendador.registro.tarefa`` em
+módulos ``tarefas.py`` dos apps e executadas pelo comando ``run_scheduler``.
+"""
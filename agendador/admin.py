@@ -0,0 +1,22 @@
+from django.contrib import admin
+
+from .models import ExecucaoTarefa, TarefaAgendada
+
+
+class TarefaAgendadaAdmin(admin.ModelAdmin):
+    list_display = ("nome", "agenda", "ativa", "proxima_execucao", "ultima_execucao", "bloqueado_por")
+    list_filter = ("ativa",)
+    search_fields = ("nome", "descricao")
+    readonly_fields = ("nome", "descricao", "agenda", "ultima_execucao", "bloqueado_por", "bloqueado_ate")
+
+
+admin.site.register(TarefaAgendada, TarefaAgendadaAdmin)
+
+
+class ExecucaoTarefaAdmin(admin.ModelAdmin):
+    list_display = ("tarefa", "inicio", "duracao", "sucesso", "no")
+    list_filter = ("sucesso", "tarefa")
+    readonly_fields = ("tarefa", "no", "inicio", "fim", "duracao", "sucesso", "resultado")
+
+
+admin.site.register(ExecucaoTarefa, ExecucaoTarefaAdmin)
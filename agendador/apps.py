@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class AgendadorConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "agendador"
+    verbose_name = "Agendador de Tarefas"
+
+    def ready(self):
+        # Importa os módulos tarefas.py dos apps para registrar as tarefas
+        autodiscover_modules("tarefas")
@@ -0,0 +1,278 @@
+"""Backup e restauração da base no nível da aplicação.
+
+Cada backup é um diretório com um arquivo JSONL compactado (gzip) por modelo e
+um ``manifest.json`` com a quantidade de linhas e o SHA-256 de cada arquivo.
+Os registros são lidos em blocos pela chave primária e gravados um a um, de
+modo que o consumo de memória não depende do tamanho das tabelas.
+
+No modo incremental, os modelos com coluna de alteração (``updated_at``,
+``data_atualizacao``, ``data_hora`` ou ``data_entrada``) exportam apenas as
+linhas alteradas desde o início do backup anterior; os demais são exportados
+por completo. Exclusões só são refletidas no próximo backup completo.
+
+A restauração aplica a cadeia completo → incrementais em ordem, gravando com
+``bulk_create`` em lotes (com atualização em caso de conflito de chave). O
+cubo de relatórios é substituído a cada backup da cadeia.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+from itertools import islice
+from pathlib import Path
+
+from django.apps import apps
+from django.core import serializers
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+ARQUIVO_MANIFESTO = "manifest.json"
+TAMANHO_BLOCO = 2000
+CAMPOS_ALTERACAO = ("updated_at", "data_atualizacao", "data_hora", "data_entrada")
+# Dados efêmeros que não precisam de backup
+MODELOS_IGNORADOS = {"sessions.session"}
+# Tabelas preenchidas pelo migrate: são substituídas (e não mescladas) na restauração
+MODELOS_SISTEMA = ("auth.permission", "contenttypes.contenttype")
+# Agregados sem coluna de alteração (exportados por completo em todo backup): cada
+# backup da cadeia substitui o anterior, sem mesclar células de chaves diferentes
+MODELOS_DERIVADOS = ("relatorios.celulacubo",)
+
+
+class BackupError(Exception):
+    """Backup inexistente, incompleto ou corrompido."""
+
+
+def _modelos(excluir=()):
+    ignorados = MODELOS_IGNORADOS | {rotulo.lower() for rotulo in excluir}
+    return [
+        modelo
+        for modelo in apps.get_models()
+        if not modelo._meta.proxy and modelo._meta.label_lower not in ignorados
+    ]
+
+
+def campo_alteracao(modelo):
+    """Retorna o nome da coluna que indica alteração da linha (ou None)."""
+    nomes = {campo.name for campo in modelo._meta.concrete_fields}
+    return next((nome for nome in CAMPOS_ALTERACAO if nome in nomes), None)
+
+
+def ler_manifesto(diretorio):
+    caminho = Path(diretorio) / ARQUIVO_MANIFESTO
+    if not caminho.exists():
+        raise BackupError(f"Manifesto não encontrado em {diretorio}")
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def ultimo_backup(destino):
+    """Retorna o diretório do backup mais recente (com manifesto) em ``destino``."""
+    candidatos = sorted(
+        (d for d in Path(destino).glob("docfinance_*") if (d / ARQUIVO_MANIFESTO).exists()),
+        key=lambda d: d.name,
+    )
+    return candidatos[-1] if candidatos else None
+
+
+def _sha256(caminho):
+    resumo = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(1024 * 1024), b""):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+def _em_blocos(queryset, tamanho):
+    """Percorre o queryset em blocos pela chave primária (sem OFFSET)."""
+    m2m = [campo.name for campo in queryset.model._meta.many_to_many]
+    ultimo_pk = None
+    while True:
+        bloco = queryset.order_by("pk")
+        if ultimo_pk is not None:
+            bloco = bloco.filter(pk__gt=ultimo_pk)
+        if m2m:
+            bloco = bloco.prefetch_related(*m2m)
+        bloco = list(bloco[:tamanho])
+        if not bloco:
+            return
+        yield bloco
+        ultimo_pk = bloco[-1].pk
+
+
+def exportar_modelo(modelo, arquivo, desde=None, tamanho_bloco=TAMANHO_BLOCO):
+    """Grava as linhas do modelo em ``arquivo`` (JSONL compactado).
+
+    Returns:
+        int: Quantidade de linhas exportadas.
+    """
+    queryset = modelo._default_manager.all()
+    campo = campo_alteracao(modelo)
+    if desde is not None and campo:
+        queryset = queryset.filter(**{f"{campo}__gte": desde})
+
+    linhas = 0
+    with gzip.open(arquivo, "wt", encoding="utf-8", compresslevel=6) as saida:
+        for bloco in _em_blocos(queryset, tamanho_bloco):
+            for registro in serializers.serialize("python", bloco):
+                saida.write(json.dumps(registro, cls=DjangoJSONEncoder, ensure_ascii=False))
+                saida.write("\n")
+            linhas += len(bloco)
+    return linhas
+
+
+def criar_backup(destino, incremental=False, excluir=(), tamanho_bloco=TAMANHO_BLOCO):
+    """Cria um backup completo ou incremental em um novo diretório de ``destino``.
+
+    Returns:
+        Path: Diretório do backup criado.
+    """
+    destino = Path(destino)
+    inicio = timezone.now()
+
+    base = desde = None
+    if incremental:
+        anterior = ultimo_backup(destino)
+        if anterior is None:
+            logger.info("Nenhum backup anterior em %s; gerando backup completo", destino)
+        else:
+            base = anterior.name
+            desde = parse_datetime(ler_manifesto(anterior)["inicio"])
+
+    diretorio = destino / f"docfinance_{timezone.localtime(inicio):%Y-%m-%d_%H%M%S_%f}"
+    diretorio.mkdir(parents=True, exist_ok=False)
+
+    modelos = {}
+    for modelo in _modelos(excluir):
+        rotulo = modelo._meta.label_lower
+        nome_arquivo = f"{rotulo}.jsonl.gz"
+        linhas = exportar_modelo(modelo, diretorio / nome_arquivo, desde, tamanho_bloco)
+        modelos[rotulo] = {
+            "arquivo": nome_arquivo,
+            "linhas": linhas,
+            "sha256": _sha256(diretorio / nome_arquivo),
+            "incremental": desde is not None and campo_alteracao(modelo) is not None,
+        }
+
+    manifesto = {
+        "tipo": "incremental" if base else "completo",
+        "base": base,
+        "inicio": inicio.isoformat(),
+        "fim": timezone.now().isoformat(),
+        "desde": desde.isoformat() if desde else None,
+        "modelos": modelos,
+    }
+    # O manifesto é gravado por último: diretório sem manifesto = backup incompleto
+    with open(diretorio / ARQUIVO_MANIFESTO, "w", encoding="utf-8") as arquivo:
+        json.dump(manifesto, arquivo, indent=2, ensure_ascii=False)
+
+    logger.info("Backup %s criado em %s", manifesto["tipo"], diretorio)
+    return diretorio
+
+
+def verificar_backup(diretorio):
+    """Confere os checksums do backup. Levanta BackupError se houver divergência."""
+    diretorio = Path(diretorio)
+    manifesto = ler_manifesto(diretorio)
+    for rotulo, info in manifesto["modelos"].items():
+        caminho = diretorio / info["arquivo"]
+        if not caminho.exists() or _sha256(caminho) != info["sha256"]:
+            raise BackupError(f"Arquivo de {rotulo} ausente ou corrompido em {diretorio}")
+    return manifesto
+
+
+def cadeia_backups(diretorio):
+    """Retorna os diretórios a restaurar, do backup completo até ``diretorio``."""
+    cadeia = [Path(diretorio)]
+    while True:
+        base = ler_manifesto(cadeia[0])["base"]
+        if not base:
+            return cadeia
+        anterior = cadeia[0].parent / base
+        if anterior in cadeia:
+            raise BackupError(f"Cadeia de backups circular em {anterior}")
+        cadeia.insert(0, anterior)
+
+
+def _restaurar_bloco(modelo, registros):
+    objetos, relacoes = [], {}
+    for deserializado in serializers.deserialize("python", registros):
+        objetos.append(deserializado.object)
+        for nome, ids in (deserializado.m2m_data or {}).items():
+            relacoes.setdefault(nome, []).append((deserializado.object.pk, ids))
+
+    campos = [
+        campo.name for campo in modelo._meta.concrete_fields if not campo.primary_key
+    ]
+    if campos:
+        modelo._default_manager.bulk_create(
+            objetos,
+            update_conflicts=True,
+            unique_fields=[modelo._meta.pk.name],
+            update_fields=campos,
+        )
+    else:
+        modelo._default_manager.bulk_create(objetos, ignore_conflicts=True)
+
+    for nome, valores in relacoes.items():
+        campo = modelo._meta.get_field(nome)
+        intermediario = campo.remote_field.through
+        origem = campo.m2m_field_name()
+        destino = campo.m2m_reverse_field_name()
+        # Substitui as relações das linhas restauradas
+        intermediario._default_manager.filter(
+            **{f"{origem}__in": [pk for pk, _ in valores]}
+        ).delete()
+        intermediario._default_manager.bulk_create(
+            [
+                intermediario(**{f"{origem}_id": pk, f"{destino}_id": alvo})
+                for pk, ids in valores
+                for alvo in ids
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def restaurar_backup(diretorio, tamanho_bloco=TAMANHO_BLOCO):
+    """Restaura ``diretorio`` e, antes dele, os backups dos quais depende.
+
+    Returns:
+        dict: Linhas restauradas por modelo (somando toda a cadeia).
+    """
+    cadeia = cadeia_backups(diretorio)
+    manifestos = [verificar_backup(item) for item in cadeia]
+
+    totais = {}
+    restaurados = set()
+    with transaction.atomic():
+        for item, manifesto in zip(cadeia, manifestos, strict=True):
+            substituidos = MODELOS_DERIVADOS
+            if manifesto["tipo"] == "completo":
+                substituidos = (*MODELOS_SISTEMA, *MODELOS_DERIVADOS)
+            for rotulo in substituidos:
+                if rotulo in manifesto["modelos"]:
+                    apps.get_model(rotulo)._default_manager.all().delete()
+
+            for rotulo, info in manifesto["modelos"].items():
+                modelo = apps.get_model(rotulo)
+                with gzip.open(item / info["arquivo"], "rt", encoding="utf-8") as entrada:
+                    linhas = (json.loads(linha) for linha in entrada)
+                    while bloco := list(islice(linhas, tamanho_bloco)):
+                        _restaurar_bloco(modelo, bloco)
+                        totais[rotulo] = totais.get(rotulo, 0) + len(bloco)
+                restaurados.add(modelo)
+
+        # As chaves foram gravadas explicitamente: ajusta as sequências (PostgreSQL)
+        comandos = connection.ops.sequence_reset_sql(no_style(), list(restaurados))
+        if comandos:
+            with connection.cursor() as cursor:
+                for comando in comandos:
+                    cursor.execute(comando)
+
+    logger.info("Backup %s restaurado: %s", diretorio, totais)
+    return totais
@@ -0,0 +1,121 @@
+"""Interpretação de expressões no formato cron.
+
+Suporta os cinco campos clássicos (minuto, hora, dia do mês, mês e dia da
+semana) com ``*``, listas (``1,15``), intervalos (``1-5``), passos (``*/10``,
+``8-18/2``) e os atalhos ``@hourly``, ``@daily``, ``@weekly``, ``@monthly`` e
+``@yearly``. O dia da semana vai de 0 (domingo) a 6; 7 também é domingo.
+"""
+
+import datetime
+
+from django.utils import timezone
+
+ATALHOS = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+}
+
+LIMITES = (
+    ("minuto", 0, 59),
+    ("hora", 0, 23),
+    ("dia", 1, 31),
+    ("mês", 1, 12),
+    ("dia da semana", 0, 7),
+)
+
+
+class ExpressaoCronInvalidaError(ValueError):
+    """Expressão cron mal formada."""
+
+
+def _interpretar_campo(texto, nome, minimo, maximo):
+    valores = set()
+    for parte in texto.split(","):
+        faixa, _, passo = parte.partition("/")
+        try:
+            passo = int(passo) if passo else 1
+            if faixa == "*":
+                inicio, fim = minimo, maximo
+            elif "-" in faixa:
+                inicio, fim = (int(v) for v in faixa.split("-", 1))
+            else:
+                inicio = int(faixa)
+                fim = maximo if passo > 1 else inicio
+        except ValueError as e:
+            raise ExpressaoCronInvalidaError(f"Campo {nome} inválido: {texto!r}") from e
+        if passo < 1 or not minimo <= inicio <= fim <= maximo:
+            raise ExpressaoCronInvalidaError(
+                f"Campo {nome} fora do intervalo: {texto!r}"
+            )
+        valores.update(range(inicio, fim + 1, passo))
+    return frozenset(valores)
+
+
+class ExpressaoCron:
+    """Expressão cron interpretada, capaz de calcular a próxima ocorrência."""
+
+    def __init__(self, expressao):
+        self.expressao = expressao.strip()
+        campos = ATALHOS.get(self.expressao, self.expressao).split()
+        if len(campos) != 5:
+            raise ExpressaoCronInvalidaError(
+                f"A expressão cron deve ter 5 campos: {self.expressao!r}"
+            )
+        self.minutos, self.horas, self.dias, self.meses, dias_semana = (
+            _interpretar_campo(texto, *limites)
+            for texto, limites in zip(campos, LIMITES, strict=True)
+        )
+        # Converte para a numeração do Python (segunda=0 ... domingo=6)
+        self.dias_semana = frozenset((d - 1) % 7 for d in dias_semana)
+        self._restringe_dia = campos[2] != "*"
+        self._restringe_dia_semana = campos[4] != "*"
+
+    def __str__(self):
+        return self.expressao
+
+    def _dia_valido(self, data):
+        no_mes = data.day in self.dias
+        na_semana = data.weekday() in self.dias_semana
+        # Regra do cron: com os dois campos restritos, basta um deles coincidir
+        if self._restringe_dia and self._restringe_dia_semana:
+            return no_mes or na_semana
+        return no_mes and na_semana
+
+    def proxima(self, apos=None):
+        """Retorna a próxima ocorrência estritamente posterior a ``apos``.
+
+        Args:
+            apos: Datetime com fuso (padrão: agora). O cálculo é feito no fuso local.
+
+        Returns:
+            datetime: Próxima ocorrência, com fuso.
+        """
+        apos = timezone.localtime(apos or timezone.now())
+        atual = apos.replace(tzinfo=None, second=0, microsecond=0) + datetime.timedelta(
+            minutes=1
+        )
+        limite = atual + datetime.timedelta(days=366 * 5)
+
+        while atual < limite:
+            if atual.month not in self.meses:
+                ano, mes = divmod(atual.year * 12 + atual.month, 12)
+                atual = datetime.datetime(ano, mes + 1, 1)
+                continue
+            if not self._dia_valido(atual):
+                atual = datetime.datetime.combine(
+                    atual.date() + datetime.timedelta(days=1), datetime.time()
+                )
+                continue
+            if atual.hour not in self.horas:
+                atual = atual.replace(minute=0) + datetime.timedelta(hours=1)
+                continue
+            if atual.minute not in self.minutos:
+                atual += datetime.timedelta(minutes=1)
+                continue
+            return timezone.make_aware(atual)
+
+        raise ExpressaoCronInvalidaError(f"A expressão {self.expressao!r} nunca ocorre")
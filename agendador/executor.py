@@ -0,0 +1,163 @@
+"""Execução das tarefas agendadas.
+
+Cada ciclo do agendador sincroniza as tarefas registradas com a tabela
+``TarefaAgendada`` e executa as que estão vencidas. Antes de executar, o nó
+obtém uma concessão com um UPDATE condicional (só afeta a linha se a tarefa
+estiver vencida e sem concessão válida); o nó cujo UPDATE alterou a linha é o
+único que executa a ocorrência.
+"""
+
+import datetime
+import logging
+import os
+import socket
+import time
+
+from django.db import close_old_connections
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from .models import ExecucaoTarefa, TarefaAgendada
+from .registro import tarefas_registradas
+
+logger = logging.getLogger(__name__)
+
+
+def identificador_no():
+    """Identifica o processo agendador atual (host:pid)."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def sincronizar_tarefas(agora=None):
+    """Cria ou atualiza as linhas de ``TarefaAgendada`` das tarefas registradas.
+
+    Returns:
+        dict: Linhas de TarefaAgendada indexadas pelo nome da tarefa.
+    """
+    agora = agora or timezone.now()
+    registradas = tarefas_registradas()
+    existentes = {
+        linha.nome: linha
+        for linha in TarefaAgendada.objects.filter(nome__in=registradas)  # pylint: disable=no-member
+    }
+
+    novas, alteradas = [], []
+    for nome, tarefa in registradas.items():
+        linha = existentes.get(nome)
+        if linha is None:
+            novas.append(
+                TarefaAgendada(
+                    nome=nome,
+                    descricao=tarefa.descricao,
+                    agenda=tarefa.agenda,
+                    proxima_execucao=tarefa.cron.proxima(agora),
+                )
+            )
+        elif linha.agenda != tarefa.agenda or linha.descricao != tarefa.descricao:
+            linha.agenda = tarefa.agenda
+            linha.descricao = tarefa.descricao
+            linha.proxima_execucao = tarefa.cron.proxima(agora)
+            alteradas.append(linha)
+
+    if novas:
+        # Outro nó pode ter criado a mesma tarefa ao mesmo tempo
+        TarefaAgendada.objects.bulk_create(novas, ignore_conflicts=True)  # pylint: disable=no-member
+    if alteradas:
+        TarefaAgendada.objects.bulk_update(  # pylint: disable=no-member
+            alteradas, ["agenda", "descricao", "proxima_execucao"]
+        )
+    if novas or alteradas:
+        existentes = {
+            linha.nome: linha
+            for linha in TarefaAgendada.objects.filter(nome__in=registradas)  # pylint: disable=no-member
+        }
+    return existentes
+
+
+def adquirir_concessao(linha, no, duracao_maxima, agora=None):
+    """Tenta obter a execução exclusiva da ocorrência vencida de uma tarefa.
+
+    Returns:
+        bool: True se este nó obteve a concessão.
+    """
+    agora = agora or timezone.now()
+    alteradas = (
+        TarefaAgendada.objects.filter(  # pylint: disable=no-member
+            pk=linha.pk, ativa=True, proxima_execucao__lte=agora
+        )
+        .filter(Q(bloqueado_ate__isnull=True) | Q(bloqueado_ate__lte=agora))
+        .update(
+            bloqueado_por=no,
+            bloqueado_ate=agora + datetime.timedelta(seconds=duracao_maxima),
+        )
+    )
+    return alteradas == 1
+
+
+def executar_tarefa(tarefa, linha, no):
+    """Executa uma tarefa já concedida a este nó e registra o histórico.
+
+    Returns:
+        ExecucaoTarefa: Registro da execução.
+    """
+    inicio = timezone.now()
+    cronometro = time.monotonic()
+    try:
+        resultado = tarefa.funcao()
+        sucesso = True
+    except Exception as e:  # pylint: disable=broad-except
+        logger.exception("Falha na tarefa agendada %s", tarefa.nome)
+        resultado = f"{type(e).__name__}: {e}"
+        sucesso = False
+    duracao = time.monotonic() - cronometro
+    fim = timezone.now()
+
+    # A conexão pode ter sido encerrada durante uma tarefa longa
+    close_old_connections()
+    execucao = ExecucaoTarefa.objects.create(  # pylint: disable=no-member
+        tarefa=linha,
+        no=no,
+        inicio=inicio,
+        fim=fim,
+        duracao=duracao,
+        sucesso=sucesso,
+        resultado="" if resultado is None else str(resultado),
+    )
+    TarefaAgendada.objects.filter(pk=linha.pk, bloqueado_por=no).update(  # pylint: disable=no-member
+        ultima_execucao=inicio,
+        proxima_execucao=tarefa.cron.proxima(fim),
+        bloqueado_por="",
+        bloqueado_ate=None,
+    )
+    logger.info(
+        "Tarefa %s executada em %.2fs (%s)", tarefa.nome, duracao, "ok" if sucesso else "falha"
+    )
+    return execucao
+
+
+def executar_pendentes(no=None, agora=None):
+    """Executa as tarefas vencidas cuja concessão este nó conseguir obter.
+
+    Returns:
+        list[ExecucaoTarefa]: Execuções realizadas neste ciclo.
+    """
+    no = no or identificador_no()
+    agora = agora or timezone.now()
+    registradas = tarefas_registradas()
+    linhas = sincronizar_tarefas(agora)
+
+    execucoes = []
+    for nome, linha in linhas.items():
+        if not linha.ativa or linha.proxima_execucao > agora:
+            continue
+        tarefa = registradas[nome]
+        if adquirir_concessao(linha, no, tarefa.duracao_maxima, agora):
+            execucoes.append(executar_tarefa(tarefa, linha, no))
+    return execucoes
+
+
+def proxima_verificacao():
+    """Retorna o horário da próxima tarefa ativa (ou None se não houver)."""
+    return TarefaAgendada.objects.filter(  # pylint: disable=no-member
+        ativa=True, nome__in=tarefas_registradas()
+    ).aggregate(proxima=Min("proxima_execucao"))["proxima"]
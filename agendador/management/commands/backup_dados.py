@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from agendador.backup import TAMANHO_BLOCO, criar_backup, ler_manifesto
+
+
+class Command(BaseCommand):
+    help = "Gera backup da base em JSONL compactado por modelo, com manifesto de checksums."
+
+    def add_arguments(self, parser):
+        parser.add_argument("destino", help="Diretório onde o backup será criado")
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Exporta apenas as linhas alteradas desde o último backup em DESTINO",
+        )
+        parser.add_argument(
+            "--excluir",
+            action="append",
+            default=[],
+            metavar="APP.MODELO",
+            help="Modelo a ignorar (pode ser repetido)",
+        )
+        parser.add_argument(
+            "--bloco",
+            type=int,
+            default=TAMANHO_BLOCO,
+            help="Linhas lidas do banco por consulta",
+        )
+
+    def handle(self, *args, **options):
+        diretorio = criar_backup(
+            options["destino"],
+            incremental=options["incremental"],
+            excluir=options["excluir"],
+            tamanho_bloco=options["bloco"],
+        )
+        manifesto = ler_manifesto(diretorio)
+        linhas = sum(info["linhas"] for info in manifesto["modelos"].values())
+        base = f" (base: {manifesto['base']})" if manifesto["base"] else ""
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Backup {manifesto['tipo']}{base} criado em {diretorio}: "
+                f"{len(manifesto['modelos'])} modelo(s), {linhas} linha(s)."
+            )
+        )
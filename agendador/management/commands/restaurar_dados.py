@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from agendador.backup import (
+    TAMANHO_BLOCO,
+    BackupError,
+    cadeia_backups,
+    restaurar_backup,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Restaura um backup gerado por backup_dados (e os backups anteriores dos quais "
+        "um incremental depende) usando inserções em lote."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("diretorio", help="Diretório do backup a restaurar")
+        parser.add_argument(
+            "--bloco",
+            type=int,
+            default=TAMANHO_BLOCO,
+            help="Linhas por inserção em lote",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            cadeia = cadeia_backups(options["diretorio"])
+            for diretorio in cadeia:
+                self.stdout.write(f"Aplicando {diretorio.name}")
+            totais = restaurar_backup(options["diretorio"], tamanho_bloco=options["bloco"])
+        except BackupError as e:
+            raise CommandError(str(e)) from e
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{sum(totais.values())} linha(s) restaurada(s) em {len(totais)} modelo(s)."
+            )
+        )
@@ -0,0 +1,57 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from agendador.executor import executar_pendentes, identificador_no, proxima_verificacao
+from agendador.registro import tarefas_registradas
+
+
+class Command(BaseCommand):
+    help = "Executa o agendador de tarefas periódicas (manutenção fora do ciclo das requisições)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--uma-vez",
+            action="store_true",
+            help="Executa as tarefas vencidas uma única vez e encerra",
+        )
+        parser.add_argument(
+            "--espera-maxima",
+            type=int,
+            default=60,
+            help="Intervalo máximo, em segundos, entre duas verificações",
+        )
+
+    def handle(self, *args, **options):
+        no = identificador_no()
+        parar = threading.Event()
+        if not options["uma_vez"]:
+            for sinal in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(sinal, lambda *_: parar.set())
+            nomes = ", ".join(sorted(tarefas_registradas())) or "nenhuma"
+            self.stdout.write(f"Agendador {no} iniciado. Tarefas: {nomes}")
+
+        while not parar.is_set():
+            close_old_connections()
+            for execucao in executar_pendentes(no):
+                estilo = self.style.SUCCESS if execucao.sucesso else self.style.ERROR
+                self.stdout.write(
+                    estilo(
+                        f"{execucao.tarefa.nome}: {execucao.duracao:.2f}s "
+                        f"{execucao.resultado}".rstrip()
+                    )
+                )
+            if options["uma_vez"]:
+                return
+
+            espera = options["espera_maxima"]
+            proxima = proxima_verificacao()
+            if proxima:
+                espera = min(espera, max((proxima - timezone.now()).total_seconds(), 1))
+            close_old_connections()
+            parar.wait(espera)
+
+        self.stdout.write(f"Agendador {no} encerrado.")
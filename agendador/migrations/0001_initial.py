@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TarefaAgendada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100, unique=True, verbose_name='Nome')),
+                ('descricao', models.TextField(blank=True, verbose_name='Descrição')),
+                ('agenda', models.CharField(max_length=100, verbose_name='Agenda (cron)')),
+                ('ativa', models.BooleanField(default=True, verbose_name='Ativa')),
+                ('proxima_execucao', models.DateTimeField(db_index=True, verbose_name='Próxima Execução')),
+                ('ultima_execucao', models.DateTimeField(blank=True, null=True, verbose_name='Última Execução')),
+                ('bloqueado_por', models.CharField(blank=True, max_length=255, verbose_name='Em execução por')),
+                ('bloqueado_ate', models.DateTimeField(blank=True, null=True, verbose_name='Concessão válida até')),
+            ],
+            options={
+                'verbose_name': 'Tarefa Agendada',
+                'verbose_name_plural': 'Tarefas Agendadas',
+                'ordering': ['nome'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ExecucaoTarefa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('no', models.CharField(max_length=255, verbose_name='Nó')),
+                ('inicio', models.DateTimeField(db_index=True, verbose_name='Início')),
+                ('fim', models.DateTimeField(blank=True, null=True, verbose_name='Fim')),
+                ('duracao', models.FloatField(blank=True, null=True, verbose_name='Duração (s)')),
+                ('sucesso', models.BooleanField(default=False, verbose_name='Sucesso')),
+                ('resultado', models.TextField(blank=True, verbose_name='Resultado')),
+                ('tarefa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='execucoes', to='agendador.tarefaagendada')),
+            ],
+            options={
+                'verbose_name': 'Execução de Tarefa',
+                'verbose_name_plural': 'Execuções de Tarefas',
+                'ordering': ['-inicio'],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+"""Modelos do agendador de tarefas.
+
+Models:
+    TarefaAgendada: Estado de cada tarefa registrada (agenda, próxima execução e
+        concessão de execução exclusiva entre os nós).
+    ExecucaoTarefa: Histórico de execuções, com duração e resultado.
+"""
+
+from django.db import models
+
+
+class TarefaAgendada(models.Model):
+    """Estado persistido de uma tarefa periódica.
+
+    A concessão (``bloqueado_por``/``bloqueado_ate``) é obtida com um UPDATE
+    condicional, garantindo que apenas um processo agendador execute a tarefa
+    em cada ocorrência, mesmo com vários nós ativos.
+    """
+
+    nome = models.CharField(max_length=100, unique=True, verbose_name="Nome")
+    descricao = models.TextField(blank=True, verbose_name="Descrição")
+    agenda = models.CharField(max_length=100, verbose_name="Agenda (cron)")
+    ativa = models.BooleanField(default=True, verbose_name="Ativa")
+    proxima_execucao = models.DateTimeField(
+        db_index=True, verbose_name="Próxima Execução"
+    )
+    ultima_execucao = models.DateTimeField(
+        blank=True, null=True, verbose_name="Última Execução"
+    )
+    bloqueado_por = models.CharField(
+        max_length=255, blank=True, verbose_name="Em execução por"
+    )
+    bloqueado_ate = models.DateTimeField(
+        blank=True, null=True, verbose_name="Concessão válida até"
+    )
+
+    class Meta:
+        ordering = ["nome"]
+        verbose_name = "Tarefa Agendada"
+        verbose_name_plural = "Tarefas Agendadas"
+
+    def __str__(self):
+        return f"{self.nome} ({self.agenda})"
+
+
+class ExecucaoTarefa(models.Model):
+    """Registro de uma execução de tarefa agendada."""
+
+    tarefa = models.ForeignKey(
+        TarefaAgendada, on_delete=models.CASCADE, related_name="execucoes"
+    )
+    no = models.CharField(max_length=255, verbose_name="Nó")
+    inicio = models.DateTimeField(db_index=True, verbose_name="Início")
+    fim = models.DateTimeField(blank=True, null=True, verbose_name="Fim")
+    duracao = models.FloatField(blank=True, null=True, verbose_name="Duração (s)")
+    sucesso = models.BooleanField(default=False, verbose_name="Sucesso")
+    resultado = models.TextField(blank=True, verbose_name="Resultado")
+
+    class Meta:
+        ordering = ["-inicio"]
+        verbose_name = "Execução de Tarefa"
+        verbose_name_plural = "Execuções de Tarefas"
+
+    def __str__(self):
+        return f"{self.tarefa.nome} em {self.inicio}"  # pylint: disable=no-member
@@ -0,0 +1,61 @@
+"""Registro das tarefas periódicas.
+
+Exemplo (em ``<app>/tarefas.py``)::
+
+    from agendador.registro import tarefa
+
+    @tarefa("0 3 * * *", descricao="Remove registros antigos")
+    def limpar_registros():
+        ...
+        return "123 registro(s) removido(s)"
+
+O valor retornado pela função (se houver) é gravado no histórico de execução.
+"""
+
+from .cron import ExpressaoCron
+
+DURACAO_MAXIMA_PADRAO = 3600
+
+_tarefas = {}
+
+
+class Tarefa:
+    """Tarefa registrada: função, agenda cron e duração máxima da concessão."""
+
+    def __init__(self, nome, funcao, agenda, descricao="", duracao_maxima=DURACAO_MAXIMA_PADRAO):
+        self.nome = nome
+        self.funcao = funcao
+        self.cron = ExpressaoCron(agenda)
+        self.descricao = descricao or (funcao.__doc__ or "").strip().split("\n")[0]
+        self.duracao_maxima = duracao_maxima
+
+    @property
+    def agenda(self):
+        return str(self.cron)
+
+    def __repr__(self):
+        return f"<Tarefa {self.nome} {self.agenda}>"
+
+
+def tarefa(agenda, nome=None, descricao="", duracao_maxima=DURACAO_MAXIMA_PADRAO):
+    """Decorador que registra uma função como tarefa periódica.
+
+    Args:
+        agenda: Expressão cron (ex.: "*/15 * * * *" ou "@daily").
+        nome: Nome único da tarefa (padrão: "<módulo>.<função>").
+        descricao: Texto exibido no painel (padrão: primeira linha da docstring).
+        duracao_maxima: Segundos após os quais a concessão de execução expira e
+            outro nó pode assumir a tarefa (ex.: se o processo morrer).
+    """
+
+    def decorador(funcao):
+        nome_tarefa = nome or f"{funcao.__module__}.{funcao.__name__}"
+        _tarefas[nome_tarefa] = Tarefa(nome_tarefa, funcao, agenda, descricao, duracao_maxima)
+        return funcao
+
+    return decorador
+
+
+def tarefas_registradas():
+    """Retorna as tarefas registradas, indexadas pelo nome."""
+    return dict(_tarefas)
@@ -0,0 +1,15 @@
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ExecucaoTarefa
+from .registro import tarefa
+
+
+@tarefa("15 4 * * *", nome="agendador.limpar_historico")
+def limpar_historico_execucoes():
+    """Remove o histórico de execuções mais antigo que AGENDADOR_RETENCAO_DIAS."""
+    limite = timezone.now() - datetime.timedelta(days=settings.AGENDADOR_RETENCAO_DIAS)
+    removidas, _ = ExecucaoTarefa.objects.filter(inicio__lt=limite).delete()  # pylint: disable=no-member
+    return f"{removidas} execução(ões) removida(s)"
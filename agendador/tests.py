@@ -0,0 +1,230 @@
+import datetime
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from documentos.models import Documento
+from fornecedores.models import Fornecedor
+
+from .backup import criar_backup, ler_manifesto
+from .cron import ExpressaoCron, ExpressaoCronInvalidaError
+from .executor import adquirir_concessao, executar_pendentes, sincronizar_tarefas
+from .models import ExecucaoTarefa, TarefaAgendada
+from .registro import Tarefa, tarefas_registradas
+
+
+def _local(*args):
+    return timezone.make_aware(datetime.datetime(*args))
+
+
+class ExpressaoCronTest(TestCase):
+    def test_proxima_ocorrencia(self):
+        self.assertEqual(
+            ExpressaoCron("*/15 * * * *").proxima(_local(2024, 3, 10, 10, 7)),
+            _local(2024, 3, 10, 10, 15),
+        )
+        self.assertEqual(
+            ExpressaoCron("30 3 * * *").proxima(_local(2024, 3, 10, 3, 30)),
+            _local(2024, 3, 11, 3, 30),
+        )
+        # 31/12/2024 é terça-feira: a próxima segunda útil às 8h é 06/01/2025
+        self.assertEqual(
+            ExpressaoCron("0 8 * * 1").proxima(_local(2024, 12, 31, 12, 0)),
+            _local(2025, 1, 6, 8, 0),
+        )
+        self.assertEqual(
+            ExpressaoCron("@monthly").proxima(_local(2024, 1, 31, 0, 0)),
+            _local(2024, 2, 1, 0, 0),
+        )
+
+    def test_dia_do_mes_ou_dia_da_semana(self):
+        # Com os dois campos restritos, qualquer um deles dispara (dia 15 ou domingo)
+        self.assertEqual(
+            ExpressaoCron("0 0 15 * 0").proxima(_local(2024, 3, 1, 0, 0)),
+            _local(2024, 3, 3, 0, 0),
+        )
+
+    def test_expressoes_invalidas(self):
+        for expressao in ("* * * *", "60 * * * *", "*/0 * * * *", "a * * * *", "0 0 31 2 *"):
+            with self.assertRaises(ExpressaoCronInvalidaError, msg=expressao):
+                ExpressaoCron(expressao).proxima(_local(2024, 1, 1, 0, 0))
+
+
+class ExecutorTest(TestCase):
+    def setUp(self):
+        self.chamadas = 0
+
+        def contar():
+            self.chamadas += 1
+            return "feito"
+
+        def falhar():
+            raise RuntimeError("sem conexão")
+
+        self.registradas = {
+            "teste.contar": Tarefa("teste.contar", contar, "* * * * *"),
+            "teste.falhar": Tarefa("teste.falhar", falhar, "@daily"),
+        }
+        patcher = mock.patch(
+            "agendador.executor.tarefas_registradas", return_value=self.registradas
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_executa_tarefas_vencidas_e_registra_historico(self):
+        linhas = sincronizar_tarefas()
+        self.assertEqual(set(linhas), {"teste.contar", "teste.falhar"})
+        TarefaAgendada.objects.update(proxima_execucao=timezone.now() - datetime.timedelta(minutes=1))
+
+        with self.assertLogs("agendador.executor", level="ERROR"):
+            execucoes = executar_pendentes("no-1")
+
+        self.assertEqual(self.chamadas, 1)
+        resultados = {e.tarefa.nome: (e.sucesso, e.resultado) for e in execucoes}
+        self.assertEqual(resultados["teste.contar"], (True, "feito"))
+        self.assertEqual(resultados["teste.falhar"], (False, "RuntimeError: sem conexão"))
+        for linha in TarefaAgendada.objects.all():
+            self.assertGreater(linha.proxima_execucao, timezone.now())
+            self.assertEqual(linha.bloqueado_por, "")
+
+        # Nada vencido: uma nova passada não executa nada
+        self.assertEqual(executar_pendentes("no-1"), [])
+        self.assertEqual(ExecucaoTarefa.objects.count(), 2)
+
+    def test_concessao_exclusiva_entre_nos(self):
+        linha = sincronizar_tarefas()["teste.contar"]
+        agora = linha.proxima_execucao + datetime.timedelta(seconds=1)
+
+        self.assertTrue(adquirir_concessao(linha, "no-1", 60, agora))
+        self.assertFalse(adquirir_concessao(linha, "no-2", 60, agora))
+        # Concessão expirada (nó caiu): outro nó pode assumir
+        self.assertTrue(
+            adquirir_concessao(linha, "no-2", 60, agora + datetime.timedelta(seconds=61))
+        )
+
+    def test_comando_uma_vez(self):
+        sincronizar_tarefas()
+        TarefaAgendada.objects.filter(nome="teste.contar").update(
+            proxima_execucao=timezone.now() - datetime.timedelta(minutes=1)
+        )
+        saida = StringIO()
+        with mock.patch(
+            "agendador.management.commands.run_scheduler.tarefas_registradas",
+            return_value=self.registradas,
+        ):
+            call_command("run_scheduler", "--uma-vez", stdout=saida)
+        self.assertIn("teste.contar", saida.getvalue())
+        self.assertEqual(self.chamadas, 1)
+
+
+class TarefasDeManutencaoTest(TestCase):
+    def test_tarefas_registradas_pelos_apps(self):
+        tarefas = tarefas_registradas()
+        for nome in ("documentos.marcar_atrasados", "usuarios.limpar_logs", "agendador.limpar_historico"):
+            self.assertIn(nome, tarefas)
+
+    def test_limpar_logs_atividade(self):
+        from usuarios.models import LogAtividade  # pylint: disable=import-outside-toplevel
+
+        antigo = LogAtividade.objects.create(acao="Teste", detalhes="antigo")
+        LogAtividade.objects.filter(pk=antigo.pk).update(
+            data_hora=timezone.now() - datetime.timedelta(days=400)
+        )
+        recente = LogAtividade.objects.create(acao="Teste", detalhes="recente")
+
+        resultado = tarefas_registradas()["usuarios.limpar_logs"].funcao()
+
+        self.assertEqual(resultado, "1 log(s) removido(s)")
+        self.assertEqual(list(LogAtividade.objects.values_list("pk", flat=True)), [recente.pk])
+
+
+class PainelTarefasTest(TestCase):
+    def test_acesso_restrito_a_administradores(self):
+        User.objects.create_user("comum", password="senha123")
+        self.client.login(username="comum", password="senha123")
+        self.assertRedirects(
+            self.client.get(reverse("agendador:painel")), reverse("home"), fetch_redirect_response=False
+        )
+
+        User.objects.create_user("admin2", password="senha123", is_staff=True)
+        self.client.login(username="admin2", password="senha123")
+        resposta = self.client.get(reverse("agendador:painel"))
+        self.assertEqual(resposta.status_code, 200)
+        self.assertContains(resposta, "Tarefas Agendadas")
+
+
+class BackupTest(TestCase):
+    def setUp(self):
+        self.destino = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.destino)
+        self.usuario = User.objects.create_user("operador", password="senha123")
+        self.fornecedor = Fornecedor.objects.create(
+            nome="Fornecedor Teste", cnpj_cpf="12345678901", tipo="PF"
+        )
+        self.documento = Documento.objects.create(
+            fornecedor=self.fornecedor,
+            numero="0001",
+            tipo="REC",
+            data_documento=date(2024, 1, 1),
+            valor_documento=Decimal("100.00"),
+            valor_liquido=Decimal("100.00"),
+        )
+
+    def test_backup_incremental_e_restauracao_da_cadeia(self):
+        completo = criar_backup(self.destino, incremental=True, tamanho_bloco=1)
+        manifesto = ler_manifesto(completo)
+        self.assertEqual(manifesto["tipo"], "completo")
+        self.assertEqual(manifesto["modelos"]["documentos.documento"]["linhas"], 1)
+        self.assertNotIn("sessions.session", manifesto["modelos"])
+
+        self.documento.status = "PAG"
+        self.documento.data_pagamento = date(2024, 1, 10)
+        self.documento.salvar_campos("status")
+        outro = Documento.objects.create(
+            fornecedor=self.fornecedor,
+            numero="0002",
+            tipo="REC",
+            data_documento=date(2024, 1, 2),
+            valor_documento=Decimal("50.00"),
+            valor_liquido=Decimal("50.00"),
+        )
+
+        incremental = criar_backup(self.destino, incremental=True)
+        manifesto = ler_manifesto(incremental)
+        self.assertEqual(manifesto["tipo"], "incremental")
+        self.assertEqual(manifesto["base"], completo.name)
+        self.assertEqual(manifesto["modelos"]["documentos.documento"]["linhas"], 2)
+        self.assertEqual(manifesto["modelos"]["fornecedores.fornecedor"]["linhas"], 0)
+
+        Documento.objects.all().delete()
+        Fornecedor.objects.all().delete()
+        User.objects.all().delete()
+
+        saida = StringIO()
+        call_command("restaurar_dados", str(incremental), stdout=saida)
+        self.assertIn(f"Aplicando {completo.name}", saida.getvalue())
+
+        self.assertEqual(
+            dict(Documento.objects.values_list("numero", "status")), {"0001": "PAG", "0002": "PEN"}
+        )
+        self.assertEqual(Documento.objects.get(pk=outro.pk).fornecedor, self.fornecedor)
+        self.assertTrue(User.objects.get(username="operador").check_password("senha123"))
+
+    def test_restauracao_recusa_arquivo_corrompido(self):
+        diretorio = criar_backup(self.destino)
+        arquivo = diretorio / ler_manifesto(diretorio)["modelos"]["documentos.documento"]["arquivo"]
+        arquivo.write_bytes(b"corrompido")
+
+        with self.assertRaises(CommandError):
+            call_command("restaurar_dados", str(diretorio), stdout=StringIO())
+        self.assertEqual(Documento.objects.count(), 1)
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from . import views
+
+app_name = "agendador"
+
+urlpatterns = [
+    path("", views.painel_tarefas, name="painel"),
+]
@@ -0,0 +1,38 @@
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.db.models import Avg, Count, Max, Q
+from django.shortcuts import redirect, render
+
+from .models import ExecucaoTarefa, TarefaAgendada
+
+
+@login_required
+def painel_tarefas(request):
+    """Painel (somente administradores) com as tarefas agendadas e suas durações."""
+    if not request.user.is_staff:
+        messages.error(request, "Você não tem permissão para acessar esta página.")
+        return redirect("home")
+
+    # Estatísticas de todas as tarefas em uma única consulta agrupada
+    estatisticas = {
+        item["tarefa_id"]: item
+        for item in ExecucaoTarefa.objects.order_by()  # pylint: disable=no-member
+        .values("tarefa_id")
+        .annotate(
+            execucoes=Count("id"),
+            falhas=Count("id", filter=Q(sucesso=False)),
+            duracao_media=Avg("duracao"),
+            duracao_maxima=Max("duracao"),
+        )
+    }
+    tarefas = list(TarefaAgendada.objects.all())  # pylint: disable=no-member
+    for tarefa in tarefas:
+        tarefa.estatisticas = estatisticas.get(tarefa.pk, {})
+
+    execucoes = ExecucaoTarefa.objects.select_related("tarefa")[:50]  # pylint: disable=no-member
+
+    context = {
+        "tarefas": tarefas,
+        "execucoes": execucoes,
+    }
+    return render(request, "agendador/painel.html", context)
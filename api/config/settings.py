@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 
 import dj_database_url
@@ -82,6 +83,7 @@ INSTALLED_APPS = [
     "fornecedores",
     "documentos",
     "relatorios",
+    "agendador",
 ]
 
 MIDDLEWARE = [
@@ -90,6 +92,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "utils.replica.FixarPrimarioMiddleware",
     "usuarios.middleware.RequireLoginMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
@@ -148,10 +151,38 @@ WSGI_APPLICATION = "api.config.wsgi.application"
 
 # Banco de dados com fallback seguro: PostgreSQL via DATABASE_URL, senão SQLite
 DATABASE_URL = config('DATABASE_URL', default=None)
+# Pool de conexões do psycopg 3 (utils.banco): cada processo mantém entre
+# DB_POOL_MIN e DB_POOL_MAX conexões, verificadas antes de cada uso. Com
+# DB_POOL=False, volta à conexão persistente por processo (CONN_MAX_AGE).
+DB_POOL = config("DB_POOL", default=True, cast=bool)
+# Consultas quentes dos relatórios como statements preparados no servidor;
+# desligue atrás de um pooler em modo transação (ex.: PgBouncer antigo)
+DB_PREPARAR = config("DB_PREPARAR", default=True, cast=bool)
+
+
+def _banco(url):
+    """Configuração de um banco a partir da URL, com o pool quando PostgreSQL."""
+    banco = dj_database_url.parse(url, conn_health_checks=True)
+    if DB_POOL and banco["ENGINE"] == "django.db.backends.postgresql":
+        banco["CONN_MAX_AGE"] = 0  # o pool gerencia as conexões
+        banco.setdefault("OPTIONS", {})["pool"] = {
+            "min_size": config("DB_POOL_MIN", default=1, cast=int),
+            "max_size": config("DB_POOL_MAX", default=4, cast=int),
+            # Espera máxima por uma conexão livre, em segundos
+            "timeout": config("DB_POOL_TIMEOUT", default=10, cast=float),
+            # Conexões ociosas além do mínimo e conexões antigas são renovadas
+            "max_idle": config("DB_POOL_MAX_IDLE", default=300, cast=float),
+            "max_lifetime": config("DB_POOL_MAX_LIFETIME", default=3600, cast=float),
+        }
+        if DB_PREPARAR:
+            banco["OPTIONS"]["prepare_threshold"] = 0
+    else:
+        banco["CONN_MAX_AGE"] = 600
+    return banco
+
+
 if DATABASE_URL:
-    DATABASES = {
-        'default': dj_database_url.parse(DATABASE_URL, conn_max_age=600)
-    }
+    DATABASES = {'default': _banco(DATABASE_URL)}
 else:
     DATABASES = {
         'default': {
@@ -160,6 +191,19 @@ else:
         }
     }
 
+# Réplica de leitura (utils.replica): relatórios, exportações e o dashboard
+# leem dela; após um POST, a sessão fica fixada no primário por
+# REPLICA_FIXACAO_SEGUNDOS para o usuário ver o que acabou de gravar.
+# Nos testes, espelha o banco padrão.
+DATABASE_REPLICA_URL = config("DATABASE_REPLICA_URL", default=None)
+if DATABASE_REPLICA_URL:
+    DATABASES["replica"] = {
+        **_banco(DATABASE_REPLICA_URL),
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_ROUTERS = ["utils.replica.RoteadorReplica"]
+REPLICA_FIXACAO_SEGUNDOS = config("REPLICA_FIXACAO_SEGUNDOS", default=10, cast=int)
+
 # Garantir transações por request para integridade ao usar PostgreSQL
 DATABASES['default']['ATOMIC_REQUESTS'] = True
 
@@ -213,10 +257,37 @@ DATE_INPUT_FORMATS = ["%d/%m/%Y"]
 STATIC_URL = "/static/"
 STATICFILES_DIRS = [os.path.join(BASE_DIR, "static")]
 
+# collectstatic: hash do conteúdo no nome, imagens redimensionadas e versões .gz/.br
+# (utils.estaticos); em produção, STATIC_ROOT é servido por utils.wsgi_estaticos
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "utils.estaticos.ArmazenamentoEstatico"},
+}
+
 # Media files
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Planilhas exportadas, entregues por utils.downloads e removidas pela tarefa
+# relatorios.limpar_exportacoes depois de EXPORTACOES_RETENCAO_HORAS. O padrão
+# fica na pasta temporária do sistema, a única gravável em hospedagens com o
+# projeto somente leitura (Vercel); com o nginx, aponte para a pasta do alias
+# /_protegido/exportacoes/
+EXPORTACOES_ROOT = config(
+    "EXPORTACOES_ROOT", default=os.path.join(tempfile.gettempdir(), "docfinance_exportacoes")
+)
+EXPORTACOES_RETENCAO_HORAS = config("EXPORTACOES_RETENCAO_HORAS", default=6, cast=int)
+
+# Envio de arquivos protegidos (utils.downloads): "x-accel-redirect" (nginx),
+# "x-sendfile" (Apache/lighttpd) ou vazio para o Django enviar (desenvolvimento).
+# Com o nginx, cada pasta precisa de uma location "internal" com o prefixo abaixo
+# (deploy/nginx/docfinance.conf).
+DOWNLOAD_ENVIO = config("DOWNLOAD_ENVIO", default="")
+DOWNLOAD_LOCAIS_INTERNOS = {
+    str(MEDIA_ROOT): "/_protegido/media/",
+    EXPORTACOES_ROOT: "/_protegido/exportacoes/",
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -236,10 +307,54 @@ EMAIL_USE_TLS = config("EMAIL_USE_TLS", default=True, cast=bool)
 EMAIL_HOST_USER = config("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = config("DEFAULT_FROM_EMAIL")
+# Segundos de espera pelo servidor SMTP (o envio roda fora dos requests:
+# usuarios.emails)
+EMAIL_TIMEOUT = config("EMAIL_TIMEOUT", default=30, cast=int)
 
 # Para desenvolvimento, você pode usar o backend de console:
 
 
+# Cache (relatórios, PDFs, versão do painel SSE). O padrão é a tabela do banco
+# (criada por ``manage.py createcachetable``), compartilhada por todos os
+# processos e instâncias; Redis também serve. Evite LocMemCache fora dos
+# testes: cada processo teria a sua cópia e as invalidações não se propagariam.
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.db.DatabaseCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", default="docfinance_cache"),
+    }
+}
+
+# Dashboard ao vivo (relatorios.painel): intervalo, em segundos, do ping SSE e
+# da conferência de alterações feitas em outros processos
+PAINEL_SSE_INTERVALO = config("PAINEL_SSE_INTERVALO", default=15, cast=int)
+
+# PDFs gerados no servidor (utils.pdf): tamanho do pool de processos e quantidade
+# mínima de documentos a desenhar para usar o pool (abaixo disso, desenha no próprio processo)
+PDF_PROCESSOS = config("PDF_PROCESSOS", default=min(4, os.cpu_count() or 1), cast=int)
+PDF_MINIMO_PARALELO = config("PDF_MINIMO_PARALELO", default=8, cast=int)
+
+# Documentos pendentes há mais dias que o prazo são marcados como atrasados (ATR)
+DOCUMENTO_PRAZO_PAGAMENTO_DIAS = config("DOCUMENTO_PRAZO_PAGAMENTO_DIAS", default=30, cast=int)
+
+# Dias máximos em cada etapa antes de o documento ser considerado parado (BAIXA é a etapa final)
+DOCUMENTO_PRAZOS_ETAPA_DIAS = {
+    "ABERTURA": config("PRAZO_ETAPA_ABERTURA_DIAS", default=5, cast=int),
+    "CONTROLE_INTERNO": config("PRAZO_ETAPA_CONTROLE_INTERNO_DIAS", default=10, cast=int),
+    "EMPENHO": config("PRAZO_ETAPA_EMPENHO_DIAS", default=10, cast=int),
+    "PAGAMENTO": config("PRAZO_ETAPA_PAGAMENTO_DIAS", default=15, cast=int),
+}
+
+# Endereço público do sistema, usado nos links dos e-mails automáticos (ex.: https://docfinance.exemplo.gov.br)
+SITE_URL = config("SITE_URL", default="")
+
+# Retenção dos registros removidos pelas tarefas de manutenção (manage.py run_scheduler)
+LOG_ATIVIDADE_RETENCAO_DIAS = config("LOG_ATIVIDADE_RETENCAO_DIAS", default=365, cast=int)
+AGENDADOR_RETENCAO_DIAS = config("AGENDADOR_RETENCAO_DIAS", default=90, cast=int)
+
+
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 
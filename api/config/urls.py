@@ -1,20 +1,24 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from utils.downloads import servir_media
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("usuarios.urls")),
     path("documentos/", include("documentos.urls")),
     path("relatorios/", include("relatorios.urls", namespace="relatorios")),
     path("fornecedores/", include("fornecedores.urls")),
+    path("agendador/", include("agendador.urls", namespace="agendador")),
 ]
 
 # if settings.DEBUG:
 #     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 #     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
-# Adicionando URLs para arquivos estáticos
-urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Arquivos estáticos: runserver (DEBUG) ou utils.wsgi_estaticos (api/config/wsgi.py).
+# Media: apenas para usuários autenticados, com o envio delegado ao nginx (utils.downloads)
+urlpatterns += [
+    path(f"{settings.MEDIA_URL.strip('/')}/<path:caminho>", servir_media, name="media"),
+]
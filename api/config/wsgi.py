@@ -13,5 +13,8 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api.config.settings")
 
-application = get_wsgi_application()
+# Arquivos estáticos são servidos antes do Django (sendfile, .br/.gz, ETag e Range)
+from utils.wsgi_estaticos import ServidorEstaticos  # noqa: E402
+
+application = ServidorEstaticos(get_wsgi_application())
 app = application
@@ -8,10 +8,22 @@ echo "🚀 Iniciando processo de build do Django..."
 echo "📦 Instalando dependências..."
 pip3 install -r requirements.txt
 
+echo "🖼️ Otimizando imagens do login..."
+python3 manage.py optimize_images
+
 echo "🗂️ Coletando arquivos estáticos..."
 python3 manage.py collectstatic --noinput
 
+echo "⚡ Pré-compilando o bytecode Python..."
+# checked-hash: o .pyc vale pelo conteúdo do fonte, não pela data de modificação
+# (que muda ao empacotar a função); cada instância fria não recompila o projeto
+python3 -m compileall -q -j 0 --invalidation-mode checked-hash \
+    -x '/(node_modules|staticfiles|staticfiles_build|media|\.git)/' .
+
 echo "🛠️ Aplicando migrações..."
 python3 manage.py migrate
 
+echo "🗄️ Criando a tabela de cache..."
+python3 manage.py createcachetable
+
 echo "✅ Build finalizado com sucesso!"
@@ -139,7 +139,8 @@ SYS_DUR="$(( $(date +%s) - SYS_TS ))"
 
 MIG_TS="$(date +%s)"
 MIG_OK=0
-if ${SUDO} ${COMPOSE} exec -T backend python manage.py migrate --noinput; then
+if ${SUDO} ${COMPOSE} exec -T backend python manage.py migrate --noinput \
+  && ${SUDO} ${COMPOSE} exec -T backend python manage.py createcachetable; then
   MIG_OK=1
 else
   HAS_ERROR=1
@@ -148,7 +149,8 @@ MIG_DUR="$(( $(date +%s) - MIG_TS ))"
 
 COL_TS="$(date +%s)"
 COL_OK=0
-if ${SUDO} ${COMPOSE} exec -T backend python manage.py collectstatic --noinput; then
+if ${SUDO} ${COMPOSE} exec -T backend python manage.py optimize_images \
+  && ${SUDO} ${COMPOSE} exec -T backend python manage.py collectstatic --noinput; then
   COL_OK=1
 else
   WARN_ON=1
@@ -1,4 +1,10 @@
 #!/bin/sh
+# Backups diários em ./backups:
+# - pg_dump (formato custom e SQL): mantém os 3 mais recentes de cada;
+# - backup da aplicação em ./backups/app (JSONL.gz por modelo + manifest.json,
+#   ver agendador/backup.py): completo aos domingos, incremental nos demais
+#   dias; diretórios com mais de 35 dias (-mtime +35) são removidos, mantendo
+#   ao menos quatro semanas de cadeias completo -> incrementais restauráveis.
 set -e
 STAMP=$(date +%Y-%m-%d_%H%M)
 DIR="$(pwd)/backups"
@@ -6,7 +12,10 @@ mkdir -p "$DIR"
 docker exec docfinance-postgres sh -lc "pg_dump -U docfinance -d docfinance -Fc -Z 9 -f /tmp/docfinance_${STAMP}.dump && pg_dump -U docfinance -d docfinance -f /tmp/docfinance_${STAMP}.sql"
 docker cp docfinance-postgres:/tmp/docfinance_${STAMP}.dump "$DIR/docfinance_${STAMP}.dump"
 docker cp docfinance-postgres:/tmp/docfinance_${STAMP}.sql "$DIR/docfinance_${STAMP}.sql"
-docker compose exec -T backend python manage.py dumpdata --natural-foreign --natural-primary --indent 2 --output "$DIR/backup_fixture_${STAMP}.json"
+# Backup da aplicação (JSONL compactado por modelo): completo aos domingos, incremental nos demais dias
+MODO="--incremental"
+[ "$(date +%u)" = "7" ] && MODO=""
+docker compose exec -T backend python manage.py backup_dados /app/backups/app $MODO
 ls -t "$DIR"/docfinance_*.dump | tail -n +4 | xargs -r rm -f
 ls -t "$DIR"/docfinance_*.sql | tail -n +4 | xargs -r rm -f
-ls -t "$DIR"/backup_fixture_*.json | tail -n +4 | xargs -r rm -f
+find "$DIR/app" -mindepth 1 -maxdepth 1 -name 'docfinance_*' -mtime +35 -exec rm -rf {} +
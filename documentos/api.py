@@ -1,9 +1,13 @@
+from django.db import transaction
 from django.http import JsonResponse
 
 from .models import Fornecedor, Recurso
 
 
-def buscar_fornecedor_por_cnpj_cpf(request):
+# Consultas curtas, assíncronas: sob ASGI não ocupam um worker enquanto
+# esperam o banco (ATOMIC_REQUESTS não se aplica a views async)
+@transaction.non_atomic_requests
+async def buscar_fornecedor_por_cnpj_cpf(request):
     """
     Pesquisar um fornecedor (fornecedor) pelo número do CPF ou CNPJ.
 
@@ -22,7 +26,7 @@ def buscar_fornecedor_por_cnpj_cpf(request):
     cnpj_cpf = "".join(filter(str.isdigit, cnpj_cpf))
 
     try:
-        fornecedor = Fornecedor.objects.get(cnpj_cpf=cnpj_cpf)
+        fornecedor = await Fornecedor.objects.aget(cnpj_cpf=cnpj_cpf)
         return JsonResponse(
             {
                 "id": fornecedor.id,
@@ -34,11 +38,12 @@ def buscar_fornecedor_por_cnpj_cpf(request):
         return JsonResponse({"error": "Fornecedor não encontrado"})
 
 
-def recursos_por_secretaria(request, secretaria_id):
+@transaction.non_atomic_requests
+async def recursos_por_secretaria(request, secretaria_id):
     """Retorna recursos (id, nome) de uma secretaria específica em JSON."""
     recursos = (
         Recurso.objects.filter(secretaria_id=secretaria_id)
         .order_by("nome")
         .values("id", "nome")
     )
-    return JsonResponse({"recursos": list(recursos)})
+    return JsonResponse({"recursos": [recurso async for recurso in recursos]})
@@ -0,0 +1,322 @@
+"""Arquivamento de exercícios fechados (armazenamento quente/frio).
+
+Ao fechar um exercício, os documentos do ano e seus históricos são movidos de
+``Documento``/``HistoricoDocumento`` para ``DocumentoArquivado``/
+``HistoricoDocumentoArquivado`` com INSERT ... SELECT, mantendo os ids. A tabela
+ativa fica restrita aos exercícios abertos.
+
+``ConsultaCombinada`` é a camada de consulta dos relatórios: consulta apenas a
+tabela ativa e inclui o arquivo somente quando o período pedido alcança um
+exercício fechado.
+"""
+
+import copy
+import datetime
+import heapq
+import logging
+from itertools import chain, islice
+
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min, Sum
+from django.utils import timezone
+
+from relatorios.cache import invalidar as invalidar_cache_relatorios
+from usuarios.models import LogAtividade
+
+from .models import (
+    Documento,
+    DocumentoArquivado,
+    ExercicioFechado,
+    HistoricoDocumento,
+    HistoricoDocumentoArquivado,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ArquivamentoError(Exception):
+    """Operação de fechamento ou reabertura de exercício não permitida."""
+
+
+def _como_data(valor):
+    if isinstance(valor, datetime.datetime):
+        return valor.date()
+    return valor or None
+
+
+def alcanca_arquivo(data_inicio=None, data_fim=None):
+    """Indica se o período informado inclui algum exercício fechado."""
+    fechados = ExercicioFechado.objects.all()  # pylint: disable=no-member
+    if data_inicio:
+        fechados = fechados.filter(ano__gte=data_inicio.year)
+    if data_fim:
+        fechados = fechados.filter(ano__lte=data_fim.year)
+    return fechados.exists()
+
+
+def _combinar(expressao, valores):
+    """Combina os resultados de uma agregação calculada em cada tabela."""
+    valores = [valor for valor in valores if valor is not None]
+    if not valores:
+        return None
+    if isinstance(expressao, (Sum, Count)):
+        return sum(valores)
+    if isinstance(expressao, Min):
+        return min(valores)
+    if isinstance(expressao, Max):
+        return max(valores)
+    raise TypeError(f"Agregação não combinável entre tabela ativa e arquivo: {expressao!r}")
+
+
+def _valor(objeto, caminho):
+    for parte in caminho.split("__"):
+        objeto = getattr(objeto, parte, None) if objeto is not None else None
+    return objeto
+
+
+def _chave_ordenacao(objeto, campos):
+    # Nulos por último, como no PostgreSQL em ordem crescente
+    chave = []
+    for campo in campos:
+        valor = _valor(objeto, campo)
+        chave.append((valor is None, valor if valor is not None else 0))
+    return tuple(chave)
+
+
+class ConsultaCombinada:
+    """Consulta de documentos que inclui o arquivo apenas quando necessário.
+
+    Aceita o subconjunto da API de QuerySet usado pelos relatórios (filter,
+    exclude, select_related, annotate, order_by, count, exists, aggregate,
+    iteração e fatiamento) e ``agrupar`` para agrupamentos com totais. Os
+    objetos do arquivo são instâncias de ``DocumentoArquivado``, que possui os
+    mesmos campos de ``Documento``.
+    """
+
+    def __init__(self, data_inicio=None, data_fim=None):
+        self.data_inicio = _como_data(data_inicio)
+        self.data_fim = _como_data(data_fim)
+
+        filtros = {}
+        if self.data_inicio:
+            filtros["data_documento__gte"] = self.data_inicio
+        if self.data_fim:
+            filtros["data_documento__lte"] = self.data_fim
+
+        self._querysets = [Documento.objects.filter(**filtros)]  # pylint: disable=no-member
+        if alcanca_arquivo(self.data_inicio, self.data_fim):
+            self._querysets.append(
+                DocumentoArquivado.objects.filter(**filtros)  # pylint: disable=no-member
+            )
+        self._ordenacao = ()
+
+    @property
+    def inclui_arquivo(self):
+        return len(self._querysets) > 1
+
+    @property
+    def querysets(self):
+        """QuerySets consultados (tabela ativa e, se for o caso, arquivo)."""
+        return list(self._querysets)
+
+    def _aplicar(self, metodo, *args, **kwargs):
+        clone = copy.copy(self)
+        clone._querysets = [getattr(qs, metodo)(*args, **kwargs) for qs in self._querysets]
+        return clone
+
+    def filter(self, *args, **kwargs):
+        return self._aplicar("filter", *args, **kwargs)
+
+    def exclude(self, *args, **kwargs):
+        return self._aplicar("exclude", *args, **kwargs)
+
+    def select_related(self, *campos):
+        return self._aplicar("select_related", *campos)
+
+    def annotate(self, *args, **kwargs):
+        return self._aplicar("annotate", *args, **kwargs)
+
+    def order_by(self, *campos):
+        clone = self._aplicar("order_by", *campos)
+        clone._ordenacao = campos
+        return clone
+
+    @property
+    def ordered(self):
+        return all(qs.ordered for qs in self._querysets)
+
+    def count(self):
+        return sum(qs.count() for qs in self._querysets)
+
+    def exists(self):
+        return any(qs.exists() for qs in self._querysets)
+
+    def __bool__(self):
+        return self.exists()
+
+    def __len__(self):
+        return self.count()
+
+    def aggregate(self, **agregacoes):
+        """Calcula as agregações em cada tabela e combina (Sum, Count, Min e Max)."""
+        if not self.inclui_arquivo:
+            return self._querysets[0].aggregate(**agregacoes)
+        resultados = [qs.aggregate(**agregacoes) for qs in self._querysets]
+        return {
+            nome: _combinar(expressao, [resultado[nome] for resultado in resultados])
+            for nome, expressao in agregacoes.items()
+        }
+
+    def agrupar(self, *campos, **agregacoes):
+        """Agrupa por ``campos`` com as agregações informadas (equivale a values().annotate()).
+
+        Returns:
+            list[dict]: Um dicionário por grupo, ordenado pelos campos (nulos por último).
+        """
+        grupos = {}
+        for qs in self._querysets:
+            for linha in qs.values(*campos).annotate(**agregacoes).order_by():
+                chave = tuple(linha[campo] for campo in campos)
+                if chave not in grupos:
+                    grupos[chave] = linha
+                    continue
+                for nome, expressao in agregacoes.items():
+                    grupos[chave][nome] = _combinar(expressao, [grupos[chave][nome], linha[nome]])
+        return [
+            grupos[chave]
+            for chave in sorted(grupos, key=lambda c: tuple((v is None, v if v is not None else 0) for v in c))
+        ]
+
+    def _mesclar(self, iteraveis):
+        if not self._ordenacao:
+            return chain.from_iterable(iteraveis)
+        campos = [campo.lstrip("-") for campo in self._ordenacao]
+        decrescente = {campo.startswith("-") for campo in self._ordenacao}
+        if len(decrescente) == 1:
+            # Cada tabela já vem ordenada pelo banco: basta intercalar
+            return heapq.merge(
+                *iteraveis,
+                key=lambda objeto: _chave_ordenacao(objeto, campos),
+                reverse=decrescente.pop(),
+            )
+        objetos = list(chain.from_iterable(iteraveis))
+        for campo in reversed(self._ordenacao):
+            nome = campo.lstrip("-")
+            objetos.sort(
+                key=lambda objeto, nome=nome: _chave_ordenacao(objeto, [nome]),
+                reverse=campo.startswith("-"),
+            )
+        return iter(objetos)
+
+    def __iter__(self):
+        if not self.inclui_arquivo:
+            return iter(self._querysets[0])
+        return self._mesclar(self._querysets)
+
+    def __getitem__(self, indice):
+        if not self.inclui_arquivo:
+            return self._querysets[0][indice]
+        if isinstance(indice, slice):
+            if indice.stop is None:
+                return list(islice(iter(self), indice.start, None, indice.step))
+            # Cada tabela contribui no máximo com ``stop`` linhas para a fatia
+            partes = [qs[: indice.stop] for qs in self._querysets]
+            return list(islice(self._mesclar(partes), indice.start, indice.stop, indice.step))
+        try:
+            return self[indice : indice + 1][0]
+        except IndexError as e:
+            raise IndexError("Índice fora do intervalo da consulta") from e
+
+
+def _copiar(queryset, destino):
+    """Copia as linhas de ``queryset`` para a tabela de ``destino`` com INSERT ... SELECT."""
+    campos = destino._meta.concrete_fields
+    select_sql, params = (
+        queryset.order_by().values_list(*(campo.attname for campo in campos)).query.sql_with_params()
+    )
+    colunas = ", ".join(connection.ops.quote_name(campo.column) for campo in campos)
+    tabela = connection.ops.quote_name(destino._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {tabela} ({colunas}) {select_sql}", params)
+        return cursor.rowcount
+
+
+def _periodo(ano):
+    return {"data_documento__gte": datetime.date(ano, 1, 1), "data_documento__lt": datetime.date(ano + 1, 1, 1)}
+
+
+def _mover(ano, documento_origem, historico_origem, documento_destino, historico_destino):
+    """Move os documentos do ano (e seus históricos) entre tabela ativa e arquivo."""
+    documentos = documento_origem.objects.filter(**_periodo(ano))
+    historicos = historico_origem.objects.filter(
+        **{f"documento__{campo}": valor for campo, valor in _periodo(ano).items()}
+    )
+
+    total = _copiar(documentos, documento_destino)
+    _copiar(historicos, historico_destino)
+    # Exclusão direta (sem signals nem coleta em memória): as linhas já foram copiadas
+    historicos._raw_delete(historicos.db)  # pylint: disable=protected-access
+    documentos._raw_delete(documentos.db)  # pylint: disable=protected-access
+    return total
+
+
+def arquivar_exercicio(ano, usuario=None, forcar=False):
+    """Fecha o exercício ``ano``, movendo seus documentos para o arquivo.
+
+    Args:
+        ano: Ano do exercício (deve ser anterior ao ano atual).
+        usuario: Usuário responsável, registrado no log de atividade.
+        forcar: Arquiva mesmo que existam documentos não pagos no exercício.
+
+    Returns:
+        int: Quantidade de documentos arquivados.
+
+    Raises:
+        ArquivamentoError: Exercício corrente, já fechado ou com pendências.
+    """
+    if ano >= timezone.localdate().year:
+        raise ArquivamentoError("Só é possível fechar exercícios anteriores ao atual.")
+
+    with transaction.atomic():
+        if ExercicioFechado.objects.filter(ano=ano).exists():  # pylint: disable=no-member
+            raise ArquivamentoError(f"O exercício {ano} já está fechado.")
+        pendentes = Documento.objects.filter(**_periodo(ano)).exclude(status="PAG").count()  # pylint: disable=no-member
+        if pendentes and not forcar:
+            raise ArquivamentoError(
+                f"O exercício {ano} possui {pendentes} documento(s) não pago(s)."
+            )
+
+        total = _mover(ano, Documento, HistoricoDocumento, DocumentoArquivado, HistoricoDocumentoArquivado)
+        ExercicioFechado.objects.create(ano=ano, fechado_por=usuario, documentos=total)  # pylint: disable=no-member
+        LogAtividade.objects.create(  # pylint: disable=no-member
+            usuario=usuario,
+            acao="Fechamento de Exercício",
+            detalhes=f"Exercício {ano} fechado: {total} documento(s) arquivado(s)",
+        )
+
+    invalidar_cache_relatorios()
+    logger.info("Exercício %s fechado: %s documento(s) arquivado(s)", ano, total)
+    return total
+
+
+def reabrir_exercicio(ano, usuario=None):
+    """Reabre o exercício ``ano``, devolvendo seus documentos à tabela ativa.
+
+    Returns:
+        int: Quantidade de documentos restaurados.
+    """
+    with transaction.atomic():
+        apagados, _ = ExercicioFechado.objects.filter(ano=ano).delete()  # pylint: disable=no-member
+        if not apagados:
+            raise ArquivamentoError(f"O exercício {ano} não está fechado.")
+
+        total = _mover(ano, DocumentoArquivado, HistoricoDocumentoArquivado, Documento, HistoricoDocumento)
+        LogAtividade.objects.create(  # pylint: disable=no-member
+            usuario=usuario,
+            acao="Reabertura de Exercício",
+            detalhes=f"Exercício {ano} reaberto: {total} documento(s) restaurado(s)",
+        )
+
+    invalidar_cache_relatorios()
+    logger.info("Exercício %s reaberto: %s documento(s) restaurado(s)", ano, total)
+    return total
@@ -0,0 +1,89 @@
+"""Marcação automática de documentos atrasados.
+
+Documentos pendentes (PEN) cuja data do documento ultrapassou o prazo de
+pagamento (``settings.DOCUMENTO_PRAZO_PAGAMENTO_DIAS``) passam para o status
+atrasado (ATR) com um único UPDATE. Os registros de auditoria são gravados em
+lote e os relatórios em cache são invalidados uma única vez ao final.
+"""
+
+import datetime
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from relatorios import cubo
+from relatorios.cache import invalidar as invalidar_cache_relatorios
+from usuarios.models import LogAtividade
+
+from .models import Documento
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE_LOG = 1000
+
+
+def data_limite_atraso(hoje=None, prazo_dias=None):
+    """Retorna a data a partir da qual um documento pendente está atrasado.
+
+    Documentos com ``data_documento`` anterior à data retornada estão atrasados.
+    """
+    hoje = hoje or timezone.localdate()
+    if prazo_dias is None:
+        prazo_dias = settings.DOCUMENTO_PRAZO_PAGAMENTO_DIAS
+    return hoje - datetime.timedelta(days=prazo_dias)
+
+
+def marcar_atrasados(hoje=None, prazo_dias=None, usuario=None):
+    """Marca como atrasados (ATR) os documentos pendentes fora do prazo.
+
+    Args:
+        hoje: Data de referência (padrão: data local atual).
+        prazo_dias: Prazo de pagamento em dias (padrão: configuração do sistema).
+        usuario: Usuário responsável, registrado nos logs de atividade.
+
+    Returns:
+        int: Quantidade de documentos marcados como atrasados.
+    """
+    limite = data_limite_atraso(hoje, prazo_dias)
+
+    with transaction.atomic():
+        vencidos = Documento.objects.filter(  # pylint: disable=no-member
+            status="PEN", data_documento__lt=limite
+        )
+        # Bloqueia as linhas selecionadas para que a auditoria corresponda exatamente
+        # ao que o UPDATE altera (bancos sem SELECT FOR UPDATE ignoram o bloqueio).
+        marcados = list(
+            vencidos.select_for_update(of=("self",))
+            .order_by("id")
+            .values_list("numero", "fornecedor__nome", *cubo.CAMPOS_ESTADO)
+        )
+        if not marcados:
+            return 0
+
+        total = vencidos.update(status="ATR", updated_at=timezone.now())
+        # PEN -> ATR não altera os contadores de documentos (ambos entram no total a pagar);
+        # no cubo, os documentos passam das células PEN para as ATR
+        anteriores = [dict(zip(cubo.CAMPOS_ESTADO, valores, strict=True)) for _, _, *valores in marcados]
+        cubo.aplicar_alteracoes(anteriores, [{**valores, "status": "ATR"} for valores in anteriores])
+
+        LogAtividade.objects.bulk_create(  # pylint: disable=no-member
+            (
+                LogAtividade(
+                    usuario=usuario,
+                    acao="Documento Atrasado",
+                    detalhes=(
+                        f"Documento {numero} do fornecedor {fornecedor} marcado como atrasado "
+                        f"(data do documento {data_documento:%d/%m/%Y})"
+                    ),
+                )
+                for numero, fornecedor, data_documento, *_ in marcados
+            ),
+            batch_size=TAMANHO_LOTE_LOG,
+        )
+
+    # update() não dispara signals: invalida os relatórios em cache explicitamente
+    invalidar_cache_relatorios()
+    logger.info("%s documento(s) marcado(s) como atrasado(s) (limite %s)", total, limite)
+    return total
@@ -0,0 +1,191 @@
+"""Contadores de documentos em Fornecedor, Secretaria e Recurso.
+
+Cada inclusão, alteração ou exclusão de documento gera deltas (quantidade,
+total bruto, total líquido e total a pagar) que são aplicados com um único
+UPDATE por registro afetado usando expressões ``F()``, sem ler os contadores
+antes. A data do último documento só é recalculada (por subconsulta) quando o
+documento removido era o mais recente.
+
+Os contadores incluem os documentos arquivados: fechar ou reabrir um exercício
+não os altera. ``reconciliar`` recalcula tudo a partir dos documentos.
+"""
+
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import (
+    Case,
+    Count,
+    DateField,
+    F,
+    Max,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Greatest
+from django.utils.dateparse import parse_date
+
+from fornecedores.models import Fornecedor
+
+from .arquivo import ConsultaCombinada
+from .models import Documento, DocumentoArquivado, Recurso, Secretaria
+
+logger = logging.getLogger(__name__)
+
+# Campo do documento -> modelo que guarda os contadores
+DONOS = {"fornecedor": Fornecedor, "secretaria": Secretaria, "recurso": Recurso}
+CAMPOS_ESTADO = (
+    "fornecedor_id",
+    "secretaria_id",
+    "recurso_id",
+    "valor_documento",
+    "valor_liquido",
+    "status",
+    "data_documento",
+)
+CONTADORES = ("total_documentos", "valor_total_bruto", "valor_total_liquido", "valor_pendente")
+
+
+def estado(documento, campos=CAMPOS_ESTADO):
+    """Campos do documento que afetam os contadores (ou os ``campos`` informados)."""
+    valores = {campo: getattr(documento, campo) for campo in campos}
+    if isinstance(valores["data_documento"], str):
+        valores["data_documento"] = parse_date(valores["data_documento"][:10])
+    return valores
+
+
+def estados_gravados(pks, campos=CAMPOS_ESTADO):
+    """Estado atual no banco dos documentos informados, por id."""
+    linhas = Documento.objects.filter(pk__in=pks).order_by().values_list("id", *campos)  # pylint: disable=no-member
+    return {pk: dict(zip(campos, valores, strict=True)) for pk, *valores in linhas}
+
+
+def _contribuicao(valores):
+    # Total a pagar: documentos ainda não pagos (pendentes ou atrasados)
+    pendente = valores["valor_documento"] if valores["status"] != "PAG" else Decimal("0")
+    return (1, valores["valor_documento"], valores["valor_liquido"], pendente)
+
+
+def _ultima_data(campo):
+    """Subconsulta da data do documento mais recente do dono (ativa ou arquivo)."""
+    ativa, arquivo = (
+        Subquery(
+            modelo.objects.filter(**{f"{campo}_id": OuterRef("pk")})  # pylint: disable=no-member
+            .order_by()
+            .values(f"{campo}_id")
+            .annotate(ultima=Max("data_documento"))
+            .values("ultima")
+        )
+        for modelo in (Documento, DocumentoArquivado)
+    )
+    # Greatest ignora nulos apenas no PostgreSQL: Coalesce cruzado vale em todos os bancos
+    return Greatest(Coalesce(ativa, arquivo), Coalesce(arquivo, ativa), output_field=DateField())
+
+
+def aplicar_alteracoes(removidos=(), incluidos=()):
+    """Aplica aos contadores a saída e a entrada de documentos.
+
+    Uma alteração de documento é a remoção do estado anterior e a inclusão do
+    novo (pares idênticos não geram UPDATE).
+
+    Args:
+        removidos: Estados (``estado()``) de documentos excluídos ou antes da alteração.
+        incluidos: Estados de documentos incluídos ou após a alteração.
+    """
+    # Estados podem trazer campos de outros agregados (cubo): só os dos contadores contam
+    removidos = [{campo: valores[campo] for campo in CAMPOS_ESTADO} for valores in removidos if valores]
+    incluidos = [{campo: valores[campo] for campo in CAMPOS_ESTADO} for valores in incluidos if valores]
+    for valores in list(removidos):
+        if valores in incluidos:
+            removidos.remove(valores)
+            incluidos.remove(valores)
+    if not removidos and not incluidos:
+        return
+
+    with transaction.atomic():
+        for campo, modelo in DONOS.items():
+            deltas = defaultdict(lambda: [0, Decimal("0"), Decimal("0"), Decimal("0")])
+            datas_removidas, datas_incluidas = {}, {}
+            for sinal, lista, datas in ((-1, removidos, datas_removidas), (1, incluidos, datas_incluidas)):
+                for valores in lista:
+                    dono = valores[f"{campo}_id"]
+                    if dono is None:
+                        continue
+                    for i, parcela in enumerate(_contribuicao(valores)):
+                        deltas[dono][i] += sinal * parcela
+                    datas[dono] = max(filter(None, (datas.get(dono), valores["data_documento"])))
+
+            for dono, delta in deltas.items():
+                alteracoes = {
+                    contador: F(contador) + variacao
+                    for contador, variacao in zip(CONTADORES, delta, strict=True)
+                    if variacao
+                }
+                incluida, removida = datas_incluidas.get(dono), datas_removidas.get(dono)
+                if removida and not (incluida and incluida >= removida):
+                    # O documento removido pode ser o mais recente: recalcula nesse caso
+                    alteracoes["ultimo_documento_em"] = Case(
+                        When(ultimo_documento_em__gt=removida, then=F("ultimo_documento_em")),
+                        default=_ultima_data(campo),
+                        output_field=DateField(),
+                    )
+                elif incluida and incluida != removida:
+                    alteracoes["ultimo_documento_em"] = Case(
+                        When(ultimo_documento_em__gte=incluida, then=F("ultimo_documento_em")),
+                        default=Value(incluida),
+                        output_field=DateField(),
+                    )
+                if alteracoes:
+                    modelo.objects.filter(pk=dono).update(**alteracoes)  # pylint: disable=no-member
+
+
+def reconciliar(corrigir=True):
+    """Recalcula os contadores a partir dos documentos e corrige divergências.
+
+    Args:
+        corrigir: Se False, apenas conta os registros divergentes.
+
+    Returns:
+        dict: Quantidade de registros divergentes por modelo.
+    """
+    documentos = ConsultaCombinada()
+    divergentes = {}
+    for campo, modelo in DONOS.items():
+        calculados = {
+            linha[campo]: (
+                linha["total_documentos"],
+                linha["valor_total_bruto"] or 0,
+                linha["valor_total_liquido"] or 0,
+                linha["valor_pendente"] or 0,
+                linha["ultimo_documento_em"],
+            )
+            for linha in documentos.filter(**{f"{campo}__isnull": False}).agrupar(
+                campo,
+                total_documentos=Count("id"),
+                valor_total_bruto=Sum("valor_documento"),
+                valor_total_liquido=Sum("valor_liquido"),
+                valor_pendente=Sum("valor_documento", filter=~Q(status="PAG")),
+                ultimo_documento_em=Max("data_documento"),
+            )
+        }
+        campos = (*CONTADORES, "ultimo_documento_em")
+        corrigidos = []
+        for registro in modelo.objects.only("pk", *campos).iterator(chunk_size=2000):  # pylint: disable=no-member
+            esperado = calculados.get(registro.pk, (0, 0, 0, 0, None))
+            if tuple(getattr(registro, nome) for nome in campos) != esperado:
+                for nome, valor in zip(campos, esperado, strict=True):
+                    setattr(registro, nome, valor)
+                corrigidos.append(registro)
+
+        divergentes[modelo._meta.label] = len(corrigidos)
+        if corrigir and corrigidos:
+            modelo.objects.bulk_update(corrigidos, campos, batch_size=1000)  # pylint: disable=no-member
+    if corrigir:
+        logger.info("Contadores de documentos reconciliados: %s", divergentes)
+    return divergentes
@@ -0,0 +1,94 @@
+"""Detecção de documentos em duplicidade.
+
+Cada documento recebe uma impressão digital normalizada calculada a partir de
+(fornecedor, numero_documento, valor_documento, data_documento). A impressão
+é gravada em uma coluna indexada, de modo que a verificação de duplicidade no
+cadastro e nas importações é uma busca direta no índice, e a varredura da
+tabela inteira é uma única consulta agrupada.
+"""
+
+import hashlib
+import re
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Count, Max, Min
+
+
+def normalizar_numero_documento(numero):
+    """Normaliza o número do documento para comparação.
+
+    Remove pontuação, espaços e zeros à esquerda dos trechos numéricos e
+    converte para maiúsculas, de forma que "NF-000123", "nf 123" e "NF123"
+    sejam equivalentes.
+    """
+    numero = re.sub(r"[^0-9A-Z]", "", str(numero or "").upper())
+    return re.sub(r"(?<![0-9])0+(?=[0-9])", "", numero)
+
+
+def calcular_impressao_digital(fornecedor_id, numero_documento, valor_documento, data_documento):
+    """Calcula a impressão digital de um documento.
+
+    Returns:
+        str | None: Hash SHA-1 hexadecimal, ou None quando não há fornecedor ou
+        número do documento (não é possível identificar duplicidade).
+    """
+    numero = normalizar_numero_documento(numero_documento)
+    if not fornecedor_id or not numero:
+        return None
+
+    try:
+        valor = Decimal(str(valor_documento or 0)).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        valor = Decimal("0.00")
+    data = data_documento.isoformat() if isinstance(data_documento, date) else str(data_documento or "")[:10]
+
+    base = f"{fornecedor_id}|{numero}|{valor}|{data}"
+    return hashlib.sha1(base.encode("utf-8")).hexdigest()
+
+
+def buscar_duplicado(impressao_digital, excluir_pk=None):
+    """Retorna o documento já cadastrado (ou arquivado) com a mesma impressão digital."""
+    from .models import Documento, DocumentoArquivado  # pylint: disable=import-outside-toplevel
+
+    if not impressao_digital:
+        return None
+    queryset = Documento.objects.filter(impressao_digital=impressao_digital)  # pylint: disable=no-member
+    if excluir_pk:
+        queryset = queryset.exclude(pk=excluir_pk)
+    return (
+        queryset.only("id", "numero").first()
+        or DocumentoArquivado.objects.filter(  # pylint: disable=no-member
+            impressao_digital=impressao_digital
+        ).only("id", "numero").first()
+    )
+
+
+def grupos_duplicados(queryset=None):
+    """Lista os grupos de documentos duplicados com uma única consulta agrupada.
+
+    Returns:
+        QuerySet: Dicionários com impressao_digital, quantidade, fornecedor,
+        numero_documento, valor_documento, data_documento, primeiro_id e ultimo_id.
+    """
+    from .models import Documento  # pylint: disable=import-outside-toplevel
+
+    if queryset is None:
+        queryset = Documento.objects.all()  # pylint: disable=no-member
+
+    return (
+        queryset.exclude(impressao_digital__isnull=True)
+        .order_by()
+        .values("impressao_digital")
+        .annotate(
+            quantidade=Count("id"),
+            fornecedor=Min("fornecedor__nome"),
+            numero_documento=Min("numero_documento"),
+            valor_documento=Min("valor_documento"),
+            data_documento=Min("data_documento"),
+            primeiro_id=Min("id"),
+            ultimo_id=Max("id"),
+        )
+        .filter(quantidade__gt=1)
+        .order_by("-quantidade", "fornecedor")
+    )
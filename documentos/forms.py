@@ -17,6 +17,7 @@ from django import forms
 import re
 from django.forms.widgets import DateInput
 
+from .duplicidade import buscar_duplicado, calcular_impressao_digital
 from .models import Documento, Recurso, Secretaria
 
 
@@ -68,8 +69,26 @@ class DocumentoForm(forms.ModelForm):
     def clean(self):
         """
         Método de validação personalizado para garantir a consistência dos dados do formulário
+
+        Rejeita o cadastro de um documento já registrado para o mesmo fornecedor
+        com o mesmo número, valor e data (consulta direta ao índice de impressões).
         """
         cleaned_data = super().clean()
+
+        fornecedor = cleaned_data.get("fornecedor")
+        impressao = calcular_impressao_digital(
+            fornecedor.pk if fornecedor else None,
+            cleaned_data.get("numero_documento"),
+            cleaned_data.get("valor_documento"),
+            cleaned_data.get("data_documento"),
+        )
+        duplicado = buscar_duplicado(impressao, excluir_pk=self.instance.pk)
+        if duplicado:
+            raise forms.ValidationError(
+                "Este documento já foi cadastrado para o fornecedor com o mesmo número, "
+                f"valor e data (documento interno nº {duplicado.numero}).",
+                code="duplicado",
+            )
         return cleaned_data
 
     def save(self, commit=True):
@@ -0,0 +1,370 @@
+"""Importação em lote de NF-e/NFS-e a partir de arquivos XML.
+
+Lê pastas ou arquivos .zip contendo XMLs de notas fiscais eletrônicas,
+extrai os dados do emitente e os valores da nota e cria os documentos
+correspondentes em lote.
+
+O processamento é dividido em duas fases:
+
+1. Leitura dos XMLs (CPU): cada arquivo é lido com ``iterparse``, limpando os
+   elementos já processados para manter o consumo de memória baixo. Essa fase
+   roda em um pool de processos.
+2. Gravação (banco): fornecedores são resolvidos/criados em lote e os
+   documentos são gravados com ``bulk_create``, ignorando notas já cadastradas
+   pelo índice (fornecedor, numero_documento normalizado) e pelas impressões
+   digitais de duplicidade (ver ``documentos.duplicidade``).
+"""
+
+import datetime
+import logging
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, InvalidOperation
+from xml.etree.ElementTree import ParseError, iterparse
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from fornecedores.models import Fornecedor
+from relatorios import cubo
+from relatorios.cache import invalidar as invalidar_cache_relatorios
+from usuarios.models import LogAtividade
+
+from .contadores import aplicar_alteracoes, estado
+from .duplicidade import normalizar_numero_documento
+from .models import Documento, ExercicioFechado
+
+logger = logging.getLogger(__name__)
+
+# Sufixos de caminho (nomes locais, sem namespace) -> campo extraído.
+# Vale sempre a primeira ocorrência encontrada no arquivo.
+CAMINHOS_NFE = {
+    ("emit", "CNPJ"): "cnpj_cpf",
+    ("emit", "CPF"): "cnpj_cpf",
+    ("emit", "xNome"): "nome",
+    ("ide", "nNF"): "numero",
+    ("ide", "dhEmi"): "data",
+    ("ide", "dEmi"): "data",
+    ("ICMSTot", "vNF"): "valor_documento",
+    ("ISSQNtot", "vISSRet"): "valor_iss",
+    ("retTrib", "vIRRF"): "valor_irrf",
+}
+
+CAMINHOS_NFSE = {
+    ("IdentificacaoPrestador", "Cnpj"): "cnpj_cpf",
+    ("IdentificacaoPrestador", "CpfCnpj", "Cnpj"): "cnpj_cpf",
+    ("IdentificacaoPrestador", "CpfCnpj", "Cpf"): "cnpj_cpf",
+    ("PrestadorServico", "RazaoSocial"): "nome",
+    ("InfNfse", "Numero"): "numero",
+    ("InfNfse", "DataEmissao"): "data",
+    ("Valores", "ValorServicos"): "valor_documento",
+    ("Valores", "IssRetido"): "iss_retido",
+    ("Valores", "ValorIss"): "valor_iss_total",
+    ("Valores", "ValorIssRetido"): "valor_iss",
+    ("Valores", "ValorIr"): "valor_irrf",
+}
+
+CAMINHOS = {**CAMINHOS_NFE, **CAMINHOS_NFSE}
+PROFUNDIDADE_MAXIMA = max(len(caminho) for caminho in CAMINHOS)
+
+TAMANHO_LOTE_PADRAO = 500
+
+
+def _nome_local(tag):
+    """Remove o namespace de uma tag XML ("{ns}tag" -> "tag")."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _decimal(valor):
+    """Converte texto do XML para Decimal, retornando zero quando inválido."""
+    try:
+        return Decimal(str(valor).strip()) if valor else Decimal("0")
+    except InvalidOperation:
+        return Decimal("0")
+
+
+def ler_xml(arquivo):
+    """Extrai os dados de uma NF-e/NFS-e a partir de um arquivo XML.
+
+    Args:
+        arquivo: Caminho ou objeto de arquivo aberto em modo binário.
+
+    Returns:
+        dict: Dados brutos extraídos (cnpj_cpf, nome, numero, data, tipo e valores).
+    """
+    dados = {}
+    pilha = []
+    tipo = None
+
+    for evento, elemento in iterparse(arquivo, events=("start", "end")):
+        if evento == "start":
+            nome = _nome_local(elemento.tag)
+            pilha.append(nome)
+            if tipo is None:
+                if nome == "infNFe":
+                    tipo = "NF"
+                elif nome == "InfNfse":
+                    tipo = "NFS"
+            continue
+
+        for tamanho in range(1, min(len(pilha), PROFUNDIDADE_MAXIMA) + 1):
+            campo = CAMINHOS.get(tuple(pilha[-tamanho:]))
+            if campo and campo not in dados and elemento.text:
+                dados[campo] = elemento.text.strip()
+                break
+
+        pilha.pop()
+        # Libera o conteúdo já lido para manter a memória constante
+        elemento.clear()
+
+    dados["tipo"] = tipo
+    return dados
+
+
+def normalizar_nota(dados):
+    """Converte os dados brutos de ``ler_xml`` para os tipos do modelo Documento.
+
+    Raises:
+        ValueError: Quando faltam campos obrigatórios na nota ou a data de
+            emissão não está no formato AAAA-MM-DD.
+    """
+    cnpj_cpf = "".join(filter(str.isdigit, dados.get("cnpj_cpf") or ""))
+    numero = (dados.get("numero") or "").strip()
+    data = (dados.get("data") or "")[:10]
+
+    faltando = [
+        nome
+        for nome, valor in (
+            ("CNPJ/CPF do emitente", cnpj_cpf),
+            ("número", numero),
+            ("data de emissão", data),
+            ("tipo (NF-e/NFS-e)", dados.get("tipo")),
+        )
+        if not valor
+    ]
+    if faltando:
+        raise ValueError(f"Campos ausentes: {', '.join(faltando)}")
+    try:
+        datetime.date.fromisoformat(data)
+    except ValueError as e:
+        raise ValueError(f"Data de emissão inválida: {data}") from e
+
+    valor_iss = dados.get("valor_iss")
+    if valor_iss is None and (dados.get("iss_retido") or "").strip() in ("1", "true"):
+        valor_iss = dados.get("valor_iss_total")
+
+    return {
+        "tipo": dados["tipo"],
+        "cnpj_cpf": cnpj_cpf,
+        "nome": (dados.get("nome") or cnpj_cpf)[:200],
+        "numero_documento": numero[:50],
+        "data_documento": data,
+        "valor_documento": _decimal(dados.get("valor_documento")),
+        "valor_iss": _decimal(valor_iss),
+        "valor_irrf": _decimal(dados.get("valor_irrf")),
+    }
+
+
+def listar_origens(caminhos):
+    """Lista os XMLs a importar como tuplas (arquivo, membro_zip).
+
+    Aceita arquivos .xml, arquivos .zip e pastas (percorridas recursivamente).
+    """
+    origens = []
+    for caminho in caminhos:
+        if os.path.isdir(caminho):
+            for raiz, _, arquivos in os.walk(caminho):
+                origens.extend(
+                    listar_origens(os.path.join(raiz, nome) for nome in sorted(arquivos))
+                )
+        elif caminho.lower().endswith(".zip"):
+            with zipfile.ZipFile(caminho) as arquivo_zip:
+                origens.extend(
+                    (caminho, membro)
+                    for membro in arquivo_zip.namelist()
+                    if membro.lower().endswith(".xml")
+                )
+        elif caminho.lower().endswith(".xml"):
+            origens.append((caminho, None))
+    return origens
+
+
+def processar_origem(origem):
+    """Lê e normaliza uma origem (executado nos processos do pool)."""
+    caminho, membro = origem
+    nome = f"{caminho}:{membro}" if membro else caminho
+    try:
+        if membro:
+            with zipfile.ZipFile(caminho) as arquivo_zip, arquivo_zip.open(membro) as arquivo:
+                dados = ler_xml(arquivo)
+        else:
+            with open(caminho, "rb") as arquivo:
+                dados = ler_xml(arquivo)
+        nota = normalizar_nota(dados)
+        nota["origem"] = os.path.basename(membro or caminho)
+        return nota
+    except (OSError, ParseError, ValueError, zipfile.BadZipFile) as e:
+        return {"erro": f"{nome}: {e}"}
+
+
+def _resolver_fornecedores(notas):
+    """Obtém ou cria em lote os fornecedores das notas, indexados por CNPJ/CPF."""
+    nomes = {}
+    for nota in notas:
+        nomes.setdefault(nota["cnpj_cpf"], nota["nome"])
+
+    existentes = dict(
+        Fornecedor.objects.filter(cnpj_cpf__in=nomes).values_list("cnpj_cpf", "id")  # pylint: disable=no-member
+    )
+    novos = [
+        Fornecedor(
+            cnpj_cpf=cnpj_cpf,
+            nome=nome,
+            tipo="PF" if len(cnpj_cpf) == 11 else "PJ",
+        )
+        for cnpj_cpf, nome in nomes.items()
+        if cnpj_cpf not in existentes
+    ]
+    if novos:
+        Fornecedor.objects.bulk_create(novos, ignore_conflicts=True)  # pylint: disable=no-member
+        existentes.update(
+            Fornecedor.objects.filter(  # pylint: disable=no-member
+                cnpj_cpf__in=[f.cnpj_cpf for f in novos]
+            ).values_list("cnpj_cpf", "id")
+        )
+    return existentes, len(novos)
+
+
+def _gerador_numeros():
+    """Gera números internos sequenciais a partir de ``Documento.gerar_numero``."""
+    base = Documento.gerar_numero()
+    prefixo, sequencial = base[:-4], int(base[-4:])
+    while True:
+        yield f"{prefixo}{sequencial:04d}"
+        sequencial += 1
+
+
+def importar_notas(
+    caminhos,
+    workers=None,
+    secretaria=None,
+    recurso=None,
+    usuario=None,
+    tamanho_lote=TAMANHO_LOTE_PADRAO,
+):
+    """Importa NF-e/NFS-e de pastas, arquivos .zip ou .xml.
+
+    Args:
+        caminhos: Lista de caminhos (pastas, .zip ou .xml).
+        workers: Número de processos para leitura dos XMLs (1 desativa o pool).
+        secretaria: Secretaria atribuída aos documentos criados (opcional).
+        recurso: Recurso atribuído aos documentos criados (opcional).
+        usuario: Usuário responsável pela importação (opcional).
+        tamanho_lote: Quantidade de documentos por ``bulk_create``.
+
+    Returns:
+        dict: Resumo com lidos, criados, duplicados, fornecedores_criados e erros.
+    """
+    origens = listar_origens(caminhos)
+    resumo = {
+        "lidos": len(origens),
+        "criados": 0,
+        "duplicados": 0,
+        "fornecedores_criados": 0,
+        "erros": [],
+    }
+    if not origens:
+        return resumo
+
+    if workers == 1:
+        resultados = list(map(processar_origem, origens))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            resultados = list(executor.map(processar_origem, origens, chunksize=16))
+
+    notas = []
+    for resultado in resultados:
+        if "erro" in resultado:
+            resumo["erros"].append(resultado["erro"])
+        else:
+            notas.append(resultado)
+    if not notas:
+        return resumo
+
+    with transaction.atomic():
+        fornecedores, resumo["fornecedores_criados"] = _resolver_fornecedores(notas)
+
+        # Índices de duplicidade em memória: (fornecedor, numero_documento) e impressões
+        vistos = set()
+        impressoes = set()
+        existentes = Documento.objects.filter(  # pylint: disable=no-member
+            fornecedor_id__in=fornecedores.values(), numero_documento__isnull=False
+        ).values_list("fornecedor_id", "numero_documento", "impressao_digital")
+        for fornecedor_id, numero_documento, impressao in existentes.iterator():
+            vistos.add((fornecedor_id, normalizar_numero_documento(numero_documento)))
+            impressoes.add(impressao)
+
+        anos_fechados = set(
+            ExercicioFechado.objects.values_list("ano", flat=True)  # pylint: disable=no-member
+        )
+        numeros = _gerador_numeros()
+        documentos = []
+        for nota in notas:
+            ano = int(nota["data_documento"][:4])
+            if ano in anos_fechados:
+                resumo["erros"].append(f"{nota['origem']}: exercício {ano} fechado")
+                continue
+            fornecedor_id = fornecedores[nota["cnpj_cpf"]]
+            chave = (fornecedor_id, normalizar_numero_documento(nota["numero_documento"]))
+            if chave in vistos:
+                resumo["duplicados"] += 1
+                continue
+
+            documento = Documento(
+                fornecedor_id=fornecedor_id,
+                numero=next(numeros),
+                numero_documento=nota["numero_documento"],
+                tipo=nota["tipo"],
+                data_documento=nota["data_documento"],
+                valor_documento=nota["valor_documento"],
+                valor_iss=nota["valor_iss"],
+                valor_irrf=nota["valor_irrf"],
+                descricao=f"Importado do XML {nota['origem']}",
+                secretaria=secretaria,
+                recurso=recurso,
+            )
+            # Regras de negócio (zeragem de retenções, valor líquido, impressão) sem consultas;
+            # uma nota inválida entra nos erros sem desfazer as demais
+            try:
+                documento.aplicar_regras()
+            except (ValidationError, ValueError) as e:
+                mensagens = getattr(e, "messages", [str(e)])
+                resumo["erros"].append(f"{nota['origem']}: {'; '.join(mensagens)}")
+                continue
+            if documento.impressao_digital in impressoes:
+                resumo["duplicados"] += 1
+                continue
+            vistos.add(chave)
+            impressoes.add(documento.impressao_digital)
+            documentos.append(documento)
+
+        Documento.objects.bulk_create(documentos, batch_size=tamanho_lote)  # pylint: disable=no-member
+        resumo["criados"] = len(documentos)
+        aplicar_alteracoes(incluidos=[estado(documento) for documento in documentos])
+        cubo.aplicar_alteracoes(incluidos=[cubo.estado(documento) for documento in documentos])
+
+        LogAtividade.objects.create(  # pylint: disable=no-member
+            usuario=usuario,
+            acao="Importação de NF-e",
+            detalhes=(
+                f"{resumo['criados']} documento(s) importado(s), "
+                f"{resumo['duplicados']} duplicado(s) ignorado(s), "
+                f"{len(resumo['erros'])} erro(s)"
+            ),
+        )
+
+    # bulk_create não dispara signals: invalida os relatórios em cache explicitamente
+    invalidar_cache_relatorios()
+    logger.info("Importação de NF-e concluída: %s", resumo)
+    return resumo
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from documentos.arquivo import ArquivamentoError, arquivar_exercicio, reabrir_exercicio
+
+
+class Command(BaseCommand):
+    help = "Fecha um exercício (move os documentos do ano para o arquivo) ou o reabre."
+
+    def add_arguments(self, parser):
+        parser.add_argument("ano", type=int, help="Ano do exercício")
+        parser.add_argument(
+            "--reabrir",
+            action="store_true",
+            help="Devolve os documentos arquivados do ano para a tabela ativa",
+        )
+        parser.add_argument(
+            "--forcar",
+            action="store_true",
+            help="Fecha o exercício mesmo com documentos não pagos",
+        )
+
+    def handle(self, *args, **options):
+        ano = options["ano"]
+        try:
+            if options["reabrir"]:
+                total = reabrir_exercicio(ano)
+                mensagem = f"Exercício {ano} reaberto: {total} documento(s) restaurado(s)."
+            else:
+                total = arquivar_exercicio(ano, forcar=options["forcar"])
+                mensagem = f"Exercício {ano} fechado: {total} documento(s) arquivado(s)."
+        except ArquivamentoError as e:
+            raise CommandError(str(e)) from e
+
+        self.stdout.write(self.style.SUCCESS(mensagem))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from documentos.importacao_nfe import TAMANHO_LOTE_PADRAO, importar_notas
+from documentos.models import Recurso, Secretaria
+
+
+class Command(BaseCommand):
+    help = "Importa documentos a partir de XMLs de NF-e/NFS-e (pastas, .zip ou .xml)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("caminhos", nargs="+", help="Pastas, arquivos .zip ou .xml")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Processos para leitura dos XMLs (padrão: número de núcleos)",
+        )
+        parser.add_argument("--secretaria", type=int, help="ID da secretaria dos documentos")
+        parser.add_argument("--recurso", type=int, help="ID do recurso dos documentos")
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=TAMANHO_LOTE_PADRAO,
+            help="Documentos por inserção em lote",
+        )
+
+    def handle(self, *args, **options):
+        secretaria = recurso = None
+        try:
+            if options["secretaria"]:
+                secretaria = Secretaria.objects.get(pk=options["secretaria"])  # pylint: disable=no-member
+            if options["recurso"]:
+                recurso = Recurso.objects.get(pk=options["recurso"])  # pylint: disable=no-member
+        except (Secretaria.DoesNotExist, Recurso.DoesNotExist) as e:  # pylint: disable=no-member
+            raise CommandError(str(e)) from e
+
+        resumo = importar_notas(
+            options["caminhos"],
+            workers=options["workers"],
+            secretaria=secretaria,
+            recurso=recurso,
+            tamanho_lote=options["lote"],
+        )
+
+        for erro in resumo["erros"]:
+            self.stderr.write(erro)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{resumo['lidos']} XML(s) lido(s): {resumo['criados']} documento(s) criado(s), "
+                f"{resumo['duplicados']} duplicado(s), "
+                f"{resumo['fornecedores_criados']} fornecedor(es) novo(s), "
+                f"{len(resumo['erros'])} erro(s)."
+            )
+        )
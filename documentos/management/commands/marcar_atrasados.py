@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from documentos.atrasos import data_limite_atraso, marcar_atrasados
+
+
+class Command(BaseCommand):
+    help = "Marca como atrasados (ATR) os documentos pendentes fora do prazo de pagamento."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--prazo",
+            type=int,
+            default=None,
+            help="Prazo de pagamento em dias (padrão: DOCUMENTO_PRAZO_PAGAMENTO_DIAS)",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=int,
+            default=0,
+            help="Repete a varredura a cada N segundos (0 executa uma única vez)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            total = marcar_atrasados(prazo_dias=options["prazo"])
+            limite = data_limite_atraso(prazo_dias=options["prazo"])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{total} documento(s) marcado(s) como atrasado(s) "
+                    f"(pendentes com data anterior a {limite:%d/%m/%Y})."
+                )
+            )
+            if not options["intervalo"]:
+                return
+            time.sleep(options["intervalo"])
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from documentos.contadores import reconciliar
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula os contadores de documentos de fornecedores, secretarias e recursos "
+        "e corrige as divergências."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verificar",
+            action="store_true",
+            help="Apenas relata os registros divergentes, sem corrigir",
+        )
+
+    def handle(self, *args, **options):
+        divergentes = reconciliar(corrigir=not options["verificar"])
+        for modelo, quantidade in divergentes.items():
+            self.stdout.write(f"{modelo}: {quantidade} registro(s) divergente(s)")
+
+        total = sum(divergentes.values())
+        if not total:
+            self.stdout.write(self.style.SUCCESS("Contadores consistentes."))
+        elif options["verificar"]:
+            self.stdout.write(self.style.WARNING(f"{total} registro(s) com contadores divergentes."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{total} registro(s) corrigido(s)."))
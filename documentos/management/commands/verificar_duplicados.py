@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from documentos.duplicidade import grupos_duplicados
+from documentos.models import Documento
+
+
+class Command(BaseCommand):
+    help = "Relata documentos cadastrados em duplicidade (mesmo fornecedor, número, valor e data)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--detalhar",
+            action="store_true",
+            help="Lista os números internos de todos os documentos de cada grupo",
+        )
+
+    def handle(self, *args, **options):
+        grupos = list(grupos_duplicados())
+        if not grupos:
+            self.stdout.write(self.style.SUCCESS("Nenhum documento duplicado encontrado."))
+            return
+
+        numeros = {}
+        if options["detalhar"]:
+            documentos = Documento.objects.filter(  # pylint: disable=no-member
+                impressao_digital__in=[g["impressao_digital"] for g in grupos]
+            ).values_list("impressao_digital", "numero")
+            for impressao, numero in documentos.order_by("id"):
+                numeros.setdefault(impressao, []).append(numero)
+
+        for grupo in grupos:
+            linha = (
+                f"{grupo['quantidade']}x {grupo['fornecedor']} | "
+                f"Nº {grupo['numero_documento']} | R$ {grupo['valor_documento']} | "
+                f"{grupo['data_documento']:%d/%m/%Y} | IDs {grupo['primeiro_id']}..{grupo['ultimo_id']}"
+            )
+            self.stdout.write(linha)
+            if grupo["impressao_digital"] in numeros:
+                self.stdout.write("    " + ", ".join(numeros[grupo["impressao_digital"]]))
+
+        total = sum(g["quantidade"] - 1 for g in grupos)
+        self.stdout.write(
+            self.style.WARNING(f"{len(grupos)} grupo(s) com {total} documento(s) excedente(s).")
+        )
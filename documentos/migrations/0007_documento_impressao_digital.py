@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:51
+
+from django.db import migrations, models
+
+from documentos.duplicidade import calcular_impressao_digital
+
+
+def preencher_impressoes(apps, schema_editor):
+    Documento = apps.get_model("documentos", "Documento")
+    lote = []
+    campos = ("id", "fornecedor_id", "numero_documento", "valor_documento", "data_documento")
+    for documento in Documento.objects.only(*campos).iterator(chunk_size=2000):
+        documento.impressao_digital = calcular_impressao_digital(
+            documento.fornecedor_id,
+            documento.numero_documento,
+            documento.valor_documento,
+            documento.data_documento,
+        )
+        lote.append(documento)
+        if len(lote) >= 2000:
+            Documento.objects.bulk_update(lote, ["impressao_digital"])
+            lote = []
+    if lote:
+        Documento.objects.bulk_update(lote, ["impressao_digital"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentos', '0006_documento_processo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documento',
+            name='impressao_digital',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=40, null=True, verbose_name='Impressão Digital'),
+        ),
+        migrations.RunPython(preencher_impressoes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentos', '0007_documento_impressao_digital'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documento',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em'),
+        ),
+    ]
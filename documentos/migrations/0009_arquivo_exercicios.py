@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentos', '0008_documento_updated_at'),
+        ('fornecedores', '0006_alter_fornecedor_agencia_alter_fornecedor_conta'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documento',
+            name='data_documento',
+            field=models.DateField(db_index=True, verbose_name='Data do Documento'),
+        ),
+        migrations.CreateModel(
+            name='DocumentoArquivado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero', models.CharField(max_length=20, unique=True, verbose_name='Número')),
+                ('numero_documento', models.CharField(blank=True, max_length=50, null=True, verbose_name='Número do Documento')),
+                ('processo', models.CharField(blank=True, max_length=50, null=True, verbose_name='Processo')),
+                ('tipo', models.CharField(choices=[('NF', 'Nota Fiscal'), ('NFS', 'Nota Fiscal de Serviço'), ('NFSA', 'Nota Fiscal de Serviço Avulsa'), ('FAT', 'Fatura'), ('REC', 'Recibo')], max_length=4, verbose_name='Tipo')),
+                ('data_documento', models.DateField(db_index=True, verbose_name='Data do Documento')),
+                ('data_pagamento', models.DateField(blank=True, null=True, verbose_name='Data de Pagamento')),
+                ('data_entrada', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(db_index=True, verbose_name='Atualizado em')),
+                ('etapa', models.CharField(choices=[('ABERTURA', 'Abertura de Processo'), ('CONTROLE_INTERNO', 'Controle Interno'), ('EMPENHO', 'Empenho'), ('PAGAMENTO', 'Pagamento'), ('BAIXA', 'Baixa')], max_length=20, verbose_name='Etapa do Processo')),
+                ('valor_documento', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Valor Bruto')),
+                ('valor_irrf', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Valor IRRF')),
+                ('valor_iss', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Valor ISS')),
+                ('valor_liquido', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Valor Líquido')),
+                ('descricao', models.TextField(blank=True, null=True, verbose_name='Descrição')),
+                ('status', models.CharField(choices=[('PEN', 'Pendente'), ('PAG', 'Pago'), ('ATR', 'Atrasado')], max_length=3, verbose_name='Status')),
+                ('data_baixa', models.DateTimeField(blank=True, null=True, verbose_name='Data de Baixa')),
+                ('impressao_digital', models.CharField(blank=True, db_index=True, editable=False, max_length=40, null=True, verbose_name='Impressão Digital')),
+                ('baixado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('fornecedor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='documentos_arquivados', to='fornecedores.fornecedor', verbose_name='Fornecedor')),
+                ('recurso', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='documentos.recurso', verbose_name='Recurso')),
+                ('secretaria', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='documentos.secretaria', verbose_name='Secretaria')),
+            ],
+            options={
+                'verbose_name': 'Documento Arquivado',
+                'verbose_name_plural': 'Documentos Arquivados',
+                'ordering': ['-data_documento'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ExercicioFechado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ano', models.PositiveSmallIntegerField(unique=True, verbose_name='Ano')),
+                ('fechado_em', models.DateTimeField(auto_now_add=True, verbose_name='Fechado em')),
+                ('documentos', models.PositiveIntegerField(default=0, verbose_name='Documentos arquivados')),
+                ('fechado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Fechado por')),
+            ],
+            options={
+                'verbose_name': 'Exercício Fechado',
+                'verbose_name_plural': 'Exercícios Fechados',
+                'ordering': ['-ano'],
+            },
+        ),
+        migrations.CreateModel(
+            name='HistoricoDocumentoArquivado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('etapa', models.CharField(choices=[('ABERTURA', 'Abertura de Processo'), ('CONTROLE_INTERNO', 'Controle Interno'), ('EMPENHO', 'Empenho'), ('PAGAMENTO', 'Pagamento'), ('BAIXA', 'Baixa')], max_length=20)),
+                ('descricao', models.TextField(blank=True, null=True)),
+                ('data_hora', models.DateTimeField()),
+                ('documento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historicos', to='documentos.documentoarquivado')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Histórico de Documento Arquivado',
+                'verbose_name_plural': 'Históricos de Documentos Arquivados',
+                'ordering': ['-data_hora'],
+            },
+        ),
+    ]
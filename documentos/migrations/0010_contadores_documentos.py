@@ -0,0 +1,107 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:19
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+
+
+def preencher_contadores(apps, schema_editor):
+    donos = {
+        "fornecedor": apps.get_model("fornecedores", "Fornecedor"),
+        "secretaria": apps.get_model("documentos", "Secretaria"),
+        "recurso": apps.get_model("documentos", "Recurso"),
+    }
+    tabelas = [apps.get_model("documentos", nome) for nome in ("Documento", "DocumentoArquivado")]
+    for campo, modelo in donos.items():
+        totais = defaultdict(lambda: [0, 0, 0, 0, None])
+        for tabela in tabelas:
+            linhas = (
+                tabela.objects.filter(**{f"{campo}__isnull": False})
+                .values(campo)
+                .annotate(
+                    quantidade=Count("id"),
+                    bruto=Sum("valor_documento"),
+                    liquido=Sum("valor_liquido"),
+                    pendente=Sum("valor_documento", filter=~Q(status="PAG")),
+                    ultimo=Max("data_documento"),
+                )
+                .order_by()
+            )
+            for linha in linhas:
+                total = totais[linha[campo]]
+                total[0] += linha["quantidade"]
+                total[1] += linha["bruto"] or 0
+                total[2] += linha["liquido"] or 0
+                total[3] += linha["pendente"] or 0
+                total[4] = max(filter(None, (total[4], linha["ultimo"])))
+        for pk, total in totais.items():
+            modelo.objects.filter(pk=pk).update(
+                total_documentos=total[0],
+                valor_total_bruto=total[1],
+                valor_total_liquido=total[2],
+                valor_pendente=total[3],
+                ultimo_documento_em=total[4],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentos', '0009_arquivo_exercicios'),
+        ('fornecedores', '0007_contadores_documentos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recurso',
+            name='total_documentos',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Documentos'),
+        ),
+        migrations.AddField(
+            model_name='recurso',
+            name='ultimo_documento_em',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Último Documento'),
+        ),
+        migrations.AddField(
+            model_name='recurso',
+            name='valor_pendente',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=16, verbose_name='Total a Pagar'),
+        ),
+        migrations.AddField(
+            model_name='recurso',
+            name='valor_total_bruto',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=16, verbose_name='Total Bruto'),
+        ),
+        migrations.AddField(
+            model_name='recurso',
+            name='valor_total_liquido',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=16, verbose_name='Total Líquido'),
+        ),
+        migrations.AddField(
+            model_name='secretaria',
+            name='total_documentos',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Documentos'),
+        ),
+        migrations.AddField(
+            model_name='secretaria',
+            name='ultimo_documento_em',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Último Documento'),
+        ),
+        migrations.AddField(
+            model_name='secretaria',
+            name='valor_pendente',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=16, verbose_name='Total a Pagar'),
+        ),
+        migrations.AddField(
+            model_name='secretaria',
+            name='valor_total_bruto',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=16, verbose_name='Total Bruto'),
+        ),
+        migrations.AddField(
+            model_name='secretaria',
+            name='valor_total_liquido',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=16, verbose_name='Total Líquido'),
+        ),
+        migrations.RunPython(preencher_contadores, migrations.RunPython.noop),
+    ]
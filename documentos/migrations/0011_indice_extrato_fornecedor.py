@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentos', '0010_contadores_documentos'),
+        ('fornecedores', '0007_contadores_documentos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='documento',
+            index=models.Index(fields=['fornecedor', 'data_documento'], name='documentos__fornece_fa198e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documentoarquivado',
+            index=models.Index(fields=['fornecedor', 'data_documento'], name='documentos__fornece_f60e01_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:34
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def preencher_etapa_desde(apps, schema_editor):
+    """Data do último histórico de cada documento (ou de entrada, sem histórico)."""
+    for documento, historico in (
+        ("Documento", "HistoricoDocumento"),
+        ("DocumentoArquivado", "HistoricoDocumentoArquivado"),
+    ):
+        ultimo = (
+            apps.get_model("documentos", historico)
+            .objects.filter(documento_id=OuterRef("pk"))
+            .order_by()
+            .values("documento_id")
+            .annotate(ultimo=Max("data_hora"))
+            .values("ultimo")
+        )
+        apps.get_model("documentos", documento).objects.update(
+            etapa_desde=Coalesce(Subquery(ultimo), F("data_entrada"))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentos', '0011_indice_extrato_fornecedor'),
+        ('fornecedores', '0007_contadores_documentos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documento',
+            name='etapa_desde',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Na Etapa Desde'),
+        ),
+        migrations.AddField(
+            model_name='documentoarquivado',
+            name='etapa_desde',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Na Etapa Desde'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='documento',
+            index=models.Index(fields=['etapa', 'etapa_desde'], name='documentos__etapa_6b824a_idx'),
+        ),
+        migrations.RunPython(preencher_etapa_desde, migrations.RunPython.noop),
+    ]
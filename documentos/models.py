@@ -13,13 +13,17 @@ from decimal import Decimal
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
 from fornecedores.models import Fornecedor
+from relatorios.cache import invalidar as invalidar_cache_relatorios
+from utils.models import ContadoresDocumentos
 
+from .duplicidade import calcular_impressao_digital
 
-class Secretaria(models.Model):
+
+class Secretaria(ContadoresDocumentos):
     """Modelo de Secretaria (dinâmico)."""
 
     nome = models.CharField(max_length=100, unique=True, verbose_name="Nome")
@@ -36,7 +40,7 @@ class Secretaria(models.Model):
         return f"{self.codigo} - {self.nome}"
 
 
-class Recurso(models.Model):
+class Recurso(ContadoresDocumentos):
     """Modelo de Recurso vinculado a uma Secretaria (dinâmico)."""
 
     nome = models.CharField(max_length=100, verbose_name="Nome")
@@ -54,6 +58,80 @@ class Recurso(models.Model):
         return f"{self.codigo} - {self.nome}"
 
 
+# Campos recalculados por Documento.aplicar_regras a partir de outros campos
+CAMPOS_VALORES = {"valor_documento", "valor_iss", "valor_irrf", "tipo"}
+CAMPOS_DERIVADOS_VALORES = {"valor_iss", "valor_irrf", "valor_liquido", "impressao_digital"}
+CAMPOS_IMPRESSAO = {"fornecedor", "numero_documento", "data_documento"}
+
+
+def campos_dependentes(campos):
+    """Completa a lista de campos a gravar com os derivados pelas regras de negócio."""
+    campos = {campo.removesuffix("_id") for campo in campos} | {"updated_at"}
+    if campos & CAMPOS_VALORES:
+        campos |= CAMPOS_DERIVADOS_VALORES
+    if campos & CAMPOS_IMPRESSAO:
+        campos.add("impressao_digital")
+    if "status" in campos:
+        campos.add("data_pagamento")
+    return sorted(campos)
+
+
+class DocumentoQuerySet(models.QuerySet):
+    """QuerySet de documentos com caminho rápido de gravação em lote."""
+
+    def atualizar_em_lote(self, documentos, campos, batch_size=500):
+        """Aplica as regras de negócio e grava vários documentos com ``bulk_update``.
+
+        Dispensa o ``full_clean`` por instância (e suas consultas de unicidade e
+        de chaves estrangeiras): as regras de ``Documento.aplicar_regras`` rodam em
+        Python e a gravação é feita em lotes.
+
+        Args:
+            documentos: Instâncias de Documento já alteradas.
+            campos: Campos alterados; os derivados são incluídos automaticamente.
+            batch_size: Documentos por comando UPDATE.
+
+        Returns:
+            int: Quantidade de documentos atualizados.
+
+        Raises:
+            ValidationError: Se alguma instância violar as regras de negócio
+                (nenhum documento é gravado nesse caso).
+        """
+        # pylint: disable=import-outside-toplevel
+        from relatorios import cubo
+
+        from . import contadores
+        from .signals import CAMPOS_ANTERIORES
+
+        documentos = list(documentos)
+        agora = timezone.now()
+        for documento in documentos:
+            documento.aplicar_regras()
+            # bulk_update não preenche campos auto_now
+            documento.updated_at = agora
+        if not documentos:
+            return 0
+
+        # Estado anterior: deltas dos contadores e do cubo de relatórios
+        anteriores = list(
+            contadores.estados_gravados(
+                [documento.pk for documento in documentos], CAMPOS_ANTERIORES
+            ).values()
+        )
+        with transaction.atomic():
+            total = self.bulk_update(documentos, campos_dependentes(campos), batch_size=batch_size)
+            contadores.aplicar_alteracoes(
+                anteriores, [contadores.estado(documento) for documento in documentos]
+            )
+            cubo.aplicar_alteracoes(
+                anteriores, [cubo.estado(documento) for documento in documentos]
+            )
+        # bulk_update não dispara signals: invalida os relatórios em cache explicitamente
+        invalidar_cache_relatorios()
+        return total
+
+
 class Documento(models.Model):
     """
     Modelo para representar documentos financeiros.
@@ -94,17 +172,20 @@ class Documento(models.Model):
         max_length=50, blank=True, null=True, verbose_name="Processo"
     )
     tipo = models.CharField(max_length=4, choices=TIPO_CHOICES, verbose_name="Tipo")
-    data_documento = models.DateField(verbose_name="Data do Documento")
+    data_documento = models.DateField(db_index=True, verbose_name="Data do Documento")
     data_pagamento = models.DateField(
         verbose_name="Data de Pagamento", blank=True, null=True
     )  # Tornando opcional
     data_entrada = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Atualizado em")
     etapa = models.CharField(
         max_length=20,
         choices=ETAPA_CHOICES,
         default="ABERTURA",
         verbose_name="Etapa do Processo",
     )
+    # Data do último registro de histórico (mantida pelo signal de HistoricoDocumento)
+    etapa_desde = models.DateTimeField(default=timezone.now, verbose_name="Na Etapa Desde")
     valor_documento = models.DecimalField(
         max_digits=10, decimal_places=2, verbose_name="Valor Bruto"
     )
@@ -151,12 +232,30 @@ class Documento(models.Model):
         related_name="documentos",
     )
 
+    # Impressão digital (fornecedor, número, valor, data) para detecção de duplicidade
+    impressao_digital = models.CharField(
+        max_length=40,
+        blank=True,
+        null=True,
+        editable=False,
+        db_index=True,
+        verbose_name="Impressão Digital",
+    )
+
+    objects = DocumentoQuerySet.as_manager()
+
     class Meta:
         """Metadados do modelo Documento."""
 
         permissions = [
             ("dar_baixa_documento", "Pode dar baixa em documentos"),
         ]
+        indexes = [
+            # Extrato do fornecedor: documentos do fornecedor em ordem de data
+            models.Index(fields=["fornecedor", "data_documento"]),
+            # Documentos parados: etapa atual e desde quando
+            models.Index(fields=["etapa", "etapa_desde"]),
+        ]
         ordering = ["-data_documento"]
         verbose_name = "Documento"
         verbose_name_plural = "Documentos"
@@ -165,28 +264,53 @@ class Documento(models.Model):
         """Retorna uma representação em string do documento."""
         return f"{self.numero} - {self.fornecedor.nome}"  # pylint: disable=no-member
 
-    def save(self, *args, **kwargs):
+    def save(self, *args, validar=True, **kwargs):
         """Sobrescreve o método save para garantir que a validação clean() seja chamada
         antes de salvar o objeto no banco de dados.
 
         Args:
             *args: Argumentos posicionais para o método save original.
+            validar: Quando False, aplica apenas as regras de negócio em Python
+                (``aplicar_regras``), sem as consultas de ``full_clean`` (unicidade
+                e existência das chaves estrangeiras). Use em atualizações internas.
             **kwargs: Argumentos nomeados para o método save original.
         """
-        self.full_clean()
+        if validar:
+            self.full_clean()
+        else:
+            self.aplicar_regras()
         super().save(*args, **kwargs)
 
+    def salvar_campos(self, *campos):
+        """Grava apenas os campos informados pelo caminho rápido (sem full_clean).
+
+        Os campos derivados pelas regras de negócio (retenções, valor líquido,
+        data de pagamento e impressão digital) são incluídos automaticamente.
+        """
+        self.save(update_fields=campos_dependentes(campos), validar=False)
+
     def clean(self):
-        """Validações e ajustes automáticos antes de salvar.
+        """Validações e ajustes automáticos antes de salvar (ver ``aplicar_regras``)."""
+        super().clean()
+        if (
+            self.data_documento
+            and ExercicioFechado.objects.filter(ano=self.data_documento.year).exists()  # pylint: disable=no-member
+        ):
+            raise ValidationError(
+                {"data_documento": f"O exercício {self.data_documento.year} está fechado."}
+            )
+        self.aplicar_regras()
+
+    def aplicar_regras(self):
+        """Aplica as regras de negócio do documento, sem consultar o banco de dados.
 
         - Garante que para tipos "Nota Fiscal" (NF) e "Fatura" (FAT) não haja descontos
           de ISS/IRRF (sempre zero).
         - Recalcula `valor_liquido` como `valor_documento - valor_iss - valor_irrf`.
         - Impede valores negativos em campos monetários.
         - Valida coerência básica de datas em relação ao status de pagamento.
+        - Atualiza a impressão digital usada na detecção de duplicidade.
         """
-        super().clean()
-
         # Normalização de campos numéricos para evitar None
         self.valor_documento = self.valor_documento or Decimal("0")
         self.valor_iss = self.valor_iss or Decimal("0")
@@ -218,6 +342,13 @@ class Documento(models.Model):
             # Se não está pago, remover data de pagamento para manter consistência
             self.data_pagamento = None
 
+        self.impressao_digital = calcular_impressao_digital(
+            self.fornecedor_id,
+            self.numero_documento,
+            self.valor_documento,
+            self.data_documento,
+        )
+
     @staticmethod
     def gerar_numero():
         """
@@ -347,3 +478,145 @@ class HistoricoDocumento(models.Model):
         # Verificar se o status não é 'Pago' mas a data de pagamento está preenchida
         if self.status != "PAG" and self.data_pagamento:
             self.data_pagamento = None
+
+
+class ExercicioFechado(models.Model):
+    """Exercício (ano) encerrado, cujos documentos foram movidos para o arquivo."""
+
+    ano = models.PositiveSmallIntegerField(unique=True, verbose_name="Ano")
+    fechado_em = models.DateTimeField(auto_now_add=True, verbose_name="Fechado em")
+    fechado_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Fechado por",
+    )
+    documentos = models.PositiveIntegerField(default=0, verbose_name="Documentos arquivados")
+
+    class Meta:
+        ordering = ["-ano"]
+        verbose_name = "Exercício Fechado"
+        verbose_name_plural = "Exercícios Fechados"
+
+    def __str__(self):
+        return str(self.ano)
+
+
+class DocumentoArquivado(models.Model):
+    """Documento de exercício fechado (arquivo frio).
+
+    Possui exatamente as mesmas colunas, na mesma ordem, de ``Documento``: os
+    documentos são movidos entre as tabelas com INSERT ... SELECT e mantêm o id.
+    """
+
+    fornecedor = models.ForeignKey(
+        Fornecedor,
+        on_delete=models.CASCADE,
+        related_name="documentos_arquivados",
+        verbose_name="Fornecedor",
+    )
+    numero = models.CharField(max_length=20, unique=True, verbose_name="Número")
+    numero_documento = models.CharField(
+        max_length=50, blank=True, null=True, verbose_name="Número do Documento"
+    )
+    processo = models.CharField(
+        max_length=50, blank=True, null=True, verbose_name="Processo"
+    )
+    tipo = models.CharField(max_length=4, choices=Documento.TIPO_CHOICES, verbose_name="Tipo")
+    data_documento = models.DateField(db_index=True, verbose_name="Data do Documento")
+    data_pagamento = models.DateField(
+        verbose_name="Data de Pagamento", blank=True, null=True
+    )
+    data_entrada = models.DateTimeField()
+    updated_at = models.DateTimeField(db_index=True, verbose_name="Atualizado em")
+    etapa = models.CharField(
+        max_length=20, choices=Documento.ETAPA_CHOICES, verbose_name="Etapa do Processo"
+    )
+    etapa_desde = models.DateTimeField(verbose_name="Na Etapa Desde")
+    valor_documento = models.DecimalField(
+        max_digits=10, decimal_places=2, verbose_name="Valor Bruto"
+    )
+    valor_irrf = models.DecimalField(
+        max_digits=10, decimal_places=2, default=0, verbose_name="Valor IRRF"
+    )
+    valor_iss = models.DecimalField(
+        max_digits=10, decimal_places=2, default=0, verbose_name="Valor ISS"
+    )
+    valor_liquido = models.DecimalField(
+        max_digits=10, decimal_places=2, verbose_name="Valor Líquido"
+    )
+    descricao = models.TextField(blank=True, null=True, verbose_name="Descrição")
+    status = models.CharField(
+        max_length=3, choices=Documento.STATUS_CHOICES, verbose_name="Status"
+    )
+    data_baixa = models.DateTimeField(
+        blank=True, null=True, verbose_name="Data de Baixa"
+    )
+    baixado_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    secretaria = models.ForeignKey(
+        Secretaria,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name="Secretaria",
+        related_name="+",
+    )
+    recurso = models.ForeignKey(
+        Recurso,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name="Recurso",
+        related_name="+",
+    )
+    impressao_digital = models.CharField(
+        max_length=40,
+        blank=True,
+        null=True,
+        editable=False,
+        db_index=True,
+        verbose_name="Impressão Digital",
+    )
+
+    class Meta:
+        indexes = [models.Index(fields=["fornecedor", "data_documento"])]
+        ordering = ["-data_documento"]
+        verbose_name = "Documento Arquivado"
+        verbose_name_plural = "Documentos Arquivados"
+
+    def __str__(self):
+        return f"{self.numero} - {self.fornecedor.nome}"  # pylint: disable=no-member
+
+
+class HistoricoDocumentoArquivado(models.Model):
+    """Histórico de etapas de um documento arquivado (mesmas colunas de HistoricoDocumento)."""
+
+    documento = models.ForeignKey(
+        DocumentoArquivado, on_delete=models.CASCADE, related_name="historicos"
+    )
+    etapa = models.CharField(max_length=20, choices=Documento.ETAPA_CHOICES)
+    descricao = models.TextField(blank=True, null=True)
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    data_hora = models.DateTimeField()
+
+    class Meta:
+        ordering = ["-data_hora"]
+        verbose_name = "Histórico de Documento Arquivado"
+        verbose_name_plural = "Históricos de Documentos Arquivados"
+
+    def __str__(self):
+        return f"{self.documento.numero} - {self.get_etapa_display()} em {self.data_hora}"
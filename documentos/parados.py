@@ -0,0 +1,100 @@
+"""Detecção de documentos parados em uma etapa do processo.
+
+Um documento está parado quando permanece na etapa atual há mais dias que o
+prazo da etapa (``settings.DOCUMENTO_PRAZOS_ETAPA_DIAS``). A data de entrada na
+etapa é a coluna ``etapa_desde``, mantida a cada registro de histórico, e a
+busca é uma única consulta sobre o índice (etapa, etapa_desde).
+
+``enviar_resumo`` envia aos administradores um e-mail com o resumo, com todas
+as mensagens em uma única conexão com o servidor de e-mail.
+"""
+
+import datetime
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import Count, Q
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from .models import Documento
+
+logger = logging.getLogger(__name__)
+
+LIMITE_RESUMO = 20
+
+
+def documentos_parados(agora=None, prazos=None):
+    """Documentos há mais tempo que o prazo na etapa atual, dos mais antigos aos mais recentes.
+
+    Args:
+        agora: Momento de referência (padrão: agora).
+        prazos: Dias por etapa (padrão: ``settings.DOCUMENTO_PRAZOS_ETAPA_DIAS``).
+            Etapas ausentes não são verificadas.
+    """
+    agora = agora or timezone.now()
+    prazos = settings.DOCUMENTO_PRAZOS_ETAPA_DIAS if prazos is None else prazos
+    condicao = Q()
+    for etapa, dias in prazos.items():
+        condicao |= Q(etapa=etapa, etapa_desde__lt=agora - datetime.timedelta(days=dias))
+    if not condicao:
+        return Documento.objects.none()  # pylint: disable=no-member
+    return (
+        Documento.objects.filter(condicao)  # pylint: disable=no-member
+        .select_related("fornecedor", "secretaria")
+        .order_by("etapa_desde")
+    )
+
+
+def resumo_parados(agora=None, prazos=None, limite=LIMITE_RESUMO):
+    """Quantidade de documentos parados por etapa e os ``limite`` mais antigos."""
+    documentos = documentos_parados(agora, prazos)
+    por_etapa = dict(documentos.order_by().values_list("etapa").annotate(total=Count("id")))
+    return {
+        "total": sum(por_etapa.values()),
+        "por_etapa": [
+            (nome, por_etapa[etapa]) for etapa, nome in Documento.ETAPA_CHOICES if etapa in por_etapa
+        ],
+        "documentos": list(documentos[:limite]) if por_etapa else [],
+        "agora": agora or timezone.now(),
+    }
+
+
+def enviar_resumo(agora=None, prazos=None):
+    """Envia o resumo de documentos parados aos administradores ativos com e-mail.
+
+    Returns:
+        int: Quantidade de e-mails enviados (0 se não houver documentos parados).
+    """
+    resumo = resumo_parados(agora, prazos)
+    if not resumo["total"]:
+        return 0
+    destinatarios = list(
+        get_user_model()
+        .objects.filter(is_staff=True, is_active=True)
+        .exclude(email="")
+        .values_list("email", flat=True)
+    )
+    if not destinatarios:
+        logger.warning("Resumo de documentos parados sem destinatários (administradores sem e-mail)")
+        return 0
+
+    html = render_to_string(
+        "documentos/email_documentos_parados.html",
+        {**resumo, "fila_url": f"{settings.SITE_URL}{reverse('documentos:parados')}"},
+    )
+    assunto = f"DocFinance - {resumo['total']} documento(s) parado(s) no processo"
+    mensagens = []
+    for email in destinatarios:
+        mensagem = EmailMultiAlternatives(
+            assunto, strip_tags(html), settings.DEFAULT_FROM_EMAIL, [email]
+        )
+        mensagem.attach_alternative(html, "text/html")
+        mensagens.append(mensagem)
+    enviados = get_connection().send_messages(mensagens) or 0
+    logger.info("Resumo de documentos parados enviado a %s destinatário(s)", enviados)
+    return enviados
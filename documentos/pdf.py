@@ -0,0 +1,194 @@
+"""Recibos em PDF (reportlab), no mesmo layout da página de impressão.
+
+``dados_recibo`` extrai e formata os campos de um documento; ``renderizar_recibo``
+desenha o PDF apenas a partir desses campos, para rodar no pool de processos de
+``utils.pdf.gerar_pdf`` e ter o resultado guardado em cache pelo conteúdo.
+"""
+
+import io
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Paragraph, Table, TableStyle
+
+from fornecedores.templatetags.fornecedor_filters import (
+    format_agencia,
+    format_cnpj_cpf,
+    format_conta,
+)
+from utils.pdf import gerar_pdf
+
+from .templatetags.custom_filters import currency_br, extenso_br
+
+# Incrementar ao alterar o layout (descarta os recibos em cache)
+VERSAO = 1
+
+TIPOS_CONTA = {"CC": "Conta corrente", "PP": "Conta poupança"}
+AMARELO = colors.HexColor("#fff3cd")
+
+ESTILO_TEXTO = ParagraphStyle(
+    "recibo", fontName="Helvetica", fontSize=10, leading=14, firstLineIndent=12 * mm
+)
+
+
+def dados_recibo(documento):
+    """Campos do recibo, já formatados para impressão."""
+    fornecedor = documento.fornecedor
+    if documento.descricao:
+        referencia = documento.descricao
+    else:
+        referencia = (
+            "ajuda de custo referente ao documento nº "
+            f"{documento.numero_documento or documento.numero}, "
+            f"emitido pelo(a) {fornecedor.nome}."
+        )
+    encargos = f"da {documento.secretaria.nome}" if documento.secretaria else "da Tesouraria Municipal"
+    if documento.status == "PAG" and documento.data_pagamento:
+        data = f"Moju(Pa), {documento.data_pagamento:%d/%m/%Y}"
+    else:
+        data = "Moju(Pa), _____ de _______________ de ________"
+    return {
+        "numero": documento.numero,
+        "secretaria": documento.secretaria.nome if documento.secretaria else "—",
+        "valor_liquido": currency_br(documento.valor_liquido),
+        "extenso": extenso_br(documento.valor_liquido).upper(),
+        "banco": fornecedor.banco or "-",
+        "agencia": format_agencia(fornecedor.agencia),
+        "tipo_conta": TIPOS_CONTA.get(fornecedor.tipo_conta, "Conta"),
+        "conta": format_conta(fornecedor.conta),
+        "referencia": referencia,
+        "encargos": f"Aos encargos {encargos} — Moju/PA.",
+        "data": data,
+        "valor_documento": currency_br(documento.valor_documento),
+        "valor_irrf": currency_br(documento.valor_irrf),
+        "valor_iss": currency_br(documento.valor_iss),
+        "fornecedor": fornecedor.nome,
+        "cnpj_cpf": format_cnpj_cpf(fornecedor.cnpj_cpf),
+        "endereco": fornecedor.endereco or "-",
+    }
+
+
+def _paragrafo(pdf, texto, x, y, largura, estilo=ESTILO_TEXTO):
+    """Desenha um parágrafo com o topo em ``y`` e devolve a altura ocupada."""
+    paragrafo = Paragraph(escape(texto), estilo)
+    _, altura = paragrafo.wrapOn(pdf, largura, 0)
+    paragrafo.drawOn(pdf, x, y - altura)
+    return altura
+
+
+def _titulo_secao(pdf, texto, x, y):
+    pdf.setFont("Helvetica-Bold", 11)
+    pdf.drawString(x, y, texto)
+    return y - 6 * mm
+
+
+def renderizar_recibo(dados):
+    """Desenha o recibo (uma página A4) e devolve o PDF."""
+    saida = io.BytesIO()
+    pdf = canvas.Canvas(saida, pagesize=A4)
+    pdf.setTitle(f"Recibo {dados['numero']}")
+    largura, altura = A4
+    margem = 18 * mm
+    util = largura - 2 * margem
+    y = altura - margem
+
+    # Cabeçalho: título e valor em destaque
+    pdf.setFont("Helvetica-Bold", 26)
+    pdf.drawString(margem, y - 10 * mm, "RECIBO")
+    pdf.setFillColor(AMARELO)
+    pdf.rect(largura - margem - 70 * mm, y - 14 * mm, 70 * mm, 14 * mm, stroke=1, fill=1)
+    pdf.setFillColor(colors.black)
+    pdf.setFont("Helvetica-Bold", 16)
+    pdf.drawRightString(largura - margem - 4 * mm, y - 9.5 * mm, f"R$ {dados['valor_liquido']}")
+    y -= 22 * mm
+
+    pdf.setFont("Helvetica", 10)
+    pdf.drawString(margem, y, f"Recibo Nº: {dados['numero']}")
+    pdf.drawRightString(largura - margem, y, f"Secretaria: {dados['secretaria']}")
+    y -= 10 * mm
+
+    # Valor por extenso
+    pdf.setFont("Helvetica-Bold", 9)
+    pdf.drawCentredString(largura / 2, y, "VALOR TOTAL POR EXTENSO")
+    y -= 2 * mm
+    estilo_extenso = ParagraphStyle("extenso", parent=ESTILO_TEXTO, firstLineIndent=0, alignment=1)
+    y -= _paragrafo(pdf, dados["extenso"], margem, y, util, estilo_extenso) + 8 * mm
+
+    # Dados bancários
+    pdf.setFont("Helvetica", 10)
+    pdf.drawString(
+        margem,
+        y,
+        f"Banco: {dados['banco']}    Agência: {dados['agencia']}    "
+        f"{dados['tipo_conta']}: {dados['conta']}",
+    )
+    y -= 10 * mm
+
+    # Histórico e assinatura
+    y = _titulo_secao(pdf, "Histórico e Assinatura:", margem, y)
+    for texto in (
+        "Recebi da Tesouraria da Prefeitura Municipal de Moju, Estado do Pará, a importância "
+        f"abaixo referida, a título de {dados['referencia']}",
+        dados["encargos"],
+        "E por ter(mos) recebido dita importância, firmo(amos) o presente em 2 (duas) vias "
+        "de igual teor, para um só efeito.",
+    ):
+        y -= _paragrafo(pdf, texto, margem, y, util) + 3 * mm
+    y -= 12 * mm
+    pdf.setFont("Helvetica", 10)
+    pdf.drawString(margem, y, dados["data"])
+    pdf.line(largura - margem - 75 * mm, y, largura - margem, y)
+    pdf.setFont("Helvetica", 8)
+    pdf.drawCentredString(largura - margem - 37.5 * mm, y - 4 * mm, "Assinatura do Beneficiário")
+    y -= 14 * mm
+
+    # Encargos do beneficiário
+    y = _titulo_secao(pdf, "Encargos do Beneficiário", margem, y)
+    tabela = Table(
+        [
+            ["Total Bruto", "R$", dados["valor_documento"]],
+            ["Desconto (INSS)", "R$", "0,00"],
+            ["Desconto (IRRF)", "R$", dados["valor_irrf"]],
+            ["Desconto (ISS)", "R$", dados["valor_iss"]],
+            ["Pagamento Líquido", "R$", dados["valor_liquido"]],
+        ],
+        colWidths=[util - 55 * mm, 10 * mm, 45 * mm],
+    )
+    tabela.setStyle(
+        TableStyle(
+            [
+                ("FONT", (0, 0), (-1, -1), "Helvetica", 10),
+                ("FONT", (0, -1), (-1, -1), "Helvetica-Bold", 10),
+                ("BACKGROUND", (1, 0), (-1, -1), AMARELO),
+                ("ALIGN", (2, 0), (2, -1), "RIGHT"),
+                ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+            ]
+        )
+    )
+    _, altura_tabela = tabela.wrapOn(pdf, util, 0)
+    tabela.drawOn(pdf, margem, y - altura_tabela)
+    y -= altura_tabela + 10 * mm
+
+    # Identificação do beneficiário
+    y = _titulo_secao(pdf, "Identificação do Beneficiário:", margem, y)
+    pdf.setFont("Helvetica", 10)
+    for rotulo, valor in (
+        ("Nome/Razão Social", dados["fornecedor"]),
+        ("CPF/CNPJ", dados["cnpj_cpf"]),
+        ("Endereço", dados["endereco"]),
+    ):
+        pdf.drawString(margem, y, f"{rotulo}: {valor}")
+        y -= 5 * mm
+
+    pdf.showPage()
+    pdf.save()
+    return saida.getvalue()
+
+
+def recibos_pdf(documentos):
+    """PDF com os recibos dos documentos (com fornecedor e secretaria), na ordem recebida."""
+    return gerar_pdf(renderizar_recibo, [dados_recibo(documento) for documento in documentos])
@@ -1,10 +1,13 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
+from django.utils import timezone
 
+from relatorios import cubo
 from usuarios.models import LogAtividade
 from usuarios.middleware import thread_local
 
-from .models import Documento, Recurso
+from . import contadores
+from .models import Documento, HistoricoDocumento, Recurso
 
 
 def _get_actor_and_ip():
@@ -13,6 +16,48 @@ def _get_actor_and_ip():
     return user, ip
 
 
+# Campos lidos antes da alteração: os dos contadores e os do cubo de relatórios
+CAMPOS_ANTERIORES = tuple(dict.fromkeys((*contadores.CAMPOS_ESTADO, *cubo.CAMPOS_ESTADO)))
+
+
+@receiver(pre_save, sender=Documento)
+def guardar_estado_anterior(sender, instance, update_fields=None, **kwargs):  # pylint: disable=unused-argument
+    # Estado gravado antes da alteração (contadores e cubo de relatórios usam os deltas)
+    instance._estado_anterior = None  # pylint: disable=protected-access
+    if instance._state.adding or instance.pk is None:  # pylint: disable=protected-access
+        return
+    if update_fields is not None and not set(update_fields) & {
+        campo.removesuffix("_id") for campo in CAMPOS_ANTERIORES
+    }:
+        # Nenhum campo agregado é gravado: anterior igual ao atual, sem deltas
+        instance._estado_anterior = contadores.estado(instance, CAMPOS_ANTERIORES)  # pylint: disable=protected-access
+        return
+    instance._estado_anterior = contadores.estados_gravados(  # pylint: disable=protected-access
+        [instance.pk], CAMPOS_ANTERIORES
+    ).get(instance.pk)
+
+
+@receiver(post_save, sender=Documento)
+def atualizar_contadores_save(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    contadores.aplicar_alteracoes(
+        [getattr(instance, "_estado_anterior", None)], [contadores.estado(instance)]
+    )
+
+
+@receiver(post_delete, sender=Documento)
+def atualizar_contadores_delete(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    contadores.aplicar_alteracoes([contadores.estado(instance)])
+
+
+@receiver(post_save, sender=HistoricoDocumento)
+def atualizar_etapa_desde(sender, instance, created, **kwargs):  # pylint: disable=unused-argument
+    # Mantém "na etapa desde" para a detecção de documentos parados (sem signals de Documento)
+    if created:
+        Documento.objects.filter(pk=instance.documento_id).update(  # pylint: disable=no-member
+            etapa_desde=instance.data_hora, updated_at=timezone.now()
+        )
+
+
 @receiver(post_save, sender=Documento)
 def log_documento_save(sender, instance, created, **kwargs):  # pylint: disable=unused-argument
     usuario, ip = _get_actor_and_ip()
@@ -0,0 +1,24 @@
+from agendador.registro import tarefa
+
+from .atrasos import marcar_atrasados
+from .contadores import reconciliar
+from .parados import enviar_resumo
+
+
+@tarefa("0 1 * * *", nome="documentos.marcar_atrasados")
+def marcar_documentos_atrasados():
+    """Marca como atrasados os documentos pendentes fora do prazo de pagamento."""
+    return f"{marcar_atrasados()} documento(s) marcado(s) como atrasado(s)"
+
+
+@tarefa("0 3 * * 0", nome="documentos.reconciliar_contadores")
+def reconciliar_contadores_documentos():
+    """Corrige divergências nos contadores de documentos (alterações feitas fora da aplicação)."""
+    divergentes = reconciliar()
+    return f"{sum(divergentes.values())} registro(s) corrigido(s)"
+
+
+@tarefa("0 7 * * 1-5", nome="documentos.resumo_parados")
+def resumo_documentos_parados():
+    """Envia aos administradores o resumo dos documentos parados além do prazo da etapa."""
+    return f"{enviar_resumo()} e-mail(s) enviado(s)"
@@ -1,6 +1,9 @@
 import locale  # Adicionando a importação do módulo locale
 
 from django import template
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.forms.utils import flatatt
+from django.utils.html import format_html
 
 register = template.Library()
 
@@ -148,3 +151,20 @@ def extenso_br(valor):
         texto = f"{parte_inteira} {moeda}"
 
     return texto
+
+
+@register.simple_tag
+def imagem(caminho, largura, altura, **atributos):
+    """Tag ``<img>`` de um arquivo estático exibido em largura x altura.
+
+    Depois do ``collectstatic``, aponta para a variante redimensionada para essa
+    caixa (gerada por ``utils.estaticos.ArmazenamentoEstatico``).
+    Ex.: ``{% imagem 'img/DocFinance3.png' 32 32 alt="DocFinance" %}``
+    """
+    if hasattr(staticfiles_storage, "url_imagem"):
+        url = staticfiles_storage.url_imagem(caminho, largura, altura)
+    else:
+        url = staticfiles_storage.url(caminho)
+    return format_html(
+        '<img src="{}" width="{}" height="{}"{}>', url, largura, altura, flatatt(atributos)
+    )
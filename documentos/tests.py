@@ -1,13 +1,44 @@
-from datetime import date
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import date, timedelta
 from decimal import Decimal
+from io import StringIO
 
+from django.contrib.auth.models import User
+from django.core import mail
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.core.management import call_command
+from django.db.models import Count, Sum
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
 
 from fornecedores.models import Fornecedor
+from relatorios.cache import em_cache
+from usuarios.models import LogAtividade
 
+from .arquivo import ArquivamentoError, ConsultaCombinada, arquivar_exercicio
+from .atrasos import marcar_atrasados
+from .contadores import reconciliar
+from .duplicidade import calcular_impressao_digital
 from .forms import DarBaixaForm, DocumentoForm
-from .models import Documento
+from .importacao_nfe import importar_notas, ler_xml, normalizar_nota
+from .models import (
+    Documento,
+    DocumentoArquivado,
+    ExercicioFechado,
+    HistoricoDocumento,
+    HistoricoDocumentoArquivado,
+    Recurso,
+    Secretaria,
+)
+from .parados import documentos_parados, enviar_resumo
+from .pdf import dados_recibo
+
+# Contagens de consultas sem as do cache no banco (invalidação dos relatórios)
+CACHE_LOCAL = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
 
 
 class DocumentoModelTest(TestCase):
@@ -109,3 +140,561 @@ class DarBaixaFormTest(TestCase):
         }
         form = DarBaixaForm(data=form_data)
         self.assertFalse(form.is_valid())
+
+
+NFE_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<nfeProc xmlns="http://www.portalfiscal.inf.br/nfe">
+  <NFe><infNFe Id="NFe123">
+    <ide><nNF>{numero}</nNF><dhEmi>2024-03-05T10:00:00-03:00</dhEmi></ide>
+    <emit><CNPJ>11222333000181</CNPJ><xNome>Empresa XML LTDA</xNome></emit>
+    <dest><CNPJ>99888777000100</CNPJ></dest>
+    <total><ICMSTot><vNF>1500.00</vNF></ICMSTot></total>
+  </infNFe></NFe>
+</nfeProc>"""
+
+NFSE_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<CompNfse xmlns="http://www.abrasf.org.br/nfse.xsd"><Nfse><InfNfse>
+  <Numero>77</Numero>
+  <DataEmissao>2024-04-10T08:30:00</DataEmissao>
+  <Servico><Valores>
+    <ValorServicos>1000.00</ValorServicos><IssRetido>1</IssRetido>
+    <ValorIss>50.00</ValorIss><ValorIr>15.00</ValorIr>
+  </Valores></Servico>
+  <PrestadorServico>
+    <IdentificacaoPrestador><CpfCnpj><Cnpj>11222333000181</Cnpj></CpfCnpj></IdentificacaoPrestador>
+    <RazaoSocial>Empresa XML LTDA</RazaoSocial>
+  </PrestadorServico>
+</InfNfse></Nfse></CompNfse>"""
+
+
+class ImportacaoNFeTest(TestCase):
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.pasta)
+
+    def _escrever(self, nome, conteudo):
+        caminho = os.path.join(self.pasta, nome)
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            arquivo.write(conteudo)
+        return caminho
+
+    def test_ler_nfe(self):
+        caminho = self._escrever("nfe.xml", NFE_XML.format(numero="321"))
+        nota = normalizar_nota(ler_xml(caminho))
+        self.assertEqual(nota["tipo"], "NF")
+        self.assertEqual(nota["cnpj_cpf"], "11222333000181")
+        self.assertEqual(nota["numero_documento"], "321")
+        self.assertEqual(nota["data_documento"], "2024-03-05")
+        self.assertEqual(nota["valor_documento"], Decimal("1500.00"))
+
+    def test_ler_nfse_com_retencoes(self):
+        caminho = self._escrever("nfse.xml", NFSE_XML)
+        nota = normalizar_nota(ler_xml(caminho))
+        self.assertEqual(nota["tipo"], "NFS")
+        self.assertEqual(nota["numero_documento"], "77")
+        self.assertEqual(nota["valor_iss"], Decimal("50.00"))
+        self.assertEqual(nota["valor_irrf"], Decimal("15.00"))
+
+    def test_importar_pasta_e_zip_ignorando_duplicados(self):
+        self._escrever("a.xml", NFE_XML.format(numero="1"))
+        self._escrever("nfse.xml", NFSE_XML)
+        with zipfile.ZipFile(os.path.join(self.pasta, "lote.zip"), "w") as arquivo_zip:
+            arquivo_zip.writestr("b.xml", NFE_XML.format(numero="2"))
+            arquivo_zip.writestr("a_copia.xml", NFE_XML.format(numero="1"))
+        self._escrever("invalido.xml", "<nfeProc>")
+
+        resumo = importar_notas([self.pasta], workers=1)
+
+        self.assertEqual(resumo["criados"], 3)
+        self.assertEqual(resumo["duplicados"], 1)
+        self.assertEqual(resumo["fornecedores_criados"], 1)
+        self.assertEqual(len(resumo["erros"]), 1)
+        nfs = Documento.objects.get(tipo="NFS")
+        self.assertEqual(nfs.valor_liquido, Decimal("935.00"))
+
+        resumo = importar_notas([self.pasta], workers=1)
+        self.assertEqual(resumo["criados"], 0)
+        self.assertEqual(resumo["duplicados"], 4)
+
+    def test_nota_invalida_nao_interrompe_importacao(self):
+        self._escrever("data.xml", NFE_XML.format(numero="5").replace("2024-03-05", "05/03/2024"))
+        self._escrever("negativa.xml", NFSE_XML.replace("<ValorIss>50.00", "<ValorIss>-50.00"))
+        self._escrever("valida.xml", NFE_XML.format(numero="6"))
+
+        resumo = importar_notas([self.pasta], workers=1)
+
+        self.assertEqual(resumo["criados"], 1)
+        self.assertEqual(len(resumo["erros"]), 2)
+        self.assertTrue(any("Data de emissão inválida" in erro for erro in resumo["erros"]))
+        self.assertTrue(any(erro.startswith("negativa.xml: ") for erro in resumo["erros"]))
+        self.assertEqual(Documento.objects.get().numero_documento, "6")
+
+
+class DuplicidadeTest(TestCase):
+    def setUp(self):
+        self.fornecedor = Fornecedor.objects.create(
+            nome="Fornecedor Teste", cnpj_cpf="12345678901", tipo="PF"
+        )
+        self.documento = Documento.objects.create(
+            fornecedor=self.fornecedor,
+            numero=Documento.gerar_numero(),
+            numero_documento="NF-000130",
+            tipo="NF",
+            data_documento=date(2024, 1, 1),
+            valor_documento=Decimal("100.00"),
+            valor_liquido=Decimal("100.00"),
+        )
+
+    def test_impressao_normaliza_numero(self):
+        self.assertEqual(
+            self.documento.impressao_digital,
+            calcular_impressao_digital(self.fornecedor.pk, "nf 130", "100", date(2024, 1, 1)),
+        )
+
+    def test_form_rejeita_duplicado(self):
+        form = DocumentoForm(
+            data={
+                "fornecedor": self.fornecedor.id,
+                "numero_documento": "NF130",
+                "tipo": "NF",
+                "data_documento": "2024-01-01",
+                "valor_documento": "100.00",
+                "valor_liquido": "100.00",
+                "valor_irrf": "0.00",
+                "valor_iss": "0.00",
+                "status": "PEN",
+            }
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn("já foi cadastrado", str(form.non_field_errors()))
+
+    def test_comando_relata_duplicados(self):
+        saida = StringIO()
+        call_command("verificar_duplicados", stdout=saida)
+        self.assertIn("Nenhum documento duplicado", saida.getvalue())
+
+        Documento.objects.create(
+            fornecedor=self.fornecedor,
+            numero=Documento.gerar_numero() + "1",
+            numero_documento="nf 130",
+            tipo="NF",
+            data_documento=date(2024, 1, 1),
+            valor_documento=Decimal("100.00"),
+            valor_liquido=Decimal("100.00"),
+        )
+        saida = StringIO()
+        call_command("verificar_duplicados", stdout=saida)
+        self.assertIn("1 grupo(s) com 1 documento(s) excedente(s)", saida.getvalue())
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class CaminhoRapidoTest(TestCase):
+    def setUp(self):
+        self.fornecedor = Fornecedor.objects.create(
+            nome="Fornecedor Teste", cnpj_cpf="12345678901", tipo="PF"
+        )
+        self.documentos = [
+            Documento.objects.create(
+                fornecedor=self.fornecedor,
+                numero=f"{Documento.gerar_numero()}{i}",
+                numero_documento=f"NFS{i}",
+                tipo="NFS",
+                data_documento=date(2024, 1, 1),
+                valor_documento=Decimal("100.00"),
+                valor_liquido=Decimal("100.00"),
+            )
+            for i in range(3)
+        ]
+
+    def test_atualizar_em_lote_aplica_regras(self):
+        for documento in self.documentos:
+            documento.valor_iss = Decimal("5.00")
+            documento.valor_irrf = Decimal("1.50")
+        # Um UPDATE para todos os documentos, um UPDATE de contador por fornecedor
+        # e um UPDATE por célula alterada no cubo
+        with self.assertNumQueries(10):
+            total = Documento.objects.atualizar_em_lote(self.documentos, ["valor_iss", "valor_irrf"])
+        self.assertEqual(total, 3)
+        self.assertEqual(
+            set(Documento.objects.values_list("valor_liquido", flat=True)), {Decimal("93.50")}
+        )
+
+    def test_atualizar_em_lote_rejeita_valores_invalidos(self):
+        self.documentos[1].valor_iss = Decimal("-1")
+        with self.assertRaises(ValidationError):
+            Documento.objects.atualizar_em_lote(self.documentos, ["valor_iss"])
+
+    def test_salvar_campos_sem_full_clean(self):
+        documento = self.documentos[0]
+        documento.status = "PAG"
+        documento.data_pagamento = date(2024, 2, 1)
+        # Estado anterior, UPDATE, contadores do fornecedor, log de atividade e
+        # deltas no cubo (signals): o documento cria a célula PAG e esvazia a PEN
+        with self.assertNumQueries(14):
+            documento.salvar_campos("status")
+        documento.refresh_from_db()
+        self.assertEqual(documento.data_pagamento, date(2024, 2, 1))
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class MarcarAtrasadosTest(TestCase):
+    def setUp(self):
+        self.fornecedor = Fornecedor.objects.create(
+            nome="Fornecedor Teste", cnpj_cpf="12345678901", tipo="PF"
+        )
+
+    def _documento(self, sufixo, data_documento, status="PEN", data_pagamento=None):
+        return Documento.objects.create(
+            fornecedor=self.fornecedor,
+            numero=f"{Documento.gerar_numero()}{sufixo}",
+            tipo="REC",
+            data_documento=data_documento,
+            valor_documento=Decimal("100.00"),
+            valor_liquido=Decimal("100.00"),
+            status=status,
+            data_pagamento=data_pagamento,
+        )
+
+    def test_marca_apenas_pendentes_fora_do_prazo(self):
+        vencido = self._documento("1", date(2024, 1, 1))
+        no_prazo = self._documento("2", date(2024, 1, 25))
+        pago = self._documento("3", date(2024, 1, 1), "PAG", date(2024, 1, 5))
+        logs_antes = LogAtividade.objects.count()
+
+        # savepoint, SELECT, UPDATE, deltas no cubo (célula ATR criada, PEN esvaziada: 8),
+        # INSERT dos logs, release
+        with self.assertNumQueries(13):
+            total = marcar_atrasados(hoje=date(2024, 2, 1), prazo_dias=10)
+
+        self.assertEqual(total, 1)
+        status = dict(Documento.objects.values_list("id", "status"))
+        self.assertEqual(status, {vencido.id: "ATR", no_prazo.id: "PEN", pago.id: "PAG"})
+        self.assertEqual(LogAtividade.objects.count(), logs_antes + 1)
+        self.assertEqual(marcar_atrasados(hoje=date(2024, 2, 1), prazo_dias=10), 0)
+
+    def test_invalida_cache_dos_relatorios(self):
+        self._documento("1", date(2024, 1, 1))
+
+        def contar_atrasados():
+            return Documento.objects.filter(status="ATR").count()
+
+        self.assertEqual(em_cache("teste_atrasados", contar_atrasados), 0)
+
+        marcar_atrasados(hoje=date(2024, 2, 1), prazo_dias=10)
+
+        self.assertEqual(em_cache("teste_atrasados", contar_atrasados), 1)
+
+    def test_comando(self):
+        self._documento("1", date(2000, 1, 1))
+        saida = StringIO()
+        call_command("marcar_atrasados", stdout=saida)
+        self.assertIn("1 documento(s) marcado(s)", saida.getvalue())
+
+
+class ArquivoExercicioTest(TestCase):
+    def setUp(self):
+        self.fornecedor = Fornecedor.objects.create(
+            nome="Fornecedor Teste", cnpj_cpf="12345678901", tipo="PF"
+        )
+        self.antigo_pago = self._documento("A1", date(2022, 3, 1), Decimal("100.00"), "PAG")
+        self.antigo_pendente = self._documento("A2", date(2022, 8, 1), Decimal("40.00"))
+        self.atual = self._documento("B1", date(2023, 5, 1), Decimal("10.00"))
+        HistoricoDocumento.objects.create(documento=self.antigo_pago, etapa="EMPENHO")
+
+    def _documento(self, numero, data_documento, valor, status="PEN"):
+        return Documento.objects.create(
+            fornecedor=self.fornecedor,
+            numero=numero,
+            tipo="REC",
+            data_documento=data_documento,
+            valor_documento=valor,
+            valor_liquido=valor,
+            status=status,
+            data_pagamento=data_documento if status == "PAG" else None,
+        )
+
+    def test_tabelas_com_as_mesmas_colunas(self):
+        for ativo, arquivo in (
+            (Documento, DocumentoArquivado),
+            (HistoricoDocumento, HistoricoDocumentoArquivado),
+        ):
+            self.assertEqual(
+                [f.column for f in ativo._meta.concrete_fields],
+                [f.column for f in arquivo._meta.concrete_fields],
+            )
+
+    def test_fechar_e_reabrir_exercicio(self):
+        with self.assertRaises(ArquivamentoError):
+            arquivar_exercicio(2022)
+        with self.assertRaises(ArquivamentoError):
+            arquivar_exercicio(date.today().year)
+
+        self.assertEqual(arquivar_exercicio(2022, forcar=True), 2)
+        self.assertEqual(list(Documento.objects.values_list("numero", flat=True)), ["B1"])
+        self.assertEqual(
+            set(DocumentoArquivado.objects.values_list("id", flat=True)),
+            {self.antigo_pago.id, self.antigo_pendente.id},
+        )
+        self.assertEqual(HistoricoDocumento.objects.count(), 0)
+        self.assertEqual(HistoricoDocumentoArquivado.objects.get().documento_id, self.antigo_pago.id)
+        self.assertTrue(ExercicioFechado.objects.filter(ano=2022, documentos=2).exists())
+
+        saida = StringIO()
+        call_command("arquivar_exercicio", "2022", "--reabrir", stdout=saida)
+        self.assertIn("2 documento(s) restaurado(s)", saida.getvalue())
+        self.assertEqual(Documento.objects.count(), 3)
+        self.assertEqual(DocumentoArquivado.objects.count(), 0)
+        self.assertEqual(self.antigo_pago.historicos.count(), 1)
+        self.assertFalse(ExercicioFechado.objects.exists())
+
+    def test_documento_em_exercicio_fechado_e_rejeitado(self):
+        arquivar_exercicio(2022, forcar=True)
+        documento = Documento(
+            fornecedor=self.fornecedor,
+            numero="A3",
+            tipo="REC",
+            data_documento=date(2022, 12, 1),
+            valor_documento=Decimal("1.00"),
+            valor_liquido=Decimal("1.00"),
+        )
+        with self.assertRaises(ValidationError):
+            documento.full_clean()
+
+    def test_consulta_combinada(self):
+        arquivar_exercicio(2022, forcar=True)
+
+        recente = ConsultaCombinada(date(2023, 1, 1))
+        self.assertFalse(recente.inclui_arquivo)
+        self.assertEqual(recente.count(), 1)
+
+        todos = ConsultaCombinada().order_by("-data_documento")
+        self.assertTrue(todos.inclui_arquivo)
+        self.assertEqual(todos.count(), 3)
+        self.assertEqual([d.numero for d in todos], ["B1", "A2", "A1"])
+        self.assertEqual([d.numero for d in todos[1:3]], ["A2", "A1"])
+        self.assertEqual(todos[0].numero, "B1")
+        self.assertEqual(
+            todos.aggregate(total=Sum("valor_documento"), quantidade=Count("id")),
+            {"total": Decimal("150.00"), "quantidade": 3},
+        )
+        self.assertEqual(
+            todos.agrupar("status", total=Sum("valor_documento")),
+            [
+                {"status": "PAG", "total": Decimal("100.00")},
+                {"status": "PEN", "total": Decimal("50.00")},
+            ],
+        )
+        self.assertEqual(todos.filter(status="PEN").count(), 2)
+
+
+class ContadoresDocumentosTest(TestCase):
+    def setUp(self):
+        self.fornecedor = Fornecedor.objects.create(
+            nome="Fornecedor Teste", cnpj_cpf="12345678901", tipo="PF"
+        )
+        self.outro = Fornecedor.objects.create(
+            nome="Outro Fornecedor", cnpj_cpf="10987654321", tipo="PF"
+        )
+        self.secretaria = Secretaria.objects.create(nome="Saúde")
+
+    def _documento(self, numero, data_documento, valor, status="PEN"):
+        return Documento.objects.create(
+            fornecedor=self.fornecedor,
+            secretaria=self.secretaria,
+            numero=numero,
+            tipo="REC",
+            data_documento=data_documento,
+            valor_documento=valor,
+            valor_liquido=valor,
+            status=status,
+            data_pagamento=data_documento if status == "PAG" else None,
+        )
+
+    def _contadores(self, registro):
+        registro.refresh_from_db()
+        return (
+            registro.total_documentos,
+            registro.valor_total_bruto,
+            registro.valor_total_liquido,
+            registro.valor_pendente,
+            registro.ultimo_documento_em,
+        )
+
+    def test_inclusao_alteracao_e_exclusao(self):
+        primeiro = self._documento("C1", date(2024, 1, 10), Decimal("100.00"))
+        segundo = self._documento("C2", date(2024, 3, 5), Decimal("50.00"), "PAG")
+        esperado = (2, Decimal("150.00"), Decimal("150.00"), Decimal("100.00"), date(2024, 3, 5))
+        self.assertEqual(self._contadores(self.fornecedor), esperado)
+        self.assertEqual(self._contadores(self.secretaria), esperado)
+
+        primeiro.status = "PAG"
+        primeiro.data_pagamento = date(2024, 1, 20)
+        primeiro.save()
+        self.assertEqual(self._contadores(self.fornecedor)[3], Decimal("0.00"))
+
+        # Troca de fornecedor: sai do antigo (com recálculo da última data) e entra no novo
+        segundo.fornecedor = self.outro
+        segundo.save()
+        self.assertEqual(
+            self._contadores(self.fornecedor),
+            (1, Decimal("100.00"), Decimal("100.00"), Decimal("0.00"), date(2024, 1, 10)),
+        )
+        self.assertEqual(self._contadores(self.outro)[:2], (1, Decimal("50.00")))
+
+        primeiro.delete()
+        self.assertEqual(
+            self._contadores(self.fornecedor), (0, Decimal("0.00"), Decimal("0.00"), Decimal("0.00"), None)
+        )
+        self.assertEqual(self._contadores(self.secretaria)[:2], (1, Decimal("50.00")))
+        self.assertEqual(sum(reconciliar(corrigir=False).values()), 0)
+
+    def test_atualizacao_em_lote(self):
+        documentos = [
+            self._documento(f"L{i}", date(2024, 2, i + 1), Decimal("10.00")) for i in range(3)
+        ]
+        for documento in documentos:
+            documento.status = "PAG"
+            documento.data_pagamento = date(2024, 3, 1)
+        Documento.objects.atualizar_em_lote(documentos, ["status", "data_pagamento"])
+        self.assertEqual(
+            self._contadores(self.fornecedor),
+            (3, Decimal("30.00"), Decimal("30.00"), Decimal("0.00"), date(2024, 2, 3)),
+        )
+
+    def test_arquivamento_nao_altera_contadores(self):
+        self._documento("A1", date(2022, 3, 1), Decimal("20.00"))
+        antes = self._contadores(self.fornecedor)
+        arquivar_exercicio(2022, forcar=True)
+        self.assertEqual(self._contadores(self.fornecedor), antes)
+
+    def test_reconciliacao_corrige_divergencias(self):
+        self._documento("R1", date(2024, 5, 1), Decimal("70.00"))
+        Fornecedor.objects.filter(pk=self.fornecedor.pk).update(total_documentos=9, valor_pendente=0)
+
+        saida = StringIO()
+        call_command("reconciliar_contadores", "--verificar", stdout=saida)
+        self.assertIn("fornecedores.Fornecedor: 1", saida.getvalue())
+        self.assertEqual(self._contadores(self.fornecedor)[0], 9)
+
+        call_command("reconciliar_contadores", stdout=StringIO())
+        self.assertEqual(
+            self._contadores(self.fornecedor),
+            (1, Decimal("70.00"), Decimal("70.00"), Decimal("70.00"), date(2024, 5, 1)),
+        )
+
+
+class DocumentosParadosTest(TestCase):
+    PRAZOS = {"ABERTURA": 5, "CONTROLE_INTERNO": 10, "EMPENHO": 10, "PAGAMENTO": 15}
+
+    def setUp(self):
+        self.fornecedor = Fornecedor.objects.create(
+            nome="Fornecedor Teste", cnpj_cpf="12345678901", tipo="PF"
+        )
+        self.agora = timezone.now()
+        self.controle = self._documento("P1", "CONTROLE_INTERNO", dias=12)
+        self.empenho = self._documento("P2", "EMPENHO", dias=3)
+        self.baixado = self._documento("P3", "BAIXA", dias=60)
+
+    def _documento(self, numero, etapa, dias):
+        documento = Documento.objects.create(
+            fornecedor=self.fornecedor,
+            numero=numero,
+            tipo="REC",
+            data_documento=date(2024, 1, 10),
+            valor_documento=Decimal("10.00"),
+            valor_liquido=Decimal("10.00"),
+            etapa=etapa,
+        )
+        Documento.objects.filter(pk=documento.pk).update(
+            etapa_desde=self.agora - timedelta(days=dias)
+        )
+        return documento
+
+    def test_etapa_desde_acompanha_historico(self):
+        alterado_em = self.controle.updated_at
+        historico = HistoricoDocumento.objects.create(documento=self.controle, etapa="EMPENHO")
+        self.controle.refresh_from_db()
+        self.assertEqual(self.controle.etapa_desde, historico.data_hora)
+        # O backup incremental (por updated_at) precisa levar a nova etapa_desde
+        self.assertGreater(self.controle.updated_at, alterado_em)
+
+    def test_deteccao_em_uma_consulta(self):
+        with self.assertNumQueries(1):
+            parados = list(documentos_parados(self.agora, self.PRAZOS))
+        self.assertEqual(parados, [self.controle])
+        self.assertEqual(
+            list(documentos_parados(self.agora, {"EMPENHO": 2})), [self.empenho]
+        )
+
+    def test_fila_e_resumo_por_email(self):
+        User.objects.create_user("operador", password="senha123")
+        User.objects.create_user("admin", "admin@exemplo.com", "senha123", is_staff=True)
+        User.objects.create_user("admin2", "admin2@exemplo.com", "senha123", is_staff=True)
+
+        self.client.login(username="operador", password="senha123")
+        self.assertEqual(self.client.get(reverse("documentos:parados")).status_code, 302)
+        self.client.login(username="admin", password="senha123")
+        with self.settings(DOCUMENTO_PRAZOS_ETAPA_DIAS=self.PRAZOS):
+            resposta = self.client.get(reverse("documentos:parados"))
+            self.assertEqual([d.numero for d in resposta.context["documentos"]], ["P1"])
+            self.assertEqual(resposta.context["documentos"][0].dias_parado, 12)
+
+            self.assertEqual(enviar_resumo(self.agora), 2)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIn("1 documento(s) parado(s)", mail.outbox[0].subject)
+        self.assertIn("P1", mail.outbox[0].body)
+
+
+class ReciboPdfTest(TestCase):
+    def test_recibo_em_pdf(self):
+        fornecedor = Fornecedor.objects.create(
+            nome="Fornecedor Teste", cnpj_cpf="12345678901", tipo="PF", banco="001"
+        )
+        documento = Documento.objects.create(
+            fornecedor=fornecedor,
+            numero="R-1",
+            tipo="REC",
+            data_documento=date(2024, 1, 10),
+            valor_documento=Decimal("1170.00"),
+            valor_liquido=Decimal("1170.00"),
+            descricao="serviços de <manutenção> & limpeza",
+        )
+        dados = dados_recibo(documento)
+        self.assertEqual(dados["valor_liquido"], "1.170,00")
+
+        User.objects.create_user("operador", password="senha123")
+        self.client.login(username="operador", password="senha123")
+        resposta = self.client.get(reverse("documentos:recibo_pdf", args=[documento.pk]))
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta["Content-Type"], "application/pdf")
+        self.assertTrue(resposta.content.startswith(b"%PDF"))
+
+
+class ApiAssincronaTest(TestCase):
+    """Endpoints JSON assíncronos, pela pilha de middlewares em modo ASGI."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user("operador", password="senha123")
+        cls.fornecedor = Fornecedor.objects.create(
+            nome="Fornecedor Teste", cnpj_cpf="12345678000199", tipo="PJ", banco="001"
+        )
+        cls.secretaria = Secretaria.objects.create(nome="Saúde", codigo="SMS")
+        Recurso.objects.create(nome="SUS", codigo="SUS", secretaria=cls.secretaria)
+        Recurso.objects.create(nome="FMS", codigo="FMS", secretaria=cls.secretaria)
+
+    async def test_endpoints_json(self):
+        url_recursos = reverse("documentos:recursos_por_secretaria", args=[self.secretaria.pk])
+        # RequireLoginMiddleware assíncrono
+        resposta = await self.async_client.get(url_recursos)
+        self.assertRedirects(resposta, reverse("home"), fetch_redirect_response=False)
+
+        await self.async_client.aforce_login(self.usuario)
+        resposta = await self.async_client.get(url_recursos)
+        self.assertEqual([r["nome"] for r in resposta.json()["recursos"]], ["FMS", "SUS"])
+
+        url = reverse("documentos:buscar_fornecedor")
+        resposta = await self.async_client.get(url, {"cnpj_cpf": "12.345.678/0001-99"})
+        self.assertEqual(resposta.json()["id"], self.fornecedor.pk)
+        resposta = await self.async_client.get(url, {"cnpj_cpf": "000"})
+        self.assertEqual(resposta.json(), {"error": "Fornecedor não encontrado"})
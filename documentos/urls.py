@@ -12,6 +12,7 @@ urlpatterns = [
     # Fluxo de recibo
     path("<int:pk>/recibo/prompt/", views.recibo_prompt, name="recibo_prompt"),
     path("<int:pk>/recibo/preview/", views.recibo_preview, name="recibo_preview"),
+    path("<int:pk>/recibo/pdf/", views.recibo_pdf, name="recibo_pdf"),
     path("<int:pk>/historico/", views.historico_documento, name="historico"),
     path("<int:pk>/editar/", views.DocumentoUpdateView.as_view(), name="update"),
     path("<int:pk>/excluir/", views.DocumentoDeleteView.as_view(), name="delete"),
@@ -51,4 +52,5 @@ urlpatterns = [
         name="excluir_recurso",
     ),
     path("dashboard/", views.dashboard, name="dashboard"),
+    path("parados/", views.documentos_parados, name="parados"),
 ]
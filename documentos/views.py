@@ -9,10 +9,14 @@ import traceback
 from datetime import date
 from decimal import Decimal
 
+from django.conf import settings
 from django.contrib import messages
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
 from django.db.models import Q, Sum
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
 from django.utils import timezone
@@ -42,6 +46,7 @@ from .forms import (
 
 # Imports locais
 from .models import Documento, Recurso, Secretaria, HistoricoDocumento
+from .parados import documentos_parados as buscar_documentos_parados
 
 # Configurar o logger
 logger = logging.getLogger(__name__)
@@ -397,7 +402,7 @@ class DarBaixaDocumentoView(LoginRequiredMixin, View):
     def get(self, request, pk):
         """Exibe o formulário para dar baixa no documento."""
         documento = get_object_or_404(Documento, pk=pk)
-        if documento.status != "PEN":
+        if documento.status not in ("PEN", "ATR"):
             messages.error(request, "Este documento não pode ser baixado.")
             return redirect("documentos:detail", pk=pk)
 
@@ -406,29 +411,12 @@ class DarBaixaDocumentoView(LoginRequiredMixin, View):
             request, self.template_name, {"form": form, "documento": documento}
         )
 
-
-from django.contrib.auth.decorators import login_required
-
-
-@login_required
-def recibo_prompt(request, pk):
-    """Exibe um painel flutuante perguntando se deseja gerar o recibo em PDF."""
-    documento = get_object_or_404(Documento, pk=pk)
-    return render(request, "documentos/recibo_prompt.html", {"documento": documento})
-
-
-@login_required
-def recibo_preview(request, pk):
-    """Exibe uma página de visualização do recibo com estilo para impressão."""
-    documento = get_object_or_404(Documento, pk=pk)
-    return render(request, "documentos/recibo_preview.html", {"documento": documento})
-
     def post(self, request, pk):
         """Processa a requisição POST para dar baixa em um documento."""
         documento = get_object_or_404(Documento, pk=pk)
         form = DarBaixaForm(request.POST)
 
-        if documento.status != "PEN":
+        if documento.status not in ("PEN", "ATR"):
             messages.error(request, "Este documento não pode ser baixado.")
             return redirect("documentos:detail", pk=pk)
 
@@ -439,7 +427,9 @@ def recibo_preview(request, pk):
                 documento.data_pagamento = form.cleaned_data["data_pagamento"]
                 documento.data_baixa = timezone.now()
                 documento.baixado_por = request.user
-                documento.save()
+                documento.salvar_campos(
+                    "status", "data_pagamento", "data_baixa", "baixado_por"
+                )
 
                 logger.info(
                     "Documento %s baixado por %s. Data de pagamento: %s, Data da baixa: %s",
@@ -461,6 +451,33 @@ def recibo_preview(request, pk):
         )
 
 
+@login_required
+def recibo_prompt(request, pk):
+    """Exibe um painel flutuante perguntando se deseja gerar o recibo em PDF."""
+    documento = get_object_or_404(Documento, pk=pk)
+    return render(request, "documentos/recibo_prompt.html", {"documento": documento})
+
+
+@login_required
+def recibo_preview(request, pk):
+    """Exibe uma página de visualização do recibo com estilo para impressão."""
+    documento = get_object_or_404(Documento, pk=pk)
+    return render(request, "documentos/recibo_preview.html", {"documento": documento})
+
+
+@login_required
+def recibo_pdf(request, pk):
+    """Gera o recibo do documento em PDF (reimpressões vêm do cache)."""
+    from .pdf import recibos_pdf  # pylint: disable=import-outside-toplevel
+
+    documento = get_object_or_404(
+        Documento.objects.select_related("fornecedor", "secretaria"), pk=pk
+    )
+    response = HttpResponse(recibos_pdf([documento]), content_type="application/pdf")
+    response["Content-Disposition"] = f'inline; filename="recibo_{documento.numero}.pdf"'
+    return response
+
+
 def dashboard(request):
     """
     Exibe o painel de controle com estatísticas de documentos financeiros.
@@ -580,7 +597,7 @@ def historico_documento(request, pk):
 
             # Atualiza etapa atual e registra histórico
             documento.etapa = nova_etapa
-            documento.save()
+            documento.salvar_campos("etapa")
             HistoricoDocumento.objects.create(
                 documento=documento,
                 etapa=nova_etapa,
@@ -719,3 +736,32 @@ def excluir_recurso(request, pk):
         "documentos/confirm_delete_recurso.html",
         {"obj": recurso},
     )
+
+
+@login_required
+def documentos_parados(request):
+    """Fila de trabalho (somente administradores) com os documentos parados em uma etapa."""
+    if not request.user.is_staff:
+        messages.error(request, "Você não tem permissão para acessar esta página.")
+        return redirect("home")
+
+    prazos = settings.DOCUMENTO_PRAZOS_ETAPA_DIAS
+    etapa = request.GET.get("etapa", "")
+    if etapa in prazos:
+        prazos = {etapa: prazos[etapa]}
+    else:
+        etapa = ""
+
+    agora = timezone.now()
+    pagina = Paginator(buscar_documentos_parados(agora, prazos), 50).get_page(request.GET.get("page"))
+    for documento in pagina:
+        documento.dias_parado = (agora - documento.etapa_desde).days
+        documento.prazo_etapa = prazos[documento.etapa]
+
+    etapas = dict(Documento.ETAPA_CHOICES)
+    context = {
+        "documentos": pagina,
+        "etapa_selecionada": etapa,
+        "etapas": [(chave, etapas[chave], dias) for chave, dias in settings.DOCUMENTO_PRAZOS_ETAPA_DIAS.items()],
+    }
+    return render(request, "documentos/documentos_parados.html", context)
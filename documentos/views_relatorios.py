@@ -1,61 +1,45 @@
 import csv
 import io
-from datetime import datetime
 
-import xlsxwriter
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Count, Sum, F
+from django.db.models import Count, Sum
 from django.http import HttpResponse
-from django.utils import timezone
 from django.views.generic import TemplateView
 
-from .models import Documento, Secretaria, Recurso
+from relatorios.filtros import FiltroRelatorio
+from utils.replica import LeituraReplicaMixin
 
 
-class RelatorioBaseView(LoginRequiredMixin, TemplateView):
+
+def _agrupar(documentos, campo):
+    """Totais por secretaria ou recurso (tabela ativa e arquivo), ordenados pelo nome."""
+    linhas = documentos.agrupar(
+        campo,
+        f"{campo}__nome",
+        total=Sum("valor_documento"),
+        total_liquido=Sum("valor_liquido"),
+        quantidade=Count("id"),
+    )
+    for linha in linhas:
+        linha[f"{campo}_nome"] = linha.pop(f"{campo}__nome")
+    return sorted(linhas, key=lambda linha: (linha[f"{campo}_nome"] is None, linha[f"{campo}_nome"] or ""))
+
+
+class RelatorioBaseView(LoginRequiredMixin, LeituraReplicaMixin, TemplateView):
     """Classe base para todos os relatórios"""
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # Filtros de data
-        data_inicio = self.request.GET.get("data_inicio")
-        data_fim = self.request.GET.get("data_fim")
-
-        # Converter strings para objetos datetime
-        if data_inicio:
-            data_inicio = datetime.strptime(data_inicio, "%Y-%m-%d")
-        else:
-            # Padrão: início do mês atual
-            hoje = timezone.now()
-            data_inicio = datetime(hoje.year, hoje.month, 1)
-
-        if data_fim:
-            data_fim = datetime.strptime(data_fim, "%Y-%m-%d")
-            # Ajustar para o final do dia
-            data_fim = data_fim.replace(hour=23, minute=59, second=59)
-        else:
-            # Padrão: data atual
-            data_fim = timezone.now()
-
-        # Adicionar datas ao contexto
-        context["data_inicio"] = data_inicio.strftime("%Y-%m-%d")
-        context["data_fim"] = data_fim.strftime("%Y-%m-%d")
-
-        # Filtro de status
-        status = self.request.GET.get("status", "")
-        context["status_selecionado"] = status
-
-        # Filtrar documentos pelo período
-        documentos = Documento.objects.filter(
-            data_documento__gte=data_inicio, data_documento__lte=data_fim
-        )
-
-        # Aplicar filtro de status se fornecido
-        if status:
-            documentos = documentos.filter(status=status)
+        # Filtros (período padrão: do início do mês atual até hoje)
+        filtro = FiltroRelatorio.do_request(self.request, padrao_mes_atual=True)
+        context.update(filtro.contexto())
+        context["filtro"] = filtro
 
-        context["documentos"] = documentos
+        # Inclui o arquivo quando o período alcança exercícios fechados
+        context["documentos"] = filtro.consulta().select_related("fornecedor").order_by(
+            "-data_documento", "-id"
+        )
         return context
 
 
@@ -69,16 +53,7 @@ class RelatorioSecretariaView(RelatorioBaseView):
         documentos = context["documentos"]
 
         # Agrupar por secretaria
-        secretarias_dados = (
-            documentos.select_related("secretaria")
-            .values("secretaria", secretaria_nome=F("secretaria__nome"))
-            .annotate(
-                total=Sum("valor_documento"),
-                total_liquido=Sum("valor_liquido"),
-                quantidade=Count("id"),
-            )
-            .order_by("secretaria__nome")
-        )
+        secretarias_dados = _agrupar(documentos, "secretaria")
 
         context["secretarias_dados"] = secretarias_dados
         context["total_geral"] = documentos.aggregate(
@@ -124,6 +99,8 @@ class RelatorioSecretariaView(RelatorioBaseView):
             return response
 
         elif formato == "excel":
+            import xlsxwriter  # pylint: disable=import-outside-toplevel
+
             output = io.BytesIO()
             workbook = xlsxwriter.Workbook(output)
             worksheet = workbook.add_worksheet()
@@ -190,16 +167,7 @@ class RelatorioRecursoView(RelatorioBaseView):
         documentos = context["documentos"]
 
         # Agrupar por recurso
-        recursos_dados = (
-            documentos.select_related("recurso")
-            .values("recurso", recurso_nome=F("recurso__nome"))
-            .annotate(
-                total=Sum("valor_documento"),
-                total_liquido=Sum("valor_liquido"),
-                quantidade=Count("id"),
-            )
-            .order_by("recurso__nome")
-        )
+        recursos_dados = _agrupar(documentos, "recurso")
 
         context["recursos_dados"] = recursos_dados
         context["total_geral"] = documentos.aggregate(
@@ -243,6 +211,8 @@ class RelatorioRecursoView(RelatorioBaseView):
             return response
 
         elif formato == "excel":
+            import xlsxwriter  # pylint: disable=import-outside-toplevel
+
             output = io.BytesIO()
             workbook = xlsxwriter.Workbook(output)
             worksheet = workbook.add_worksheet()
@@ -308,34 +278,8 @@ class RelatorioFinanceiroView(RelatorioBaseView):
         context = super().get_context_data(**kwargs)
         documentos = context["documentos"]
 
-        # Resumo financeiro
-        resumo = {
-            "total_bruto": documentos.aggregate(total=Sum("valor_documento"))["total"]
-            or 0,
-            "total_iss": documentos.aggregate(total=Sum("valor_iss"))["total"] or 0,
-            "total_irrf": documentos.aggregate(total=Sum("valor_irrf"))["total"] or 0,
-            "total_liquido": documentos.aggregate(total=Sum("valor_liquido"))["total"]
-            or 0,
-            "quantidade": documentos.count(),
-            "pendentes": documentos.filter(status="PEN").count(),
-            "pagos": documentos.filter(status="PAG").count(),
-            "atrasados": documentos.filter(status="ATR").count(),
-        }
-
-        # Adicionar percentuais
-        if resumo["quantidade"] > 0:
-            resumo["perc_pendentes"] = (
-                resumo["pendentes"] / resumo["quantidade"]
-            ) * 100
-            resumo["perc_pagos"] = (resumo["pagos"] / resumo["quantidade"]) * 100
-            resumo["perc_atrasados"] = (
-                resumo["atrasados"] / resumo["quantidade"]
-            ) * 100
-        else:
-            resumo["perc_pendentes"] = resumo["perc_pagos"] = resumo[
-                "perc_atrasados"
-            ] = 0
-
+        # Resumo financeiro (valores, quantidades e percentuais por status em uma consulta)
+        resumo = context["filtro"].resumo(documentos)
         context["resumo"] = resumo
 
         # Dados para gráficos
@@ -414,6 +358,8 @@ class RelatorioFinanceiroView(RelatorioBaseView):
             return response
 
         elif formato == "excel":
+            import xlsxwriter  # pylint: disable=import-outside-toplevel
+
             output = io.BytesIO()
             workbook = xlsxwriter.Workbook(output)
             worksheet = workbook.add_worksheet("Detalhes")
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fornecedores', '0006_alter_fornecedor_agencia_alter_fornecedor_conta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fornecedor',
+            name='total_documentos',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Documentos'),
+        ),
+        migrations.AddField(
+            model_name='fornecedor',
+            name='ultimo_documento_em',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Último Documento'),
+        ),
+        migrations.AddField(
+            model_name='fornecedor',
+            name='valor_pendente',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=16, verbose_name='Total a Pagar'),
+        ),
+        migrations.AddField(
+            model_name='fornecedor',
+            name='valor_total_bruto',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=16, verbose_name='Total Bruto'),
+        ),
+        migrations.AddField(
+            model_name='fornecedor',
+            name='valor_total_liquido',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=16, verbose_name='Total Líquido'),
+        ),
+    ]
@@ -4,6 +4,7 @@ from django.db import models
 from django.urls import reverse
 
 from utils.document_validators import validate_cnpj, validate_cpf
+from utils.models import ContadoresDocumentos
 
 
 def validate_cnpj_cpf(value):
@@ -14,7 +15,7 @@ def validate_cnpj_cpf(value):
     return value
 
 
-class Fornecedor(models.Model):
+class Fornecedor(ContadoresDocumentos):
     """
     Modelo para representar fornecedores de documentos financeiros.
     Armazena informações básicas como nome, tipo (PF/PJ), CNPJ/CPF e contato.
@@ -0,0 +1,40 @@
+"""Configuração do gunicorn: ``gunicorn -c gunicorn.conf.py``.
+
+Os valores podem ser ajustados por variáveis de ambiente. Cada worker tem o
+seu pool de conexões (``DB_POOL_MIN``/``DB_POOL_MAX``), então o total de
+conexões com o PostgreSQL fica entre workers x DB_POOL_MIN e
+workers x DB_POOL_MAX (com ``GUNICORN_THREADS`` > 1, use DB_POOL_MAX >= threads).
+
+Com ``GUNICORN_ASGI=1`` os workers são do uvicorn (``api.config.asgi``): as
+views assíncronas (endpoints JSON) não ocupam o worker enquanto esperam o
+banco; as views síncronas rodam em uma thread por vez (``thread_sensitive``).
+"""
+
+import multiprocessing
+import os
+
+ASGI = os.environ.get("GUNICORN_ASGI", "").lower() in ("1", "true", "yes")
+
+if ASGI:
+    wsgi_app = "api.config.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "api.config.wsgi:application"
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 1))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+# Recicla os workers periodicamente (evita crescimento de memória)
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = 100
+
+
+def post_worker_init(worker):
+    """Abre o pool de conexões e carrega as views antes do primeiro request."""
+    from utils.banco import aquecer  # pylint: disable=import-outside-toplevel
+
+    try:
+        worker.log.info("Worker %s aquecido em %.2fs", worker.pid, aquecer())
+    except Exception:  # pylint: disable=broad-exception-caught
+        # Banco indisponível no boot: o worker sobe e conecta no primeiro request
+        worker.log.exception("Falha ao aquecer as conexões do worker %s", worker.pid)
@@ -1 +1,48 @@
-# Register your models here.
+from django.contrib import admin
+
+from .models import CelulaCubo, PermanenciaEtapa, SelecaoDocumentos
+
+
+class CelulaCuboAdmin(admin.ModelAdmin):
+    list_display = ("mes", "secretaria", "recurso", "status", "tipo", "etapa", "quantidade", "valor_bruto")
+    list_filter = ("status", "tipo", "etapa", "secretaria")
+    date_hierarchy = "mes"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(CelulaCubo, CelulaCuboAdmin)
+
+
+class PermanenciaEtapaAdmin(admin.ModelAdmin):
+    list_display = ("documento", "etapa", "secretaria", "entrada", "saida", "duracao")
+    list_filter = ("etapa", "secretaria")
+    date_hierarchy = "entrada"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(PermanenciaEtapa, PermanenciaEtapaAdmin)
+
+
+class SelecaoDocumentosAdmin(admin.ModelAdmin):
+    list_display = ("id", "usuario", "destino", "criada_em")
+    list_filter = ("destino",)
+    date_hierarchy = "criada_em"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(SelecaoDocumentos, SelecaoDocumentosAdmin)
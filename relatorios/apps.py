@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class RelatoriosConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "relatorios"
+
+    def ready(self):
+        # Importa os signals para ativá-los
+        from . import signals  # noqa: F401
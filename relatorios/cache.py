@@ -0,0 +1,73 @@
+"""Cache dos dados agregados dos relatórios e dashboards.
+
+As entradas são gravadas sob uma chave que inclui um número de versão global.
+Para invalidar todos os relatórios basta incrementar essa versão (uma única
+operação no cache), sem precisar conhecer ou apagar as chaves individualmente.
+"""
+
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+CHAVE_VERSAO = "relatorios:versao"
+TEMPO_PADRAO = 300
+
+
+def versao():
+    """Retorna a versão atual dos dados de relatórios em cache."""
+    atual = cache.get(CHAVE_VERSAO)
+    if atual is None:
+        # Inicia com um valor baseado no relógio para não reaproveitar entradas
+        # antigas caso a chave de versão tenha sido descartada pelo cache.
+        cache.add(CHAVE_VERSAO, time.time_ns(), None)
+        atual = cache.get(CHAVE_VERSAO)
+    return atual
+
+
+async def aversao():
+    """Versão assíncrona de ``versao``."""
+    atual = await cache.aget(CHAVE_VERSAO)
+    if atual is None:
+        await cache.aadd(CHAVE_VERSAO, time.time_ns(), None)
+        atual = await cache.aget(CHAVE_VERSAO)
+    return atual
+
+
+def invalidar():
+    """Invalida todos os dados de relatórios em cache."""
+    try:
+        cache.incr(CHAVE_VERSAO)
+    except ValueError:
+        cache.add(CHAVE_VERSAO, time.time_ns(), None)
+
+
+def em_cache(nome, calcular, timeout=TEMPO_PADRAO):
+    """Retorna o valor em cache para ``nome`` ou o calcula e grava.
+
+    Args:
+        nome: Identificador do conjunto de dados (ex.: "dashboard").
+        calcular: Função sem argumentos que produz o valor (deve ser serializável).
+        timeout: Tempo máximo, em segundos, de permanência no cache.
+    """
+    chave = f"relatorios:{nome}:{versao()}"
+    valor = cache.get(chave)
+    if valor is None:
+        valor = calcular()
+        cache.set(chave, valor, timeout)
+    return valor
+
+
+async def aem_cache(nome, calcular, timeout=TEMPO_PADRAO):
+    """Versão assíncrona de ``em_cache`` para views ``async``.
+
+    O cache é consultado sem bloquear o event loop; ``calcular`` (síncrona,
+    com consultas ao ORM) só roda, em uma thread, quando o valor não está no
+    cache.
+    """
+    chave = f"relatorios:{nome}:{await aversao()}"
+    valor = await cache.aget(chave)
+    if valor is None:
+        valor = await sync_to_async(calcular)()
+        await cache.aset(chave, valor, timeout)
+    return valor
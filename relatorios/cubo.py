@@ -0,0 +1,318 @@
+"""Cubo de agregados de documentos para relatórios e dashboards.
+
+O cubo (``CelulaCubo``) guarda, por mês, secretaria, recurso, status, tipo e
+etapa, a quantidade de documentos e os totais bruto, ISS, IRRF e líquido,
+somando a tabela ativa e o arquivo de exercícios fechados.
+
+Manutenção: cada inclusão, alteração ou exclusão de documento gera deltas
+(estado anterior saindo da célula, estado novo entrando) aplicados com um
+UPDATE por célula afetada usando expressões ``F()``, como em
+``documentos.contadores``; a célula é criada quando ainda não existe. A
+restrição de unicidade das dimensões garante uma única linha por célula
+mesmo com gravações concorrentes. ``reconstruir`` refaz o cubo inteiro e roda
+diariamente como salvaguarda.
+
+Consulta: ``pivot`` agrupa por qualquer combinação de dimensões. Meses
+inteiros do período são atendidos pelo cubo; apenas os dias das bordas de um
+período que não começa ou termina em limite de mês são lidos dos documentos.
+"""
+
+import datetime
+import logging
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils.dateparse import parse_date
+
+from documentos.arquivo import ConsultaCombinada
+from utils.banco import valores_preparados
+
+from .cache import invalidar
+from .models import CelulaCubo
+
+logger = logging.getLogger(__name__)
+
+DIMENSOES = ("mes", "secretaria", "recurso", "status", "tipo", "etapa")
+DIMENSOES_CELULA = ("mes", "secretaria_id", "recurso_id", "status", "tipo", "etapa")
+MEDIDAS = ("quantidade", "valor_bruto", "valor_iss", "valor_irrf", "valor_liquido")
+# Agregações que produzem as medidas a partir dos documentos
+AGREGACOES_DOCUMENTOS = {
+    "quantidade": Count("id"),
+    "valor_bruto": Sum("valor_documento"),
+    "valor_iss": Sum("valor_iss"),
+    "valor_irrf": Sum("valor_irrf"),
+    "valor_liquido": Sum("valor_liquido"),
+}
+TAMANHO_LOTE = 1000
+# Campos do documento que afetam o cubo (estado anterior/novo nos deltas)
+CAMPOS_ESTADO = (
+    "data_documento",
+    "secretaria_id",
+    "recurso_id",
+    "status",
+    "tipo",
+    "etapa",
+    "valor_documento",
+    "valor_iss",
+    "valor_irrf",
+    "valor_liquido",
+)
+
+
+def _como_data(valor):
+    if isinstance(valor, str):
+        return parse_date(valor[:10])
+    if isinstance(valor, datetime.datetime):
+        return valor.date()
+    return valor or None
+
+
+def _inicio_mes(data):
+    return data.replace(day=1)
+
+
+def _mes_seguinte(data):
+    return (data.replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+
+
+def _celulas(documentos):
+    """Agrupa os documentos nas células do cubo."""
+    linhas = documentos.annotate(mes=TruncMonth("data_documento")).agrupar(
+        *DIMENSOES, **AGREGACOES_DOCUMENTOS
+    )
+    for linha in linhas:
+        yield CelulaCubo(
+            mes=linha["mes"],
+            secretaria_id=linha["secretaria"],
+            recurso_id=linha["recurso"],
+            status=linha["status"],
+            tipo=linha["tipo"],
+            etapa=linha["etapa"],
+            **{medida: linha[medida] or 0 for medida in MEDIDAS},
+        )
+
+
+def estado(documento):
+    """Campos do documento que definem a sua célula e as medidas no cubo."""
+    valores = {campo: getattr(documento, campo) for campo in CAMPOS_ESTADO}
+    valores["data_documento"] = _como_data(valores["data_documento"])
+    return valores
+
+
+def _celula(valores):
+    return (
+        _inicio_mes(valores["data_documento"]),
+        valores["secretaria_id"],
+        valores["recurso_id"],
+        valores["status"],
+        valores["tipo"],
+        valores["etapa"],
+    )
+
+
+def _medidas(valores):
+    return (
+        1,
+        valores["valor_documento"] or 0,
+        valores["valor_iss"] or 0,
+        valores["valor_irrf"] or 0,
+        valores["valor_liquido"] or 0,
+    )
+
+
+def _somar(celula, delta):
+    """Aplica o delta à célula (UPDATE com F()); cria a célula se ainda não existe."""
+    filtro = dict(zip(DIMENSOES_CELULA, celula, strict=True))
+    alteracoes = {
+        medida: F(medida) + variacao
+        for medida, variacao in zip(MEDIDAS, delta, strict=True)
+        if variacao
+    }
+    celulas = CelulaCubo.objects.filter(**filtro)  # pylint: disable=no-member
+    if celulas.update(**alteracoes):
+        if delta[0] < 0:
+            celulas.filter(quantidade=0).delete()
+        return
+    if delta[0] <= 0:
+        # Célula inexistente para um documento que saiu: o cubo já divergia
+        logger.warning("Célula do cubo ausente ao remover documento: %s", filtro)
+        return
+    try:
+        with transaction.atomic():
+            CelulaCubo.objects.create(  # pylint: disable=no-member
+                **filtro, **dict(zip(MEDIDAS, delta, strict=True))
+            )
+    except IntegrityError:
+        # Outra transação criou a mesma célula ao mesmo tempo
+        celulas.update(**alteracoes)
+
+
+def aplicar_alteracoes(removidos=(), incluidos=()):
+    """Aplica ao cubo a saída e a entrada de documentos.
+
+    Uma alteração de documento é a remoção do estado anterior e a inclusão do
+    novo; estados que não mudam de célula nem de valores não geram UPDATE.
+
+    Args:
+        removidos: Estados (``estado()``) de documentos excluídos ou antes da alteração.
+        incluidos: Estados de documentos incluídos ou após a alteração.
+    """
+    deltas = defaultdict(lambda: [0] * len(MEDIDAS))
+    for sinal, lista in ((-1, removidos), (1, incluidos)):
+        for valores in lista:
+            if not valores or not valores["data_documento"]:
+                continue
+            delta = deltas[_celula(valores)]
+            for indice, parcela in enumerate(_medidas(valores)):
+                delta[indice] += sinal * parcela
+    alteradas = sorted((celula for celula, delta in deltas.items() if any(delta)), key=str)
+    if not alteradas:
+        return
+    with transaction.atomic():
+        # Ordem fixa das células: transações concorrentes não se bloqueiam em ciclo
+        for celula in alteradas:
+            _somar(celula, deltas[celula])
+
+
+def remover_dimensao(dimensao, pk):
+    """Move as células de uma secretaria ou recurso excluído para as células sem ele.
+
+    Chamado antes da exclusão (os documentos ficam com a chave nula por
+    SET_NULL): as medidas somam na célula de mesma combinação sem a dimensão,
+    em vez de o SET_NULL criar uma segunda linha que viola ``celula_cubo_unica``.
+
+    Args:
+        dimensao: "secretaria" ou "recurso".
+        pk: Id do registro que será excluído.
+    """
+    campo = f"{dimensao}_id"
+    with transaction.atomic():
+        celulas = list(
+            CelulaCubo.objects.select_for_update().filter(**{campo: pk}).order_by("pk")  # pylint: disable=no-member
+        )
+        for celula in celulas:
+            destino = tuple(
+                None if nome == campo else getattr(celula, nome) for nome in DIMENSOES_CELULA
+            )
+            celula.delete()
+            if celula.quantidade:
+                _somar(destino, tuple(getattr(celula, medida) for medida in MEDIDAS))
+
+
+def reconstruir():
+    """Refaz o cubo inteiro a partir dos documentos (tabela ativa e arquivo).
+
+    Returns:
+        int: Quantidade de células gravadas.
+    """
+    with transaction.atomic():
+        CelulaCubo.objects.all().delete()  # pylint: disable=no-member
+        celulas = CelulaCubo.objects.bulk_create(  # pylint: disable=no-member
+            _celulas(ConsultaCombinada()), batch_size=TAMANHO_LOTE
+        )
+    invalidar()
+    logger.info("Cubo de documentos reconstruído: %s célula(s)", len(celulas))
+    return len(celulas)
+
+
+def _dividir_periodo(data_inicio, data_fim):
+    """Separa o período em meses inteiros (cubo) e bordas (documentos).
+
+    Returns:
+        tuple: ``(meses, bordas)``, em que ``meses`` é ``(primeiro_mes,
+        mes_final_exclusivo)`` ou None e ``bordas`` é uma lista de períodos
+        ``(inicio, fim)`` com as datas inclusivas.
+    """
+    inicio = data_inicio
+    if data_inicio and data_inicio.day != 1:
+        inicio = _mes_seguinte(data_inicio)
+    fim = None
+    if data_fim:
+        seguinte = data_fim + datetime.timedelta(days=1)
+        fim = seguinte if seguinte.day == 1 else _inicio_mes(data_fim)
+
+    if inicio and fim and inicio >= fim:
+        return None, [(data_inicio, data_fim)]
+
+    bordas = []
+    if data_inicio and data_inicio < inicio:
+        bordas.append((data_inicio, inicio - datetime.timedelta(days=1)))
+    if data_fim and fim <= data_fim:
+        bordas.append((fim, data_fim))
+    return (inicio, fim), bordas
+
+
+def _validar(dimensoes, filtros):
+    for nome in (*dimensoes, *(filtro.split("__")[0] for filtro in filtros)):
+        if nome not in DIMENSOES:
+            raise ValueError(f"Dimensão desconhecida no cubo: {nome}")
+    if any(filtro.split("__")[0] == "mes" for filtro in filtros):
+        raise ValueError("Use data_inicio e data_fim para filtrar por período.")
+
+
+def pivot(*dimensoes, data_inicio=None, data_fim=None, **filtros):
+    """Agrupa os documentos pelas dimensões informadas.
+
+    Args:
+        *dimensoes: Nomes de ``DIMENSOES`` (nenhum = total geral).
+        data_inicio: Início do período (inclusivo).
+        data_fim: Fim do período (inclusivo).
+        **filtros: Filtros sobre as dimensões, ex.: ``status="PAG"``,
+            ``secretaria=3``, ``tipo__in=["NF", "NFS"]``.
+
+    Returns:
+        list[dict]: Um dicionário por grupo com as dimensões (secretaria e
+        recurso como ids) e as ``MEDIDAS``, ordenado pelas dimensões.
+    """
+    _validar(dimensoes, filtros)
+    meses, bordas = _dividir_periodo(_como_data(data_inicio), _como_data(data_fim))
+
+    parciais = []
+    if meses:
+        celulas = CelulaCubo.objects.filter(**filtros)  # pylint: disable=no-member
+        if meses[0]:
+            celulas = celulas.filter(mes__gte=meses[0])
+        if meses[1]:
+            celulas = celulas.filter(mes__lt=meses[1])
+        somas = {medida: Sum(medida) for medida in MEDIDAS}
+        if dimensoes:
+            # Consulta mais frequente dos relatórios: preparada no servidor
+            agrupadas = celulas.values(*dimensoes).annotate(**somas).order_by()
+            parciais.extend(valores_preparados(agrupadas))
+        else:
+            parciais.append(celulas.aggregate(**somas))
+
+    for inicio, fim in bordas:
+        documentos = ConsultaCombinada(inicio, fim).filter(**filtros)
+        if "mes" in dimensoes:
+            documentos = documentos.annotate(mes=TruncMonth("data_documento"))
+        if dimensoes:
+            parciais.extend(documentos.agrupar(*dimensoes, **AGREGACOES_DOCUMENTOS))
+        else:
+            parciais.append(documentos.aggregate(**AGREGACOES_DOCUMENTOS))
+
+    grupos = {}
+    for linha in parciais:
+        chave = tuple(linha[dimensao] for dimensao in dimensoes)
+        grupo = grupos.setdefault(
+            chave, {**dict(zip(dimensoes, chave, strict=True)), **dict.fromkeys(MEDIDAS, 0)}
+        )
+        for medida in MEDIDAS:
+            grupo[medida] += linha[medida] or 0
+    if not dimensoes and not grupos:
+        grupos[()] = dict.fromkeys(MEDIDAS, 0)
+
+    return [
+        grupos[chave]
+        for chave in sorted(
+            grupos, key=lambda c: tuple((v is None, v if v is not None else 0) for v in c)
+        )
+        if grupos[chave]["quantidade"] or not dimensoes
+    ]
+
+
+def total(data_inicio=None, data_fim=None, **filtros):
+    """Atalho para ``pivot`` sem dimensões: retorna o dicionário de medidas."""
+    return pivot(data_inicio=data_inicio, data_fim=data_fim, **filtros)[0]
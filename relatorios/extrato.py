@@ -0,0 +1,152 @@
+"""Extrato de conta do fornecedor.
+
+Lista os documentos do fornecedor em ordem de data com os valores de cada um
+(bruto, retenções, pago e a pagar) e os saldos acumulados. Os acumulados são
+calculados pelo banco com funções de janela (``SUM(...) OVER (ORDER BY
+data_documento, id)``) e as linhas são lidas em lotes com ``iterator()``, sem
+carregar o extrato inteiro em memória.
+
+Quando o período alcança exercícios fechados, cada tabela (ativa e arquivo)
+calcula os próprios acumulados e as duas sequências são intercaladas por data:
+o saldo de cada linha é a soma do último acumulado de cada tabela. Com
+``data_inicio``, os totais anteriores ao período entram como saldo anterior.
+"""
+
+import datetime
+import heapq
+from decimal import Decimal
+from itertools import islice
+
+from django.db.models import Case, DecimalField, F, Sum, Value, When, Window
+from django.utils.functional import cached_property
+
+from documentos.arquivo import ConsultaCombinada
+
+TAMANHO_LOTE = 2000
+CAMPOS = (
+    "id",
+    "data_documento",
+    "numero",
+    "numero_documento",
+    "tipo",
+    "status",
+    "valor_documento",
+    "valor_liquido",
+)
+# Valor de cada documento que compõe os saldos do extrato
+VALORES = {
+    "bruto": F("valor_documento"),
+    "retencoes": F("valor_iss") + F("valor_irrf"),
+    "pago": Case(When(status="PAG", then=F("valor_documento")), default=Value(Decimal("0"))),
+    "pendente": Case(When(status="PAG", then=Value(Decimal("0"))), default=F("valor_documento")),
+}
+SALDOS = tuple(f"{nome}_acumulado" for nome in VALORES)
+ORDENACAO = ("data_documento", "id")
+CENTAVOS = Decimal("0.01")
+
+
+def _decimal():
+    return DecimalField(max_digits=16, decimal_places=2)
+
+
+def _linhas_com_saldo(queryset):
+    """Linhas da tabela com os valores do documento e os acumulados (janela)."""
+    ordem = [F(campo).asc() for campo in ORDENACAO]
+    return (
+        queryset.annotate(**VALORES)
+        .annotate(
+            **{
+                saldo: Window(Sum(nome), order_by=ordem, output_field=_decimal())
+                for nome, saldo in zip(VALORES, SALDOS, strict=True)
+            }
+        )
+        .values(*CAMPOS, *VALORES, *SALDOS)
+        .order_by(*ORDENACAO)
+    )
+
+
+def _marcar(sequencia, indice):
+    for linha in sequencia:
+        yield linha, indice
+
+
+class Extrato:
+    """Extrato de um fornecedor em um período (datas opcionais e inclusivas).
+
+    Iterar sobre o extrato produz um dicionário por documento com os
+    ``CAMPOS``, os valores (bruto, retencoes, pago, pendente) e os saldos
+    acumulados (bruto_acumulado, ...). Aceita ``count()`` e fatiamento, e
+    pode ser usado diretamente com ``Paginator``.
+    """
+
+    def __init__(self, fornecedor, data_inicio=None, data_fim=None):
+        self.fornecedor = fornecedor
+        self.data_inicio = data_inicio
+        self.data_fim = data_fim
+
+    @cached_property
+    def consulta(self):
+        return ConsultaCombinada(self.data_inicio, self.data_fim).filter(fornecedor=self.fornecedor)
+
+    @cached_property
+    def saldo_anterior(self):
+        """Acumulados dos documentos anteriores a ``data_inicio``."""
+        if not self.data_inicio:
+            return dict.fromkeys(SALDOS, Decimal("0"))
+        anteriores = ConsultaCombinada(
+            data_fim=self.data_inicio - datetime.timedelta(days=1)
+        ).filter(fornecedor=self.fornecedor)
+        return self._somas(anteriores)
+
+    @cached_property
+    def saldo_final(self):
+        """Acumulados ao fim do período (saldo anterior incluído)."""
+        periodo = self._somas(self.consulta)
+        return {saldo: self.saldo_anterior[saldo] + periodo[saldo] for saldo in SALDOS}
+
+    @staticmethod
+    def _somas(consulta):
+        totais = consulta.aggregate(
+            **{
+                saldo: Sum(expressao, output_field=_decimal())
+                for expressao, saldo in zip(VALORES.values(), SALDOS, strict=True)
+            }
+        )
+        return {saldo: Decimal(totais[saldo] or 0).quantize(CENTAVOS) for saldo in SALDOS}
+
+    def count(self):
+        return self.consulta.count()
+
+    def _linhas(self, sequencias):
+        """Soma aos acumulados de cada linha o saldo anterior e o das outras tabelas.
+
+        Os valores calculados são arredondados a centavos: expressões e janelas
+        não preservam a escala do campo em todos os bancos.
+        """
+        ultimos = [dict.fromkeys(SALDOS, Decimal("0")) for _ in sequencias]
+        marcadas = [_marcar(sequencia, indice) for indice, sequencia in enumerate(sequencias)]
+        for linha, indice in heapq.merge(
+            *marcadas, key=lambda item: tuple(item[0][campo] for campo in ORDENACAO)
+        ):
+            ultimos[indice] = {saldo: linha[saldo] for saldo in SALDOS}
+            for saldo in SALDOS:
+                linha[saldo] = self.saldo_anterior[saldo] + sum(
+                    (ultimo[saldo] for ultimo in ultimos), Decimal("0")
+                )
+            for nome in (*VALORES, *SALDOS):
+                linha[nome] = Decimal(linha[nome]).quantize(CENTAVOS)
+            yield linha
+
+    def __iter__(self):
+        return self._linhas(
+            [_linhas_com_saldo(qs).iterator(chunk_size=TAMANHO_LOTE) for qs in self.consulta.querysets]
+        )
+
+    def __getitem__(self, fatia):
+        if not isinstance(fatia, slice):
+            raise TypeError("O extrato aceita apenas fatiamento.")
+        querysets = self.consulta.querysets
+        if len(querysets) == 1:
+            # A janela é calculada antes do LIMIT/OFFSET: a página sai pronta do banco
+            return list(self._linhas([_linhas_com_saldo(querysets[0])[fatia]]))
+        return list(islice(iter(self), fatia.start, fatia.stop, fatia.step))
@@ -0,0 +1,171 @@
+"""Filtros comuns dos relatórios e exportações.
+
+``FiltroRelatorio`` lê e valida uma única vez os parâmetros ``data_inicio``,
+``data_fim``, ``status``, ``secretaria`` e ``recurso`` da requisição e os
+aplica às consultas. ``resumo`` calcula todos os totais do período (valores,
+quantidades e totais por status) em um único ``aggregate()`` com agregações
+condicionais (``filter=Q(...)``).
+"""
+
+import datetime
+import logging
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from documentos.arquivo import ConsultaCombinada
+from documentos.models import Documento
+
+logger = logging.getLogger(__name__)
+
+FORMATO_DATA = "%Y-%m-%d"
+STATUS_VALIDOS = dict(Documento.STATUS_CHOICES)
+# Nome usado no resumo para cada status
+NOMES_STATUS = {"PEN": "pendentes", "PAG": "pagos", "ATR": "atrasados"}
+
+
+def _agregacoes_resumo():
+    agregacoes = {
+        "quantidade": Count("id"),
+        "total_bruto": Sum("valor_documento"),
+        "total_iss": Sum("valor_iss"),
+        "total_irrf": Sum("valor_irrf"),
+        "total_liquido": Sum("valor_liquido"),
+    }
+    for status, nome in NOMES_STATUS.items():
+        agregacoes[nome] = Count("id", filter=Q(status=status))
+        agregacoes[f"valor_{nome}"] = Sum("valor_documento", filter=Q(status=status))
+    return agregacoes
+
+
+class FiltroRelatorio:
+    """Parâmetros de filtro de um relatório, já convertidos e validados.
+
+    Attributes:
+        data_inicio, data_fim: Período (``datetime.date`` ou None).
+        status: Código do status ("" = todos).
+        secretaria, recurso: Ids (int) ou None.
+        erros: Mensagens dos parâmetros inválidos, que foram ignorados.
+    """
+
+    def __init__(self, data_inicio=None, data_fim=None, status="", secretaria=None, recurso=None):
+        self.data_inicio = data_inicio
+        self.data_fim = data_fim
+        self.status = status
+        self.secretaria = secretaria
+        self.recurso = recurso
+        self.erros = []
+
+    @classmethod
+    def do_request(cls, request, padrao_mes_atual=False):
+        """Monta o filtro a partir dos parâmetros GET.
+
+        Args:
+            request: Requisição do relatório.
+            padrao_mes_atual: Sem datas informadas, usa do início do mês atual até hoje.
+        """
+        filtro = cls()
+        parametros = request.GET
+        filtro.data_inicio = filtro._data(parametros.get("data_inicio", ""), "data_inicio")
+        filtro.data_fim = filtro._data(parametros.get("data_fim", ""), "data_fim")
+        if padrao_mes_atual:
+            hoje = timezone.localdate()
+            filtro.data_inicio = filtro.data_inicio or hoje.replace(day=1)
+            filtro.data_fim = filtro.data_fim or hoje
+
+        status = parametros.get("status", "")
+        if status and status not in STATUS_VALIDOS:
+            filtro._erro("status", status)
+            status = ""
+        filtro.status = status
+
+        filtro.secretaria = filtro._id(parametros.get("secretaria", ""), "secretaria")
+        filtro.recurso = filtro._id(parametros.get("recurso", ""), "recurso")
+        return filtro
+
+    def _erro(self, parametro, valor):
+        logger.error("Valor inválido para %s: %s", parametro, valor)
+        self.erros.append(f"Valor inválido para {parametro}: {valor}")
+
+    def _data(self, valor, parametro):
+        if not valor:
+            return None
+        try:
+            return datetime.datetime.strptime(valor, FORMATO_DATA).date()
+        except ValueError:
+            self._erro(parametro, valor)
+            return None
+
+    def _id(self, valor, parametro):
+        if not valor:
+            return None
+        if not str(valor).isdigit():
+            self._erro(parametro, valor)
+            return None
+        return int(valor)
+
+    def condicoes(self):
+        """Filtros sobre os campos de Documento, para ``filter(**condicoes)``."""
+        condicoes = {}
+        if self.data_inicio:
+            condicoes["data_documento__gte"] = self.data_inicio
+        if self.data_fim:
+            condicoes["data_documento__lte"] = self.data_fim
+        if self.status:
+            condicoes["status"] = self.status
+        if self.secretaria:
+            condicoes["secretaria_id"] = self.secretaria
+        if self.recurso:
+            condicoes["recurso_id"] = self.recurso
+        return condicoes
+
+    def aplicar(self, queryset):
+        """Aplica o filtro a um QuerySet de documentos."""
+        return queryset.filter(**self.condicoes())
+
+    def consulta(self):
+        """Documentos filtrados, incluindo o arquivo se o período alcançar exercícios fechados."""
+        return ConsultaCombinada(self.data_inicio, self.data_fim).filter(**self.condicoes())
+
+    def filtros_cubo(self):
+        """Argumentos equivalentes para ``relatorios.cubo.pivot``."""
+        filtros = {"data_inicio": self.data_inicio, "data_fim": self.data_fim}
+        if self.status:
+            filtros["status"] = self.status
+        if self.secretaria:
+            filtros["secretaria"] = self.secretaria
+        if self.recurso:
+            filtros["recurso"] = self.recurso
+        return filtros
+
+    def resumo(self, documentos=None):
+        """Totais do período em uma única consulta de agregação.
+
+        Args:
+            documentos: QuerySet ou ConsultaCombinada (padrão: ``consulta()``).
+
+        Returns:
+            dict: quantidade, total_bruto, total_iss, total_irrf, total_liquido,
+            quantidade e valor por status (pendentes, valor_pendentes, ...) e
+            percentual de cada status (perc_pendentes, ...).
+        """
+        documentos = self.consulta() if documentos is None else documentos
+        resumo = {
+            nome: valor or 0
+            for nome, valor in documentos.aggregate(**_agregacoes_resumo()).items()
+        }
+        for nome in NOMES_STATUS.values():
+            resumo[f"perc_{nome}"] = (
+                resumo[nome] / resumo["quantidade"] * 100 if resumo["quantidade"] else 0
+            )
+        return resumo
+
+    def contexto(self):
+        """Valores dos filtros para os formulários dos templates."""
+        return {
+            "data_inicio": self.data_inicio.strftime(FORMATO_DATA) if self.data_inicio else "",
+            "data_fim": self.data_fim.strftime(FORMATO_DATA) if self.data_fim else "",
+            "status_selecionado": self.status,
+            "secretaria_selecionada": self.secretaria or "",
+            "recurso_selecionado": self.recurso or "",
+        }
@@ -0,0 +1,253 @@
+"""Análise do fluxo de documentos pelas etapas do processo.
+
+``PermanenciaEtapa`` materializa o histórico de etapas como períodos: cada
+registro de ``HistoricoDocumento`` abre a permanência do documento na etapa e
+o registro seguinte a encerra. O registro anterior de cada linha vem de uma
+função de janela (``LAG(...) OVER (PARTITION BY documento ORDER BY
+data_hora)``).
+
+A materialização é incremental: ``atualizar`` processa apenas os registros de
+histórico com id acima do último já materializado, lendo o histórico somente
+dos documentos afetados, e encerra as permanências que eles sucedem.
+``reconstruir`` refaz tudo (tabela ativa e arquivo).
+
+Consultas: ``duracoes_por_etapa`` (mediana e p90 do tempo em cada etapa) e
+``fluxo_semanal`` (vazão e estoque por secretaria e semana).
+"""
+
+import datetime
+import logging
+import math
+from itertools import pairwise
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Window
+from django.db.models.functions import Lag
+from django.utils import timezone
+
+from documentos.models import Documento, HistoricoDocumento, HistoricoDocumentoArquivado
+
+from .models import PermanenciaEtapa
+
+logger = logging.getLogger(__name__)
+
+ETAPA_FINAL = "BAIXA"
+TAMANHO_LOTE = 2000
+
+
+def _historicos(modelo, documentos):
+    """Histórico dos documentos com o registro anterior de cada linha (LAG)."""
+    janela = {
+        "partition_by": [F("documento_id")],
+        "order_by": [F("data_hora").asc(), F("id").asc()],
+    }
+    return (
+        modelo.objects.filter(documento_id__in=documentos)  # pylint: disable=no-member
+        .annotate(
+            anterior=Window(Lag("id"), **janela),
+            entrada_anterior=Window(Lag("data_hora"), **janela),
+        )
+        .values(
+            "id",
+            "documento_id",
+            "etapa",
+            "data_hora",
+            "anterior",
+            "entrada_anterior",
+            secretaria=F("documento__secretaria_id"),
+        )
+        .order_by()
+    )
+
+
+def _materializar(modelo, documentos, novos=None):
+    """Grava as permanências abertas pelos registros ``novos`` e encerra as anteriores.
+
+    Args:
+        modelo: HistoricoDocumento ou HistoricoDocumentoArquivado.
+        documentos: Ids dos documentos afetados (o LAG precisa do histórico completo de cada um).
+        novos: Ids dos registros ainda não materializados (None = todos).
+
+    Returns:
+        int: Quantidade de permanências criadas.
+    """
+    criadas, encerradas = {}, []
+    for linha in _historicos(modelo, documentos):
+        if novos is not None and linha["id"] not in novos:
+            continue
+        criadas[linha["id"]] = PermanenciaEtapa(
+            historico=linha["id"],
+            documento=linha["documento_id"],
+            secretaria_id=linha["secretaria"],
+            etapa=linha["etapa"],
+            entrada=linha["data_hora"],
+        )
+        if linha["anterior"] is not None:
+            encerradas.append(
+                (linha["anterior"], linha["data_hora"], linha["data_hora"] - linha["entrada_anterior"])
+            )
+
+    atualizadas = []
+    for historico, saida, duracao in encerradas:
+        permanencia = criadas.get(historico) or PermanenciaEtapa(historico=historico)
+        permanencia.saida, permanencia.duracao = saida, duracao
+        if historico not in criadas:
+            atualizadas.append(permanencia)
+
+    with transaction.atomic():
+        PermanenciaEtapa.objects.bulk_create(criadas.values(), batch_size=TAMANHO_LOTE)  # pylint: disable=no-member
+        PermanenciaEtapa.objects.bulk_update(  # pylint: disable=no-member
+            atualizadas, ["saida", "duracao"], batch_size=TAMANHO_LOTE
+        )
+    return len(criadas)
+
+
+def atualizar(tamanho_lote=TAMANHO_LOTE):
+    """Materializa os registros de histórico criados desde a última execução.
+
+    Returns:
+        int: Quantidade de permanências criadas.
+    """
+    marca = PermanenciaEtapa.objects.aggregate(marca=Max("historico"))["marca"] or 0  # pylint: disable=no-member
+    total = 0
+    while True:
+        lote = list(
+            HistoricoDocumento.objects.filter(id__gt=marca)  # pylint: disable=no-member
+            .order_by("id")
+            .values_list("id", "documento_id")[:tamanho_lote]
+        )
+        if not lote:
+            break
+        total += _materializar(
+            HistoricoDocumento,
+            {documento for _, documento in lote},
+            {historico for historico, _ in lote},
+        )
+        marca = lote[-1][0]
+    if total:
+        logger.info("Permanências em etapas atualizadas: %s registro(s) novo(s)", total)
+    return total
+
+
+def reconstruir(tamanho_lote=TAMANHO_LOTE):
+    """Refaz as permanências a partir de todo o histórico (tabela ativa e arquivo).
+
+    Returns:
+        int: Quantidade de permanências gravadas.
+    """
+    total = 0
+    with transaction.atomic():
+        PermanenciaEtapa.objects.all().delete()  # pylint: disable=no-member
+        for modelo in (HistoricoDocumento, HistoricoDocumentoArquivado):
+            documentos = list(
+                modelo.objects.order_by("documento_id")  # pylint: disable=no-member
+                .values_list("documento_id", flat=True)
+                .distinct()
+            )
+            for inicio in range(0, len(documentos), tamanho_lote):
+                total += _materializar(modelo, documentos[inicio : inicio + tamanho_lote])
+    logger.info("Permanências em etapas reconstruídas: %s registro(s)", total)
+    return total
+
+
+def _percentil(duracoes, quantidade, percentual):
+    # Método do posto mais próximo: um OFFSET sobre o índice (etapa, duracao)
+    return duracoes[max(math.ceil(percentual / 100 * quantidade) - 1, 0)]
+
+
+def duracoes_por_etapa(**filtros):
+    """Mediana e p90 do tempo de permanência em cada etapa (períodos encerrados).
+
+    Args:
+        **filtros: Filtros sobre ``PermanenciaEtapa``, ex.: ``secretaria=3``,
+            ``entrada__gte=...``.
+
+    Returns:
+        list[dict]: Uma linha por etapa com etapa, nome, concluidos,
+        em_andamento, mediana e p90 (``timedelta`` ou None).
+    """
+    permanencias = PermanenciaEtapa.objects.filter(**filtros)  # pylint: disable=no-member
+    contagens = {
+        linha["etapa"]: linha
+        for linha in permanencias.values("etapa")
+        .annotate(
+            concluidos=Count("pk", filter=Q(duracao__isnull=False)),
+            em_andamento=Count("pk", filter=Q(saida__isnull=True)),
+        )
+        .order_by()
+    }
+
+    resultado = []
+    for etapa, nome in Documento.ETAPA_CHOICES:
+        contagem = contagens.get(etapa, {"concluidos": 0, "em_andamento": 0})
+        linha = {
+            "etapa": etapa,
+            "nome": nome,
+            "concluidos": contagem["concluidos"],
+            "em_andamento": contagem["em_andamento"],
+            "mediana": None,
+            "p90": None,
+        }
+        if contagem["concluidos"]:
+            duracoes = (
+                permanencias.filter(etapa=etapa, duracao__isnull=False)
+                .order_by("duracao")
+                .values_list("duracao", flat=True)
+            )
+            linha["mediana"] = _percentil(duracoes, contagem["concluidos"], 50)
+            linha["p90"] = _percentil(duracoes, contagem["concluidos"], 90)
+        resultado.append(linha)
+    return resultado
+
+
+def _meia_noite(data):
+    return timezone.make_aware(datetime.datetime.combine(data, datetime.time.min))
+
+
+def fluxo_semanal(semanas=8, hoje=None, **filtros):
+    """Vazão e estoque por secretaria nas últimas semanas, em uma consulta.
+
+    Vazão é a quantidade de documentos que chegaram à etapa final na semana;
+    estoque é a quantidade de documentos fora da etapa final ao fim da semana.
+
+    Args:
+        semanas: Quantidade de semanas (a atual incluída), de segunda a domingo.
+        hoje: Data de referência (padrão: hoje).
+        **filtros: Filtros sobre ``PermanenciaEtapa``, ex.: ``secretaria=3``.
+
+    Returns:
+        tuple: ``(inicios, linhas)``, com as datas de início das semanas e uma
+        linha por secretaria (``secretaria`` com o id ou None, ``vazao`` e
+        ``estoque`` com uma quantidade por semana).
+    """
+    hoje = hoje or timezone.localdate()
+    atual = hoje - datetime.timedelta(days=hoje.weekday())
+    inicios = [atual - datetime.timedelta(weeks=i) for i in reversed(range(semanas))]
+    limites = [_meia_noite(inicio) for inicio in (*inicios, atual + datetime.timedelta(weeks=1))]
+
+    agregacoes = {}
+    for i, (comeco, fim) in enumerate(pairwise(limites)):
+        agregacoes[f"vazao_{i}"] = Count(
+            "pk", filter=Q(etapa=ETAPA_FINAL, entrada__gte=comeco, entrada__lt=fim)
+        )
+        agregacoes[f"estoque_{i}"] = Count(
+            "pk",
+            filter=~Q(etapa=ETAPA_FINAL)
+            & Q(entrada__lt=fim)
+            & (Q(saida__isnull=True) | Q(saida__gte=fim)),
+        )
+
+    # Só interessam períodos que alcançam o intervalo consultado
+    periodos = PermanenciaEtapa.objects.filter(  # pylint: disable=no-member
+        Q(saida__isnull=True) | Q(saida__gte=limites[0]), entrada__lt=limites[-1], **filtros
+    )
+    linhas = []
+    for linha in periodos.values("secretaria").annotate(**agregacoes).order_by("secretaria"):
+        linhas.append(
+            {
+                "secretaria": linha["secretaria"],
+                "vazao": [linha[f"vazao_{i}"] for i in range(semanas)],
+                "estoque": [linha[f"estoque_{i}"] for i in range(semanas)],
+            }
+        )
+    return inicios, linhas
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from relatorios.fluxo import atualizar, reconstruir
+
+
+class Command(BaseCommand):
+    help = "Materializa as permanências dos documentos em cada etapa a partir do histórico."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--completo",
+            action="store_true",
+            help="Refaz todas as permanências em vez de processar apenas os históricos novos",
+        )
+
+    def handle(self, *args, **options):
+        if options["completo"]:
+            total = reconstruir()
+            self.stdout.write(self.style.SUCCESS(f"Permanências reconstruídas: {total} registro(s)."))
+        else:
+            total = atualizar()
+            self.stdout.write(self.style.SUCCESS(f"{total} permanência(s) nova(s)."))
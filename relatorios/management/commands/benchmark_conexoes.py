@@ -0,0 +1,132 @@
+import copy
+import io
+import statistics
+import sys
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+
+URLS_PADRAO = ("/relatorios/", "/relatorios/dados-grafico/", "/relatorios/financeiro/")
+
+
+def cookie_sessao(usuario=None):
+    """Cabeçalho ``Cookie`` de uma sessão logada (padrão: um superusuário)."""
+    filtro = {"username": usuario} if usuario else {"is_superuser": True}
+    user = User.objects.filter(is_active=True, **filtro).first()
+    if user is None:
+        raise CommandError("Usuário não encontrado (informe --usuario).")
+    cliente = Client()
+    cliente.force_login(user)
+    sessao = cliente.cookies[settings.SESSION_COOKIE_NAME].value
+    return f"{settings.SESSION_COOKIE_NAME}={sessao}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a latência de requests aos relatórios com conexão nova por request, "
+        "conexão persistente por processo e pool do psycopg 3 (PostgreSQL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "urls", nargs="*", default=URLS_PADRAO, help="Caminhos a requisitar"
+        )
+        parser.add_argument(
+            "--requests", type=int, default=200, help="Requests por modo"
+        )
+        parser.add_argument(
+            "--usuario", help="Usuário logado nos requests (padrão: um superusuário)"
+        )
+
+    def handle(self, *args, **options):
+        base = copy.deepcopy(settings.DATABASES["default"])
+        if base["ENGINE"] != "django.db.backends.postgresql":
+            raise CommandError("O benchmark requer o PostgreSQL (DATABASE_URL).")
+        pool = base["OPTIONS"].pop("pool", None) or {"min_size": 1, "max_size": 4}
+        base["OPTIONS"].pop("prepare_threshold", None)
+        modos = {
+            # Como uma função serverless a cada invocação fria
+            "conexao_por_request": {**base, "CONN_MAX_AGE": 0},
+            # Configuração anterior: dj_database_url com conn_max_age=600
+            "persistente": {**base, "CONN_MAX_AGE": 600},
+            "pool": {
+                **base,
+                "CONN_MAX_AGE": 0,
+                "OPTIONS": {**base["OPTIONS"], "pool": pool, "prepare_threshold": 0},
+            },
+        }
+
+        cookie = cookie_sessao(options["usuario"])
+        aplicacao = WSGIHandler()
+        original = connections.settings["default"]
+        try:
+            for nome, banco in modos.items():
+                self._configurar(banco)
+                # Aquecimento: imports, primeira conexão e statements preparados
+                for url in options["urls"]:
+                    self._request(aplicacao, url, cookie)
+                tempos = []
+                for indice in range(options["requests"]):
+                    url = options["urls"][indice % len(options["urls"])]
+                    cache.clear()  # mede o acesso ao banco, não o cache dos relatórios
+                    inicio = time.perf_counter()
+                    self._request(aplicacao, url, cookie)
+                    tempos.append((time.perf_counter() - inicio) * 1000)
+                self._relatorio(nome, tempos)
+        finally:
+            self._configurar(original)
+
+    @staticmethod
+    def _configurar(banco):
+        conexao = connections["default"]
+        conexao.close()
+        if getattr(conexao, "pool", None) is not None:
+            conexao.close_pool()
+        connections.settings["default"] = connections.configure_settings(
+            {"default": banco}
+        )["default"]
+        del connections["default"]
+
+    @staticmethod
+    def _request(aplicacao, url, cookie):
+        caminho, _, consulta = url.partition("?")
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": caminho,
+            "QUERY_STRING": consulta,
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "80",
+            "HTTP_HOST": "localhost",
+            "HTTP_COOKIE": cookie,
+            "wsgi.input": io.BytesIO(),
+            "wsgi.errors": sys.stderr,
+            "wsgi.url_scheme": "http",
+        }
+        estado = {}
+
+        def start_response(status, _cabecalhos, _exc_info=None):
+            estado["status"] = status
+
+        resposta = aplicacao(environ, start_response)
+        try:
+            for _ in resposta:
+                pass
+        finally:
+            # Fim do request: dispara request_finished (devolve/fecha a conexão)
+            resposta.close()
+        if not estado["status"].startswith("200"):
+            raise CommandError(f"{url}: {estado['status']}")
+
+    def _relatorio(self, nome, tempos):
+        tempos.sort()
+        p95 = tempos[max(int(len(tempos) * 0.95) - 1, 0)]
+        self.stdout.write(
+            f"{nome:<20} média {statistics.mean(tempos):7.2f} ms   "
+            f"p50 {statistics.median(tempos):7.2f} ms   p95 {p95:7.2f} ms"
+        )
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+
+from utils.inicializacao import MODULOS_SOB_DEMANDA, medir_inicializacao
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede a inicialização a frio (import do wsgi, apps, signals e URLs) com "
+        "python -X importtime e lista os módulos mais lentos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limite", type=int, default=25, help="Quantidade de módulos listados"
+        )
+        parser.add_argument(
+            "--repeticoes",
+            type=int,
+            default=3,
+            help="Medições (vale a mais rápida)",
+        )
+        parser.add_argument(
+            "--proprio",
+            action="store_true",
+            help="Ordena pelo tempo do próprio módulo, sem os que ele importa",
+        )
+
+    def handle(self, *args, **options):
+        medicao = medir_inicializacao(options["repeticoes"])
+        chave = "proprio" if options["proprio"] else "acumulado"
+        modulos = sorted(medicao["modulos"], key=lambda m: m[chave], reverse=True)
+
+        self.stdout.write(f"Inicialização a frio: {medicao['total']:.0f} ms\n")
+        self.stdout.write(f"{'acumulado':>10} {'próprio':>9}  módulo")
+        for modulo in modulos[: options["limite"]]:
+            self.stdout.write(
+                f"{modulo['acumulado']:8.1f}ms {modulo['proprio']:7.1f}ms  "
+                f"{modulo['modulo']}"
+            )
+
+        carregados = {modulo["modulo"] for modulo in medicao["modulos"]}
+        indevidos = [nome for nome in MODULOS_SOB_DEMANDA if nome in carregados]
+        if indevidos:
+            self.stdout.write(
+                self.style.WARNING(
+                    "Módulos de exportação importados na inicialização: "
+                    + ", ".join(indevidos)
+                )
+            )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from relatorios.cubo import reconstruir
+
+
+class Command(BaseCommand):
+    help = "Refaz o cubo de agregados de documentos usado pelos relatórios."
+
+    def handle(self, *args, **options):
+        total = reconstruir()
+        self.stdout.write(self.style.SUCCESS(f"Cubo reconstruído: {total} célula(s)."))
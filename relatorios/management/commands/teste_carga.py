@@ -0,0 +1,97 @@
+import http.client
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from documentos.models import Secretaria
+from fornecedores.models import Fornecedor
+
+from .benchmark_conexoes import cookie_sessao
+
+
+def _urls_padrao():
+    """Os endpoints JSON assíncronos, com uma secretaria e um fornecedor existentes."""
+    urls = [reverse("relatorios:dados_grafico")]
+    secretaria = Secretaria.objects.order_by("pk").first()  # pylint: disable=no-member
+    if secretaria is not None:
+        urls.append(reverse("documentos:recursos_por_secretaria", args=[secretaria.pk]))
+    fornecedor = Fornecedor.objects.order_by("pk").first()  # pylint: disable=no-member
+    if fornecedor is not None:
+        consulta = urlencode({"cnpj_cpf": fornecedor.cnpj_cpf})
+        urls.append(f"{reverse('documentos:buscar_fornecedor')}?{consulta}")
+    return urls
+
+
+class Command(BaseCommand):
+    help = (
+        "Teste de carga contra um servidor em execução: requests concorrentes aos "
+        "endpoints JSON, para comparar o gunicorn WSGI com o uvicorn (ASGI)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "urls", nargs="*", help="Caminhos a requisitar (padrão: endpoints JSON)"
+        )
+        parser.add_argument(
+            "--servidor",
+            default="http://127.0.0.1:8000",
+            help="Endereço do servidor em teste",
+        )
+        parser.add_argument(
+            "--concorrencia", type=int, default=32, help="Clientes simultâneos"
+        )
+        parser.add_argument(
+            "--requests", type=int, default=2000, help="Total de requests"
+        )
+        parser.add_argument(
+            "--usuario", help="Usuário logado nos requests (padrão: um superusuário)"
+        )
+
+    def handle(self, *args, **options):
+        servidor = urlsplit(options["servidor"])
+        urls = options["urls"] or _urls_padrao()
+        cookie = cookie_sessao(options["usuario"])
+        local = threading.local()
+
+        def requisitar(indice):
+            # Uma conexão keep-alive por cliente
+            if not hasattr(local, "conexao"):
+                local.conexao = http.client.HTTPConnection(
+                    servidor.hostname, servidor.port or 80, timeout=30
+                )
+            inicio = time.perf_counter()
+            try:
+                local.conexao.request(
+                    "GET", urls[indice % len(urls)], headers={"Cookie": cookie}
+                )
+                resposta = local.conexao.getresponse()
+                resposta.read()
+                ok = resposta.status == 200
+            except (OSError, http.client.HTTPException):
+                local.conexao.close()
+                ok = False
+            return (time.perf_counter() - inicio) * 1000, ok
+
+        # Aquecimento: um request por URL
+        with ThreadPoolExecutor(max_workers=options["concorrencia"]) as executor:
+            list(executor.map(requisitar, range(len(urls))))
+            inicio = time.perf_counter()
+            resultados = list(executor.map(requisitar, range(options["requests"])))
+            duracao = time.perf_counter() - inicio
+
+        tempos = sorted(tempo for tempo, ok in resultados if ok)
+        erros = len(resultados) - len(tempos)
+        if not tempos:
+            raise CommandError(f"Todos os requests falharam ({options['servidor']}).")
+        p95 = tempos[max(int(len(tempos) * 0.95) - 1, 0)]
+        self.stdout.write(
+            f"{len(resultados)} requests, concorrência {options['concorrencia']}: "
+            f"{len(resultados) / duracao:.0f} req/s   "
+            f"p50 {statistics.median(tempos):.1f} ms   p95 {p95:.1f} ms   "
+            f"erros {erros}"
+        )
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def preencher_cubo(apps, schema_editor):
+    CelulaCubo = apps.get_model("relatorios", "CelulaCubo")
+    dimensoes = ("mes", "secretaria", "recurso", "status", "tipo", "etapa")
+    for nome in ("Documento", "DocumentoArquivado"):
+        modelo = apps.get_model("documentos", nome)
+        linhas = (
+            modelo.objects.annotate(mes=TruncMonth("data_documento"))
+            .values(*dimensoes)
+            .annotate(
+                quantidade=Count("id"),
+                valor_bruto=Sum("valor_documento"),
+                valor_iss=Sum("valor_iss"),
+                valor_irrf=Sum("valor_irrf"),
+                valor_liquido=Sum("valor_liquido"),
+            )
+            .order_by()
+        )
+        CelulaCubo.objects.bulk_create(
+            (
+                CelulaCubo(
+                    **{f"{campo}_id" if campo in ("secretaria", "recurso") else campo: valor
+                       for campo, valor in linha.items()}
+                )
+                for linha in linhas
+            ),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('documentos', '0009_arquivo_exercicios'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CelulaCubo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(verbose_name='Mês')),
+                ('status', models.CharField(choices=[('PEN', 'Pendente'), ('PAG', 'Pago'), ('ATR', 'Atrasado')], max_length=3)),
+                ('tipo', models.CharField(choices=[('NF', 'Nota Fiscal'), ('NFS', 'Nota Fiscal de Serviço'), ('NFSA', 'Nota Fiscal de Serviço Avulsa'), ('FAT', 'Fatura'), ('REC', 'Recibo')], max_length=4)),
+                ('etapa', models.CharField(choices=[('ABERTURA', 'Abertura de Processo'), ('CONTROLE_INTERNO', 'Controle Interno'), ('EMPENHO', 'Empenho'), ('PAGAMENTO', 'Pagamento'), ('BAIXA', 'Baixa')], max_length=20)),
+                ('quantidade', models.PositiveIntegerField(default=0)),
+                ('valor_bruto', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('valor_iss', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('valor_irrf', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('valor_liquido', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('recurso', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='documentos.recurso')),
+                ('secretaria', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='documentos.secretaria')),
+            ],
+            options={
+                'verbose_name': 'Célula do Cubo',
+                'verbose_name_plural': 'Cubo de Documentos',
+                'indexes': [models.Index(fields=['mes', 'secretaria', 'recurso'], name='relatorios__mes_a05795_idx')],
+            },
+        ),
+        migrations.RunPython(preencher_cubo, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentos', '0011_indice_extrato_fornecedor'),
+        ('relatorios', '0001_cubo_documentos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PermanenciaEtapa',
+            fields=[
+                ('historico', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Histórico')),
+                ('documento', models.BigIntegerField(db_index=True, verbose_name='Documento')),
+                ('etapa', models.CharField(choices=[('ABERTURA', 'Abertura de Processo'), ('CONTROLE_INTERNO', 'Controle Interno'), ('EMPENHO', 'Empenho'), ('PAGAMENTO', 'Pagamento'), ('BAIXA', 'Baixa')], max_length=20)),
+                ('entrada', models.DateTimeField(verbose_name='Entrada')),
+                ('saida', models.DateTimeField(null=True, verbose_name='Saída')),
+                ('duracao', models.DurationField(null=True, verbose_name='Duração')),
+                ('secretaria', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='documentos.secretaria')),
+            ],
+            options={
+                'verbose_name': 'Permanência em Etapa',
+                'verbose_name_plural': 'Permanências em Etapas',
+                'indexes': [models.Index(fields=['etapa', 'duracao'], name='relatorios__etapa_0a39df_idx'), models.Index(fields=['secretaria', 'entrada'], name='relatorios__secreta_1a7b2b_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentos', '0012_etapa_desde'),
+        ('relatorios', '0002_permanencia_etapas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemSelecao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('documento', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='documentos.documento')),
+            ],
+            options={
+                'verbose_name': 'Item de Seleção',
+                'verbose_name_plural': 'Itens de Seleção',
+            },
+        ),
+        migrations.CreateModel(
+            name='SelecaoDocumentos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('destino', models.CharField(choices=[('controle_interno', 'Controle Interno'), ('contabilidade', 'Contabilidade')], max_length=20)),
+                ('criada_em', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Criada em')),
+                ('documentos', models.ManyToManyField(related_name='selecoes', through='relatorios.ItemSelecao', to='documentos.documento')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='selecoes_documentos', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Seleção de Documentos',
+                'verbose_name_plural': 'Seleções de Documentos',
+            },
+        ),
+        migrations.AddField(
+            model_name='itemselecao',
+            name='selecao',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='itens', to='relatorios.selecaodocumentos'),
+        ),
+        migrations.AddConstraint(
+            model_name='itemselecao',
+            constraint=models.UniqueConstraint(fields=('selecao', 'documento'), name='item_selecao_unico'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:55
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def mesclar_duplicadas(apps, schema_editor):
+    # Células repetidas (recálculos concorrentes, carga inicial de ativa + arquivo) viram uma só
+    CelulaCubo = apps.get_model("relatorios", "CelulaCubo")
+    dimensoes = ("mes", "secretaria", "recurso", "status", "tipo", "etapa")
+    medidas = ("quantidade", "valor_bruto", "valor_iss", "valor_irrf", "valor_liquido")
+    repetidas = (
+        CelulaCubo.objects.values(*dimensoes)
+        .annotate(linhas=Count("id"), manter=Min("id"), **{f"soma_{m}": Sum(m) for m in medidas})
+        .filter(linhas__gt=1)
+        .order_by()
+    )
+    for grupo in repetidas:
+        filtro = {campo: grupo[campo] for campo in dimensoes}
+        CelulaCubo.objects.filter(**filtro).exclude(pk=grupo["manter"]).delete()
+        CelulaCubo.objects.filter(pk=grupo["manter"]).update(
+            **{medida: grupo[f"soma_{medida}"] for medida in medidas}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentos', '0012_etapa_desde'),
+        ('relatorios', '0003_selecoes_documentos'),
+    ]
+
+    operations = [
+        migrations.RunPython(mesclar_duplicadas, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='celulacubo',
+            constraint=models.UniqueConstraint(models.F('mes'), django.db.models.functions.comparison.Coalesce('secretaria', models.Value(0)), django.db.models.functions.comparison.Coalesce('recurso', models.Value(0)), models.F('status'), models.F('tipo'), models.F('etapa'), name='celula_cubo_unica'),
+        ),
+    ]
@@ -1 +1,138 @@
-# Create your models here.
+from django.conf import settings
+from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+
+from documentos.models import Documento, Recurso, Secretaria
+
+
+class CelulaCubo(models.Model):
+    """Célula do cubo de agregados de documentos.
+
+    Cada linha guarda a quantidade e os totais dos documentos de uma combinação
+    de mês, secretaria, recurso, status, tipo e etapa (tabela ativa e arquivo).
+    É mantida por ``relatorios.cubo`` e não deve ser alterada manualmente.
+    """
+
+    mes = models.DateField(verbose_name="Mês")
+    secretaria = models.ForeignKey(
+        Secretaria, on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+    recurso = models.ForeignKey(
+        Recurso, on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+    status = models.CharField(max_length=3, choices=Documento.STATUS_CHOICES)
+    tipo = models.CharField(max_length=4, choices=Documento.TIPO_CHOICES)
+    etapa = models.CharField(max_length=20, choices=Documento.ETAPA_CHOICES)
+    quantidade = models.PositiveIntegerField(default=0)
+    valor_bruto = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    valor_iss = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    valor_irrf = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    valor_liquido = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=["mes", "secretaria", "recurso"])]
+        constraints = [
+            # Uma linha por célula: os deltas concorrentes somam na mesma linha.
+            # Coalesce: secretaria/recurso nulos também contam como iguais.
+            models.UniqueConstraint(
+                F("mes"),
+                Coalesce("secretaria", Value(0)),
+                Coalesce("recurso", Value(0)),
+                F("status"),
+                F("tipo"),
+                F("etapa"),
+                name="celula_cubo_unica",
+            )
+        ]
+        verbose_name = "Célula do Cubo"
+        verbose_name_plural = "Cubo de Documentos"
+
+    def __str__(self):
+        return f"{self.mes:%m/%Y} - {self.status}/{self.tipo}/{self.etapa}: {self.quantidade}"
+
+
+class PermanenciaEtapa(models.Model):
+    """Período em que um documento permaneceu em uma etapa do processo.
+
+    Cada linha corresponde a um registro de ``HistoricoDocumento`` (entrada na
+    etapa); a saída é o registro seguinte do mesmo documento e fica nula
+    enquanto o documento continua na etapa. Os ids são guardados sem chave
+    estrangeira para que as linhas sobrevivam ao arquivamento do exercício.
+    É mantida por ``relatorios.fluxo``.
+    """
+
+    historico = models.BigIntegerField(primary_key=True, verbose_name="Histórico")
+    documento = models.BigIntegerField(db_index=True, verbose_name="Documento")
+    secretaria = models.ForeignKey(
+        Secretaria, on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+    etapa = models.CharField(max_length=20, choices=Documento.ETAPA_CHOICES)
+    entrada = models.DateTimeField(verbose_name="Entrada")
+    saida = models.DateTimeField(null=True, verbose_name="Saída")
+    duracao = models.DurationField(null=True, verbose_name="Duração")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["etapa", "duracao"]),
+            models.Index(fields=["secretaria", "entrada"]),
+        ]
+        verbose_name = "Permanência em Etapa"
+        verbose_name_plural = "Permanências em Etapas"
+
+    def __str__(self):
+        return f"Documento {self.documento} - {self.etapa} desde {self.entrada:%d/%m/%Y %H:%M}"
+
+
+class SelecaoDocumentos(models.Model):
+    """Conjunto de documentos selecionados para um relatório de encaminhamento.
+
+    A seleção fica no servidor e os relatórios recebem apenas o id
+    (``?selecao=``), em vez de repetir os ids dos documentos na URL. É
+    preenchida por ``relatorios.selecoes`` e descartada após alguns dias.
+    """
+
+    DESTINO_CHOICES = (
+        ("controle_interno", "Controle Interno"),
+        ("contabilidade", "Contabilidade"),
+    )
+
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="selecoes_documentos"
+    )
+    destino = models.CharField(max_length=20, choices=DESTINO_CHOICES)
+    criada_em = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Criada em")
+    documentos = models.ManyToManyField(
+        Documento, through="ItemSelecao", related_name="selecoes"
+    )
+
+    class Meta:
+        verbose_name = "Seleção de Documentos"
+        verbose_name_plural = "Seleções de Documentos"
+
+    def __str__(self):
+        return f"Seleção {self.pk} - {self.get_destino_display()} ({self.criada_em:%d/%m/%Y %H:%M})"
+
+
+class ItemSelecao(models.Model):
+    """Documento de uma ``SelecaoDocumentos``.
+
+    A chave estrangeira não tem restrição no banco para não impedir o
+    arquivamento do exercício: o documento arquivado mantém o id e a seleção
+    passa a lê-lo do arquivo (``selecoes.documentos_da_selecao``).
+    """
+
+    selecao = models.ForeignKey(SelecaoDocumentos, on_delete=models.CASCADE, related_name="itens")
+    documento = models.ForeignKey(
+        Documento, on_delete=models.CASCADE, db_constraint=False, related_name="+"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["selecao", "documento"], name="item_selecao_unico")
+        ]
+        verbose_name = "Item de Seleção"
+        verbose_name_plural = "Itens de Seleção"
+
+    def __str__(self):
+        return f"Seleção {self.selecao_id} - Documento {self.documento_id}"
@@ -0,0 +1,185 @@
+"""Atualizações ao vivo do dashboard por Server-Sent Events (SSE).
+
+O dashboard abre uma conexão SSE (``relatorios:eventos_painel``) em vez de
+consultar ``dados_grafico`` periodicamente. Quando um ``Documento`` é salvo ou
+excluído, o signal de ``relatorios.signals`` agenda ``publicador.atualizar`` para
+depois do commit: os dados do painel são calculados uma única vez (e gravados
+no cache dos relatórios) e cada cliente conectado recebe só as seções que
+mudaram. Sem clientes conectados, nada é calculado.
+
+O pub/sub é local ao processo. Alterações feitas em outro processo (outro
+worker, tarefas agendadas) aparecem na versão do cache de relatórios
+(``relatorios.cache``), conferida a cada ``PAINEL_SSE_INTERVALO`` segundos;
+para isso o cache precisa ser compartilhado (Redis, banco).
+
+O streaming requer o servidor ASGI (``GUNICORN_ASGI=1``). Sob WSGI cada
+conexão prenderia um worker: o endpoint envia o estado atual e encerra, e o
+navegador reconecta após o intervalo.
+"""
+
+import asyncio
+import contextlib
+import json
+import threading
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from documentos.models import Recurso, Secretaria
+
+from . import cubo
+from .cache import aem_cache, aversao, em_cache, versao
+
+
+def mais_frequentes(dimensao, limite=5):
+    """Retorna os ``limite`` valores da dimensão com mais documentos (pelo cubo)."""
+    return sorted(cubo.pivot(dimensao), key=lambda linha: -linha["quantidade"])[:limite]
+
+
+def _grafico(dimensao, modelo):
+    linhas = mais_frequentes(dimensao)
+    nomes = dict(
+        modelo.objects.filter(  # pylint: disable=no-member
+            pk__in=[linha[dimensao] for linha in linhas]
+        ).values_list("id", "nome")
+    )
+    return {
+        "labels": [linha[dimensao] for linha in linhas],
+        "nomes": [nomes.get(linha[dimensao]) for linha in linhas],
+        "data": [linha["quantidade"] for linha in linhas],
+    }
+
+
+def dados_grafico():
+    """Calcula os dados dos gráficos do dashboard."""
+    por_status = {
+        linha["status"]: linha["quantidade"] for linha in cubo.pivot("status")
+    }
+    totais = cubo.total()
+    return {
+        "status": {
+            "labels": ["Pendentes", "Pagos", "Atrasados"],
+            "data": [
+                por_status.get("PEN", 0),
+                por_status.get("PAG", 0),
+                por_status.get("ATR", 0),
+            ],
+            "colors": ["#ffc107", "#28a745", "#dc3545"],
+        },
+        "totais": {"bruto": totais["valor_bruto"], "liquido": totais["valor_liquido"]},
+        # Top 5 secretarias e recursos (ids em labels, como antes)
+        "secretarias": _grafico("secretaria", Secretaria),
+        "recursos": _grafico("recurso", Recurso),
+    }
+
+
+def evento(dados, retry=None):
+    """Mensagem SSE ``painel`` com ``dados`` em JSON."""
+    linhas = [f"retry: {retry}"] if retry else []
+    linhas += ["event: painel", f"data: {json.dumps(dados, cls=DjangoJSONEncoder)}"]
+    return "\n".join(linhas) + "\n\n"
+
+
+class _Assinante:
+    """Cliente SSE conectado: último estado enviado e o mais recente publicado."""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.enviado = self.publicado = {}
+        self.sinal = asyncio.Event()
+
+    def iniciar(self, estado):
+        """Estado enviado na conexão (publicações anteriores a ele ficam pendentes)."""
+        self.enviado = estado
+        if not self.sinal.is_set():
+            self.publicado = estado
+
+    def _receber(self, dados):
+        self.publicado = dados
+        self.sinal.set()
+
+    def entregar(self, dados):
+        """Chamado de qualquer thread (ex.: a do request que salvou o documento)."""
+        # Loop encerrado (RuntimeError): o cliente já desconectou
+        with contextlib.suppress(RuntimeError):
+            self.loop.call_soon_threadsafe(self._receber, dados)
+
+    async def proximo(self, timeout):
+        """Seções alteradas desde o último envio, ou None se nada foi publicado."""
+        try:
+            await asyncio.wait_for(self.sinal.wait(), timeout)
+        except TimeoutError:
+            return None
+        self.sinal.clear()
+        delta = {
+            chave: valor
+            for chave, valor in self.publicado.items()
+            if self.enviado.get(chave) != valor
+        }
+        self.enviado = self.publicado
+        return delta
+
+
+class Painel:
+    """Pub/sub do processo: clientes conectados e a versão publicada por último."""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._assinantes = set()
+        self.versao = None
+
+    @property
+    def conectados(self):
+        return len(self._assinantes)
+
+    def publicar(self, nova_versao, dados):
+        """Envia o novo estado aos clientes (cada um recebe só o que mudou para ele)."""
+        with self._trava:
+            self.versao = nova_versao
+            assinantes = list(self._assinantes)
+        for assinante in assinantes:
+            assinante.entregar(dados)
+
+    def atualizar(self):
+        """Recalcula e publica o painel (após o commit de uma alteração)."""
+        if not self.conectados:
+            return
+        atual = versao()
+        # Vários documentos na mesma transação: a primeira chamada já publicou
+        if atual != self.versao:
+            self.publicar(atual, em_cache("dados_grafico", dados_grafico))
+
+    async def sincronizar(self):
+        """Publica alterações feitas em outros processos (a versão do cache mudou)."""
+        atual = await aversao()
+        with self._trava:
+            if atual == self.versao:
+                return
+            # Só um cliente recalcula; os demais recebem a publicação
+            self.versao = atual
+        self.publicar(atual, await aem_cache("dados_grafico", dados_grafico))
+
+    async def eventos(self):
+        """Stream SSE: o estado atual e, depois, só as seções alteradas."""
+        intervalo = settings.PAINEL_SSE_INTERVALO
+        assinante = _Assinante()
+        with self._trava:
+            self._assinantes.add(assinante)
+        try:
+            # Assina antes de ler o estado: nenhuma publicação se perde no meio
+            inicial = await aem_cache("dados_grafico", dados_grafico)
+            assinante.iniciar(inicial)
+            yield evento(inicial, retry=intervalo * 1000)
+            while True:
+                delta = await assinante.proximo(intervalo)
+                if delta is None:
+                    yield ": ping\n\n"  # mantém a conexão aberta em proxies
+                    await self.sincronizar()
+                elif delta:
+                    yield evento(delta)
+        finally:
+            with self._trava:
+                self._assinantes.discard(assinante)
+
+
+publicador = Painel()
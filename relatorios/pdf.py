@@ -0,0 +1,228 @@
+"""Ofícios de encaminhamento e protocolos para empenho em PDF (reportlab).
+
+Os campos de cada ofício são montados aqui a partir dos documentos da seleção
+e ``renderizar_oficio`` desenha o PDF apenas com eles, no pool de processos de
+``utils.pdf.gerar_pdf`` (com cache pelo conteúdo). O protocolo para empenho
+gera um ofício por secretaria.
+"""
+
+import io
+from itertools import groupby
+from xml.sax.saxutils import escape
+
+from django.contrib.staticfiles import finders
+from django.utils import formats
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_RIGHT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.platypus import (
+    Image,
+    Paragraph,
+    SimpleDocTemplate,
+    Spacer,
+    Table,
+    TableStyle,
+)
+
+from documentos.templatetags.custom_filters import currency_br
+from utils.pdf import gerar_pdf
+
+# Incrementar ao alterar o layout (descarta os ofícios em cache)
+VERSAO = 1
+
+BRASAO = "img/brasao_moju.png"
+MESES = (
+    "janeiro",
+    "fevereiro",
+    "março",
+    "abril",
+    "maio",
+    "junho",
+    "julho",
+    "agosto",
+    "setembro",
+    "outubro",
+    "novembro",
+    "dezembro",
+)
+
+ESTILO = ParagraphStyle("oficio", fontName="Helvetica", fontSize=11, leading=15)
+ESTILO_CENTRO = ParagraphStyle("oficio_centro", parent=ESTILO, alignment=TA_CENTER)
+ESTILO_DIREITA = ParagraphStyle("oficio_direita", parent=ESTILO, alignment=TA_RIGHT)
+ESTILO_CORPO = ParagraphStyle(
+    "oficio_corpo", parent=ESTILO, alignment=TA_JUSTIFY, firstLineIndent=25 * mm, spaceAfter=8
+)
+ESTILO_CELULA = ParagraphStyle("oficio_celula", parent=ESTILO, fontSize=9, leading=11)
+
+
+def _data_extenso(data):
+    return f"Moju(PA), {data.day} de {MESES[data.month - 1]} de {data.year}."
+
+
+def _cabecalho(assinatura, data, numero):
+    return {
+        "brasao": finders.find(BRASAO) or "",
+        "numero": numero,
+        "data": _data_extenso(data),
+        "secretario_nome": assinatura["secretario_nome"],
+        "secretario_decreto": assinatura["secretario_decreto"],
+    }
+
+
+def dados_encaminhamento(documentos, destino, data, numero, assinatura):
+    """Campos do ofício de encaminhamento ao Controle Interno ou à Contabilidade.
+
+    Args:
+        documentos: Documentos da seleção (com fornecedor).
+        destino: Dicionário com ``destinatario``, ``cargo``, ``orgao`` e ``vocativo``.
+        data: Data do ofício.
+        numero: Número/ano do ofício (ex.: "012/2025/DIREF").
+        assinatura: Dicionário com ``secretario_nome`` e ``secretario_decreto``.
+    """
+    return {
+        **_cabecalho(assinatura, data, f"Ofício Nº {numero}"),
+        "titulo": "",
+        "destinatario": [
+            destino["orgao"],
+            f"<b>{escape(destino['destinatario'])}</b>",
+            destino["cargo"],
+        ],
+        "paragrafos": [
+            destino["vocativo"],
+            "Ao cumprimentá-lo, de ordem da Secretaria Municipal de Fazenda, sirvo-me do "
+            "presente expediente para encaminhar a esta controladoria as seguintes "
+            "solicitações de despesas:",
+        ],
+        "colunas": ["Fornecedor", "Nº Nota Fiscal/Recibo", "Valor", "Referência/Mês"],
+        "linhas": [
+            [
+                doc.fornecedor.nome,
+                doc.numero_documento or "",
+                f"R$ {currency_br(doc.valor_documento)}",
+                formats.date_format(doc.data_documento, "F/Y").capitalize(),
+            ]
+            for doc in documentos
+        ],
+        "encerramento": [
+            "No caso da(s) despesa(s) ser(em) considerada(s) apta(s) para pagamento, peço "
+            "que retorne de volta a este departamento financeiro.",
+            "Cordialmente,",
+        ],
+    }
+
+
+def _secretaria(documento):
+    return documento.secretaria.nome if documento.secretaria else ""
+
+
+def dados_protocolos(documentos, data, numero, assinatura):
+    """Campos dos protocolos para empenho, um por secretaria dos documentos."""
+    protocolos = []
+    for secretaria, grupo in groupby(sorted(documentos, key=_secretaria), key=_secretaria):
+        protocolos.append(
+            {
+                **_cabecalho(assinatura, data, f"Protocolo Nº {numero}"),
+                "titulo": f"PARA EMPENHO: {secretaria.upper()}",
+                "destinatario": [],
+                "paragrafos": [],
+                "colunas": ["FORNECEDOR", "NOTA / RECIBO", "VALOR (R$)", "DEPARTAMENTO"],
+                "linhas": [
+                    [
+                        doc.fornecedor.nome,
+                        doc.numero_documento or "",
+                        currency_br(doc.valor_documento),
+                        doc.recurso.nome if doc.recurso else "-",
+                    ]
+                    for doc in grupo
+                ],
+                "encerramento": [],
+            }
+        )
+    return protocolos
+
+
+def _tabela(colunas, linhas, largura):
+    def celula(texto, estilo=ESTILO_CELULA):
+        return Paragraph(escape(str(texto)), estilo)
+
+    dados = [[celula(coluna, ESTILO_CENTRO) for coluna in colunas]]
+    dados += [[celula(valor) for valor in linha] for linha in linhas]
+    larguras = [largura * proporcao for proporcao in (0.4, 0.2, 0.18, 0.22)]
+    tabela = Table(dados, colWidths=larguras, repeatRows=1)
+    tabela.setStyle(
+        TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f8f9fa")),
+                ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+            ]
+        )
+    )
+    return tabela
+
+
+def renderizar_oficio(dados):
+    """Desenha um ofício (uma ou mais páginas A4) e devolve o PDF."""
+    saida = io.BytesIO()
+    margem = 20 * mm
+    documento = SimpleDocTemplate(
+        saida,
+        pagesize=A4,
+        leftMargin=margem,
+        rightMargin=margem,
+        topMargin=15 * mm,
+        bottomMargin=15 * mm,
+        title=dados["numero"],
+    )
+    elementos = []
+    if dados["brasao"]:
+        elementos.append(Image(dados["brasao"], width=30 * mm, height=22 * mm))
+    for linha in (
+        "<b>PREFEITURA MUNICIPAL DE MOJU</b>",
+        "SECRETARIA MUNICIPAL DE FAZENDA",
+        "Departamento Financeiro",
+    ):
+        elementos.append(Paragraph(linha, ESTILO_CENTRO))
+    elementos.append(Spacer(1, 8 * mm))
+    elementos.append(
+        Table(
+            [
+                [
+                    Paragraph(escape(dados["numero"]), ESTILO),
+                    Paragraph(dados["data"], ESTILO_DIREITA),
+                ]
+            ],
+            colWidths=[documento.width / 2] * 2,
+        )
+    )
+    elementos.append(Spacer(1, 6 * mm))
+    if dados["titulo"]:
+        elementos.append(Paragraph(f"<b>{escape(dados['titulo'])}</b>", ESTILO_CENTRO))
+        elementos.append(Spacer(1, 6 * mm))
+    for linha in dados["destinatario"]:
+        elementos.append(Paragraph(linha, ESTILO))
+    if dados["destinatario"]:
+        elementos.append(Spacer(1, 6 * mm))
+    for paragrafo in dados["paragrafos"]:
+        elementos.append(Paragraph(paragrafo, ESTILO_CORPO))
+    elementos.append(_tabela(dados["colunas"], dados["linhas"], documento.width))
+    elementos.append(Spacer(1, 6 * mm))
+    for paragrafo in dados["encerramento"]:
+        elementos.append(Paragraph(paragrafo, ESTILO_CORPO))
+    elementos.append(Spacer(1, 20 * mm))
+    for linha in (
+        "__________________________________________",
+        f"<b>{escape(dados['secretario_nome'])}</b>",
+        "Secretário Municipal de Fazenda",
+        f"Decreto: {escape(dados['secretario_decreto'])}",
+    ):
+        elementos.append(Paragraph(linha, ESTILO_CENTRO))
+    documento.build(elementos)
+    return saida.getvalue()
+
+
+def oficios_pdf(oficios):
+    """PDF com os ofícios (dicionários de ``dados_encaminhamento``/``dados_protocolos``)."""
+    return gerar_pdf(renderizar_oficio, oficios)
@@ -0,0 +1,93 @@
+"""Seleções de documentos para os relatórios de encaminhamento.
+
+Os documentos escolhidos em ``filtro_encaminhamento`` são gravados em uma
+``SelecaoDocumentos`` e os relatórios recebem apenas o id da seleção. O
+preenchimento é um único ``INSERT ... SELECT`` a partir da consulta filtrada
+(todos os documentos do filtro ou os marcados na página), sem trazer os ids
+para a aplicação; a leitura é uma consulta com junção entre itens, documentos
+e suas relações. Documentos de exercícios arquivados mantêm o id e são lidos
+do arquivo.
+"""
+
+import datetime
+import logging
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connection, transaction
+from django.db.models import BigIntegerField, Value
+from django.utils import timezone
+
+from documentos.arquivo import ConsultaCombinada
+
+from .models import ItemSelecao, SelecaoDocumentos
+
+logger = logging.getLogger(__name__)
+
+DIAS_RETENCAO = 7
+
+
+def criar_selecao(usuario, destino, documentos):
+    """Grava os documentos da consulta em uma nova seleção do usuário.
+
+    Args:
+        usuario: Dono da seleção.
+        destino: "controle_interno" ou "contabilidade".
+        documentos: QuerySet de ``Documento`` ou ``ConsultaCombinada`` (não é
+            avaliado na aplicação).
+
+    Returns:
+        SelecaoDocumentos: A seleção, com ``quantidade`` documentos.
+    """
+    with transaction.atomic():
+        selecao = SelecaoDocumentos.objects.create(usuario=usuario, destino=destino)  # pylint: disable=no-member
+        opcoes = ItemSelecao._meta  # pylint: disable=protected-access
+        colunas = ", ".join(
+            connection.ops.quote_name(opcoes.get_field(campo).column) for campo in ("documento", "selecao")
+        )
+        querysets = documentos.querysets if isinstance(documentos, ConsultaCombinada) else [documentos]
+        selecao.quantidade = 0
+        # Um INSERT ... SELECT por tabela (ativa e arquivo): os ids não se repetem entre elas
+        for queryset in querysets:
+            # Colunas na ordem do SELECT: campos do modelo antes das anotações
+            try:
+                select_sql, params = (
+                    queryset.order_by()
+                    .annotate(selecao_id=Value(selecao.pk, output_field=BigIntegerField()))
+                    .values_list("id", "selecao_id")
+                    .distinct()
+                    .query.sql_with_params()
+                )
+            except EmptyResultSet:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {connection.ops.quote_name(opcoes.db_table)} ({colunas}) {select_sql}",
+                    params,
+                )
+                selecao.quantidade += cursor.rowcount
+    return selecao
+
+
+def documentos_da_selecao(selecao):
+    """Documentos da seleção com fornecedor, secretaria e recurso (tabela ativa e arquivo)."""
+    return (
+        ConsultaCombinada()
+        .filter(id__in=selecao.itens.values("documento_id"))
+        .select_related("fornecedor", "secretaria", "recurso")
+        .order_by("fornecedor__nome", "data_documento", "id")
+    )
+
+
+def limpar_selecoes(dias=DIAS_RETENCAO, agora=None):
+    """Exclui as seleções criadas há mais de ``dias`` dias.
+
+    Returns:
+        int: Quantidade de seleções excluídas.
+    """
+    limite = (agora or timezone.now()) - datetime.timedelta(days=dias)
+    antigas = SelecaoDocumentos.objects.filter(criada_em__lt=limite)  # pylint: disable=no-member
+    ItemSelecao.objects.filter(selecao__in=antigas)._raw_delete(ItemSelecao.objects.db)  # pylint: disable=no-member,protected-access
+    total, _ = antigas.delete()
+    if total:
+        logger.info("Seleções de documentos excluídas: %s", total)
+    return total
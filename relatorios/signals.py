@@ -0,0 +1,49 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from documentos.models import Documento, Recurso, Secretaria
+
+from . import cubo
+from .cache import invalidar
+from .models import PermanenciaEtapa
+from .painel import publicador
+
+
+@receiver(post_save, sender=Documento)
+def atualizar_cubo(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    # Estado anterior gravado pelo signal pre_save de documentos: sai da célula antiga
+    cubo.aplicar_alteracoes(
+        [getattr(instance, "_estado_anterior", None)], [cubo.estado(instance)]
+    )
+
+
+@receiver(post_delete, sender=Documento)
+def remover_do_cubo(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    cubo.aplicar_alteracoes([cubo.estado(instance)])
+
+
+@receiver(pre_delete, sender=Secretaria)
+@receiver(pre_delete, sender=Recurso)
+def remover_dimensao_do_cubo(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    # Antes do SET_NULL: as células do registro excluído somam nas células sem ele
+    cubo.remover_dimensao(sender._meta.model_name, instance.pk)  # pylint: disable=protected-access
+
+
+@receiver(post_delete, sender=Documento)
+def remover_permanencias(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    # Permanências guardam o id do documento sem chave estrangeira
+    PermanenciaEtapa.objects.filter(documento=instance.pk).delete()  # pylint: disable=no-member
+
+
+@receiver(post_save, sender=Documento)
+@receiver(post_delete, sender=Documento)
+def invalidar_cache_relatorios(sender, **kwargs):  # pylint: disable=unused-argument
+    invalidar()
+
+
+@receiver(post_save, sender=Documento)
+@receiver(post_delete, sender=Documento)
+def publicar_painel(sender, **kwargs):  # pylint: disable=unused-argument
+    # Dashboards abertos (SSE) recebem o novo estado depois do commit
+    transaction.on_commit(publicador.atualizar)
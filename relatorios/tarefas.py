@@ -0,0 +1,38 @@
+from django.conf import settings
+
+from agendador.registro import tarefa
+from utils.downloads import limpar_exportacoes as remover_exportacoes
+
+from . import fluxo, selecoes
+from .cubo import reconstruir
+
+
+@tarefa("30 2 * * *", nome="relatorios.reconstruir_cubo")
+def reconstruir_cubo():
+    """Refaz o cubo de agregados (corrige alterações feitas fora da aplicação)."""
+    return f"{reconstruir()} célula(s) gravada(s)"
+
+
+@tarefa("*/10 * * * *", nome="relatorios.atualizar_permanencias")
+def atualizar_permanencias():
+    """Materializa as permanências em etapas dos históricos registrados desde a última execução."""
+    return f"{fluxo.atualizar()} permanência(s) nova(s)"
+
+
+@tarefa("45 2 * * 0", nome="relatorios.reconstruir_permanencias")
+def reconstruir_permanencias():
+    """Refaz as permanências em etapas (corrige históricos alterados ou excluídos)."""
+    return f"{fluxo.reconstruir()} permanência(s) gravada(s)"
+
+
+@tarefa("15 3 * * *", nome="relatorios.limpar_selecoes")
+def limpar_selecoes():
+    """Exclui as seleções de documentos dos relatórios de encaminhamento já antigas."""
+    return f"{selecoes.limpar_selecoes()} seleção(ões) excluída(s)"
+
+
+@tarefa("0 * * * *", nome="relatorios.limpar_exportacoes")
+def limpar_exportacoes():
+    """Remove as planilhas exportadas há mais de EXPORTACOES_RETENCAO_HORAS."""
+    removidas = remover_exportacoes(settings.EXPORTACOES_RETENCAO_HORAS)
+    return f"{removidas} exportação(ões) removida(s)"
@@ -1 +1,684 @@
-# Create your tests here.
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Sum
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from pypdf import PdfReader
+
+from documentos import pdf as recibos_pdf
+from documentos.arquivo import arquivar_exercicio
+from documentos.models import Documento, HistoricoDocumento, Recurso, Secretaria
+from documentos.views_relatorios import RelatorioSecretariaView
+from fornecedores.models import Fornecedor
+from utils import pdf as pdf_utils
+
+from . import cubo, fluxo, painel, selecoes
+from .extrato import Extrato
+from .filtros import FiltroRelatorio
+from .models import CelulaCubo, ItemSelecao, PermanenciaEtapa, SelecaoDocumentos
+
+
+class CuboDocumentosTest(TestCase):
+    def setUp(self):
+        self.fornecedor = Fornecedor.objects.create(
+            nome="Fornecedor Teste", cnpj_cpf="12345678901", tipo="PF"
+        )
+        self.saude = Secretaria.objects.create(nome="Saúde", codigo="SMS")
+        self.educacao = Secretaria.objects.create(nome="Educação", codigo="SME")
+        self.fms = Recurso.objects.create(nome="FMS", codigo="FMS", secretaria=self.saude)
+        self.fundeb = Recurso.objects.create(nome="FUNDEB", codigo="FUNDEB", secretaria=self.educacao)
+        self.documentos = [
+            self._documento("1", date(2024, 1, 10), "100.00", self.saude, self.fms, "PAG"),
+            self._documento("2", date(2024, 1, 25), "50.00", self.saude, self.fms),
+            self._documento("3", date(2024, 2, 5), "30.00", self.educacao, self.fundeb),
+            self._documento("4", date(2024, 3, 15), "20.00", self.educacao, self.fundeb, "PAG"),
+        ]
+
+    def _documento(self, numero, data_documento, valor, secretaria, recurso, status="PEN"):
+        return Documento.objects.create(
+            fornecedor=self.fornecedor,
+            numero=numero,
+            tipo="REC",
+            data_documento=data_documento,
+            valor_documento=Decimal(valor),
+            valor_liquido=Decimal(valor),
+            status=status,
+            data_pagamento=data_documento if status == "PAG" else None,
+            secretaria=secretaria,
+            recurso=recurso,
+        )
+
+    def _detalhe(self, *dimensoes):
+        """Agrupamento equivalente calculado diretamente nos documentos."""
+        return {
+            tuple(linha[d] for d in dimensoes): (linha["quantidade"], linha["valor_bruto"])
+            for linha in Documento.objects.values(*dimensoes)
+            .annotate(quantidade=Count("id"), valor_bruto=Sum("valor_documento"))
+            .order_by()
+        }
+
+    def _pivot(self, *dimensoes, **filtros):
+        return {
+            tuple(linha[d] for d in dimensoes): (linha["quantidade"], linha["valor_bruto"])
+            for linha in cubo.pivot(*dimensoes, **filtros)
+        }
+
+    def test_cubo_acompanha_alteracoes_individuais(self):
+        self.assertEqual(self._pivot("secretaria", "status"), self._detalhe("secretaria", "status"))
+
+        documento = self.documentos[1]
+        documento.status = "PAG"
+        documento.data_pagamento = date(2024, 4, 1)
+        documento.data_documento = date(2024, 3, 1)
+        documento.save()
+        self.documentos[2].delete()
+
+        self.assertEqual(
+            self._pivot("mes", "status"),
+            {
+                (date(2024, 1, 1), "PAG"): (1, Decimal("100.00")),
+                (date(2024, 3, 1), "PAG"): (2, Decimal("70.00")),
+            },
+        )
+        self.assertEqual(self._pivot("recurso", "status"), self._detalhe("recurso", "status"))
+
+    def test_caminho_em_lote_atualiza_cubo(self):
+        for documento in self.documentos:
+            documento.etapa = "EMPENHO"
+        Documento.objects.atualizar_em_lote(self.documentos, ["etapa"])
+        self.assertEqual(self._pivot("etapa"), {("EMPENHO",): (4, Decimal("200.00"))})
+
+    def test_celula_unica_por_dimensoes(self):
+        # Documentos na mesma célula somam na mesma linha; o último a sair a remove
+        novo = self._documento("5", date(2024, 1, 20), "25.00", self.saude, self.fms)
+        novo.save(update_fields=["descricao"])
+        celulas = CelulaCubo.objects.filter(mes=date(2024, 1, 1), secretaria=self.saude, status="PEN")
+        self.assertEqual(
+            list(celulas.values_list("quantidade", "valor_bruto")), [(2, Decimal("75.00"))]
+        )
+        novo.delete()
+        self.documentos[1].delete()
+        self.assertFalse(celulas.exists())
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            CelulaCubo.objects.create(
+                mes=date(2024, 1, 1), secretaria=self.saude, recurso=self.fms,
+                status="PAG", tipo="REC", etapa="ABERTURA",
+            )
+
+    def test_excluir_secretaria_e_recurso_mescla_celulas(self):
+        # Células sem recurso/secretaria já existentes nas mesmas combinações
+        self._documento("5", date(2024, 1, 20), "25.00", self.saude, None)
+        self._documento("6", date(2024, 2, 8), "15.00", None, None)
+        dimensoes = ("mes", "status", "tipo", "etapa")
+        esperado = self._pivot(*dimensoes)
+
+        self.fms.delete()
+        self.assertEqual(self._pivot(*dimensoes), esperado)
+        self.assertEqual(
+            self._pivot("secretaria", "recurso"), self._detalhe("secretaria", "recurso")
+        )
+        # Secretaria excluída em cascata com os seus recursos
+        self.educacao.delete()
+        self.assertEqual(self._pivot(*dimensoes), esperado)
+        self.assertEqual(
+            self._pivot("secretaria", "recurso"),
+            {(self.saude.id, None): (3, Decimal("175.00")), (None, None): (3, Decimal("65.00"))},
+        )
+        self.assertEqual(CelulaCubo.objects.filter(secretaria=None, recurso=None).count(), 2)
+
+    def test_pivot_com_filtros_e_periodo(self):
+        self.assertEqual(
+            self._pivot("secretaria", data_inicio=date(2024, 1, 1), data_fim=date(2024, 2, 29)),
+            {(self.saude.id,): (2, Decimal("150.00")), (self.educacao.id,): (1, Decimal("30.00"))},
+        )
+        # Período fora dos limites de mês: as bordas vêm dos documentos
+        self.assertEqual(
+            self._pivot("mes", data_inicio=date(2024, 1, 20), data_fim=date(2024, 3, 10)),
+            {(date(2024, 1, 1),): (1, Decimal("50.00")), (date(2024, 2, 1),): (1, Decimal("30.00"))},
+        )
+        self.assertEqual(
+            self._pivot("status", data_inicio=date(2024, 1, 11), data_fim=date(2024, 1, 30)),
+            {("PEN",): (1, Decimal("50.00"))},
+        )
+        self.assertEqual(cubo.total(status="PAG")["valor_bruto"], Decimal("120.00"))
+        self.assertEqual(cubo.total(data_inicio=date(2025, 1, 1))["quantidade"], 0)
+        with self.assertRaises(ValueError):
+            cubo.pivot("fornecedor")
+
+    def test_pivot_de_meses_inteiros_nao_consulta_documentos(self):
+        with self.assertNumQueries(1):
+            cubo.pivot("secretaria", "recurso", data_inicio=date(2024, 1, 1), data_fim=date(2024, 3, 31))
+
+    def test_reconstruir(self):
+        esperado = self._pivot("mes", "secretaria", "recurso", "status", "tipo", "etapa")
+        CelulaCubo.objects.all().delete()
+        self.assertEqual(cubo.reconstruir(), 4)
+        self.assertEqual(self._pivot("mes", "secretaria", "recurso", "status", "tipo", "etapa"), esperado)
+
+    def test_relatorio_pagamentos(self):
+        User.objects.create_user("operador", password="senha123")
+        self.client.login(username="operador", password="senha123")
+        resposta = self.client.get(
+            reverse("relatorios:pagamentos"),
+            {"data_inicio": "2024-01-01", "data_fim": "2024-02-29"},
+        )
+        self.assertEqual(resposta.status_code, 200)
+        dados = resposta.context["secretarias_dados"]
+        self.assertEqual(dados[self.saude.id]["total"], Decimal("150.00"))
+        self.assertEqual(
+            [doc.numero for doc in dados[self.saude.id]["recursos"][0]["documentos"]], ["2", "1"]
+        )
+        self.assertEqual(resposta.context["total_geral"]["quantidade"], 3)
+
+        resposta = self.client.get(reverse("relatorios:dashboard"))
+        self.assertEqual(resposta.context["status_counts"]["pagos"], 2)
+        self.assertEqual(resposta.context["valores_totais"]["bruto"], Decimal("200.00"))
+
+    async def test_dados_grafico_assincrono(self):
+        usuario = await User.objects.acreate_user("operador", password="senha123")
+        await self.async_client.aforce_login(usuario)
+        resposta = await self.async_client.get(reverse("relatorios:dados_grafico"))
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json()["status"]["data"][1], 2)  # pagos
+
+    def _pagar(self, documento):
+        with self.captureOnCommitCallbacks(execute=True):
+            documento.status = "PAG"
+            documento.data_pagamento = documento.data_documento
+            documento.save()
+
+    async def test_painel_ao_vivo(self):
+        publicador = painel.Painel()
+        usuario = await User.objects.acreate_user("operador", password="senha123")
+        await self.async_client.aforce_login(usuario)
+        url = reverse("relatorios:eventos_painel")
+        with (
+            mock.patch("relatorios.painel.publicador", publicador),
+            mock.patch("relatorios.signals.publicador", publicador),
+            mock.patch("relatorios.painel.dados_grafico", wraps=painel.dados_grafico) as calcular,
+        ):
+            streams = []
+            for _ in range(2):
+                resposta = await self.async_client.get(url)
+                self.assertEqual(resposta["Content-Type"], "text/event-stream")
+                streams.append(aiter(resposta.streaming_content))
+            inicial = [await anext(stream) for stream in streams]
+            self.assertIn(b'"data": [2, 2, 0]', inicial[0])
+
+            calcular.reset_mock()
+            await sync_to_async(self._pagar)(self.documentos[1])
+            for stream in streams:
+                mensagem = (await anext(stream)).decode()
+                self.assertTrue(mensagem.startswith("event: painel\n"))
+                delta = json.loads(mensagem.split("data: ", 1)[1])
+                # Só a seção alterada; totais e gráficos não mudaram
+                self.assertEqual(list(delta), ["status"])
+                self.assertEqual(delta["status"]["data"], [1, 3, 0])
+            # Um cálculo para todos os clientes conectados
+            self.assertEqual(calcular.call_count, 1)
+
+    def test_painel_sob_wsgi(self):
+        User.objects.create_user("operador", password="senha123")
+        self.client.login(username="operador", password="senha123")
+        resposta = self.client.get(reverse("relatorios:eventos_painel"))
+        conteudo = b"".join(resposta.streaming_content).decode()
+        self.assertTrue(conteudo.startswith("retry: 15000\nevent: painel\n"))
+        dados = json.loads(conteudo.split("data: ", 1)[1])
+        self.assertEqual(dados["secretarias"]["nomes"], ["Saúde", "Educação"])
+
+
+class FiltroRelatorioTest(TestCase):
+    def setUp(self):
+        fornecedor = Fornecedor.objects.create(
+            nome="Fornecedor Teste", cnpj_cpf="12345678901", tipo="PF"
+        )
+        self.saude = Secretaria.objects.create(nome="Saúde", codigo="SMS")
+        for numero, valor, status, secretaria in (
+            ("1", "100.00", "PAG", self.saude),
+            ("2", "50.00", "PEN", self.saude),
+            ("3", "30.00", "ATR", None),
+        ):
+            Documento.objects.create(
+                fornecedor=fornecedor,
+                numero=numero,
+                tipo="REC",
+                data_documento=date(2024, 1, 10),
+                valor_documento=Decimal(valor),
+                valor_liquido=Decimal(valor),
+                status=status,
+                data_pagamento=date(2024, 1, 20) if status == "PAG" else None,
+                secretaria=secretaria,
+            )
+
+    def _filtro(self, **parametros):
+        return FiltroRelatorio.do_request(RequestFactory().get("/", parametros))
+
+    def test_parametros_validados(self):
+        filtro = self._filtro(
+            data_inicio="2024-01-01", data_fim="31/01/2024", status="XYZ", secretaria="abc", recurso="7"
+        )
+        self.assertEqual(filtro.data_inicio, date(2024, 1, 1))
+        self.assertIsNone(filtro.data_fim)
+        self.assertEqual(filtro.status, "")
+        self.assertIsNone(filtro.secretaria)
+        self.assertEqual(filtro.recurso, 7)
+        self.assertEqual(len(filtro.erros), 3)
+
+        padrao = FiltroRelatorio.do_request(RequestFactory().get("/"), padrao_mes_atual=True)
+        self.assertEqual(padrao.data_inicio.day, 1)
+        self.assertIsNotNone(padrao.data_fim)
+
+    def test_resumo_em_uma_consulta(self):
+        filtro = self._filtro(data_inicio="2024-01-01", data_fim="2024-01-31")
+        with self.assertNumQueries(1):
+            resumo = filtro.resumo(filtro.aplicar(Documento.objects.all()))
+        self.assertEqual(resumo["quantidade"], 3)
+        self.assertEqual(resumo["total_bruto"], Decimal("180.00"))
+        self.assertEqual((resumo["pagos"], resumo["pendentes"], resumo["atrasados"]), (1, 1, 1))
+        self.assertEqual(resumo["valor_pendentes"], Decimal("50.00"))
+        self.assertAlmostEqual(resumo["perc_pagos"], 100 / 3)
+
+        resumo = self._filtro(secretaria=str(self.saude.id), status="PAG").resumo()
+        self.assertEqual((resumo["quantidade"], resumo["total_liquido"]), (1, Decimal("100.00")))
+
+    def test_exportacao_ignora_parametros_invalidos(self):
+        User.objects.create_user("operador", password="senha123")
+        self.client.login(username="operador", password="senha123")
+        resposta = self.client.get(
+            reverse("relatorios:exportar_csv"), {"data_inicio": "invalida", "status": "PEN"}
+        )
+        self.assertEqual(resposta.status_code, 200)
+        linhas = resposta.content.decode().strip().splitlines()
+        self.assertEqual(len(linhas), 2)
+
+        for nome, parametros in (
+            ("relatorios:financeiro", {"tipo_agrupamento": "secretaria", "data_fim": "x"}),
+            ("relatorios:filtro_encaminhamento", {"data_inicio": "2024-13-01"}),
+        ):
+            self.assertEqual(self.client.get(reverse(nome), parametros).status_code, 200)
+
+
+class ExtratoFornecedorTest(TestCase):
+    def setUp(self):
+        self.fornecedor = Fornecedor.objects.create(
+            nome="Fornecedor Teste", cnpj_cpf="12345678901", tipo="PF"
+        )
+        for numero, data_documento, valor, status in (
+            ("A1", date(2022, 6, 1), "40.00", "PAG"),
+            ("B1", date(2024, 1, 10), "100.00", "PAG"),
+            ("B2", date(2024, 2, 5), "50.00", "PEN"),
+            ("B3", date(2024, 2, 5), "30.00", "ATR"),
+        ):
+            Documento.objects.create(
+                fornecedor=self.fornecedor,
+                numero=numero,
+                tipo="REC",
+                data_documento=data_documento,
+                valor_documento=Decimal(valor),
+                valor_iss=Decimal("1.00"),
+                valor_liquido=Decimal(valor) - 1,
+                status=status,
+                data_pagamento=data_documento if status == "PAG" else None,
+            )
+
+    def _saldos(self, linhas):
+        return [
+            (linha["numero"], linha["bruto_acumulado"], linha["pago_acumulado"], linha["pendente_acumulado"])
+            for linha in linhas
+        ]
+
+    def test_saldos_acumulados(self):
+        esperado = [
+            ("A1", Decimal("40.00"), Decimal("40.00"), Decimal("0.00")),
+            ("B1", Decimal("140.00"), Decimal("140.00"), Decimal("0.00")),
+            ("B2", Decimal("190.00"), Decimal("140.00"), Decimal("50.00")),
+            ("B3", Decimal("220.00"), Decimal("140.00"), Decimal("80.00")),
+        ]
+        extrato = Extrato(self.fornecedor)
+        self.assertEqual(self._saldos(extrato), esperado)
+        self.assertEqual(self._saldos(extrato[2:4]), esperado[2:])
+        self.assertEqual(extrato.saldo_final["retencoes_acumulado"], Decimal("4.00"))
+
+        # Com o exercício de 2022 no arquivo, as duas tabelas são intercaladas
+        arquivar_exercicio(2022)
+        extrato = Extrato(self.fornecedor)
+        self.assertEqual(self._saldos(extrato), esperado)
+        self.assertEqual(self._saldos(extrato[1:3]), esperado[1:3])
+
+        # Com data inicial, os documentos anteriores entram como saldo anterior
+        periodo = Extrato(self.fornecedor, data_inicio=date(2024, 2, 1))
+        self.assertEqual(periodo.saldo_anterior["bruto_acumulado"], Decimal("140.00"))
+        self.assertEqual(self._saldos(periodo), esperado[2:])
+        self.assertEqual(periodo.count(), 2)
+
+    def test_exportacoes(self):
+        User.objects.create_user("operador", password="senha123")
+        self.client.login(username="operador", password="senha123")
+        url = reverse("relatorios:extrato_fornecedor", args=[self.fornecedor.pk])
+        resposta = self.client.get(url, {"data_fim": "2024-01-31"})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(len(resposta.context["linhas"]), 2)
+
+        resposta = self.client.get(
+            reverse("relatorios:exportar_extrato_csv", args=[self.fornecedor.pk])
+        )
+        linhas = b"".join(resposta.streaming_content).decode().strip().splitlines()
+        self.assertEqual(len(linhas), 5)
+        self.assertTrue(linhas[-1].endswith("220.00,4.00,140.00,80.00"))
+
+        exportacoes = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, exportacoes)
+        url = reverse("relatorios:exportar_extrato_excel", args=[self.fornecedor.pk])
+        with override_settings(EXPORTACOES_ROOT=exportacoes):
+            resposta = self.client.get(url)
+            self.assertEqual(resposta.status_code, 200)
+            self.assertTrue(b"".join(resposta.streaming_content).startswith(b"PK"))
+
+            resposta = self.client.get(reverse("relatorios:exportar_excel"), {"tipo": "../x"})
+            self.assertEqual(
+                resposta["Content-Disposition"], 'attachment; filename="relatorio_..x.xlsx"'
+            )
+            self.assertTrue(b"".join(resposta.streaming_content).startswith(b"PK"))
+
+            # Em produção a planilha fica em disco e o nginx a envia
+            locais = {exportacoes: "/_protegido/exportacoes/"}
+            with override_settings(
+                DOWNLOAD_ENVIO="x-accel-redirect", DOWNLOAD_LOCAIS_INTERNOS=locais
+            ):
+                resposta = self.client.get(url)
+        interno = resposta["X-Accel-Redirect"]
+        nome = f"extrato_fornecedor_{self.fornecedor.pk}.xlsx"
+        self.assertRegex(interno, rf"^/_protegido/exportacoes/[0-9a-f]{{32}}/{nome}$")
+        self.assertEqual(resposta.content, b"")
+        caminho = os.path.join(exportacoes, interno.removeprefix("/_protegido/exportacoes/"))
+        with open(caminho, "rb") as arquivo:
+            self.assertEqual(arquivo.read(2), b"PK")
+
+
+class FluxoEtapasTest(TestCase):
+    def setUp(self):
+        fornecedor = Fornecedor.objects.create(
+            nome="Fornecedor Teste", cnpj_cpf="12345678901", tipo="PF"
+        )
+        self.saude = Secretaria.objects.create(nome="Saúde", codigo="SMS")
+        self.documentos = [
+            Documento.objects.create(
+                fornecedor=fornecedor,
+                numero=numero,
+                tipo="REC",
+                data_documento=date(2024, 3, 1),
+                valor_documento=Decimal("10.00"),
+                valor_liquido=Decimal("10.00"),
+                secretaria=self.saude,
+            )
+            for numero in ("1", "2", "3")
+        ]
+        # Segunda-feira, 04/03/2024
+        self.inicio = timezone.make_aware(datetime(2024, 3, 4, 9))
+
+    def _historico(self, documento, etapa, dias):
+        historico = HistoricoDocumento.objects.create(documento=documento, etapa=etapa)
+        HistoricoDocumento.objects.filter(pk=historico.pk).update(
+            data_hora=self.inicio + timedelta(days=dias)
+        )
+        return historico
+
+    def test_materializacao_incremental(self):
+        primeiro, segundo, terceiro = self.documentos
+        self._historico(primeiro, "ABERTURA", 0)
+        self._historico(primeiro, "EMPENHO", 2)
+        self._historico(segundo, "ABERTURA", 0)
+        self.assertEqual(fluxo.atualizar(), 3)
+        self.assertEqual(
+            PermanenciaEtapa.objects.get(documento=primeiro.pk, etapa="ABERTURA").duracao,
+            timedelta(days=2),
+        )
+
+        # Só os registros novos são processados; a permanência aberta é encerrada
+        self._historico(primeiro, "BAIXA", 3)
+        self._historico(segundo, "EMPENHO", 4)
+        self._historico(terceiro, "ABERTURA", 1)
+        self._historico(terceiro, "EMPENHO", 9)
+        self.assertEqual(fluxo.atualizar(), 4)
+        self.assertEqual(fluxo.atualizar(), 0)
+        duracoes = dict(
+            PermanenciaEtapa.objects.filter(etapa="ABERTURA").values_list("documento", "duracao")
+        )
+        self.assertEqual(
+            duracoes,
+            {primeiro.pk: timedelta(days=2), segundo.pk: timedelta(days=4), terceiro.pk: timedelta(days=8)},
+        )
+        self.assertIsNone(PermanenciaEtapa.objects.get(documento=segundo.pk, etapa="EMPENHO").saida)
+
+        incremental = set(PermanenciaEtapa.objects.values_list("historico", "saida", "duracao"))
+        self.assertEqual(fluxo.reconstruir(), 7)
+        self.assertEqual(set(PermanenciaEtapa.objects.values_list("historico", "saida", "duracao")), incremental)
+
+        abertura = fluxo.duracoes_por_etapa()[0]
+        self.assertEqual((abertura["concluidos"], abertura["em_andamento"]), (3, 0))
+        self.assertEqual(abertura["mediana"], timedelta(days=4))
+        self.assertEqual(abertura["p90"], timedelta(days=8))
+
+        semanas, linhas = fluxo.fluxo_semanal(semanas=2, hoje=date(2024, 3, 12))
+        self.assertEqual(semanas, [date(2024, 3, 4), date(2024, 3, 11)])
+        self.assertEqual(linhas[0]["secretaria"], self.saude.pk)
+        # Semana de 04/03: um documento baixado e dois em aberto ao fim da semana
+        self.assertEqual(linhas[0]["vazao"], [1, 0])
+        self.assertEqual(linhas[0]["estoque"], [2, 2])
+
+        primeiro.delete()
+        self.assertFalse(PermanenciaEtapa.objects.filter(documento=primeiro.pk).exists())
+
+    def test_relatorio(self):
+        self._historico(self.documentos[0], "ABERTURA", 0)
+        self._historico(self.documentos[0], "EMPENHO", 1)
+        call_command("atualizar_permanencias", stdout=StringIO())
+        User.objects.create_user("operador", password="senha123")
+        self.client.login(username="operador", password="senha123")
+        resposta = self.client.get(reverse("relatorios:fluxo_etapas"), {"secretaria": self.saude.pk})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.context["etapas"][0]["mediana_dias"], 1.0)
+
+
+class SelecaoDocumentosTest(TestCase):
+    def setUp(self):
+        fornecedor = Fornecedor.objects.create(
+            nome="Fornecedor Teste", cnpj_cpf="12345678901", tipo="PF"
+        )
+        self.saude = Secretaria.objects.create(nome="Saúde", codigo="SMS")
+        self.documentos = [
+            Documento.objects.create(
+                fornecedor=fornecedor,
+                numero=str(numero),
+                tipo="REC",
+                data_documento=date(2024, 1, numero),
+                valor_documento=Decimal("10.00"),
+                valor_liquido=Decimal("10.00"),
+                secretaria=self.saude if numero % 2 else None,
+            )
+            for numero in range(1, 26)
+        ]
+        self.usuario = User.objects.create_user("operador", password="senha123")
+        self.client.login(username="operador", password="senha123")
+
+    def _selecionar(self, dados, **filtros):
+        url = reverse("relatorios:selecionar_documentos")
+        if filtros:
+            url = f"{url}?{'&'.join(f'{chave}={valor}' for chave, valor in filtros.items())}"
+        return self.client.post(url, dados)
+
+    def test_selecionar_todos_do_filtro(self):
+        resposta = self._selecionar({"todos": "1", "tipo": "contabilidade"}, secretaria=self.saude.id)
+        selecao = SelecaoDocumentos.objects.get()
+        self.assertRedirects(
+            resposta,
+            f"{reverse('relatorios:relatorio_encaminhamento')}?selecao={selecao.pk}&tipo=contabilidade",
+        )
+        self.assertEqual(selecao.destino, "contabilidade")
+        self.assertEqual(
+            set(selecao.documentos.values_list("numero", flat=True)),
+            {str(numero) for numero in range(1, 26, 2)},
+        )
+
+    def test_selecionar_marcados(self):
+        marcados = [self.documentos[0].pk, self.documentos[3].pk]
+        self._selecionar({"documentos": marcados, "tipo": "controle_interno"})
+        selecao = SelecaoDocumentos.objects.get()
+        self.assertEqual(sorted(selecao.documentos.values_list("pk", flat=True)), marcados)
+
+        resposta = self._selecionar({"tipo": "controle_interno"})
+        self.assertRedirects(resposta, reverse("relatorios:filtro_encaminhamento"))
+        self.assertEqual(SelecaoDocumentos.objects.count(), 1)
+
+    def test_relatorios_em_uma_consulta(self):
+        self._selecionar({"todos": "1", "tipo": "contabilidade"})
+        selecao = SelecaoDocumentos.objects.get()
+
+        # Sessão, usuário, savepoints, perfil (menu), seleção, exercícios fechados
+        # e uma consulta para os documentos (com fornecedor, secretaria e recurso)
+        with self.assertNumQueries(8):
+            resposta = self.client.get(
+                reverse("relatorios:relatorio_contabilidade"), {"selecao": selecao.pk}
+            )
+        self.assertEqual(len(resposta.context["documentos"]), 25)
+        self.assertEqual(resposta.context["total_valor"], Decimal("250.00"))
+        self.assertEqual(resposta.context["secretaria"], "Saúde")
+
+        resposta = self.client.get(
+            reverse("relatorios:relatorio_encaminhamento"), {"selecao": selecao.pk}
+        )
+        self.assertEqual(resposta.context["numero_oficio"], "025")
+        self.assertEqual(resposta.context["tipo_encaminhamento"], "contabilidade")
+
+    def test_selecao_de_outro_usuario(self):
+        self._selecionar({"todos": "1"})
+        selecao = SelecaoDocumentos.objects.get()
+        User.objects.create_user("outro", password="senha123")
+        self.client.login(username="outro", password="senha123")
+        resposta = self.client.get(
+            reverse("relatorios:relatorio_contabilidade"), {"selecao": selecao.pk}
+        )
+        self.assertRedirects(resposta, reverse("relatorios:filtro_encaminhamento"))
+
+    def test_limpar_selecoes_antigas(self):
+        self._selecionar({"todos": "1"})
+        self._selecionar({"todos": "1"})
+        antiga = SelecaoDocumentos.objects.first()
+        SelecaoDocumentos.objects.filter(pk=antiga.pk).update(
+            criada_em=timezone.now() - timedelta(days=selecoes.DIAS_RETENCAO + 1)
+        )
+        self.assertEqual(selecoes.limpar_selecoes(), 1)
+        self.assertFalse(SelecaoDocumentos.objects.filter(pk=antiga.pk).exists())
+        self.assertEqual(ItemSelecao.objects.count(), 25)
+
+    def test_exercicio_arquivado_continua_nos_relatorios(self):
+        # Documento de 2024 selecionado antes do fechamento do exercício
+        self._selecionar({"documentos": [self.documentos[0].pk], "tipo": "contabilidade"})
+        anterior = SelecaoDocumentos.objects.get()
+        arquivar_exercicio(2024, forcar=True)
+        self.assertFalse(Documento.objects.exists())
+
+        resposta = self.client.get(reverse("relatorios:secretaria"), {"secretaria": self.saude.id})
+        self.assertEqual(resposta.context["paginator"].count, 13)
+        resposta = self.client.get(reverse("relatorios:recurso"))
+        self.assertEqual(resposta.context["paginator"].count, 25)
+
+        resposta = self.client.get(
+            reverse("relatorios:filtro_encaminhamento"), {"data_inicio": "2024-01-01"}
+        )
+        self.assertEqual(resposta.context["paginator"].count, 25)
+        self._selecionar({"todos": "1", "tipo": "contabilidade"}, secretaria=self.saude.id)
+        selecao = SelecaoDocumentos.objects.latest("pk")
+        self.assertEqual(selecao.itens.count(), 13)
+        resposta = self.client.get(
+            reverse("relatorios:relatorio_contabilidade"), {"selecao": selecao.pk}
+        )
+        self.assertEqual(resposta.context["total_valor"], Decimal("130.00"))
+        self.assertEqual(
+            [documento.numero for documento in selecoes.documentos_da_selecao(anterior)], ["1"]
+        )
+
+        # Relatórios agrupados (views de documentos.views_relatorios)
+        request = RequestFactory().get("/", {"data_inicio": "2024-01-01", "data_fim": "2024-12-31"})
+        request.user = self.usuario
+        view = RelatorioSecretariaView()
+        view.setup(request)
+        contexto = view.get_context_data()
+        self.assertEqual(
+            [(linha["secretaria_nome"], linha["quantidade"]) for linha in contexto["secretarias_dados"]],
+            [("Saúde", 13), (None, 12)],
+        )
+        self.assertEqual(contexto["total_geral"]["total"], Decimal("250.00"))
+
+
+class PdfEncaminhamentoTest(TestCase):
+    def setUp(self):
+        fornecedor = Fornecedor.objects.create(
+            nome="Fornecedor & Filhos", cnpj_cpf="12345678901", tipo="PF"
+        )
+        saude = Secretaria.objects.create(nome="Saúde", codigo="SMS")
+        for numero in range(1, 5):
+            Documento.objects.create(
+                fornecedor=fornecedor,
+                numero=str(numero),
+                numero_documento=f"NF-{numero}",
+                tipo="REC",
+                data_documento=date(2024, 1, numero),
+                valor_documento=Decimal("10.00"),
+                valor_liquido=Decimal("10.00"),
+                secretaria=saude if numero % 2 else None,
+            )
+        User.objects.create_user("operador", password="senha123")
+        self.client.login(username="operador", password="senha123")
+        self.client.post(reverse("relatorios:selecionar_documentos"), {"todos": "1"})
+        self.selecao = SelecaoDocumentos.objects.get()
+        cache.clear()
+
+    def _paginas(self, resposta):
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta["Content-Type"], "application/pdf")
+        return len(PdfReader(BytesIO(resposta.content)).pages)
+
+    def test_recibos_da_selecao(self):
+        url = reverse("relatorios:recibos_pdf")
+        self.assertEqual(self._paginas(self.client.get(url, {"selecao": self.selecao.pk})), 4)
+
+        # Reimpressão: todos os recibos vêm do cache, nenhum é redesenhado
+        with mock.patch("utils.pdf._desenhar") as desenhar:
+            self.assertEqual(self._paginas(self.client.get(url, {"selecao": self.selecao.pk})), 4)
+        desenhar.assert_not_called()
+
+    def test_oficio_e_protocolos(self):
+        url = reverse("relatorios:oficio_pdf")
+        self.assertEqual(self._paginas(self.client.get(url, {"selecao": self.selecao.pk})), 1)
+        # Um protocolo por secretaria (Saúde e sem secretaria)
+        resposta = self.client.get(url, {"selecao": self.selecao.pk, "modelo": "protocolo"})
+        self.assertEqual(self._paginas(resposta), 2)
+
+    @override_settings(PDF_MINIMO_PARALELO=2)
+    def test_pool_de_processos(self):
+        documentos = Documento.objects.select_related("fornecedor", "secretaria")
+        dados = [recibos_pdf.dados_recibo(documento) for documento in documentos]
+        combinado = pdf_utils.gerar_pdf(recibos_pdf.renderizar_recibo, dados, processos=2)
+        self.assertEqual(len(PdfReader(BytesIO(combinado)).pages), 4)
+        chaves = [pdf_utils.chave_cache(recibos_pdf.renderizar_recibo, d) for d in dados]
+        self.assertEqual(len(cache.get_many(chaves)), 4)
+        # Campos alterados geram outra chave
+        alterado = {**dados[0], "valor_liquido": "11,00"}
+        self.assertNotEqual(
+            pdf_utils.chave_cache(recibos_pdf.renderizar_recibo, alterado),
+            pdf_utils.chave_cache(recibos_pdf.renderizar_recibo, dados[0]),
+        )
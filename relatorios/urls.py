@@ -14,17 +14,34 @@ app_name = "relatorios"
 urlpatterns = [
     path("", views.dashboard, name="dashboard"),
     path("fornecedores/", views.relatorio_fornecedores, name="fornecedores"),
+    path("fornecedores/<int:pk>/extrato/", views.extrato_fornecedor, name="extrato_fornecedor"),
+    path(
+        "fornecedores/<int:pk>/extrato/csv/",
+        views.exportar_extrato_csv,
+        name="exportar_extrato_csv",
+    ),
+    path(
+        "fornecedores/<int:pk>/extrato/excel/",
+        views.exportar_extrato_excel,
+        name="exportar_extrato_excel",
+    ),
     path("secretaria/", views.relatorio_secretaria, name="secretaria"),
     path("recurso/", views.relatorio_recurso, name="recurso"),
     path("financeiro/", views.relatorio_financeiro, name="financeiro"),
     path("exportar/csv/", views.exportar_csv, name="exportar_csv"),
     path("exportar/excel/", views.exportar_excel, name="exportar_excel"),
     path("dados-grafico/", views.dados_grafico, name="dados_grafico"),
+    path("painel/eventos/", views.eventos_painel, name="eventos_painel"),
     path(
         "filtro-encaminhamento/",
         views.filtro_encaminhamento,
         name="filtro_encaminhamento",
     ),
+    path(
+        "filtro-encaminhamento/selecionar/",
+        views.selecionar_documentos,
+        name="selecionar_documentos",
+    ),
     path(
         "encaminhamento/",
         views.relatorio_encaminhamento,
@@ -33,5 +50,8 @@ urlpatterns = [
     path(
         "contabilidade/", views.relatorio_contabilidade, name="relatorio_contabilidade"
     ),
+    path("encaminhamento/oficio.pdf", views.oficio_pdf, name="oficio_pdf"),
+    path("encaminhamento/recibos.pdf", views.recibos_pdf, name="recibos_pdf"),
     path("pagamentos/", views.relatorio_pagamentos, name="pagamentos"),
+    path("fluxo-etapas/", views.relatorio_fluxo, name="fluxo_etapas"),
 ]
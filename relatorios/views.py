@@ -6,71 +6,102 @@ import logging
 from decimal import Decimal
 from io import BytesIO
 
-# Importações de terceiros
-import xlsxwriter
-
 # Importações do Django
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
-from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
-from django.db.models.functions import TruncMonth
-from django.http import HttpResponse, JsonResponse
-from django.shortcuts import redirect, render
+from django.db import transaction
+from django.db.models import F, Q
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.text import get_valid_filename
+from django.views.decorators.http import require_POST
 
 # Importações locais
 from documentos.models import Documento, Secretaria, Recurso
 from fornecedores.models import Fornecedor
+from utils.downloads import enviar_arquivo, novo_arquivo_exportacao
+from utils.replica import ler_da_replica
+
+from . import cubo, fluxo, painel, selecoes
+from .cache import aem_cache, em_cache
+from .extrato import Extrato
+from .filtros import FiltroRelatorio
+from .models import SelecaoDocumentos
+
+# xlsxwriter e os módulos de PDF (reportlab, pypdf) são importados nas views
+# de exportação: ficam fora da inicialização a frio (utils.inicializacao)
 
 # Configuração de logging
 # Configuração do logger
 logger = logging.getLogger(__name__)
 
 
-@login_required
-def dashboard(request):
-    """Dashboard principal com resumo de todos os relatórios"""
+def _nomes(modelo):
+    """Mapeia id -> nome das secretarias ou recursos."""
+    return dict(modelo.objects.values_list("id", "nome"))
+
+
+def _resumo_dashboard():
+    """Calcula os dados agregados exibidos no dashboard de relatórios."""
     # Contagem de documentos por status
+    por_status = {linha["status"]: linha["quantidade"] for linha in cubo.pivot("status")}
     status_counts = {
-        "pendentes": Documento.objects.filter(status="PEN").count(),
-        "pagos": Documento.objects.filter(status="PAG").count(),
-        "atrasados": Documento.objects.filter(status="ATR").count(),
+        "pendentes": por_status.get("PEN", 0),
+        "pagos": por_status.get("PAG", 0),
+        "atrasados": por_status.get("ATR", 0),
     }
 
     # Valores totais
+    totais = cubo.total()
     valores_totais = {
-        "bruto": Documento.objects.aggregate(total=Sum("valor_documento"))["total"]
-        or 0,
-        "liquido": Documento.objects.aggregate(total=Sum("valor_liquido"))["total"]
-        or 0,
+        "bruto": totais["valor_bruto"],
+        "liquido": totais["valor_liquido"],
     }
 
-    # Documentos por secretaria (top 5) com nome para exibição
-    docs_por_secretaria = (
-        Documento.objects.values("secretaria", secretaria_display=F("secretaria__nome"))
-        .annotate(count=Count("id"))
-        .order_by("-count")[:5]
-    )
-
-    # Documentos por recurso (top 5) com nome para exibição
-    docs_por_recurso = (
-        Documento.objects.values("recurso", recurso_display=F("recurso__nome"))
-        .annotate(count=Count("id"))
-        .order_by("-count")[:5]
-    )
+    # Documentos por secretaria e por recurso (top 5) com nome para exibição
+    secretarias = _nomes(Secretaria)
+    docs_por_secretaria = [
+        {
+            "secretaria": linha["secretaria"],
+            "secretaria_display": secretarias.get(linha["secretaria"]),
+            "count": linha["quantidade"],
+        }
+        for linha in painel.mais_frequentes("secretaria")
+    ]
+    recursos = _nomes(Recurso)
+    docs_por_recurso = [
+        {
+            "recurso": linha["recurso"],
+            "recurso_display": recursos.get(linha["recurso"]),
+            "count": linha["quantidade"],
+        }
+        for linha in painel.mais_frequentes("recurso")
+    ]
 
-    context = {
+    return {
         "status_counts": status_counts,
         "valores_totais": valores_totais,
         "docs_por_secretaria": docs_por_secretaria,
         "docs_por_recurso": docs_por_recurso,
     }
 
+
+@login_required
+@ler_da_replica
+def dashboard(request):
+    """Dashboard principal com resumo de todos os relatórios"""
+    context = em_cache("dashboard", _resumo_dashboard)
+
     return render(request, "relatorios/dashboard.html", context)
 
 
 @login_required
+@ler_da_replica
 def relatorio_fornecedores(request):
     """Relatório de Fornecedores com listagem em ordem alfabética"""
     search = request.GET.get("search", "").strip()
@@ -94,34 +125,54 @@ def relatorio_fornecedores(request):
     return render(request, "relatorios/relatorio_fornecedores.html", context)
 
 
-@login_required
-def relatorio_secretaria(request):
-    """Relatório detalhado por secretaria"""
-    secretaria = request.GET.get("secretaria", "")
-
-    # Agrupamento por secretaria
-    secretarias = (
-        Documento.objects.select_related("secretaria")
-        .values("secretaria", nome=F("secretaria__nome"))
-        .annotate(
-            count=Count("id"),
-            valor_total=Sum("valor_documento"),
-            valor_liquido=Sum("valor_liquido"),
+def _resumo_contadores(modelo, dimensao):
+    """Totais por secretaria ou recurso lidos dos contadores, mais o grupo sem vínculo."""
+    resumo = list(
+        modelo.objects.filter(total_documentos__gt=0)
+        .values(
+            "nome",
+            count=F("total_documentos"),
+            valor_total=F("valor_total_bruto"),
+            valor_liquido=F("valor_total_liquido"),
+            **{dimensao: F("id")},
         )
         .order_by("nome")
     )
+    # Documentos sem secretaria/recurso não têm contador: vêm do cubo de agregados
+    sem_vinculo = cubo.total(**{f"{dimensao}__isnull": True})
+    if sem_vinculo["quantidade"]:
+        resumo.append(
+            {
+                dimensao: None,
+                "nome": None,
+                "count": sem_vinculo["quantidade"],
+                "valor_total": sem_vinculo["valor_bruto"],
+                "valor_liquido": sem_vinculo["valor_liquido"],
+            }
+        )
+    return resumo
+
+
+@login_required
+@ler_da_replica
+def relatorio_secretaria(request):
+    """Relatório detalhado por secretaria"""
+    filtro = FiltroRelatorio.do_request(request)
+    secretaria = filtro.secretaria
 
-    # Lista de documentos filtrados por secretaria
+    # Agrupamento por secretaria (contadores mantidos em Secretaria)
+    secretarias = _resumo_contadores(Secretaria, "secretaria")
+
+    # Lista de documentos filtrados por secretaria (com os exercícios arquivados)
+    documentos_list = filtro.consulta().select_related("fornecedor", "secretaria").order_by(
+        "-data_documento", "-id"
+    )
     if secretaria:
-        documentos_list = Documento.objects.filter(
-            secretaria_id=secretaria
-        ).select_related("fornecedor", "secretaria")
         secretaria_nome = (
             Secretaria.objects.filter(pk=secretaria).values_list("nome", flat=True).first()
             or "Não definido"
         )
     else:
-        documentos_list = Documento.objects.all().select_related("fornecedor")
         secretaria_nome = "Todas"
 
     # Paginação
@@ -138,7 +189,7 @@ def relatorio_secretaria(request):
     context = {
         "secretarias": secretarias,
         "documentos": documentos,
-        "secretaria_selecionada": secretaria,
+        "secretaria_selecionada": secretaria or "",
         "secretaria_nome": secretaria_nome,
         "secretaria_choices": [(s.id, s.nome) for s in Secretaria.objects.order_by("nome")],
         "is_paginated": True,
@@ -149,33 +200,25 @@ def relatorio_secretaria(request):
 
 
 @login_required
+@ler_da_replica
 def relatorio_recurso(request):
     """Relatório detalhado por recurso"""
-    recurso = request.GET.get("recurso", "")
-
-    # Agrupamento por recurso
-    recursos = (
-        Documento.objects.select_related("recurso")
-        .values("recurso", nome=F("recurso__nome"))
-        .annotate(
-            count=Count("id"),
-            valor_total=Sum("valor_documento"),
-            valor_liquido=Sum("valor_liquido"),
-        )
-        .order_by("nome")
-    )
+    filtro = FiltroRelatorio.do_request(request)
+    recurso = filtro.recurso
+
+    # Agrupamento por recurso (contadores mantidos em Recurso)
+    recursos = _resumo_contadores(Recurso, "recurso")
 
-    # Lista de documentos filtrados por recurso
+    # Lista de documentos filtrados por recurso (com os exercícios arquivados)
+    documentos_list = filtro.consulta().select_related("fornecedor", "recurso").order_by(
+        "-data_documento", "-id"
+    )
     if recurso:
-        documentos_list = Documento.objects.filter(recurso_id=recurso).select_related(
-            "fornecedor", "recurso"
-        )
         recurso_nome = (
             Recurso.objects.filter(pk=recurso).values_list("nome", flat=True).first()
             or "Não definido"
         )
     else:
-        documentos_list = Documento.objects.all().select_related("fornecedor")
         recurso_nome = "Todos"
 
     # Paginação
@@ -204,7 +247,7 @@ def relatorio_recurso(request):
     context = {
         "recursos": recursos_list,
         "documentos": documentos,
-        "recurso_selecionado": recurso,
+        "recurso_selecionado": recurso or "",
         "recurso_nome": recurso_nome,
         "recurso_choices": [(r.id, r.nome) for r in Recurso.objects.order_by("nome")],
         "is_paginated": True,
@@ -217,68 +260,31 @@ def relatorio_recurso(request):
     return render(request, "relatorios/relatorio_recurso.html", context)
 
 
-def _agrupar_documentos(
-    queryset, campo_agrupamento, titulo_agrupamento, choices=None, trunc_function=None
-):
-    """Função utilitária para agrupar documentos e calcular totais."""
-    if trunc_function:
-        agrupamentos = (
-            queryset.annotate(agrupamento=trunc_function(campo_agrupamento))
-            .values("agrupamento")
-            .annotate(
-                total_documentos=Count("id"),
-                valor_total=Sum("valor_documento"),
-                valor_pago=Sum(
-                    Case(
-                        When(status="PAG", then=F("valor_documento")),
-                        default=Value(0),
-                        output_field=DecimalField(),
-                    )
-                ),
-                valor_pendente=Sum(
-                    Case(
-                        When(status="PEN", then=F("valor_documento")),
-                        default=Value(0),
-                        output_field=DecimalField(),
-                    )
-                ),
-            )
-            .order_by("agrupamento")
-        )
-    else:
-        agrupamentos = (
-            queryset.values(campo_agrupamento)
-            .annotate(
-                total_documentos=Count("id"),
-                valor_total=Sum("valor_documento"),
-                valor_pago=Sum(
-                    Case(
-                        When(status="PAG", then=F("valor_documento")),
-                        default=Value(0),
-                        output_field=DecimalField(),
-                    )
-                ),
-                valor_pendente=Sum(
-                    Case(
-                        When(status="PEN", then=F("valor_documento")),
-                        default=Value(0),
-                        output_field=DecimalField(),
-                    )
-                ),
-            )
-            .order_by(campo_agrupamento)
-        )
+def _agrupar_documentos(dimensao, titulo_agrupamento, choices=None, **filtros):
+    """Função utilitária para agrupar documentos e calcular totais.
 
-    total_valor_geral = queryset.aggregate(total=Sum("valor_documento"))["total"] or 0
-    resumo = []
-    for item in agrupamentos:
-        nome_agrupamento = (
-            item.get("agrupamento") if trunc_function else item.get(campo_agrupamento)
+    Os totais vêm do cubo de agregados (``relatorios.cubo``); ``filtros`` são
+    repassados a ``cubo.pivot`` (período e filtros por dimensão).
+    """
+    agrupamentos = {}
+    for linha in cubo.pivot(dimensao, "status", **filtros):
+        item = agrupamentos.setdefault(
+            linha[dimensao],
+            {"total_documentos": 0, "valor_total": 0, "valor_pago": 0, "valor_pendente": 0},
         )
-        nome = nome_agrupamento
+        item["total_documentos"] += linha["quantidade"]
+        item["valor_total"] += linha["valor_bruto"]
+        if linha["status"] == "PAG":
+            item["valor_pago"] += linha["valor_bruto"]
+        elif linha["status"] == "PEN":
+            item["valor_pendente"] += linha["valor_bruto"]
+
+    total_valor_geral = sum(item["valor_total"] for item in agrupamentos.values())
+    resumo = []
+    for nome, item in agrupamentos.items():
         if choices and nome in dict(choices):
             nome = dict(choices).get(nome, "Não definido")
-        elif trunc_function and nome:
+        elif dimensao == "mes" and nome:
             nome = nome.strftime("%B/%Y")
         elif nome is None:
             nome = "Não definido"
@@ -286,10 +292,7 @@ def _agrupar_documentos(
         resumo.append(
             {
                 "nome": nome,
-                "total_documentos": item["total_documentos"],
-                "valor_total": item["valor_total"] or 0,
-                "valor_pago": item["valor_pago"] or 0,
-                "valor_pendente": item["valor_pendente"] or 0,
+                **item,
                 "percentual": (item["valor_total"] / total_valor_geral * 100)
                 if total_valor_geral
                 else 0,
@@ -299,125 +302,120 @@ def _agrupar_documentos(
 
 
 @login_required
+@ler_da_replica
 def relatorio_financeiro(request):
     """Relatório financeiro com filtros por período (corrigido)"""
-    data_inicio = request.GET.get("data_inicio", "")
-    data_fim = request.GET.get("data_fim", "")
-    status = request.GET.get("status", "")
+    filtro = FiltroRelatorio.do_request(request)
     tipo_agrupamento = request.GET.get("tipo_agrupamento", "mes")
 
-    filtros = Q()
-
-    if data_inicio:
-        try:
-            data_inicio = datetime.datetime.strptime(data_inicio, "%Y-%m-%d")
-            filtros &= Q(data_documento__gte=data_inicio)
-        except ValueError:
-            logger.error("Formato de data inválido para data_inicio: %s", data_inicio)
-
-    if data_fim:
-        try:
-            data_fim = datetime.datetime.strptime(data_fim, "%Y-%m-%d")
-            filtros &= Q(data_documento__lte=data_fim)
-        except ValueError:
-            logger.error("Formato de data inválido para data_fim: %s", data_fim)
-
-    if status:
-        filtros &= Q(status=status)
-
-    documentos = Documento.objects.filter(filtros).select_related("fornecedor")
+    # Totais pelo cubo de agregados (inclui exercícios fechados se o período os alcançar)
+    filtros = filtro.filtros_cubo()
+    por_status = {linha["status"]: linha for linha in cubo.pivot("status", **filtros)}
 
     context = {
-        "documentos": documentos,
-        "total_documentos": documentos.count(),
-        "total_valor": documentos.aggregate(total=Sum("valor_documento"))["total"] or 0,
-        "total_pago": documentos.filter(status="PAG").aggregate(
-            total=Sum("valor_documento")
-        )["total"]
-        or 0,
-        "total_pendente": documentos.filter(status="PEN").aggregate(
-            total=Sum("valor_documento")
-        )["total"]
-        or 0,
+        "total_documentos": sum(linha["quantidade"] for linha in por_status.values()),
+        "total_valor": sum(linha["valor_bruto"] for linha in por_status.values()),
+        "total_pago": por_status.get("PAG", {}).get("valor_bruto", 0),
+        "total_pendente": por_status.get("PEN", {}).get("valor_bruto", 0),
         "tipo_agrupamento": tipo_agrupamento,
     }
 
-    if tipo_agrupamento == "mes":
+    if tipo_agrupamento == "secretaria":
         context["agrupamento_titulo"], context["resumo_financeiro"] = (
             _agrupar_documentos(
-                documentos, "data_documento", "Mês", trunc_function=TruncMonth
-            )
-        )
-    elif tipo_agrupamento == "secretaria":
-        context["agrupamento_titulo"], context["resumo_financeiro"] = (
-            _agrupar_documentos(
-                documentos, "secretaria", "Secretaria", [(s.id, s.nome) for s in Secretaria.objects.all()]
+                "secretaria", "Secretaria", [(s.id, s.nome) for s in Secretaria.objects.all()], **filtros
             )
         )
     elif tipo_agrupamento == "recurso":
         context["agrupamento_titulo"], context["resumo_financeiro"] = (
             _agrupar_documentos(
-                documentos, "recurso", "Recurso", [(r.id, r.nome) for r in Recurso.objects.all()]
+                "recurso", "Recurso", [(r.id, r.nome) for r in Recurso.objects.all()], **filtros
             )
         )
     else:
+        # "mes" e padrão
         context["agrupamento_titulo"], context["resumo_financeiro"] = (
-            _agrupar_documentos(
-                documentos,
-                "data_documento",
-                "Mês",
-                trunc_function=TruncMonth,  # Default
-            )
+            _agrupar_documentos("mes", "Mês", **filtros)
         )
 
     return render(request, "relatorios/relatorio_financeiro.html", context)
 
 
+def _dias(duracao):
+    return round(duracao.total_seconds() / 86400, 1) if duracao is not None else None
+
+
 @login_required
-def relatorio_pagamentos(request):
-    """Relatório de pagamentos agrupado por secretaria e recurso"""
-    # Obter parâmetros de filtro
-    data_inicio = request.GET.get("data_inicio", "")
-    data_fim = request.GET.get("data_fim", "")
-    status = request.GET.get("status", "")
-    secretaria = request.GET.get("secretaria", "")
-
-    # Converter strings para objetos datetime
-    if data_inicio:
-        data_inicio = datetime.datetime.strptime(data_inicio, "%Y-%m-%d")
-    else:
-        # Padrão: início do mês atual
-        hoje = timezone.now()
-        data_inicio = datetime.datetime(hoje.year, hoje.month, 1)
-
-    if data_fim:
-        data_fim = datetime.datetime.strptime(data_fim, "%Y-%m-%d")
-        # Ajustar para o final do dia
-        data_fim = data_fim.replace(hour=23, minute=59, second=59)
-    else:
-        # Padrão: data atual
-        data_fim = timezone.now()
+@ler_da_replica
+def relatorio_fluxo(request):
+    """Tempo de permanência por etapa e vazão/estoque semanal por secretaria"""
+    filtro = FiltroRelatorio.do_request(request)
+    filtros = {}
+    if filtro.secretaria:
+        filtros["secretaria"] = filtro.secretaria
+    periodo = dict(filtros)
+    if filtro.data_inicio:
+        periodo["entrada__date__gte"] = filtro.data_inicio
+    if filtro.data_fim:
+        periodo["entrada__date__lte"] = filtro.data_fim
+
+    etapas = fluxo.duracoes_por_etapa(**periodo)
+    for linha in etapas:
+        linha["mediana_dias"], linha["p90_dias"] = _dias(linha["mediana"]), _dias(linha["p90"])
+
+    semanas, linhas = fluxo.fluxo_semanal(**filtros)
+    nomes = _nomes(Secretaria)
+    for linha in linhas:
+        linha["nome"] = nomes.get(linha["secretaria"], "Não definido")
+        linha["semanas"] = list(zip(linha["vazao"], linha["estoque"], strict=True))
 
-    # Filtrar documentos pelo período
-    documentos = Documento.objects.filter(
-        data_documento__gte=data_inicio, data_documento__lte=data_fim
-    ).select_related("fornecedor")
+    context = {
+        "etapas": etapas,
+        "semanas": semanas,
+        "fluxo_secretarias": linhas,
+        "secretaria_choices": [(s.id, s.nome) for s in Secretaria.objects.order_by("nome")],
+        **filtro.contexto(),
+    }
+    return render(request, "relatorios/relatorio_fluxo.html", context)
 
-    # Aplicar filtro de status se fornecido
-    if status:
-        documentos = documentos.filter(status=status)
 
-    # Filtrar por secretaria se fornecido
-    if secretaria:
-        documentos = documentos.filter(secretaria_id=secretaria)
+@login_required
+@ler_da_replica
+def relatorio_pagamentos(request):
+    """Relatório de pagamentos agrupado por secretaria e recurso"""
+    # Padrão: do início do mês atual até hoje
+    filtro = FiltroRelatorio.do_request(request, padrao_mes_atual=True)
+    filtros = filtro.filtros_cubo()
+    if filtro.secretaria:
         secretaria_nome = (
-            Secretaria.objects.filter(pk=secretaria).values_list("nome", flat=True).first()
+            Secretaria.objects.filter(pk=filtro.secretaria).values_list("nome", flat=True).first()
             or "Não definido"
         )
     else:
         secretaria_nome = "Todas"
 
-    # Agrupar por secretaria
+    # Totais por secretaria e recurso em uma única consulta ao cubo
+    por_secretaria = {}
+    for linha in cubo.pivot("secretaria", "recurso", **filtros):
+        por_secretaria.setdefault(linha["secretaria"], {})[linha["recurso"]] = linha
+
+    # Cada secretaria lista apenas os seus próprios recursos
+    recursos_por_secretaria = {}
+    for recurso in Recurso.objects.filter(secretaria_id__in=por_secretaria).order_by("nome"):
+        if recurso.id in por_secretaria[recurso.secretaria_id]:
+            recursos_por_secretaria.setdefault(recurso.secretaria_id, []).append(recurso)
+
+    # Documentos listados, carregados de uma vez (inclui o arquivo se o período o alcançar)
+    documentos_por_recurso = {}
+    documentos = (
+        filtro.consulta()
+        .filter(recurso__in=[r for lista in recursos_por_secretaria.values() for r in lista])
+        .select_related("fornecedor")
+        .order_by("-data_documento")
+    )
+    for doc in documentos:
+        documentos_por_recurso.setdefault((doc.secretaria_id, doc.recurso_id), []).append(doc)
+
     secretarias_dados = {}
     total_geral = {
         "quantidade": 0,
@@ -427,76 +425,41 @@ def relatorio_pagamentos(request):
         "total_irrf": Decimal("0.00"),
     }
 
-    # Processar cada secretaria
-    for s in Secretaria.objects.order_by("nome"):
-        # Filtrar documentos por secretaria
-        docs_secretaria = documentos.filter(secretaria=s)
-
-        if docs_secretaria.exists():
-            # Calcular totais da secretaria
-            total_secretaria = docs_secretaria.aggregate(
-                total=Sum("valor_documento"),
-                total_liquido=Sum("valor_liquido"),
-                total_iss=Sum("valor_iss"),
-                total_irrf=Sum("valor_irrf"),
-                quantidade=Count("id"),
+    for s in Secretaria.objects.filter(id__in=por_secretaria).order_by("nome"):
+        linhas = por_secretaria[s.id].values()
+        total_secretaria = {
+            "total": sum(linha["valor_bruto"] for linha in linhas),
+            "total_liquido": sum(linha["valor_liquido"] for linha in linhas),
+            "total_iss": sum(linha["valor_iss"] for linha in linhas),
+            "total_irrf": sum(linha["valor_irrf"] for linha in linhas),
+            "quantidade": sum(linha["quantidade"] for linha in linhas),
+        }
+
+        recursos_dados = []
+        for recurso in recursos_por_secretaria.get(s.id, []):
+            linha = por_secretaria[s.id][recurso.id]
+            recursos_dados.append(
+                {
+                    "recurso_code": recurso.id,
+                    "recurso_nome": recurso.nome,
+                    "total": linha["valor_bruto"],
+                    "total_liquido": linha["valor_liquido"],
+                    "total_iss": linha["valor_iss"],
+                    "total_irrf": linha["valor_irrf"],
+                    "quantidade": linha["quantidade"],
+                    "documentos": documentos_por_recurso.get((s.id, recurso.id), []),
+                }
             )
 
-            # Agrupar por recurso dentro da secretaria
-            recursos_dados = []
-
-            # Obter recursos para esta secretaria dinamicamente
-            recursos_choices = Recurso.objects.filter(secretaria=s).order_by("nome")
-
-            for recurso in recursos_choices:
-                # Filtrar documentos por recurso
-                docs_recurso = docs_secretaria.filter(recurso=recurso)
-
-                if docs_recurso.exists():
-                    # Calcular totais do recurso
-                    total_recurso = docs_recurso.aggregate(
-                        total=Sum("valor_documento"),
-                        total_liquido=Sum("valor_liquido"),
-                        total_iss=Sum("valor_iss"),
-                        total_irrf=Sum("valor_irrf"),
-                        quantidade=Count("id"),
-                    )
-
-                    # Adicionar dados do recurso
-                    recursos_dados.append(
-                        {
-                            "recurso_code": recurso.id,
-                            "recurso_nome": recurso.nome,
-                            "total": total_recurso["total"],
-                            "total_liquido": total_recurso["total_liquido"],
-                            "total_iss": total_recurso["total_iss"],
-                            "total_irrf": total_recurso["total_irrf"],
-                            "quantidade": total_recurso["quantidade"],
-                            "documentos": docs_recurso,
-                        }
-                    )
-
-            # Adicionar dados da secretaria
-            secretarias_dados[s.id] = {
-                "secretaria_nome": s.nome,
-                "total": total_secretaria["total"],
-                "total_liquido": total_secretaria["total_liquido"],
-                "total_iss": total_secretaria["total_iss"],
-                "total_irrf": total_secretaria["total_irrf"],
-                "quantidade": total_secretaria["quantidade"],
-                "recursos": recursos_dados,
-            }
+        secretarias_dados[s.id] = {
+            "secretaria_nome": s.nome,
+            **total_secretaria,
+            "recursos": recursos_dados,
+        }
 
-            # Atualizar totais gerais
-            total_geral["quantidade"] += total_secretaria["quantidade"]
-            total_geral["total"] += total_secretaria["total"] or Decimal("0.00")
-            total_geral["total_liquido"] += total_secretaria[
-                "total_liquido"
-            ] or Decimal("0.00")
-            total_geral["total_iss"] += total_secretaria["total_iss"] or Decimal("0.00")
-            total_geral["total_irrf"] += total_secretaria["total_irrf"] or Decimal(
-                "0.00"
-            )
+        # Atualizar totais gerais
+        for chave, valor in total_secretaria.items():
+            total_geral[chave] += valor
 
     # Verificar se foi solicitada exportação
     formato = request.GET.get("formato", "")
@@ -504,14 +467,11 @@ def relatorio_pagamentos(request):
         return exportar_pagamentos(request, secretarias_dados, total_geral, formato)
 
     context = {
+        **filtro.contexto(),
         "secretarias_dados": secretarias_dados,
         "total_geral": total_geral,
-        "secretaria_selecionada": secretaria,
         "secretaria_nome": secretaria_nome,
         "secretaria_choices": [(sec.id, sec.nome) for sec in Secretaria.objects.order_by("nome")],
-        "data_inicio": data_inicio.strftime("%Y-%m-%d"),
-        "data_fim": data_fim.strftime("%Y-%m-%d"),
-        "status_selecionado": status,
     }
 
     return render(request, "relatorios/relatorio_pagamentos.html", context)
@@ -519,6 +479,8 @@ def relatorio_pagamentos(request):
 
 def exportar_pagamentos(_, secretarias_dados, total_geral, formato):
     """Exporta o relatório de pagamentos para CSV ou Excel"""
+    import xlsxwriter  # pylint: disable=import-outside-toplevel
+
     try:
         if formato == "csv":
             response = HttpResponse(content_type="text/csv")
@@ -652,33 +614,52 @@ def exportar_pagamentos(_, secretarias_dados, total_geral, formato):
         )
 
 
+# Destinatários dos ofícios de encaminhamento
+DESTINOS = {
+    "controle_interno": {
+        "orgao": "AO CONTROLE INTERNO",
+        "destinatario": "RODRIGO BASTOS DE LIMA",
+        "cargo": "Controlador Municipal",
+        "vocativo": "Prezado Controlador,",
+    },
+    "contabilidade": {
+        "orgao": "À CONTABILIDADE",
+        "destinatario": "MARIA APARECIDA SILVA",
+        "cargo": "Contadora Municipal",
+        "vocativo": "Prezada Contadora,",
+    },
+}
+ASSINATURA = {
+    "secretario_nome": "CARLOS EDUARDO ALVES DA SILVA",
+    "secretario_decreto": "008/2023",
+}
+
+
+def _documentos_encaminhamento(request):
+    """Documentos do filtro de encaminhamento (período, secretaria e fornecedor).
+
+    Inclui o arquivo quando o período alcança exercícios fechados.
+    """
+    filtro = FiltroRelatorio.do_request(request)
+    documentos = filtro.consulta()
+    fornecedor = request.GET.get("fornecedor", "")
+    if fornecedor:
+        documentos = documentos.filter(fornecedor__nome__icontains=fornecedor)
+    return filtro, documentos
+
+
 @login_required
+@ler_da_replica
 def filtro_encaminhamento(request):
     """Filtro para selecionar documentos a serem encaminhados"""
     # Obter parâmetros do filtro
-    data_inicio = request.GET.get("data_inicio", "")
-    data_fim = request.GET.get("data_fim", "")
-    secretaria_id = request.GET.get("secretaria", "")
+    filtro, documentos = _documentos_encaminhamento(request)
     fornecedor = request.GET.get("fornecedor", "")
     destino = request.GET.get("destino", "")  # controle_interno ou contabilidade
 
-    # Inicializar queryset
-    documentos = Documento.objects.all().order_by("fornecedor__nome", "data_documento")
-
-    # Aplicar filtros
-    if data_inicio:
-        data_inicio = datetime.datetime.strptime(data_inicio, "%Y-%m-%d").date()
-        documentos = documentos.filter(data_documento__gte=data_inicio)
-
-    if data_fim:
-        data_fim = datetime.datetime.strptime(data_fim, "%Y-%m-%d").date()
-        documentos = documentos.filter(data_documento__lte=data_fim)
-
-    if secretaria_id:
-        documentos = documentos.filter(secretaria_id=secretaria_id)
-
-    if fornecedor:
-        documentos = documentos.filter(fornecedor__nome__icontains=fornecedor)
+    documentos = documentos.select_related("fornecedor", "secretaria").order_by(
+        "fornecedor__nome", "data_documento"
+    )
 
     # Paginação
     page = request.GET.get("page", 1)
@@ -691,12 +672,17 @@ def filtro_encaminhamento(request):
     except EmptyPage:
         documentos_paginados = paginator.page(paginator.num_pages)
 
+    # Filtro repassado à seleção ("selecionar todos" grava a consulta inteira)
+    parametros_filtro = request.GET.copy()
+    parametros_filtro.pop("page", None)
+
     context = {
         "documentos": documentos_paginados,
+        "parametros_filtro": parametros_filtro.urlencode(),
         "secretarias": [(s.id, s.nome) for s in Secretaria.objects.order_by("nome")],
-        "data_inicio": data_inicio,
-        "data_fim": data_fim,
-        "secretaria": secretaria_id,
+        "data_inicio": filtro.data_inicio or "",
+        "data_fim": filtro.data_fim or "",
+        "secretaria": filtro.secretaria or "",
         "fornecedor": fornecedor,
         "is_paginated": True,
         "paginator": paginator,
@@ -707,45 +693,77 @@ def filtro_encaminhamento(request):
 
 
 @login_required
+@require_POST
+def selecionar_documentos(request):
+    """Grava a seleção do filtro de encaminhamento e abre o relatório do destino.
+
+    Com ``todos`` marcado, a seleção recebe todos os documentos do filtro
+    (parâmetros na query string); senão, apenas os marcados na página.
+    """
+    destino = request.POST.get("tipo", "controle_interno")
+    if destino not in dict(SelecaoDocumentos.DESTINO_CHOICES):
+        destino = "controle_interno"
+
+    _, documentos = _documentos_encaminhamento(request)
+    if not request.POST.get("todos"):
+        ids = [valor for valor in request.POST.getlist("documentos") if valor.isdigit()]
+        documentos = documentos.filter(id__in=ids)
+
+    selecao = selecoes.criar_selecao(request.user, destino, documentos)
+    if not selecao.quantidade:
+        selecao.delete()
+        messages.warning(request, "Nenhum documento foi selecionado para o relatório.")
+        return redirect(f"{reverse('relatorios:filtro_encaminhamento')}?{request.GET.urlencode()}")
+
+    return redirect(
+        f"{reverse('relatorios:relatorio_encaminhamento')}?selecao={selecao.pk}&tipo={destino}"
+    )
+
+
+def _selecao_do_request(request):
+    """Seleção do usuário indicada em ``?selecao=`` (None se ausente ou de outro usuário)."""
+    selecao = request.GET.get("selecao", "")
+    if not selecao.isdigit():
+        return None
+    return SelecaoDocumentos.objects.filter(pk=selecao, usuario=request.user).first()
+
+
+@login_required
+@ler_da_replica
 def relatorio_encaminhamento(request):
     """Relatório de encaminhamentos para Controle Interno e Contabilidade"""
     # Usar timezone.now() em vez de datetime.now()
     data_atual = timezone.now().date()
     ano_atual = data_atual.year
 
-    # Obter o tipo de encaminhamento (controle_interno ou contabilidade)
-    tipo_encaminhamento = request.GET.get("tipo", "controle_interno")
-
-    # Obter IDs dos documentos selecionados
-    documentos_ids = request.GET.getlist("documentos")
-
-    # Obter documentos selecionados
-    if documentos_ids:
-        documentos = Documento.objects.filter(id__in=documentos_ids).order_by(
-            "fornecedor__nome", "data_documento"
-        )
-    else:
+    # Seleção gravada pelo filtro de encaminhamento
+    selecao = _selecao_do_request(request)
+    if selecao is None:
         # Se não houver documentos selecionados, redirecionar para a página de filtro
         return redirect("relatorios:filtro_encaminhamento")
 
+    # Obter o tipo de encaminhamento (controle_interno ou contabilidade)
+    tipo_encaminhamento = request.GET.get("tipo", selecao.destino)
+
+    # Documentos selecionados, avaliados uma única vez
+    documentos = list(selecoes.documentos_da_selecao(selecao))
+
     # Obter o número e ano do ofício
-    numero_oficio = request.GET.get("numero_oficio", f"{documentos.count():03d}")
+    numero_oficio = request.GET.get("numero_oficio", f"{len(documentos):03d}")
     ano_oficio = request.GET.get("ano_oficio", ano_atual)
 
     # Definir destinatário com base no tipo de encaminhamento
-    if tipo_encaminhamento == "controle_interno":
-        destinatario = "RODRIGO BASTOS DE LIMA"
-        cargo_destinatario = "Controlador Municipal"
-    else:  # contabilidade
-        destinatario = "MARIA APARECIDA SILVA"
-        cargo_destinatario = "Contadora Municipal"
+    destino = DESTINOS.get(tipo_encaminhamento, DESTINOS["contabilidade"])
+    destinatario = destino["destinatario"]
+    cargo_destinatario = destino["cargo"]
 
     # Obter informações do secretário
-    secretario_nome = "CARLOS EDUARDO ALVES DA SILVA"
-    secretario_decreto = "008/2023"
+    secretario_nome = ASSINATURA["secretario_nome"]
+    secretario_decreto = ASSINATURA["secretario_decreto"]
 
     context = {
         "documentos": documentos,
+        "selecao": selecao,
         "tipo_encaminhamento": tipo_encaminhamento,
         "data_atual": data_atual,
         "ano_atual": ano_atual,
@@ -761,30 +779,16 @@ def relatorio_encaminhamento(request):
 
 
 @login_required
+@ler_da_replica
 def relatorio_contabilidade(request):
     """Relatório de encaminhamento para contabilidade"""
-    # Obter IDs dos documentos selecionados
-    documentos_ids = request.GET.getlist("documentos")
-
-    if not documentos_ids:
+    selecao = _selecao_do_request(request)
+    if selecao is None:
         messages.warning(request, "Nenhum documento foi selecionado para o relatório.")
         return redirect("relatorios:filtro_encaminhamento")
 
-    # Buscar documentos pelo ID
-    documentos = Documento.objects.filter(id__in=documentos_ids).select_related(
-        "fornecedor"
-    )
-
-    # Calcular valor total
-    # Calculate total value and add to context
-    total_valor = (
-        documentos.aggregate(total_valor=Sum("valor_documento"))["total_valor"] or 0
-    )
-    # Add total value to the existing context dictionary
-    context = {}
-    if "total_valor" not in context:
-        context = {}
-    context["total_valor"] = total_valor
+    # Documentos selecionados, avaliados uma única vez
+    documentos = list(selecoes.documentos_da_selecao(selecao))
 
     # Adicionar numeração sequencial
     for i, doc in enumerate(documentos, 1):
@@ -794,60 +798,85 @@ def relatorio_contabilidade(request):
     # Assumindo que todos os documentos são da mesma secretaria, pegamos a primeira
     secretaria = None
     if documentos:
-        primeiro_doc = documentos.first()
+        primeiro_doc = documentos[0]
         secretaria = (
             primeiro_doc.secretaria.nome if primeiro_doc.secretaria else ""
         )
 
     context = {
         "documentos": documentos,
+        "total_valor": sum((doc.valor_documento for doc in documentos), Decimal("0")),
         "data_atual": datetime.datetime.now(),
         "secretaria": secretaria,
-        "secretario_nome": "CARLOS EDUARDO ALVES DA SILVA",
-        "secretario_decreto": "008/2023",
+        "selecao": selecao,
+        **ASSINATURA,
     }
 
     return render(request, "relatorios/relatorio_contabilidade.html", context)
 
 
+def _pdf(conteudo, nome):
+    response = HttpResponse(conteudo, content_type="application/pdf")
+    response["Content-Disposition"] = f'inline; filename="{nome}.pdf"'
+    return response
+
+
+@login_required
+@ler_da_replica
+def oficio_pdf(request):
+    """Ofício de encaminhamento (``?modelo=encaminhamento``) ou protocolos para
+    empenho por secretaria (``?modelo=protocolo``) da seleção, em PDF."""
+    from . import pdf  # pylint: disable=import-outside-toplevel
+
+    selecao = _selecao_do_request(request)
+    if selecao is None:
+        messages.warning(request, "Nenhum documento foi selecionado para o relatório.")
+        return redirect("relatorios:filtro_encaminhamento")
+
+    documentos = list(selecoes.documentos_da_selecao(selecao))
+    data_atual = timezone.localdate()
+    numero = request.GET.get("numero_oficio", "_____")
+    ano = request.GET.get("ano_oficio", data_atual.year)
+    if request.GET.get("modelo") == "protocolo":
+        oficios = pdf.dados_protocolos(documentos, data_atual, f"{numero}/{ano}", ASSINATURA)
+    else:
+        destino = DESTINOS.get(request.GET.get("tipo", selecao.destino), DESTINOS["contabilidade"])
+        oficios = [
+            pdf.dados_encaminhamento(
+                documentos, destino, data_atual, f"{numero}/{ano}/DIREF", ASSINATURA
+            )
+        ]
+    return _pdf(pdf.oficios_pdf(oficios), f"oficio_{selecao.pk}")
+
+
 @login_required
+@ler_da_replica
+def recibos_pdf(request):
+    """Recibos de todos os documentos da seleção em um único PDF."""
+    from documentos import pdf as recibos  # pylint: disable=import-outside-toplevel
+
+    selecao = _selecao_do_request(request)
+    if selecao is None:
+        messages.warning(request, "Nenhum documento foi selecionado para o relatório.")
+        return redirect("relatorios:filtro_encaminhamento")
+    return _pdf(
+        recibos.recibos_pdf(selecoes.documentos_da_selecao(selecao)), f"recibos_{selecao.pk}"
+    )
+
+
+@login_required
+@ler_da_replica
 def exportar_csv(request):
     """Exporta relatórios para formato CSV"""
     tipo = request.GET.get("tipo", "documentos")
 
-    # Obter parâmetros de filtro
-    data_inicio = request.GET.get("data_inicio", "")
-    data_fim = request.GET.get("data_fim", "")
-    status = request.GET.get("status", "")
-    secretaria = request.GET.get("secretaria", "")
-    recurso = request.GET.get("recurso", "")
-
-    # Inicializar queryset
-    documentos = Documento.objects.all().order_by("data_documento")
-
-    # Aplicar filtros
-    if data_inicio:
-        try:
-            data_inicio = datetime.datetime.strptime(data_inicio, "%Y-%m-%d").date()
-            documentos = documentos.filter(data_documento__gte=data_inicio)
-        except ValueError:
-            pass
-
-    if data_fim:
-        try:
-            data_fim = datetime.datetime.strptime(data_fim, "%Y-%m-%d").date()
-            documentos = documentos.filter(data_documento__lte=data_fim)
-        except ValueError:
-            pass
-
-    if status:
-        documentos = documentos.filter(status=status)
-
-    if secretaria:
-        documentos = documentos.filter(secretaria=secretaria)
-
-    if recurso:
-        documentos = documentos.filter(recurso=recurso)
+    # Documentos filtrados (inclui o arquivo se o período alcançar exercícios fechados)
+    documentos = (
+        FiltroRelatorio.do_request(request)
+        .consulta()
+        .select_related("fornecedor", "secretaria", "recurso")
+        .order_by("data_documento")
+    )
 
     # Configurar resposta CSV
     response = HttpResponse(content_type="text/csv")
@@ -887,47 +916,25 @@ def exportar_csv(request):
 
 
 @login_required
+@ler_da_replica
 def exportar_excel(request):
     """Exporta relatórios para formato Excel"""
-    tipo = request.GET.get("tipo", "documentos")
+    import xlsxwriter  # pylint: disable=import-outside-toplevel
 
-    # Obter parâmetros de filtro
-    data_inicio = request.GET.get("data_inicio", "")
-    data_fim = request.GET.get("data_fim", "")
-    status = request.GET.get("status", "")
-    secretaria = request.GET.get("secretaria", "")
-    recurso = request.GET.get("recurso", "")
-
-    # Inicializar queryset
-    documentos = Documento.objects.all().order_by("data_documento")
-
-    # Aplicar filtros
-    if data_inicio:
-        try:
-            data_inicio = datetime.datetime.strptime(data_inicio, "%Y-%m-%d").date()
-            documentos = documentos.filter(data_documento__gte=data_inicio)
-        except ValueError:
-            pass
-
-    if data_fim:
-        try:
-            data_fim = datetime.datetime.strptime(data_fim, "%Y-%m-%d").date()
-            documentos = documentos.filter(data_documento__lte=data_fim)
-        except ValueError:
-            pass
-
-    if status:
-        documentos = documentos.filter(status=status)
-
-    if secretaria:
-        documentos = documentos.filter(secretaria=secretaria)
+    tipo = request.GET.get("tipo", "documentos")
 
-    if recurso:
-        documentos = documentos.filter(recurso=recurso)
+    # Documentos filtrados (inclui o arquivo se o período alcançar exercícios fechados)
+    documentos = (
+        FiltroRelatorio.do_request(request)
+        .consulta()
+        .select_related("fornecedor", "secretaria", "recurso")
+        .order_by("data_documento")
+    )
 
-    # Configurar resposta Excel
-    output = BytesIO()
-    workbook = xlsxwriter.Workbook(output)
+    # Gravada em disco e entregue pelo nginx (utils.downloads); constant_memory
+    # grava cada linha assim que a próxima começa
+    caminho = novo_arquivo_exportacao(get_valid_filename(f"relatorio_{tipo}.xlsx"))
+    workbook = xlsxwriter.Workbook(str(caminho), {"constant_memory": True})
     worksheet = workbook.add_worksheet()
 
     # Formatos
@@ -936,6 +943,15 @@ def exportar_excel(request):
     moeda = workbook.add_format({"num_format": "R$ #,##0.00"})
     data = workbook.add_format({"num_format": "dd/mm/yyyy"})
 
+    # Ajustar largura das colunas
+    worksheet.set_column(0, 0, 10)  # ID
+    worksheet.set_column(1, 1, 30)  # Fornecedor
+    worksheet.set_column(2, 2, 40)  # Descrição
+    worksheet.set_column(3, 3, 15)  # Data
+    worksheet.set_column(4, 5, 15)  # Valores
+    worksheet.set_column(6, 7, 25)  # Secretaria/Recurso
+    worksheet.set_column(8, 8, 15)  # Status
+
     # Título
     worksheet.write(0, 0, f"Relatório de {tipo.capitalize()}", titulo)
     worksheet.write(1, 0, f"Total de documentos: {documentos.count()}")
@@ -970,70 +986,162 @@ def exportar_excel(request):
         worksheet.write(row, 7, doc.recurso.nome if doc.recurso else "")
         worksheet.write(row, 8, doc.get_status_display())
 
-    # Ajustar largura das colunas
-    worksheet.set_column(0, 0, 10)  # ID
-    worksheet.set_column(1, 1, 30)  # Fornecedor
-    worksheet.set_column(2, 2, 40)  # Descrição
-    worksheet.set_column(3, 3, 15)  # Data
-    worksheet.set_column(4, 5, 15)  # Valores
-    worksheet.set_column(6, 7, 25)  # Secretaria/Recurso
-    worksheet.set_column(8, 8, 15)  # Status
-
     workbook.close()
 
-    output.seek(0)
-    response = HttpResponse(
-        output.read(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
-    response["Content-Disposition"] = f'attachment; filename="relatorio_{tipo}.xlsx"'
+    return enviar_arquivo(caminho)
+
+
+CABECALHO_EXTRATO = [
+    "Data",
+    "Número",
+    "Nº Documento",
+    "Tipo",
+    "Status",
+    "Valor Bruto",
+    "Retenções",
+    "Valor Líquido",
+    "Pago",
+    "A Pagar",
+    "Bruto Acumulado",
+    "Retenções Acumuladas",
+    "Pago Acumulado",
+    "Saldo a Pagar",
+]
+STATUS_DOCUMENTO = dict(Documento.STATUS_CHOICES)
+TIPOS_DOCUMENTO = dict(Documento.TIPO_CHOICES)
+
+
+def _extrato(request, pk):
+    filtro = FiltroRelatorio.do_request(request)
+    for erro in filtro.erros:
+        messages.error(request, erro)
+    fornecedor = get_object_or_404(Fornecedor, pk=pk)
+    return filtro, Extrato(fornecedor, filtro.data_inicio, filtro.data_fim)
+
+
+@login_required
+@ler_da_replica
+def extrato_fornecedor(request, pk):
+    """Extrato de conta do fornecedor com saldos acumulados"""
+    filtro, extrato = _extrato(request, pk)
+
+    paginator = Paginator(extrato, 50)
+    try:
+        linhas = paginator.page(request.GET.get("page", 1))
+    except PageNotAnInteger:
+        linhas = paginator.page(1)
+    except EmptyPage:
+        linhas = paginator.page(paginator.num_pages)
+    for linha in linhas:
+        linha["tipo_display"] = TIPOS_DOCUMENTO.get(linha["tipo"], linha["tipo"])
+        linha["status_display"] = STATUS_DOCUMENTO.get(linha["status"], linha["status"])
+
+    context = {
+        "fornecedor": extrato.fornecedor,
+        "linhas": linhas,
+        "saldo_anterior": extrato.saldo_anterior,
+        "saldo_final": extrato.saldo_final,
+        **filtro.contexto(),
+    }
+    return render(request, "relatorios/relatorio_extrato.html", context)
+
+
+def _valores_extrato(linha):
+    return [
+        linha["numero"],
+        linha["numero_documento"] or "",
+        TIPOS_DOCUMENTO.get(linha["tipo"], linha["tipo"]),
+        STATUS_DOCUMENTO.get(linha["status"], linha["status"]),
+        linha["bruto"],
+        linha["retencoes"],
+        linha["valor_liquido"],
+        linha["pago"],
+        linha["pendente"],
+        linha["bruto_acumulado"],
+        linha["retencoes_acumulado"],
+        linha["pago_acumulado"],
+        linha["pendente_acumulado"],
+    ]
+
+
+class _Eco:
+    """Pseudo-arquivo para o csv.writer: devolve a linha em vez de gravá-la."""
 
+    def write(self, valor):
+        return valor
+
+
+@login_required
+@ler_da_replica
+def exportar_extrato_csv(request, pk):
+    """Exporta o extrato do fornecedor em CSV, gerado linha a linha"""
+    _, extrato = _extrato(request, pk)
+    writer = csv.writer(_Eco())
+
+    def linhas():
+        yield writer.writerow(CABECALHO_EXTRATO)
+        for linha in extrato:
+            yield writer.writerow(
+                [linha["data_documento"].strftime("%d/%m/%Y"), *_valores_extrato(linha)]
+            )
+
+    response = StreamingHttpResponse(linhas(), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="extrato_fornecedor_{pk}.csv"'
     return response
 
 
 @login_required
-def dados_grafico(_):
-    """Return JSON data for dashboard charts"""
-    # Get data from the dashboard function
-    status_counts = {
-        "pendentes": Documento.objects.filter(status="PEN").count(),
-        "pagos": Documento.objects.filter(status="PAG").count(),
-        "atrasados": Documento.objects.filter(status="ATR").count(),
-    }
+@ler_da_replica
+def exportar_extrato_excel(request, pk):
+    """Exporta o extrato do fornecedor em Excel"""
+    import xlsxwriter  # pylint: disable=import-outside-toplevel
 
-    # Documents by secretaria (top 5)
-    docs_por_secretaria = (
-        Documento.objects.values("secretaria")
-        .annotate(count=Count("id"))
-        .order_by("-count")[:5]
-    )
+    _, extrato = _extrato(request, pk)
 
-    # Documents by recurso (top 5)
-    docs_por_recurso = (
-        Documento.objects.values("recurso")
-        .annotate(count=Count("id"))
-        .order_by("-count")[:5]
-    )
+    # constant_memory grava cada linha em disco assim que a próxima começa
+    caminho = novo_arquivo_exportacao(f"extrato_fornecedor_{pk}.xlsx")
+    workbook = xlsxwriter.Workbook(str(caminho), {"constant_memory": True})
+    worksheet = workbook.add_worksheet("Extrato")
+    titulo = workbook.add_format({"bold": True, "font_size": 14})
+    cabecalho = workbook.add_format({"bold": True, "bg_color": "#CCCCCC"})
+    moeda = workbook.add_format({"num_format": "R$ #,##0.00"})
+    data = workbook.add_format({"num_format": "dd/mm/yyyy"})
+
+    worksheet.set_column(0, 0, 12)
+    worksheet.set_column(1, 4, 16)
+    worksheet.set_column(5, 13, 16)
+    worksheet.write(0, 0, f"Extrato de {extrato.fornecedor.nome}", titulo)
+    for col, header in enumerate(CABECALHO_EXTRATO):
+        worksheet.write(2, col, header, cabecalho)
+
+    for row, linha in enumerate(extrato, start=3):
+        worksheet.write_datetime(row, 0, linha["data_documento"], data)
+        for col, valor in enumerate(_valores_extrato(linha), start=1):
+            worksheet.write(row, col, valor, moeda if isinstance(valor, Decimal) else None)
+    workbook.close()
+
+    return enviar_arquivo(caminho)
 
-    # Format data for charts
-    data = {
-        "status": {
-            "labels": ["Pendentes", "Pagos", "Atrasados"],
-            "data": [
-                status_counts["pendentes"],
-                status_counts["pagos"],
-                status_counts["atrasados"],
-            ],
-            "colors": ["#ffc107", "#28a745", "#dc3545"],
-        },
-        "secretarias": {
-            "labels": [doc["secretaria"] for doc in docs_por_secretaria],
-            "data": [doc["count"] for doc in docs_por_secretaria],
-        },
-        "recursos": {
-            "labels": [doc["recurso"] for doc in docs_por_recurso],
-            "data": [doc["count"] for doc in docs_por_recurso],
-        },
-    }
 
-    return JsonResponse(data)
+@transaction.non_atomic_requests  # ATOMIC_REQUESTS não se aplica a views async
+@login_required
+@ler_da_replica
+async def dados_grafico(_):
+    """Return JSON data for dashboard charts"""
+    return JsonResponse(await aem_cache("dados_grafico", painel.dados_grafico))
+
+
+@transaction.non_atomic_requests
+@login_required
+async def eventos_painel(request):
+    """Atualizações do dashboard por Server-Sent Events (ver ``relatorios.painel``)."""
+    if isinstance(request, ASGIRequest):
+        eventos = painel.publicador.eventos()
+    else:
+        # WSGI: envia o estado atual e o navegador reconecta após o intervalo
+        dados = await aem_cache("dados_grafico", painel.dados_grafico)
+        eventos = [painel.evento(dados, retry=settings.PAINEL_SSE_INTERVALO * 1000)]
+    resposta = StreamingHttpResponse(eventos, content_type="text/event-stream")
+    resposta["Cache-Control"] = "no-cache"
+    resposta["X-Accel-Buffering"] = "no"  # nginx: não acumular os eventos
+    return resposta
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import LogAtividade, Perfil
+from .models import EmailPendente, LogAtividade, Perfil
 
 
 class PerfilAdmin(admin.ModelAdmin):
@@ -20,3 +20,19 @@ class LogAtividadeAdmin(admin.ModelAdmin):
 
 
 admin.site.register(LogAtividade, LogAtividadeAdmin)
+
+
+class EmailPendenteAdmin(admin.ModelAdmin):
+    list_display = (
+        "assunto",
+        "status",
+        "tentativas",
+        "proxima_tentativa",
+        "data_envio",
+    )
+    list_filter = ("status",)
+    search_fields = ("assunto", "destinatarios")
+    readonly_fields = ("data_criacao", "data_envio", "erro")
+
+
+admin.site.register(EmailPendente, EmailPendenteAdmin)
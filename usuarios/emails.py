@@ -0,0 +1,140 @@
+"""Fila de saída (outbox) de e-mails.
+
+As views não falam com o servidor SMTP: ``enfileirar_email`` grava um
+``EmailPendente`` na mesma transação do request (``ATOMIC_REQUESTS``), então
+o e-mail só existe se o cadastro/aprovação for confirmado, e um SMTP lento ou
+fora do ar não atrasa nem desfaz o request.
+
+``enviar_pendentes`` entrega a fila em lotes, com uma única conexão SMTP por
+lote. Falhas são tentadas de novo com espera exponencial
+(``ESPERA_INICIAL`` x 2^tentativas, até ``ESPERA_MAXIMA``); após
+``MAX_TENTATIVAS`` o e-mail fica como ``falhou``. Roda a cada minuto pelo
+agendador (``usuarios.enviar_emails``) ou continuamente com
+``python manage.py enviar_emails --continuo``.
+"""
+
+import contextlib
+import datetime
+import logging
+import smtplib
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EmailPendente
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE = 50
+MAX_TENTATIVAS = 8
+ESPERA_INICIAL = 60
+ESPERA_MAXIMA = 6 * 3600
+# Tempo reservado a um lote: outro processo só o pega se este morrer no meio
+CONCESSAO = 300
+
+ERROS_ENVIO = (smtplib.SMTPException, OSError)
+
+
+def enfileirar_email(assunto, corpo, destinatarios, html="", remetente=None):
+    """Grava um e-mail na fila de saída (na transação atual)."""
+    return EmailPendente.objects.create(  # pylint: disable=no-member
+        assunto=assunto,
+        corpo=corpo,
+        html=html or "",
+        remetente=remetente or settings.DEFAULT_FROM_EMAIL,
+        destinatarios=list(destinatarios),
+    )
+
+
+def _reservar_lote(agora, limite):
+    """Reserva até ``limite`` e-mails vencidos (adiados por ``CONCESSAO`` segundos)."""
+    with transaction.atomic():
+        lote = list(
+            EmailPendente.objects.select_for_update(skip_locked=True)  # pylint: disable=no-member
+            .filter(status=EmailPendente.PENDENTE, proxima_tentativa__lte=agora)
+            .order_by("proxima_tentativa")[:limite]
+        )
+        EmailPendente.objects.filter(  # pylint: disable=no-member
+            pk__in=[email.pk for email in lote]
+        ).update(proxima_tentativa=agora + datetime.timedelta(seconds=CONCESSAO))
+    return lote
+
+
+def _mensagem(email, conexao):
+    mensagem = EmailMultiAlternatives(
+        email.assunto,
+        email.corpo,
+        email.remetente,
+        email.destinatarios,
+        connection=conexao,
+    )
+    if email.html:
+        mensagem.attach_alternative(email.html, "text/html")
+    return mensagem
+
+
+def _registrar_falha(email, erro, agora):
+    email.tentativas += 1
+    email.erro = f"{type(erro).__name__}: {erro}"[:1000]
+    if email.tentativas >= MAX_TENTATIVAS:
+        email.status = EmailPendente.FALHOU
+        logger.error(
+            "E-mail %s descartado após %s tentativas: %s",
+            email.pk,
+            email.tentativas,
+            erro,
+        )
+    else:
+        espera = min(ESPERA_INICIAL * 2 ** (email.tentativas - 1), ESPERA_MAXIMA)
+        email.proxima_tentativa = agora + datetime.timedelta(seconds=espera)
+    email.save(update_fields=["tentativas", "erro", "status", "proxima_tentativa"])
+
+
+def _fechar(conexao):
+    with contextlib.suppress(*ERROS_ENVIO):
+        conexao.close()
+
+
+def enviar_pendentes(limite=TAMANHO_LOTE, agora=None):
+    """Envia um lote da fila de saída por uma única conexão SMTP.
+
+    Returns:
+        tuple: (enviados, falhas).
+    """
+    agora = agora or timezone.now()
+    lote = _reservar_lote(agora, limite)
+    enviados = falhas = 0
+    conexao = get_connection(fail_silently=False)
+    try:
+        for indice, email in enumerate(lote):
+            # Aberta aqui, a conexão é reaproveitada por todo o lote (e reaberta
+            # se o servidor a derrubar no meio)
+            if getattr(conexao, "connection", None) is None:
+                try:
+                    conexao.open()
+                except ERROS_ENVIO as erro:
+                    # Servidor indisponível: o restante do lote volta para a fila
+                    for restante in lote[indice:]:
+                        _registrar_falha(restante, erro, agora)
+                    falhas += len(lote) - indice
+                    break
+            try:
+                conexao.send_messages([_mensagem(email, conexao)])
+            except ERROS_ENVIO as erro:
+                _registrar_falha(email, erro, agora)
+                falhas += 1
+                if isinstance(erro, (smtplib.SMTPServerDisconnected, OSError)):
+                    _fechar(conexao)
+                continue
+            email.status = EmailPendente.ENVIADO
+            email.data_envio = timezone.now()
+            email.erro = ""
+            email.save(update_fields=["status", "data_envio", "erro"])
+            enviados += 1
+    finally:
+        _fechar(conexao)
+    if falhas:
+        logger.warning("Fila de e-mails: %s enviado(s), %s falha(s)", enviados, falhas)
+    return enviados, falhas
@@ -11,6 +11,7 @@ from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
 from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist
 
+from .miniaturas import gerar_miniaturas, remover_miniaturas
 from .models import Perfil
 
 
@@ -172,6 +173,22 @@ class PerfilForm(forms.ModelForm):
     Estende o ModelForm do Django para fornecer funcionalidade de formulário para o modelo de Perfil
     """
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Nome da foto antes da edição, para descartar as miniaturas dela
+        self.foto_anterior = self.instance.foto.name if self.instance.foto else ""
+
+    def save(self, commit=True):
+        """Salva o perfil e, se a foto mudou, gera as miniaturas da nova (com ``commit``)."""
+        perfil = super().save(commit)
+        if commit and "foto" in self.changed_data:
+            if self.foto_anterior:
+                remover_miniaturas(self.foto_anterior)
+            nome = perfil.foto.name if perfil.foto else ""
+            perfil.foto_miniaturas = nome if nome and gerar_miniaturas(nome) else ""
+            perfil.save(update_fields=["foto_miniaturas"])
+        return perfil
+
     def clean_cpf(self):
         """Valida o formato do campo CPF"""
         cpf = self.cleaned_data.get("cpf")
@@ -0,0 +1,48 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from usuarios.emails import TAMANHO_LOTE, enviar_pendentes
+
+
+class Command(BaseCommand):
+    help = "Envia os e-mails da fila de saída (uma conexão SMTP por lote)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--continuo",
+            action="store_true",
+            help="Continua em execução, verificando a fila a cada --intervalo segundos",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=5,
+            help="Segundos entre duas verificações da fila (com --continuo)",
+        )
+        parser.add_argument(
+            "--lote", type=int, default=TAMANHO_LOTE, help="E-mails por conexão SMTP"
+        )
+
+    def handle(self, *args, **options):
+        parar = threading.Event()
+        if options["continuo"]:
+            for sinal in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(sinal, lambda *_: parar.set())
+
+        total = 0
+        while not parar.is_set():
+            close_old_connections()
+            enviados, falhas = enviar_pendentes(options["lote"])
+            total += enviados
+            if enviados or falhas:
+                self.stdout.write(f"{enviados} e-mail(s) enviado(s), {falhas} falha(s)")
+            # Lote cheio sem falhas: ainda pode haver e-mails vencidos na fila
+            if enviados == options["lote"]:
+                continue
+            if not options["continuo"]:
+                break
+            parar.wait(options["intervalo"])
+        self.stdout.write(self.style.SUCCESS(f"{total} e-mail(s) enviado(s)."))
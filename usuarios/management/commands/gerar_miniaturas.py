@@ -0,0 +1,58 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from usuarios.miniaturas import gerar_miniaturas, miniaturas_existem
+from usuarios.models import Perfil
+
+
+class Command(BaseCommand):
+    help = "Gera as miniaturas das fotos de perfil já enviadas."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processos",
+            type=int,
+            default=None,
+            help="Processos em paralelo (padrão: CPUs)",
+        )
+        parser.add_argument(
+            "--forcar",
+            action="store_true",
+            help="Regenera também as fotos que já têm miniaturas",
+        )
+
+    def handle(self, *args, **options):
+        perfis = Perfil.objects.exclude(foto="").exclude(foto__isnull=True)  # pylint: disable=no-member
+        if not options["forcar"]:
+            perfis = perfis.exclude(foto_miniaturas=F("foto"))
+        fotos = list(perfis.values_list("foto", flat=True).distinct())
+        if not options["forcar"]:
+            # Miniaturas gravadas antes de Perfil.foto_miniaturas existir: só marca
+            prontas = [nome for nome in fotos if miniaturas_existem(nome)]
+            self._marcar(prontas)
+            fotos = [nome for nome in fotos if nome not in prontas]
+
+        processos = options["processos"] or os.cpu_count() or 1
+        if processos > 1 and len(fotos) > 1:
+            with ProcessPoolExecutor(max_workers=min(processos, len(fotos))) as pool:
+                resultados = list(pool.map(gerar_miniaturas, fotos))
+        else:
+            resultados = [gerar_miniaturas(nome) for nome in fotos]
+
+        self._marcar([nome for nome, gerada in zip(fotos, resultados, strict=True) if gerada])
+        geradas = sum(resultados)
+        mensagem = f"Miniaturas geradas para {geradas} foto(s)."
+        if geradas < len(fotos):
+            mensagem += f" {len(fotos) - geradas} foto(s) ausente(s) ou inválida(s)."
+        self.stdout.write(self.style.SUCCESS(mensagem))
+
+    @staticmethod
+    def _marcar(fotos):
+        """Registra nos perfis que as fotos ``fotos`` já têm miniaturas."""
+        if fotos:
+            Perfil.objects.filter(foto__in=fotos).update(  # pylint: disable=no-member
+                foto_miniaturas=F("foto")
+            )
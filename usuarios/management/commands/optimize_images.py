@@ -0,0 +1,80 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.imagens import (
+    LARGURAS,
+    PASTA_DESTINO,
+    PASTA_ORIGEM,
+    QUALIDADE,
+    OtimizacaoError,
+    otimizar_pasta,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera as variantes JPEG/WebP redimensionadas das imagens do slideshow do login."
+    )
+
+    def add_arguments(self, parser):
+        estaticos = settings.STATICFILES_DIRS[0]
+        parser.add_argument(
+            "--origem",
+            default=os.path.join(estaticos, PASTA_ORIGEM),
+            help="Pasta das imagens originais",
+        )
+        parser.add_argument(
+            "--destino",
+            default=os.path.join(estaticos, PASTA_DESTINO),
+            help="Pasta das variantes e do imagens.json",
+        )
+        parser.add_argument(
+            "--larguras",
+            type=int,
+            nargs="+",
+            default=list(LARGURAS),
+            help="Larguras das variantes, em pixels",
+        )
+        parser.add_argument(
+            "--qualidade", type=int, default=QUALIDADE, help="Qualidade (1-95)"
+        )
+        parser.add_argument(
+            "--processos",
+            type=int,
+            default=None,
+            help="Processos em paralelo (padrão: CPUs)",
+        )
+        parser.add_argument(
+            "--forcar",
+            action="store_true",
+            help="Regenera também as imagens que não mudaram",
+        )
+
+    def handle(self, *args, **options):
+        if not 1 <= options["qualidade"] <= 95:
+            raise CommandError("A qualidade deve estar entre 1 e 95.")
+        if min(options["larguras"]) <= 0:
+            raise CommandError("As larguras devem ser positivas.")
+        try:
+            resultado = otimizar_pasta(
+                options["origem"],
+                options["destino"],
+                larguras=options["larguras"],
+                qualidade=options["qualidade"],
+                processos=options["processos"],
+                forcar=options["forcar"],
+            )
+        except OtimizacaoError as e:
+            raise CommandError(str(e)) from e
+
+        for nome in resultado["processadas"]:
+            self.stdout.write(f"OK: {nome}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imagens otimizadas: {len(resultado['processadas'])} processada(s), "
+                f"{len(resultado['inalteradas'])} inalterada(s), "
+                f"{len(resultado['removidas'])} removida(s)."
+            )
+        )
@@ -1,26 +1,51 @@
 import logging
-import threading
 
+from asgiref.local import Local
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.conf import settings
 from django.shortcuts import redirect
 from django.urls import resolve, reverse
 
 from .views import registrar_atividade
 
-# Thread-local para disponibilizar o usuário/IP atual aos signals
-thread_local = threading.local()
+# Usuário/IP atual para os signals. O Local do asgiref funciona como um
+# threading.local, mas também acompanha o request em views assíncronas (ASGI),
+# cujo código síncrono roda em outra thread
+thread_local = Local()
 
 logger = logging.getLogger(__name__)
 
 
 class LogAtividadeMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        self._guardar_contexto(request, request.user)
+        response = self.get_response(request)
+        self._registrar(request, request.user)
+        return response
+
+    async def __acall__(self, request):
+        user = await request.auser()
+        self._guardar_contexto(request, user)
+        response = await self.get_response(request)
+        await sync_to_async(self._registrar)(request, user)
+        return response
+
+    @staticmethod
+    def _guardar_contexto(request, user):
         # Disponibilizar usuário e IP em thread-local
         try:
-            thread_local.current_user = request.user if request.user.is_authenticated else None
+            thread_local.current_user = user if user.is_authenticated else None
             # Capturar IP (básico)
             x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
             ip = x_forwarded_for.split(",")[0] if x_forwarded_for else request.META.get("REMOTE_ADDR")
@@ -29,14 +54,14 @@ class LogAtividadeMiddleware:
             thread_local.current_user = None
             thread_local.current_ip = None
 
-        response = self.get_response(request)
-
+    @staticmethod
+    def _registrar(request, user):
         # Não registrar atividades para requisições de arquivos estáticos ou admin
         if request.path.startswith("/static/") or request.path.startswith("/admin/"):
-            return response
+            return
 
         # Registrar apenas para usuários autenticados
-        if request.user.is_authenticated:
+        if user.is_authenticated:
             try:
                 resolver_match = resolve(request.path)
                 view_name = resolver_match.url_name
@@ -61,12 +86,16 @@ class LogAtividadeMiddleware:
             except Exception:
                 pass  # Ignorar erros de resolução de URL
 
-        return response
-
 
 class RequireLoginMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
 
         # Views liberadas sem autenticação
         self.allowed_names = {
@@ -82,19 +111,29 @@ class RequireLoginMiddleware:
         }
 
     def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        # Estáticos, mídia e admin ou já autenticado
+        if self._livre(request.path) or request.user.is_authenticated:
+            return self.get_response(request)
+        return self._redirecionar(request.path) or self.get_response(request)
+
+    async def __acall__(self, request):
+        if self._livre(request.path) or (await request.auser()).is_authenticated:
+            return await self.get_response(request)
+        return self._redirecionar(request.path) or await self.get_response(request)
+
+    @staticmethod
+    def _livre(path):
         # Permitir estáticos, mídia e admin
-        path = request.path
-        if (
+        return (
             path.startswith("/static/")
             or path.startswith("/media/")
             or path.startswith("/admin/")
-        ):
-            return self.get_response(request)
-
-        # Já autenticado
-        if request.user.is_authenticated:
-            return self.get_response(request)
+        )
 
+    def _redirecionar(self, path):
+        """Redirect para a home se a rota não estiver liberada; senão, None."""
         # Resolver nome da rota; em caso de 404, forçar login
         try:
             match = resolve(path)
@@ -108,4 +147,4 @@ class RequireLoginMiddleware:
             home_url = reverse("home")
             return redirect(home_url)
 
-        return self.get_response(request)
+        return None
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0008_alter_logatividade_usuario'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='logatividade',
+            name='data_hora',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
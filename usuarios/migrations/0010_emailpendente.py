@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:44
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0009_alter_logatividade_data_hora'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailPendente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('assunto', models.CharField(max_length=255)),
+                ('corpo', models.TextField()),
+                ('html', models.TextField(blank=True)),
+                ('remetente', models.CharField(max_length=254)),
+                ('destinatarios', models.JSONField()),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('enviado', 'Enviado'), ('falhou', 'Falhou')], default='pendente', max_length=10)),
+                ('tentativas', models.PositiveSmallIntegerField(default=0)),
+                ('proxima_tentativa', models.DateTimeField(default=django.utils.timezone.now)),
+                ('erro', models.TextField(blank=True)),
+                ('data_criacao', models.DateTimeField(auto_now_add=True)),
+                ('data_envio', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'E-mail Pendente',
+                'verbose_name_plural': 'E-mails Pendentes',
+                'ordering': ['proxima_tentativa'],
+                'indexes': [models.Index(fields=['status', 'proxima_tentativa'], name='usuarios_em_status_2bb4d1_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0010_emailpendente'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='perfil',
+            name='foto_miniaturas',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+    ]
@@ -0,0 +1,86 @@
+"""Miniaturas das fotos de perfil.
+
+A foto enviada pelo usuário é guardada como veio (muitas vezes uma foto de
+celular com vários MB), mas é exibida em caixas pequenas: 40x40 na barra de
+navegação e 150x150 na página de perfil. Para cada caixa de ``TAMANHOS``,
+``gerar_miniaturas`` recorta a foto ao centro e grava em ``MEDIA_ROOT`` as
+variantes WebP e JPEG em densidade 2x, sem os metadados EXIF (localização,
+modelo do aparelho...):
+
+    fotos_perfil/joao.jpg -> miniaturas/fotos_perfil/joao.40.webp, .40.jpg, .150.webp...
+
+O nome das variantes deriva do nome da foto, que muda a cada upload, então
+elas nunca ficam desatualizadas. As miniaturas são geradas ao salvar o
+``PerfilForm``; o comando ``gerar_miniaturas`` processa as fotos já enviadas.
+"""
+
+import io
+import logging
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+PASTA = "miniaturas"
+TAMANHOS = (40, 150)
+DENSIDADE = 2
+QUALIDADE = 82
+FORMATOS = {
+    "webp": ("WEBP", {"method": 6}),
+    "jpg": ("JPEG", {"optimize": True, "progressive": True}),
+}
+
+
+def nome_miniatura(nome, tamanho, extensao):
+    """``fotos_perfil/joao.jpg`` -> ``miniaturas/fotos_perfil/joao.40.webp``."""
+    raiz = os.path.splitext(nome)[0]
+    return f"{PASTA}/{raiz}.{tamanho}.{extensao}"
+
+
+def tamanho_para(lado):
+    """Menor tamanho gerado que cobre uma caixa de ``lado`` pixels (ou o maior)."""
+    return next((tamanho for tamanho in TAMANHOS if tamanho >= lado), TAMANHOS[-1])
+
+
+def miniaturas_existem(nome, storage=default_storage):
+    return all(
+        storage.exists(nome_miniatura(nome, tamanho, extensao))
+        for tamanho in TAMANHOS
+        for extensao in FORMATOS
+    )
+
+
+def gerar_miniaturas(nome, storage=default_storage):
+    """Gera as variantes da foto ``nome`` do storage.
+
+    Returns:
+        True se gerou; False se o arquivo não existe ou não é uma imagem.
+    """
+    from PIL import Image, ImageOps  # pylint: disable=import-outside-toplevel
+
+    try:
+        with storage.open(nome) as arquivo, Image.open(arquivo) as aberta:
+            # Aplica a rotação do EXIF antes de descartá-lo
+            foto = ImageOps.exif_transpose(aberta).convert("RGB")
+    except OSError as e:  # inclui arquivo ausente e UnidentifiedImageError
+        logger.warning("Foto de perfil ignorada (%s): %s", nome, e)
+        return False
+
+    for tamanho in TAMANHOS:
+        lado = tamanho * DENSIDADE
+        recortada = ImageOps.fit(foto, (lado, lado), Image.Resampling.LANCZOS)
+        for extensao, (formato, opcoes) in FORMATOS.items():
+            saida = io.BytesIO()
+            recortada.save(saida, formato, quality=QUALIDADE, **opcoes)
+            destino = nome_miniatura(nome, tamanho, extensao)
+            storage.delete(destino)
+            storage.save(destino, ContentFile(saida.getvalue()))
+    return True
+
+
+def remover_miniaturas(nome, storage=default_storage):
+    for tamanho in TAMANHOS:
+        for extensao in FORMATOS:
+            storage.delete(nome_miniatura(nome, tamanho, extensao))
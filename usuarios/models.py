@@ -2,6 +2,7 @@ from django.contrib.auth.models import User
 from django.db import models
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
 
 class Perfil(models.Model):
@@ -22,6 +23,9 @@ class Perfil(models.Model):
     )
     telefone = models.CharField(max_length=15, blank=True, null=True)
     foto = models.ImageField(upload_to="fotos_perfil/", blank=True, null=True)
+    # Foto cujas miniaturas já foram geradas (usuarios.miniaturas): a tag
+    # foto_perfil compara os nomes em vez de consultar o storage a cada página
+    foto_miniaturas = models.CharField(max_length=100, blank=True, default="", editable=False)
     matricula = models.CharField(max_length=20, blank=True, null=True)
     cpf = models.CharField(max_length=14, blank=True, null=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pendente")
@@ -42,7 +46,7 @@ class LogAtividade(models.Model):
     usuario = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     acao = models.CharField(max_length=100)
     detalhes = models.TextField()
-    data_hora = models.DateTimeField(auto_now_add=True)
+    data_hora = models.DateTimeField(auto_now_add=True, db_index=True)
     ip = models.GenericIPAddressField(
         null=True, blank=True
     )  # Adicionando o campo ip novamente
@@ -56,6 +60,44 @@ class LogAtividade(models.Model):
         return f"{self.usuario.username} - {self.acao} - {self.data_hora}"  # pylint: disable=no-member
 
 
+class EmailPendente(models.Model):
+    """E-mail na fila de saída (``usuarios.emails``).
+
+    Gravado na mesma transação do request que o originou; o envio acontece
+    depois, fora do request, com novas tentativas em caso de falha.
+    """
+
+    PENDENTE = "pendente"
+    ENVIADO = "enviado"
+    FALHOU = "falhou"
+    STATUS_CHOICES = (
+        (PENDENTE, "Pendente"),
+        (ENVIADO, "Enviado"),
+        (FALHOU, "Falhou"),
+    )
+
+    assunto = models.CharField(max_length=255)
+    corpo = models.TextField()
+    html = models.TextField(blank=True)
+    remetente = models.CharField(max_length=254)
+    destinatarios = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDENTE)
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    proxima_tentativa = models.DateTimeField(default=timezone.now)
+    erro = models.TextField(blank=True)
+    data_criacao = models.DateTimeField(auto_now_add=True)
+    data_envio = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["proxima_tentativa"]
+        indexes = [models.Index(fields=["status", "proxima_tentativa"])]
+        verbose_name = "E-mail Pendente"
+        verbose_name_plural = "E-mails Pendentes"
+
+    def __str__(self):
+        return f"{self.assunto} ({self.get_status_display()})"  # pylint: disable=no-member
+
+
 @receiver(post_save, sender=User)
 def criar_perfil(sender, instance, created, **kwargs):  # pylint: disable=unused-argument
     if created:
@@ -0,0 +1,41 @@
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from agendador.registro import tarefa
+
+from .emails import TAMANHO_LOTE, enviar_pendentes
+from .models import LogAtividade
+
+TAMANHO_LOTE_EXCLUSAO = 5000
+
+
+@tarefa("30 3 * * *", nome="usuarios.limpar_logs")
+def limpar_logs_atividade():
+    """Remove os logs de atividade mais antigos que LOG_ATIVIDADE_RETENCAO_DIAS."""
+    limite = timezone.now() - datetime.timedelta(days=settings.LOG_ATIVIDADE_RETENCAO_DIAS)
+    antigos = LogAtividade.objects.filter(data_hora__lt=limite).order_by()  # pylint: disable=no-member
+
+    # Exclui em lotes para não manter a tabela bloqueada por muito tempo
+    total = 0
+    while True:
+        ids = list(antigos.values_list("pk", flat=True)[:TAMANHO_LOTE_EXCLUSAO])
+        if not ids:
+            break
+        removidos, _ = LogAtividade.objects.filter(pk__in=ids).delete()  # pylint: disable=no-member
+        total += removidos
+    return f"{total} log(s) removido(s)"
+
+
+@tarefa("* * * * *", nome="usuarios.enviar_emails", duracao_maxima=600)
+def enviar_emails():
+    """Envia os e-mails da fila de saída (ativação, avisos aos administradores)."""
+    enviados = falhas = 0
+    while True:
+        lote = enviar_pendentes()
+        enviados, falhas = enviados + lote[0], falhas + lote[1]
+        # Lote incompleto ou com falhas: o restante fica para a próxima execução
+        if sum(lote) < TAMANHO_LOTE or lote[1]:
+            break
+    return f"{enviados} e-mail(s) enviado(s), {falhas} falha(s)"
@@ -0,0 +1,42 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from ..miniaturas import nome_miniatura, tamanho_para
+
+register = template.Library()
+
+
+@register.simple_tag
+def foto_perfil(perfil, lado, **atributos):
+    """Foto do perfil exibida em ``lado`` x ``lado`` pixels, a partir da miniatura.
+
+    Gera um ``<picture>`` com a variante WebP e a JPEG como alternativa; sem
+    miniaturas (comando ``gerar_miniaturas`` ainda não executado), usa a foto
+    original. Quem diz se elas existem é ``Perfil.foto_miniaturas``, sem
+    consultar o storage a cada renderização. Ex.: ``{% foto_perfil user.perfil 40 class="rounded-circle" alt="Perfil" %}``
+    """
+    if not perfil or not perfil.foto:
+        return ""
+    nome = perfil.foto.name
+    tamanho = tamanho_para(lado)
+    webp = nome_miniatura(nome, tamanho, "webp")
+    jpg = nome_miniatura(nome, tamanho, "jpg")
+    if perfil.foto_miniaturas != nome:
+        return format_html(
+            '<img src="{}" width="{}" height="{}"{}>',
+            perfil.foto.url,
+            lado,
+            lado,
+            flatatt(atributos),
+        )
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}">'
+        '<img src="{}" width="{}" height="{}"{}></picture>',
+        default_storage.url(webp),
+        default_storage.url(jpg),
+        lado,
+        lado,
+        flatatt(atributos),
+    )
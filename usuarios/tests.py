@@ -1,20 +1,38 @@
 # from django.db import transaction # Removido - @transaction.atomic não será mais usado
+import io
+import os
+import shutil
+import socket
+import tempfile
 import uuid
 from datetime import timedelta
+from unittest import mock, skipIf
 
 from django.contrib.auth.models import User
 from django.contrib.messages import get_messages
 from django.core import mail
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
 from django.test import (
     TestCase,
     TransactionTestCase,  # Mudar para TransactionTestCase
+    override_settings,
 )
 from django.test.client import Client
 from django.urls import reverse
 from django.utils import timezone
+from PIL import Image
 
-from usuarios.forms import UsuarioRegistroForm
-from usuarios.models import LogAtividade, Perfil
+from usuarios.emails import MAX_TENTATIVAS, enfileirar_email, enviar_pendentes
+from usuarios.forms import PerfilForm, UsuarioRegistroForm
+from usuarios.models import EmailPendente, LogAtividade, Perfil
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:  # dependência só dos testes (pyproject: [testes])
+    Controller = None
 
 
 # Testes para modelos
@@ -400,7 +418,9 @@ class EmailTest(TestCase):
 
         enviar_email_ativacao(self.client.request().wsgi_request, user)
 
-        # Verificações atualizadas para corresponder ao assunto real do e-mail
+        # O e-mail vai para a fila de saída e é entregue fora do request
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(enviar_pendentes(), (1, 0))
         self.assertEqual(len(mail.outbox), 1)
         email_enviado = mail.outbox[0]
         self.assertEqual(email_enviado.to[0], test_email)
@@ -408,6 +428,108 @@ class EmailTest(TestCase):
         self.assertIn("ativar sua conta", email_enviado.body)
 
 
+class _ServidorSmtp:
+    """Handler do aiosmtpd: guarda as mensagens e conta as conexões (EHLO)."""
+
+    def __init__(self):
+        self.mensagens = []
+        self.conexoes = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):  # noqa: N802
+        self.conexoes += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):  # noqa: N802
+        self.mensagens.append(envelope)
+        return "250 OK"
+
+
+def _porta_livre():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@skipIf(Controller is None, "aiosmtpd não instalado")
+class FilaEmailTest(TestCase):
+    """Fila de saída de e-mails entregue a um servidor SMTP local (aiosmtpd)."""
+
+    def setUp(self):
+        self.porta = _porta_livre()
+        self.servidor = _ServidorSmtp()
+        configuracao = override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=self.porta,
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="",
+            EMAIL_HOST_PASSWORD="",
+            EMAIL_TIMEOUT=5,
+        )
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def _iniciar_servidor(self):
+        controlador = Controller(self.servidor, hostname="127.0.0.1", port=self.porta)
+        controlador.start()
+        self.addCleanup(controlador.stop)
+
+    def test_registro_com_smtp_fora_do_ar(self):
+        User.objects.create_user("admin_fila", email="admin@example.com", is_staff=True)
+        dados = {
+            "username": "novo_fila",
+            "email": "novo_fila@example.com",
+            "password1": "senhaSegura123",
+            "password2": "senhaSegura123",
+            "first_name": "Novo",
+            "last_name": "Usuário",
+            "telefone": "(91) 91234-5678",
+            "matricula": "MAT12345",
+            "cpf": "123.456.789-01",
+        }
+        resposta = self.client.post(reverse("registro"), dados)
+        self.assertRedirects(resposta, reverse("login"), fetch_redirect_response=False)
+        self.assertTrue(User.objects.filter(username="novo_fila").exists())
+        email = EmailPendente.objects.get()
+        self.assertEqual(email.destinatarios, ["admin@example.com"])
+
+        # Nenhum servidor escutando: o e-mail volta para a fila com espera
+        agora = timezone.now()
+        with self.assertLogs("usuarios.emails", "WARNING"):
+            self.assertEqual(enviar_pendentes(agora=agora), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.tentativas), (EmailPendente.PENDENTE, 1))
+        self.assertEqual(email.proxima_tentativa, agora + timedelta(seconds=60))
+        self.assertEqual(enviar_pendentes(agora=agora + timedelta(seconds=30)), (0, 0))
+
+        self._iniciar_servidor()
+        self.assertEqual(enviar_pendentes(agora=agora + timedelta(seconds=61)), (1, 0))
+        email.refresh_from_db()
+        self.assertEqual(email.status, EmailPendente.ENVIADO)
+        self.assertEqual(self.servidor.mensagens[0].rcpt_tos, ["admin@example.com"])
+
+    def test_lote_em_uma_conexao(self):
+        for indice in range(3):
+            enfileirar_email(
+                f"Aviso {indice}", "texto", [f"u{indice}@example.com"], html="<p>texto</p>"
+            )
+        self._iniciar_servidor()
+        self.assertEqual(enviar_pendentes(), (3, 0))
+        self.assertEqual(len(self.servidor.mensagens), 3)
+        self.assertEqual(self.servidor.conexoes, 1)
+        self.assertFalse(EmailPendente.objects.exclude(status=EmailPendente.ENVIADO).exists())
+
+    def test_descarta_apos_max_tentativas(self):
+        email = enfileirar_email("Aviso", "texto", ["u@example.com"])
+        EmailPendente.objects.filter(pk=email.pk).update(tentativas=MAX_TENTATIVAS - 1)
+        with self.assertLogs("usuarios.emails", "ERROR"):
+            self.assertEqual(enviar_pendentes(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.status, EmailPendente.FALHOU)
+        self.assertIn("ConnectionRefusedError", email.erro)
+
+
 class SegurancaTest(TestCase):
     """Testes de segurança do sistema"""
 
@@ -597,3 +719,102 @@ class RateLimitingTest(TestCase):
 
         # Verificar se várias tentativas foram registradas
         self.assertGreaterEqual(logs.count(), 5)
+
+
+def _foto_jpeg(cor="green", tamanho=(1200, 900)):
+    """JPEG com EXIF (modelo da câmera), como as fotos de celular."""
+    imagem = Image.new("RGB", tamanho, cor)
+    exif = Image.Exif()
+    exif[0x0110] = "Camera Teste"
+    saida = io.BytesIO()
+    imagem.save(saida, "JPEG", exif=exif.tobytes())
+    return SimpleUploadedFile("foto.jpg", saida.getvalue(), content_type="image/jpeg")
+
+
+class MiniaturasPerfilTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        configuracao = override_settings(MEDIA_ROOT=self.media)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.user = User.objects.create_user(username="foto", password="senha12345")
+
+    def _salvar_foto(self, foto):
+        form = PerfilForm({}, {"foto": foto}, instance=self.user.perfil)
+        self.assertTrue(form.is_valid(), form.errors)
+        return form.save()
+
+    def _miniaturas(self):
+        pasta = os.path.join(self.media, "miniaturas", "fotos_perfil")
+        return sorted(os.listdir(pasta)) if os.path.isdir(pasta) else []
+
+    def test_miniaturas_ao_salvar_o_perfil(self):
+        perfil = self._salvar_foto(_foto_jpeg())
+        raiz = os.path.splitext(os.path.basename(perfil.foto.name))[0]
+        self.assertEqual(
+            self._miniaturas(),
+            sorted(f"{raiz}.{lado}.{ext}" for lado in (40, 150) for ext in ("jpg", "webp")),
+        )
+        caminho = os.path.join(self.media, "miniaturas", "fotos_perfil", f"{raiz}.40.jpg")
+        with Image.open(caminho) as miniatura:
+            self.assertEqual(miniatura.size, (80, 80))
+            self.assertEqual(dict(miniatura.getexif()), {})
+
+        # Nova foto: as miniaturas da anterior são descartadas
+        perfil = self._salvar_foto(_foto_jpeg("red"))
+        nova = os.path.splitext(os.path.basename(perfil.foto.name))[0]
+        self.assertNotEqual(nova, raiz)
+        self.assertTrue(all(nome.startswith(f"{nova}.") for nome in self._miniaturas()))
+
+    def test_tag_foto_perfil(self):
+        template = Template("{% load fotos %}{% foto_perfil perfil 40 alt='Perfil' %}")
+        self.assertEqual(template.render(Context({"perfil": self.user.perfil})), "")
+
+        perfil = self._salvar_foto(_foto_jpeg())
+        self.assertEqual(perfil.foto_miniaturas, perfil.foto.name)
+        raiz = os.path.splitext(perfil.foto.name)[0]
+        # A tag não consulta o storage a cada renderização
+        with mock.patch.object(
+            default_storage, "exists", side_effect=AssertionError("exists")
+        ):
+            html = template.render(Context({"perfil": perfil}))
+        self.assertEqual(
+            html,
+            f'<picture><source type="image/webp" srcset="/media/miniaturas/{raiz}.40.webp">'
+            f'<img src="/media/miniaturas/{raiz}.40.jpg" width="40" height="40" alt="Perfil">'
+            "</picture>",
+        )
+
+    def test_comando_gerar_miniaturas(self):
+        perfil = self._salvar_foto(_foto_jpeg())
+        # Foto enviada antes das miniaturas
+        shutil.rmtree(os.path.join(self.media, "miniaturas"))
+        Perfil.objects.filter(pk=perfil.pk).update(foto_miniaturas="")
+        perfil.refresh_from_db()
+
+        # Sem miniaturas, a tag usa a foto original
+        html = Template("{% load fotos %}{% foto_perfil perfil 150 %}").render(
+            Context({"perfil": perfil})
+        )
+        self.assertEqual(
+            html, f'<img src="/media/{perfil.foto.name}" width="150" height="150">'
+        )
+
+        saida = io.StringIO()
+        call_command("gerar_miniaturas", "--processos", "1", stdout=saida)
+        self.assertIn("Miniaturas geradas para 1 foto(s).", saida.getvalue())
+        self.assertEqual(len(self._miniaturas()), 4)
+
+        call_command("gerar_miniaturas", "--processos", "1", stdout=saida)
+        self.assertIn("Miniaturas geradas para 0 foto(s).", saida.getvalue())
+        perfil.refresh_from_db()
+        self.assertEqual(perfil.foto_miniaturas, perfil.foto.name)
+
+        # Miniaturas já no disco sem o registro no perfil: só marca
+        Perfil.objects.filter(pk=perfil.pk).update(foto_miniaturas="")
+        saida = io.StringIO()
+        call_command("gerar_miniaturas", "--processos", "1", stdout=saida)
+        self.assertIn("Miniaturas geradas para 0 foto(s).", saida.getvalue())
+        perfil.refresh_from_db()
+        self.assertEqual(perfil.foto_miniaturas, perfil.foto.name)
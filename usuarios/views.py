@@ -2,12 +2,10 @@
 import uuid
 from datetime import timedelta
 
-from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib.auth.views import LoginView, LogoutView, PasswordResetView
-from django.core.mail import send_mail
 from django.core.paginator import Paginator
 from django.urls import reverse
 from urllib.parse import urlencode
@@ -19,6 +17,9 @@ from django.template.loader import render_to_string
 from django.utils import timezone
 from django.utils.html import strip_tags
 
+from utils.imagens import imagens_responsivas
+
+from .emails import enfileirar_email
 from .forms import PerfilForm, UsuarioLoginForm, UsuarioRegistroForm
 from .models import LogAtividade, Perfil
 
@@ -115,15 +116,8 @@ def enviar_email_ativacao(request, usuario):
 
     plain_message = strip_tags(html_message)
 
-    # Enviar o e-mail
-    send_mail(
-        subject,
-        plain_message,
-        settings.DEFAULT_FROM_EMAIL,
-        [usuario.email],
-        html_message=html_message,
-        fail_silently=False,
-    )
+    # Fila de saída: enviado após o commit, fora do request (usuarios.emails)
+    enfileirar_email(subject, plain_message, [usuario.email], html=html_message)
 
 
 def ativar_conta(request, token):
@@ -403,15 +397,7 @@ def enviar_email_notificacao_admin(request, user):
 
     plain_message = strip_tags(html_message)
 
-    # Enviar o e-mail
-    send_mail(
-        subject,
-        plain_message,
-        settings.DEFAULT_FROM_EMAIL,
-        admin_emails,
-        html_message=html_message,
-        fail_silently=False,
-    )
+    enfileirar_email(subject, plain_message, admin_emails, html=html_message)
 
 
 def registrar_atividade(request, acao, detalhes, usuario=None):
@@ -464,6 +450,11 @@ class CustomLoginView(LoginView):
     form_class = UsuarioLoginForm
     template_name = "usuarios/login.html"
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["imagens_login"] = imagens_responsivas()
+        return context
+
     def form_valid(self, form):
         response = super().form_valid(form)
         # Registrar atividade de login bem-sucedido
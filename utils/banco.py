@@ -0,0 +1,104 @@
+"""Pool de conexões do PostgreSQL e consultas preparadas no servidor.
+
+Com ``DATABASE_URL`` apontando para o PostgreSQL, cada processo usa o pool
+do psycopg 3 integrado ao Django (``OPTIONS["pool"]``, configurado pelas
+variáveis ``DB_POOL_*`` em ``settings``): as conexões são abertas uma vez,
+verificadas antes de cada uso (``CONN_HEALTH_CHECKS``) e devolvidas ao pool ao
+fim de cada request.
+
+- ``aquecer`` abre o pool (``DB_POOL_MIN`` conexões) e carrega as URLs e
+  views; roda no boot de cada worker do gunicorn (``gunicorn.conf.py``), para
+  que o primeiro request não pague a conexão nem os imports.
+- ``valores_preparados`` executa um ``queryset.values(...)`` como statement
+  preparado no servidor: o PostgreSQL planeja a consulta uma vez por conexão
+  e, como as conexões do pool duram, as execuções seguintes só trocam os
+  parâmetros. Usado nas consultas quentes dos relatórios (``relatorios.cubo``).
+  O Django usa binding no cliente, em que o psycopg não prepara consultas.
+
+Sem PostgreSQL/psycopg 3 (SQLite em desenvolvimento e testes) ou com
+``DB_PREPARAR=False``, ``valores_preparados`` apenas avalia o queryset.
+"""
+
+import logging
+import time
+
+from django.db import connections
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def _psycopg(conexao):
+    """Módulo ``psycopg`` se a conexão aceita consultas preparadas, senão None."""
+    if conexao.vendor != "postgresql":
+        return None
+    # Importado aqui: com o SQLite, o psycopg fica fora da inicialização
+    try:
+        import psycopg  # pylint: disable=import-outside-toplevel
+    except ImportError:  # psycopg2: sem consultas preparadas
+        return None
+    conexao.ensure_connection()
+    bruta = conexao.connection
+    if isinstance(bruta, psycopg.Connection) and bruta.prepare_threshold is not None:
+        return psycopg
+    return None
+
+
+def valores_preparados(queryset):
+    """Linhas de ``queryset.values(...)`` (dicionários), preparadas no servidor."""
+    conexao = connections[queryset.db]
+    psycopg = _psycopg(conexao)
+    if psycopg is None:
+        return list(queryset)
+
+    consulta = queryset.query
+    nomes = [
+        *consulta.extra_select,
+        *consulta.values_select,
+        *consulta.annotation_select,
+    ]
+    sql, parametros = consulta.sql_with_params()
+    with conexao.wrap_database_errors, psycopg.Cursor(conexao.connection) as cursor:
+        inicio = time.monotonic()
+        cursor.execute(sql, parametros, prepare=True)
+        linhas = [dict(zip(nomes, linha, strict=True)) for linha in cursor]
+    if conexao.queries_logged:
+        conexao.queries_log.append(
+            {"sql": f"EXECUTE {sql}", "time": f"{time.monotonic() - inicio:.3f}"}
+        )
+    return linhas
+
+
+def mesmo_banco(banco, outro):
+    """Se duas entradas de ``settings.DATABASES`` apontam para o mesmo banco."""
+    return all(
+        banco.get(chave) == outro.get(chave)
+        for chave in ("ENGINE", "NAME", "HOST", "PORT")
+    )
+
+
+def aquecer(timeout=30):
+    """Abre os pools de conexão e carrega as URLs (boot de um worker).
+
+    Returns:
+        Segundos gastos no aquecimento.
+    """
+    inicio = time.monotonic()
+    get_resolver().check()  # importa as URLconfs e as views
+    aquecidos = []
+    for conexao in connections.all():
+        # Ex.: réplica espelhando o banco padrão nos testes
+        if any(mesmo_banco(conexao.settings_dict, banco) for banco in aquecidos):
+            continue
+        aquecidos.append(conexao.settings_dict)
+        pool = getattr(conexao, "pool", None)
+        if pool is not None:
+            # Espera as DB_POOL_MIN conexões ficarem prontas
+            pool.open(wait=True, timeout=timeout)
+        with conexao.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        if not conexao.in_atomic_block:
+            conexao.close()  # devolve ao pool a conexão usada na verificação
+    duracao = time.monotonic() - inicio
+    logger.info("Conexões aquecidas em %.2fs", duracao)
+    return duracao
@@ -0,0 +1,124 @@
+"""Downloads de arquivos protegidos com o envio delegado ao servidor web.
+
+A view confere a permissão e ``enviar_arquivo`` responde apenas com os
+cabeçalhos, apontando o arquivo ao nginx (``X-Accel-Redirect``, para uma
+``location`` marcada como ``internal``) ou ao Apache/lighttpd
+(``X-Sendfile``); o servidor web envia os bytes e o worker do gunicorn fica
+livre enquanto o cliente baixa. ``settings.DOWNLOAD_ENVIO`` escolhe o modo:
+
+- ``"x-accel-redirect"``: o caminho interno vem de ``DOWNLOAD_LOCAIS_INTERNOS``
+  (pasta no disco -> prefixo da ``location`` interna do nginx);
+- ``"x-sendfile"``: envia o caminho absoluto do arquivo;
+- vazio (desenvolvimento): o próprio Django envia o arquivo em blocos
+  (``FileResponse``).
+
+Arquivos gerados sob demanda (planilhas exportadas) são gravados em
+``EXPORTACOES_ROOT`` com ``novo_arquivo_exportacao`` e removidos pela tarefa
+``relatorios.limpar_exportacoes``, já que o nginx os lê depois que a view
+retorna.
+"""
+
+import mimetypes
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.http import content_disposition_header
+
+ENVIO_X_ACCEL = "x-accel-redirect"
+ENVIO_X_SENDFILE = "x-sendfile"
+TAMANHO_BLOCO = 64 * 1024
+
+
+def _local_interno(caminho):
+    """Prefixo interno do nginx + caminho relativo, ou None se fora das pastas mapeadas."""
+    for pasta, prefixo in settings.DOWNLOAD_LOCAIS_INTERNOS.items():
+        raiz = os.path.realpath(pasta)
+        if caminho.startswith(raiz + os.sep):
+            relativo = os.path.relpath(caminho, raiz).replace(os.sep, "/")
+            return prefixo.rstrip("/") + "/" + quote(relativo)
+    return None
+
+
+def enviar_arquivo(caminho, nome=None, anexo=True, tipo=None):
+    """Resposta que entrega o arquivo ``caminho`` (a permissão já foi conferida).
+
+    Args:
+        caminho: Caminho do arquivo no disco.
+        nome: Nome sugerido ao navegador (padrão: nome do arquivo).
+        anexo: ``attachment`` (baixar) ou ``inline`` (exibir no navegador).
+        tipo: Content-Type (padrão: deduzido pela extensão).
+
+    Raises:
+        Http404: Arquivo inexistente.
+    """
+    caminho = os.path.realpath(caminho)
+    if not os.path.isfile(caminho):
+        raise Http404("Arquivo não encontrado")
+    nome = nome or os.path.basename(caminho)
+    tipo = tipo or mimetypes.guess_type(nome)[0] or "application/octet-stream"
+
+    envio = settings.DOWNLOAD_ENVIO
+    interno = _local_interno(caminho) if envio == ENVIO_X_ACCEL else None
+    if envio == ENVIO_X_ACCEL and interno is None:
+        raise ValueError(
+            f"Pasta sem location interna em DOWNLOAD_LOCAIS_INTERNOS: {caminho}"
+        )
+    if envio not in (ENVIO_X_ACCEL, ENVIO_X_SENDFILE):
+        # O arquivo precisa continuar aberto após o retorno: o FileResponse o lê
+        # durante o envio e o fecha ao final (close() da resposta)
+        resposta = FileResponse(
+            open(caminho, "rb"),  # noqa: SIM115  # pylint: disable=consider-using-with
+            as_attachment=anexo,
+            filename=nome,
+            content_type=tipo,
+        )
+        resposta.block_size = TAMANHO_BLOCO
+        return resposta
+
+    resposta = HttpResponse(content_type=tipo)
+    resposta["Content-Disposition"] = content_disposition_header(anexo, nome)
+    if envio == ENVIO_X_ACCEL:
+        resposta["X-Accel-Redirect"] = interno
+    else:
+        resposta["X-Sendfile"] = caminho
+    return resposta
+
+
+def novo_arquivo_exportacao(nome):
+    """Caminho para gravar uma exportação, em uma subpasta exclusiva de ``EXPORTACOES_ROOT``."""
+    pasta = Path(settings.EXPORTACOES_ROOT) / uuid.uuid4().hex
+    pasta.mkdir(parents=True)
+    return pasta / nome
+
+
+def limpar_exportacoes(horas):
+    """Remove as exportações com mais de ``horas`` horas. Devolve quantas removeu."""
+    raiz = Path(settings.EXPORTACOES_ROOT)
+    if not raiz.is_dir():
+        return 0
+    limite = time.time() - horas * 3600
+    removidas = 0
+    for pasta in raiz.iterdir():
+        if pasta.is_dir() and pasta.stat().st_mtime < limite:
+            shutil.rmtree(pasta, ignore_errors=True)
+            removidas += 1
+    return removidas
+
+
+@login_required
+def servir_media(request, caminho):  # pylint: disable=unused-argument
+    """Arquivos de ``MEDIA_ROOT`` (fotos de perfil...), apenas para usuários autenticados."""
+    raiz = os.path.realpath(settings.MEDIA_ROOT)
+    arquivo = os.path.realpath(os.path.join(raiz, caminho))
+    if not arquivo.startswith(raiz + os.sep):
+        raise Http404("Arquivo não encontrado")
+    resposta = enviar_arquivo(arquivo, anexo=False)
+    resposta["Cache-Control"] = "private, max-age=3600"
+    return resposta
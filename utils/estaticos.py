@@ -0,0 +1,150 @@
+"""Etapa de build dos arquivos estáticos (``collectstatic``).
+
+``ArmazenamentoEstatico`` estende o ``ManifestStaticFilesStorage`` do Django,
+que renomeia cada arquivo com o hash do conteúdo (``app.3f2a9c1b0d4e.css``) e
+reescreve as referências entre CSS/JS. Depois do pós-processamento padrão:
+
+- imagens usadas com ``{% imagem 'img/logo.png' 32 32 %}`` ganham uma variante
+  redimensionada para a caixa usada no template (com densidade 2x), em vez de
+  o navegador baixar o original para exibi-lo reduzido;
+- arquivos de texto (CSS, JS, SVG...) ganham versões pré-comprimidas ``.gz`` e,
+  com o pacote ``brotli`` instalado, ``.br``, servidas por
+  ``utils.wsgi_estaticos`` (ou pelo nginx com ``gzip_static``).
+"""
+
+import gzip
+import io
+import logging
+import os
+import re
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+try:
+    import brotli
+except ImportError:  # .br é opcional: sem o pacote, apenas .gz
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+EXTENSOES_COMPRIMIVEIS = {
+    ".css",
+    ".js",
+    ".mjs",
+    ".svg",
+    ".json",
+    ".map",
+    ".txt",
+    ".html",
+    ".xml",
+    ".ico",
+}
+TAMANHO_MINIMO_COMPRESSAO = 512
+DENSIDADE = 2
+PADRAO_IMAGEM = re.compile(r"""\{%\s*imagem\s+["']([^"']+)["']\s+(\d+)\s+(\d+)""")
+
+
+def nome_variante(caminho, largura, altura):
+    """Nome da variante redimensionada: ``img/logo.png`` -> ``img/logo.32x32.png``."""
+    raiz, extensao = os.path.splitext(caminho)
+    return f"{raiz}.{largura}x{altura}{extensao}"
+
+
+def imagens_usadas():
+    """Caixas (largura, altura) em que cada imagem aparece nos templates via ``{% imagem %}``."""
+    pastas = [Path(pasta) for config in settings.TEMPLATES for pasta in config.get("DIRS", [])]
+    pastas += [Path(app.path) / "templates" for app in apps.get_app_configs()]
+    usos = {}
+    for pasta in pastas:
+        for template in pasta.rglob("*.html") if pasta.is_dir() else ():
+            for caminho, largura, altura in PADRAO_IMAGEM.findall(template.read_text("utf-8")):
+                usos.setdefault(caminho, set()).add((int(largura), int(altura)))
+    return usos
+
+
+def _redimensionar(original, largura, altura):
+    """Conteúdo da imagem reduzida para caber em largura x altura (None se não reduzir)."""
+    # Usado só no collectstatic: o Pillow fica fora da inicialização
+    from PIL import Image  # pylint: disable=import-outside-toplevel
+
+    with Image.open(original) as imagem:
+        if imagem.width <= largura and imagem.height <= altura:
+            return None
+        formato = imagem.format
+        imagem.thumbnail((largura, altura), Image.Resampling.LANCZOS)
+        saida = io.BytesIO()
+        opcoes = {"optimize": True} if formato == "PNG" else {"quality": 85, "optimize": True}
+        imagem.save(saida, format=formato, **opcoes)
+    return saida.getvalue()
+
+
+def _comprimir(conteudo):
+    """Variantes comprimidas do conteúdo que ficaram menores que o original."""
+    variantes = {".gz": gzip.compress(conteudo, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variantes[".br"] = brotli.compress(conteudo, quality=11)
+    return {sufixo: dados for sufixo, dados in variantes.items() if len(dados) < len(conteudo)}
+
+
+class ArmazenamentoEstatico(ManifestStaticFilesStorage):
+    """Storage do ``collectstatic`` com hash no nome, imagens redimensionadas e pré-compressão."""
+
+    # Sem manifest (desenvolvimento, testes) ou com arquivo ausente, usa a URL sem hash
+    manifest_strict = False
+
+    def url(self, name, force=False):
+        try:
+            return super().url(name, force)
+        except ValueError:
+            return FileSystemStorage.url(self, name)
+
+    def url_imagem(self, caminho, largura, altura):
+        """URL da variante redimensionada da imagem, ou do original se não houver variante."""
+        variante = nome_variante(caminho, largura, altura)
+        if self.hash_key(variante) in self.hashed_files:
+            return self.url(variante)
+        return self.url(caminho)
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run, **options)
+            return
+
+        paths = dict(paths)
+        for caminho, caixas in imagens_usadas().items():
+            if caminho not in paths:
+                continue
+            origem, nome = paths[caminho]
+            for largura, altura in caixas:
+                with origem.open(nome) as original:
+                    conteudo = _redimensionar(original, largura * DENSIDADE, altura * DENSIDADE)
+                if conteudo is None:
+                    continue
+                variante = nome_variante(caminho, largura, altura)
+                self.delete(variante)
+                self.save(variante, ContentFile(conteudo))
+                paths[variante] = (self, variante)
+
+        yield from super().post_process(paths, dry_run, **options)
+        self._pre_comprimir()
+
+    def _pre_comprimir(self):
+        comprimidos = 0
+        for nome in {*self.hashed_files.values(), *self.hashed_files.keys()}:
+            extensao = os.path.splitext(nome)[1].lower()
+            if extensao not in EXTENSOES_COMPRIMIVEIS or not self.exists(nome):
+                continue
+            with self.open(nome) as arquivo:
+                conteudo = arquivo.read()
+            if len(conteudo) < TAMANHO_MINIMO_COMPRESSAO:
+                continue
+            for sufixo, dados in _comprimir(conteudo).items():
+                self.delete(nome + sufixo)
+                self.save(nome + sufixo, ContentFile(dados))
+                comprimidos += 1
+        logger.info("Arquivos estáticos pré-comprimidos: %s", comprimidos)
@@ -0,0 +1,250 @@
+"""Otimização das imagens do slideshow da tela de login (Pillow).
+
+``otimizar_pasta`` gera, para cada imagem de ``static/img/home``, variantes JPEG
+e WebP redimensionadas em várias larguras (``manha1-640w.webp``...) em
+``static/img/home/optimized``, junto com o ``imagens.json``, que descreve as
+variantes de cada imagem (arquivo, largura, altura e ``srcset``):
+
+- as imagens são processadas em um pool de processos;
+- o ``imagens.json`` guarda o sha256 de cada original e os parâmetros usados,
+  então originais que não mudaram não são processados de novo;
+- variantes de originais removidos (ou de larguras que deixaram de ser
+  geradas) são apagadas.
+
+``imagens_responsivas`` lê o ``imagens.json`` e devolve as URLs das variantes
+para o template escolher a menor que cobre a tela. Sem o ``imagens.json`` (o
+comando ainda não rodou), devolve os originais.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+
+logger = logging.getLogger(__name__)
+
+PASTA_ORIGEM = "img/home"
+PASTA_DESTINO = "img/home/optimized"
+MANIFESTO = "imagens.json"
+LARGURAS = (640, 1280, 1920)
+QUALIDADE = 82
+EXTENSOES = {".jpg", ".jpeg", ".png"}
+FORMATOS = {
+    "webp": ("WEBP", ".webp", {"method": 6}),
+    "jpeg": ("JPEG", ".jpg", {"optimize": True, "progressive": True}),
+}
+
+
+class OtimizacaoError(Exception):
+    """Pasta de origem inexistente ou manifesto ilegível."""
+
+
+def hash_arquivo(caminho):
+    digest = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(1024 * 1024), b""):
+            digest.update(bloco)
+    return digest.hexdigest()
+
+
+def larguras_variantes(largura_original, larguras):
+    """Larguras a gerar sem ampliar a imagem: a original entra no lugar das maiores."""
+    menores = sorted({largura for largura in larguras if largura < largura_original})
+    if len(menores) < len(set(larguras)):
+        menores.append(largura_original)
+    return menores
+
+
+def srcset(variantes):
+    """Valor do atributo ``srcset`` (nomes relativos à pasta de destino)."""
+    return ", ".join(
+        f"{variante['arquivo']} {variante['largura']}w" for variante in variantes
+    )
+
+
+def otimizar_imagem(origem, destino, larguras, qualidade):
+    """Gera as variantes de uma imagem e devolve a entrada dela no manifesto.
+
+    Roda nos processos do pool: recebe e devolve apenas dados serializáveis.
+    """
+    # Só o comando optimize_images usa o Pillow; a view do login lê o manifesto
+    from PIL import Image, ImageOps  # pylint: disable=import-outside-toplevel
+
+    nome = os.path.splitext(os.path.basename(origem))[0]
+    with Image.open(origem) as aberta:
+        imagem = ImageOps.exif_transpose(aberta).convert("RGB")
+    entrada = {"largura": imagem.width, "altura": imagem.height, "formatos": {}}
+    for formato, (formato_pil, extensao, opcoes) in FORMATOS.items():
+        variantes = []
+        for largura in larguras_variantes(imagem.width, larguras):
+            altura = round(imagem.height * largura / imagem.width)
+            if largura == imagem.width:
+                reduzida = imagem
+            else:
+                reduzida = imagem.resize((largura, altura), Image.Resampling.LANCZOS)
+            arquivo = f"{nome}-{largura}w{extensao}"
+            reduzida.save(
+                os.path.join(destino, arquivo), formato_pil, quality=qualidade, **opcoes
+            )
+            variantes.append({"arquivo": arquivo, "largura": largura, "altura": altura})
+        entrada["formatos"][formato] = {
+            "variantes": variantes,
+            "srcset": srcset(variantes),
+        }
+    return entrada
+
+
+def _arquivos(entrada):
+    return {
+        variante["arquivo"]
+        for formato in entrada.get("formatos", {}).values()
+        for variante in formato["variantes"]
+    }
+
+
+def ler_manifesto(destino):
+    caminho = os.path.join(destino, MANIFESTO)
+    if not os.path.isfile(caminho):
+        return {}
+    try:
+        with open(caminho, encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    except ValueError as e:
+        raise OtimizacaoError(f"Manifesto inválido: {caminho}") from e
+
+
+def _gravar_manifesto(destino, manifesto):
+    caminho = os.path.join(destino, MANIFESTO)
+    with open(caminho + ".tmp", "w", encoding="utf-8") as arquivo:
+        json.dump(manifesto, arquivo, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(caminho + ".tmp", caminho)
+
+
+def otimizar_pasta(
+    origem,
+    destino,
+    larguras=LARGURAS,
+    qualidade=QUALIDADE,
+    processos=None,
+    forcar=False,
+):
+    """Gera as variantes das imagens de ``origem`` em ``destino``.
+
+    Args:
+        origem: Pasta com as imagens originais (JPEG/PNG; subpastas são ignoradas).
+        destino: Pasta das variantes e do ``imagens.json`` (criada se preciso).
+        larguras: Larguras das variantes, em pixels.
+        qualidade: Qualidade JPEG/WebP (1-95).
+        processos: Tamanho do pool (padrão: número de CPUs); 1 processa em série.
+        forcar: Regenera mesmo as imagens que não mudaram.
+
+    Returns:
+        Dicionário com as listas de nomes ``processadas``, ``inalteradas`` e ``removidas``.
+    """
+    if not os.path.isdir(origem):
+        raise OtimizacaoError(f"Pasta de origem não encontrada: {origem}")
+    os.makedirs(destino, exist_ok=True)
+    anterior = ler_manifesto(destino).get("imagens", {})
+    parametros = {"larguras": sorted(set(larguras)), "qualidade": qualidade}
+
+    originais = {}
+    for arquivo in sorted(os.listdir(origem)):
+        nome, extensao = os.path.splitext(arquivo)
+        caminho = os.path.join(origem, arquivo)
+        if extensao.lower() in EXTENSOES and os.path.isfile(caminho):
+            originais[nome] = caminho
+
+    imagens, pendentes = {}, []
+    for nome, caminho in originais.items():
+        conteudo = hash_arquivo(caminho)
+        entrada = anterior.get(nome, {})
+        completa = all(
+            os.path.isfile(os.path.join(destino, a)) for a in _arquivos(entrada)
+        )
+        if (
+            not forcar
+            and completa
+            and entrada.get("hash") == conteudo
+            and entrada.get("parametros") == parametros
+        ):
+            imagens[nome] = entrada
+        else:
+            pendentes.append((nome, caminho, conteudo))
+
+    argumentos = [
+        (caminho, destino, parametros["larguras"], qualidade)
+        for _, caminho, _ in pendentes
+    ]
+    processos = processos or os.cpu_count() or 1
+    if processos > 1 and len(pendentes) > 1:
+        with ProcessPoolExecutor(max_workers=min(processos, len(pendentes))) as pool:
+            geradas = list(pool.map(otimizar_imagem, *zip(*argumentos, strict=True)))
+    else:
+        geradas = [otimizar_imagem(*args) for args in argumentos]
+    for (nome, _, conteudo), entrada in zip(pendentes, geradas, strict=True):
+        imagens[nome] = {**entrada, "hash": conteudo, "parametros": parametros}
+
+    # Variantes que não fazem mais parte do manifesto (original removido, larguras alteradas)
+    atuais = set().union(*(_arquivos(entrada) for entrada in imagens.values()))
+    for entrada in anterior.values():
+        for arquivo in _arquivos(entrada) - atuais:
+            caminho = os.path.join(destino, arquivo)
+            if os.path.isfile(caminho):
+                os.remove(caminho)
+
+    _gravar_manifesto(destino, {"imagens": imagens})
+    processadas = [nome for nome, _, _ in pendentes]
+    resultado = {
+        "processadas": processadas,
+        "inalteradas": [nome for nome in originais if nome not in processadas],
+        "removidas": sorted(set(anterior) - set(imagens)),
+    }
+    logger.info(
+        "Imagens otimizadas: %s processada(s), %s inalterada(s), %s removida(s)",
+        len(resultado["processadas"]),
+        len(resultado["inalteradas"]),
+        len(resultado["removidas"]),
+    )
+    return resultado
+
+
+@functools.cache
+def imagens_responsivas(pasta_origem=PASTA_ORIGEM, pasta_destino=PASTA_DESTINO):
+    """Variantes de cada imagem: ``{nome: {"webp": [[url, largura], ...], "jpeg": [...]}}``.
+
+    As listas vêm em ordem crescente de largura. Sem o ``imagens.json``, cada
+    imagem tem só o original em ``jpeg``, com largura 0 (desconhecida).
+    """
+    caminho = finders.find(f"{pasta_destino}/{MANIFESTO}")
+    if caminho:
+        with open(caminho, encoding="utf-8") as arquivo:
+            manifesto = json.load(arquivo)
+        return {
+            nome: {
+                formato: [
+                    [
+                        static(f"{pasta_destino}/{variante['arquivo']}"),
+                        variante["largura"],
+                    ]
+                    for variante in dados["variantes"]
+                ]
+                for formato, dados in entrada["formatos"].items()
+            }
+            for nome, entrada in sorted(manifesto["imagens"].items())
+        }
+
+    pasta = finders.find(pasta_origem)
+    if not pasta or not os.path.isdir(pasta):
+        return {}
+    return {
+        os.path.splitext(arquivo)[0]: {
+            "jpeg": [[static(f"{pasta_origem}/{arquivo}"), 0]]
+        }
+        for arquivo in sorted(os.listdir(pasta))
+        if os.path.splitext(arquivo)[1].lower() in EXTENSOES
+    }
@@ -0,0 +1,79 @@
+"""Tempo de inicialização a frio do projeto.
+
+Na Vercel, cada instância nova importa o projeto inteiro antes de responder ao
+primeiro request (``api/config/wsgi.py``: ``django.setup()`` com apps, models e
+signals, depois as URLs e as views). ``medir_inicializacao`` repete isso em um
+processo Python novo com ``-X importtime`` e devolve o tempo total e o custo
+de cada módulo; é usado pelo comando ``perfil_inicializacao`` e pelo teste que
+limita o tempo em ``ORCAMENTO_MS``.
+
+Os módulos de ``MODULOS_SOB_DEMANDA`` (planilhas, PDFs e imagens) são
+importados dentro das funções de exportação que os usam e não devem aparecer
+na inicialização.
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+
+# O que uma instância nova executa até poder atender o primeiro request
+CODIGO_INICIALIZACAO = (
+    "import api.config.wsgi\n"
+    "from django.urls import get_resolver\n"
+    "get_resolver().url_patterns\n"
+)
+MODULOS_SOB_DEMANDA = ("xlsxwriter", "reportlab", "PIL", "pypdf")
+# Limite do teste de regressão (com bytecode já compilado); a medição atual
+# fica em torno de 1/4 disso, a folga cobre máquinas de CI mais lentas
+ORCAMENTO_MS = 1500
+
+# "import time:       self [us] | cumulative | imported package"
+LINHA = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)$")
+
+
+def _importtime(codigo):
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=settings.BASE_DIR,
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": "api.config.settings"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modulos = []
+    for linha in resultado.stderr.splitlines():
+        encontrada = LINHA.match(linha)
+        if encontrada:
+            proprio, acumulado, recuo, nome = encontrada.groups()
+            modulos.append(
+                {
+                    "modulo": nome,
+                    "proprio": int(proprio) / 1000,
+                    "acumulado": int(acumulado) / 1000,
+                    # Importado diretamente pelo código (não por outro módulo)
+                    "raiz": len(recuo) == 1,
+                }
+            )
+    return modulos
+
+
+def medir_inicializacao(repeticoes=3, codigo=CODIGO_INICIALIZACAO):
+    """Mede a inicialização a frio ``repeticoes`` vezes e devolve a mais rápida.
+
+    A primeira execução extra compila o bytecode que faltar, como o build faz
+    (``compileall``), para a medição não incluir a compilação.
+
+    Returns:
+        Dicionário com ``total`` (ms) e ``modulos``: lista de dicionários com
+        ``modulo``, ``proprio`` e ``acumulado`` (ms), na ordem de importação.
+    """
+    _importtime(codigo)
+    medicoes = []
+    for _ in range(max(repeticoes, 1)):
+        modulos = _importtime(codigo)
+        total = sum(modulo["acumulado"] for modulo in modulos if modulo["raiz"])
+        medicoes.append({"total": total, "modulos": modulos})
+    return min(medicoes, key=lambda medicao: medicao["total"])
@@ -0,0 +1,29 @@
+from django.db import models
+
+
+class ContadoresDocumentos(models.Model):
+    """Contadores dos documentos vinculados (tabela ativa e arquivo).
+
+    Mantidos por ``documentos.contadores`` a cada inclusão, alteração ou
+    exclusão de documento; não devem ser editados manualmente. O comando
+    ``reconciliar_contadores`` corrige eventuais divergências.
+    """
+
+    total_documentos = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Documentos"
+    )
+    valor_total_bruto = models.DecimalField(
+        max_digits=16, decimal_places=2, default=0, editable=False, verbose_name="Total Bruto"
+    )
+    valor_total_liquido = models.DecimalField(
+        max_digits=16, decimal_places=2, default=0, editable=False, verbose_name="Total Líquido"
+    )
+    valor_pendente = models.DecimalField(
+        max_digits=16, decimal_places=2, default=0, editable=False, verbose_name="Total a Pagar"
+    )
+    ultimo_documento_em = models.DateField(
+        null=True, blank=True, editable=False, verbose_name="Último Documento"
+    )
+
+    class Meta:
+        abstract = True
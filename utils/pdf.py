@@ -0,0 +1,99 @@
+"""Geração de PDFs no servidor com cache e processamento paralelo.
+
+Cada documento (recibo, ofício) é descrito por um dicionário de campos já
+formatados e desenhado por uma função ``renderizar(dados) -> bytes`` definida
+no módulo do app (reportlab). ``gerar_pdf`` junta vários documentos em um
+único arquivo:
+
+- o PDF de cada documento fica no cache com a chave derivada do hash do
+  conteúdo (função de desenho + campos), então reimpressões não redesenham
+  nada e qualquer alteração nos dados gera uma chave nova;
+- os documentos ausentes do cache são desenhados em um pool de processos
+  (``settings.PDF_PROCESSOS``) quando passam de ``settings.PDF_MINIMO_PARALELO``.
+
+A função de desenho é executada em outro processo: precisa ser de nível de
+módulo e não deve acessar o banco (os dados chegam prontos no dicionário).
+Ao alterar o layout de um documento, incremente ``VERSAO`` no módulo dele
+para descartar os PDFs em cache.
+"""
+
+import hashlib
+import importlib
+import io
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+PREFIXO_CACHE = "pdf"
+VALIDADE_CACHE = 60 * 60 * 24 * 30
+
+
+def chave_cache(renderizar, dados):
+    """Chave do PDF no cache: hash da função de desenho (e versão do layout) e dos campos."""
+    modulo = renderizar.__module__
+    versao = getattr(importlib.import_module(modulo), "VERSAO", 1)
+    conteudo = json.dumps(
+        [modulo, renderizar.__qualname__, versao, dados], sort_keys=True, default=str
+    )
+    return f"{PREFIXO_CACHE}:{hashlib.sha256(conteudo.encode()).hexdigest()}"
+
+
+def _desenhar(renderizar, pendentes, processos):
+    if processos > 1 and len(pendentes) >= settings.PDF_MINIMO_PARALELO:
+        with ProcessPoolExecutor(max_workers=min(processos, len(pendentes))) as pool:
+            return list(pool.map(renderizar, pendentes))
+    return [renderizar(dados) for dados in pendentes]
+
+
+def gerar_pdf(renderizar, documentos, processos=None):
+    """Gera um PDF com todos os documentos, na ordem recebida.
+
+    Args:
+        renderizar: Função de nível de módulo que recebe os dados de um
+            documento e devolve o PDF dele (bytes).
+        documentos: Lista de dicionários serializáveis, um por documento.
+        processos: Tamanho do pool (padrão: ``settings.PDF_PROCESSOS``).
+
+    Returns:
+        bytes: O PDF combinado.
+    """
+    processos = settings.PDF_PROCESSOS if processos is None else processos
+    chaves = [chave_cache(renderizar, dados) for dados in documentos]
+    em_cache = cache.get_many(set(chaves))
+
+    faltantes = {}
+    for chave, dados in zip(chaves, documentos, strict=True):
+        if chave not in em_cache:
+            faltantes.setdefault(chave, dados)
+    if faltantes:
+        desenhados = dict(
+            zip(
+                faltantes,
+                _desenhar(renderizar, list(faltantes.values()), processos),
+                strict=True,
+            )
+        )
+        cache.set_many(desenhados, VALIDADE_CACHE)
+        em_cache.update(desenhados)
+    logger.debug(
+        "PDF com %s documento(s): %s desenhado(s), %s do cache",
+        len(documentos),
+        len(faltantes),
+        len(documentos) - len(faltantes),
+    )
+
+    if len(chaves) == 1:
+        return em_cache[chaves[0]]
+    from pypdf import PdfWriter  # pylint: disable=import-outside-toplevel
+
+    combinado = PdfWriter()
+    for chave in chaves:
+        combinado.append(io.BytesIO(em_cache[chave]))
+    saida = io.BytesIO()
+    combinado.write(saida)
+    return saida.getvalue()
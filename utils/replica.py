@@ -0,0 +1,187 @@
+"""Leituras pesadas (relatórios, exportações, dashboard) em uma réplica.
+
+Com ``DATABASE_REPLICA_URL`` configurada, ``settings.DATABASES["replica"]``
+aponta para uma réplica de leitura do PostgreSQL (ou qualquer cópia do banco).
+As views de relatório são marcadas com ``@ler_da_replica`` (funções) ou
+``LeituraReplicaMixin`` (classes): durante o request, ``RoteadorReplica``
+envia as leituras para a réplica; as gravações continuam no primário.
+
+A réplica pode estar alguns segundos atrasada. Para o usuário ver o que acabou
+de gravar, ``FixarPrimarioMiddleware`` fixa a sessão no primário por
+``REPLICA_FIXACAO_SEGUNDOS`` após cada request que altera dados (POST, PUT...).
+
+Sem réplica configurada, ou com a réplica espelhando o banco padrão (testes),
+tudo é lido do primário.
+"""
+
+import contextlib
+import contextvars
+import functools
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .banco import mesmo_banco
+
+ALIAS_REPLICA = "replica"
+CHAVE_FIXACAO = "_primario_ate"
+METODOS_SEGUROS = ("GET", "HEAD", "OPTIONS")
+
+_na_replica = contextvars.ContextVar("ler_da_replica", default=False)
+
+
+def replica_disponivel():
+    """Se há uma réplica distinta do primário configurada."""
+    if ALIAS_REPLICA not in connections.settings:
+        return False
+    # Nos testes a réplica é um espelho (TEST["MIRROR"]) do banco padrão
+    return not mesmo_banco(
+        connections[ALIAS_REPLICA].settings_dict,
+        connections[DEFAULT_DB_ALIAS].settings_dict,
+    )
+
+
+@contextlib.contextmanager
+def usar_replica():
+    """Envia à réplica as leituras feitas dentro do bloco."""
+    token = _na_replica.set(True)
+    try:
+        yield
+    finally:
+        _na_replica.reset(token)
+
+
+def fixado_no_primario(request):
+    """Se a sessão alterou dados há menos de ``REPLICA_FIXACAO_SEGUNDOS``."""
+    sessao = getattr(request, "session", None)
+    return sessao is not None and sessao.get(CHAVE_FIXACAO, 0) > time.time()
+
+
+async def _afixado_no_primario(request):
+    sessao = getattr(request, "session", None)
+    return sessao is not None and await sessao.aget(CHAVE_FIXACAO, 0) > time.time()
+
+
+def _iterar_na_replica(conteudo):
+    """Conteúdo de uma resposta streaming, gerado com as leituras na réplica."""
+    iterador = iter(conteudo)
+    while True:
+        with usar_replica():
+            try:
+                parte = next(iterador)
+            except StopIteration:
+                return
+        yield parte
+
+
+def _responder_da_replica(request, view, *args, **kwargs):
+    if (
+        request.method not in METODOS_SEGUROS
+        or not replica_disponivel()
+        or fixado_no_primario(request)
+    ):
+        return view(request, *args, **kwargs)
+    with usar_replica():
+        resposta = view(request, *args, **kwargs)
+        # TemplateResponse: as consultas dos templates rodam na renderização
+        if hasattr(resposta, "render") and not resposta.is_rendered:
+            resposta.render()
+    if resposta.streaming:
+        resposta.streaming_content = _iterar_na_replica(resposta.streaming_content)
+    return resposta
+
+
+async def _aresponder_da_replica(request, view, *args, **kwargs):
+    if (
+        request.method not in METODOS_SEGUROS
+        or not replica_disponivel()
+        or await _afixado_no_primario(request)
+    ):
+        return await view(request, *args, **kwargs)
+    # O contexto (e a réplica) acompanha as consultas do ORM assíncrono
+    with usar_replica():
+        resposta = await view(request, *args, **kwargs)
+        if hasattr(resposta, "render") and not resposta.is_rendered:
+            await sync_to_async(resposta.render)()
+    return resposta
+
+
+def ler_da_replica(view):
+    """Decorator de views de leitura: consultas dos GETs vão para a réplica."""
+    if iscoroutinefunction(view):
+
+        @functools.wraps(view)
+        async def _aview(request, *args, **kwargs):
+            return await _aresponder_da_replica(request, view, *args, **kwargs)
+
+        return _aview
+
+    @functools.wraps(view)
+    def _view(request, *args, **kwargs):
+        return _responder_da_replica(request, view, *args, **kwargs)
+
+    return _view
+
+
+class LeituraReplicaMixin:
+    """Equivalente de ``@ler_da_replica`` para views baseadas em classe."""
+
+    def dispatch(self, request, *args, **kwargs):
+        return _responder_da_replica(request, super().dispatch, *args, **kwargs)
+
+
+class RoteadorReplica:
+    """Leituras dentro de ``usar_replica()`` vão para a réplica; o resto, ao padrão."""
+
+    def db_for_read(self, model, **hints):  # pylint: disable=unused-argument
+        if _na_replica.get() and replica_disponivel():
+            return ALIAS_REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):  # pylint: disable=unused-argument
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):  # pylint: disable=unused-argument
+        # Réplica e primário têm os mesmos dados
+        return True
+
+
+class FixarPrimarioMiddleware:
+    """Fixa a sessão no primário por alguns segundos após um POST (PUT, DELETE...)."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        resposta = self.get_response(request)
+        if self._fixar(request):
+            request.session[CHAVE_FIXACAO] = self._fixado_ate()
+        return resposta
+
+    async def __acall__(self, request):
+        resposta = await self.get_response(request)
+        if self._fixar(request):
+            await request.session.aset(CHAVE_FIXACAO, self._fixado_ate())
+        return resposta
+
+    @staticmethod
+    def _fixar(request):
+        return (
+            request.method not in METODOS_SEGUROS
+            and hasattr(request, "session")
+            and replica_disponivel()
+        )
+
+    @staticmethod
+    def _fixado_ate():
+        return time.time() + settings.REPLICA_FIXACAO_SEGUNDOS
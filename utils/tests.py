@@ -0,0 +1,496 @@
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import Count
+from django.http import HttpResponse
+from django.template import Context, Template, engines
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.views.generic import TemplateView
+from PIL import Image
+
+from documentos.models import Secretaria
+
+from .banco import aquecer, valores_preparados
+from .downloads import enviar_arquivo, limpar_exportacoes
+from .estaticos import ArmazenamentoEstatico
+from .imagens import MANIFESTO, imagens_responsivas
+from .inicializacao import MODULOS_SOB_DEMANDA, ORCAMENTO_MS, medir_inicializacao
+from .replica import (
+    ALIAS_REPLICA,
+    FixarPrimarioMiddleware,
+    LeituraReplicaMixin,
+    ler_da_replica,
+    replica_disponivel,
+    usar_replica,
+)
+from .wsgi_estaticos import ServidorEstaticos
+
+
+class ArmazenamentoEstaticoTest(SimpleTestCase):
+    def setUp(self):
+        self.origem = tempfile.mkdtemp()
+        self.destino = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.origem)
+        self.addCleanup(shutil.rmtree, self.destino)
+        os.makedirs(os.path.join(self.origem, "img"))
+        os.makedirs(os.path.join(self.origem, "css"))
+        Image.new("RGBA", (400, 300), "blue").save(
+            os.path.join(self.origem, "img", "logo.png")
+        )
+        with open(
+            os.path.join(self.origem, "css", "app.css"), "w", encoding="utf-8"
+        ) as arquivo:
+            arquivo.write(".logo { background: url('../img/logo.png'); }\n" * 50)
+
+    def _coletar(self):
+        origem = FileSystemStorage(location=self.origem)
+        armazenamento = ArmazenamentoEstatico(
+            location=self.destino, base_url="/static/"
+        )
+        paths = {}
+        for nome in ("img/logo.png", "css/app.css"):
+            with origem.open(nome) as arquivo:
+                armazenamento.save(nome, arquivo)
+            paths[nome] = (origem, nome)
+        with mock.patch(
+            "utils.estaticos.imagens_usadas",
+            return_value={"img/logo.png": {(32, 32), (500, 500)}},
+        ):
+            for _, _, processado in armazenamento.post_process(paths):
+                self.assertNotIsInstance(processado, Exception)
+        return armazenamento
+
+    def test_hash_variantes_e_compressao(self):
+        armazenamento = self._coletar()
+        css = armazenamento.stored_name("css/app.css")
+        self.assertRegex(css, r"^css/app\.[0-9a-f]{12}\.css$")
+        with armazenamento.open(css) as arquivo:
+            conteudo = arquivo.read()
+        self.assertIn(
+            armazenamento.stored_name("img/logo.png").split("/")[-1].encode(), conteudo
+        )
+        with armazenamento.open(css + ".gz") as arquivo:
+            self.assertEqual(gzip.decompress(arquivo.read()), conteudo)
+
+        # Variante em 2x da caixa 32x32; a caixa maior que o original não gera variante
+        url = armazenamento.url_imagem("img/logo.png", 32, 32)
+        self.assertRegex(url, r"^/static/img/logo\.32x32\.[0-9a-f]{12}\.png$")
+        with armazenamento.open(url.removeprefix("/static/")) as arquivo:
+            self.assertEqual(Image.open(arquivo).size, (64, 48))
+        self.assertEqual(
+            armazenamento.url_imagem("img/logo.png", 500, 500),
+            armazenamento.url("img/logo.png"),
+        )
+
+    def test_tag_imagem_sem_manifest(self):
+        template = Template(
+            "{% load custom_filters %}{% imagem 'img/logo.png' 32 32 alt='Logo' %}"
+        )
+        html = template.render(Context())
+        self.assertEqual(
+            html, '<img src="/static/img/logo.png" width="32" height="32" alt="Logo">'
+        )
+
+
+class ServidorEstaticosTest(SimpleTestCase):
+    NOME = "css/app.3f2a9c1b0d4e.css"
+
+    def setUp(self):
+        self.raiz = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.raiz)
+        os.makedirs(os.path.join(self.raiz, "css"))
+        self.conteudo = b"body { color: black; }\n" * 100
+        caminho = os.path.join(self.raiz, self.NOME)
+        with open(caminho, "wb") as arquivo:
+            arquivo.write(self.conteudo)
+        with open(caminho + ".gz", "wb") as arquivo:
+            arquivo.write(gzip.compress(self.conteudo))
+        self.django = mock.Mock(return_value=[b"django"])
+        self.servidor = ServidorEstaticos(
+            self.django, raiz=self.raiz, prefixo="/static/"
+        )
+
+    def _get(self, caminho, **cabecalhos):
+        environ = {"REQUEST_METHOD": "GET", "PATH_INFO": caminho, **cabecalhos}
+        resposta = {}
+
+        def start_response(status, headers):
+            resposta["status"] = status
+            resposta["headers"] = dict(headers)
+
+        corpo = b"".join(self.servidor(environ, start_response))
+        return resposta.get("status"), resposta.get("headers", {}), corpo
+
+    def test_variante_comprimida_e_cache(self):
+        status, cabecalhos, corpo = self._get(
+            f"/static/{self.NOME}", HTTP_ACCEPT_ENCODING="gzip, br"
+        )
+        self.assertEqual(status, "200 OK")
+        self.assertEqual(cabecalhos["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(corpo), self.conteudo)
+        self.assertEqual(
+            cabecalhos["Cache-Control"], "public, max-age=31536000, immutable"
+        )
+        self.assertEqual(cabecalhos["Vary"], "Accept-Encoding")
+
+        status, cabecalhos, corpo = self._get(f"/static/{self.NOME}")
+        self.assertNotIn("Content-Encoding", cabecalhos)
+        self.assertEqual(corpo, self.conteudo)
+
+        status, _, corpo = self._get(
+            f"/static/{self.NOME}", HTTP_IF_NONE_MATCH=cabecalhos["ETag"]
+        )
+        self.assertEqual((status, corpo), ("304 Not Modified", b""))
+
+    def test_intervalos(self):
+        status, cabecalhos, corpo = self._get(
+            f"/static/{self.NOME}",
+            HTTP_RANGE="bytes=10-19",
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+        self.assertEqual(status, "206 Partial Content")
+        self.assertEqual(corpo, self.conteudo[10:20])
+        self.assertEqual(
+            cabecalhos["Content-Range"], f"bytes 10-19/{len(self.conteudo)}"
+        )
+        self.assertNotIn("Content-Encoding", cabecalhos)
+
+        _, _, corpo = self._get(f"/static/{self.NOME}", HTTP_RANGE="bytes=-5")
+        self.assertEqual(corpo, self.conteudo[-5:])
+
+        status, _, _ = self._get(
+            f"/static/{self.NOME}", HTTP_RANGE=f"bytes={len(self.conteudo)}-"
+        )
+        self.assertEqual(status, "416 Range Not Satisfiable")
+
+    def test_demais_caminhos_seguem_para_o_django(self):
+        for caminho in (
+            "/documentos/",
+            "/static/css/inexistente.css",
+            "/static/../settings.py",
+        ):
+            self.assertEqual(self._get(caminho)[2], b"django")
+        self.assertEqual(self.django.call_count, 3)
+
+    def test_file_wrapper(self):
+        envoltorio = mock.Mock(return_value=[b"sendfile"])
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": f"/static/{self.NOME}",
+            "wsgi.file_wrapper": envoltorio,
+        }
+        self.assertEqual(self.servidor(environ, mock.Mock()), [b"sendfile"])
+        arquivo = envoltorio.call_args.args[0]
+        self.assertIsInstance(arquivo, io.BufferedReader)
+        arquivo.close()
+
+
+class OtimizacaoImagensTest(SimpleTestCase):
+    def setUp(self):
+        self.estaticos = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.estaticos)
+        self.origem = os.path.join(self.estaticos, "img", "home")
+        self.destino = os.path.join(self.origem, "optimized")
+        os.makedirs(self.origem)
+        Image.new("RGB", (800, 600), "orange").save(
+            os.path.join(self.origem, "manha1.jpg")
+        )
+        Image.new("RGBA", (2000, 1000), "navy").save(
+            os.path.join(self.origem, "noite.png")
+        )
+        imagens_responsivas.cache_clear()
+        self.addCleanup(imagens_responsivas.cache_clear)
+
+    def _otimizar(self, *args):
+        saida = io.StringIO()
+        call_command(
+            "optimize_images",
+            "--origem",
+            self.origem,
+            "--destino",
+            self.destino,
+            "--larguras",
+            "640",
+            "1280",
+            "--processos",
+            "1",
+            *args,
+            stdout=saida,
+        )
+        return saida.getvalue()
+
+    def _manifesto(self):
+        with open(os.path.join(self.destino, MANIFESTO), encoding="utf-8") as arquivo:
+            return json.load(arquivo)["imagens"]
+
+    def test_variantes_e_srcset(self):
+        self.assertIn("2 processada(s), 0 inalterada(s)", self._otimizar())
+        imagens = self._manifesto()
+        # Sem ampliar: a original de 800px substitui a variante de 1280px
+        self.assertEqual(
+            imagens["manha1"]["formatos"]["webp"]["srcset"],
+            "manha1-640w.webp 640w, manha1-800w.webp 800w",
+        )
+        self.assertEqual(
+            imagens["noite"]["formatos"]["jpeg"]["srcset"],
+            "noite-640w.jpg 640w, noite-1280w.jpg 1280w",
+        )
+        with Image.open(os.path.join(self.destino, "noite-640w.jpg")) as imagem:
+            self.assertEqual((imagem.format, imagem.size), ("JPEG", (640, 320)))
+        with Image.open(os.path.join(self.destino, "manha1-640w.webp")) as imagem:
+            self.assertEqual((imagem.format, imagem.size), ("WEBP", (640, 480)))
+
+    def test_ignora_originais_inalterados(self):
+        self._otimizar()
+        self.assertIn("0 processada(s), 2 inalterada(s)", self._otimizar())
+
+        Image.new("RGB", (800, 600), "red").save(
+            os.path.join(self.origem, "manha1.jpg")
+        )
+        saida = self._otimizar()
+        self.assertIn("OK: manha1", saida)
+        self.assertIn("1 processada(s), 1 inalterada(s)", saida)
+        self.assertIn("2 processada(s)", self._otimizar("--forcar"))
+
+        os.remove(os.path.join(self.origem, "noite.png"))
+        self.assertIn("1 removida(s)", self._otimizar())
+        self.assertEqual(list(self._manifesto()), ["manha1"])
+        self.assertFalse(
+            any(nome.startswith("noite") for nome in os.listdir(self.destino))
+        )
+
+    def test_imagens_responsivas(self):
+        with override_settings(STATICFILES_DIRS=[self.estaticos]):
+            # Antes do comando, apenas os originais
+            self.assertEqual(
+                imagens_responsivas()["noite"],
+                {"jpeg": [["/static/img/home/noite.png", 0]]},
+            )
+            self._otimizar()
+            imagens_responsivas.cache_clear()
+            self.assertEqual(
+                imagens_responsivas()["manha1"]["webp"],
+                [
+                    ["/static/img/home/optimized/manha1-640w.webp", 640],
+                    ["/static/img/home/optimized/manha1-800w.webp", 800],
+                ],
+            )
+
+
+class DownloadsTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        os.makedirs(os.path.join(self.media, "fotos_perfil"))
+        self.caminho = os.path.join(self.media, "fotos_perfil", "joão silva.jpg")
+        with open(self.caminho, "wb") as arquivo:
+            arquivo.write(b"\xff\xd8" + b"0" * 200_000)
+        configuracao = override_settings(
+            MEDIA_ROOT=self.media,
+            DOWNLOAD_LOCAIS_INTERNOS={self.media: "/_protegido/media/"},
+        )
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def test_envio_pelo_django_em_blocos(self):
+        resposta = enviar_arquivo(self.caminho, nome="foto.jpg")
+        self.assertEqual(resposta["Content-Type"], "image/jpeg")
+        self.assertEqual(
+            resposta["Content-Disposition"], 'attachment; filename="foto.jpg"'
+        )
+        blocos = list(resposta.streaming_content)
+        self.assertGreater(len(blocos), 1)
+        self.assertEqual(len(b"".join(blocos)), 200_002)
+
+    def test_envio_delegado_ao_servidor_web(self):
+        with override_settings(DOWNLOAD_ENVIO="x-accel-redirect"):
+            resposta = enviar_arquivo(self.caminho, anexo=False)
+        self.assertEqual(
+            resposta["X-Accel-Redirect"],
+            "/_protegido/media/fotos_perfil/jo%C3%A3o%20silva.jpg",
+        )
+        self.assertEqual(resposta.content, b"")
+        self.assertTrue(resposta["Content-Disposition"].startswith("inline;"))
+
+        with override_settings(DOWNLOAD_ENVIO="x-sendfile"):
+            resposta = enviar_arquivo(self.caminho)
+        self.assertEqual(resposta["X-Sendfile"], os.path.realpath(self.caminho))
+
+    def test_media_exige_login(self):
+        url = "/media/fotos_perfil/jo%C3%A3o%20silva.jpg"
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        User.objects.create_user(username="leitor", password="senha12345")
+        self.client.login(username="leitor", password="senha12345")
+        with override_settings(DOWNLOAD_ENVIO="x-accel-redirect"):
+            resposta = self.client.get(url)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta["Cache-Control"], "private, max-age=3600")
+        self.assertIn("X-Accel-Redirect", resposta)
+        self.assertEqual(
+            self.client.get("/media/fotos_perfil/..%2F..%2Fsettings.py").status_code,
+            404,
+        )
+        self.assertEqual(self.client.get("/media/inexistente.jpg").status_code, 404)
+
+    def test_limpar_exportacoes(self):
+        with override_settings(EXPORTACOES_ROOT=self.media):
+            antiga = os.path.join(self.media, "fotos_perfil")
+            os.makedirs(os.path.join(self.media, "recente"))
+            duas_horas = time.time() - 2 * 3600
+            os.utime(antiga, (duas_horas, duas_horas))
+            self.assertEqual(limpar_exportacoes(1), 1)
+            self.assertEqual(os.listdir(self.media), ["recente"])
+
+
+class BancoTest(TestCase):
+    def test_valores_preparados(self):
+        User.objects.create_user("ana", is_staff=True)
+        User.objects.create_user("bia")
+        consulta = (
+            User.objects.values("is_staff")
+            .annotate(total=Count("id"))
+            .order_by("is_staff")
+        )
+        with CaptureQueriesContext(connection) as consultas:
+            linhas = valores_preparados(consulta)
+        self.assertEqual(
+            linhas,
+            [{"is_staff": False, "total": 1}, {"is_staff": True, "total": 1}],
+        )
+        self.assertEqual(len(consultas), 1)
+        if connection.vendor == "postgresql" and settings.DB_PREPARAR:
+            self.assertTrue(consultas[0]["sql"].startswith("EXECUTE "))
+
+    def test_aquecer(self):
+        self.assertGreaterEqual(aquecer(), 0)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            self.assertEqual(cursor.fetchone(), (1,))
+
+
+class ReplicaTest(TestCase):
+    """Uma cópia SQLite local faz o papel da réplica de leitura."""
+
+    @classmethod
+    def setUpClass(cls):
+        # Alias trocado aqui, não em settings: o runner não cria banco de teste
+        cls.databases = {DEFAULT_DB_ALIAS, ALIAS_REPLICA}
+        cls.pasta = tempfile.mkdtemp()
+        cls.replica_configurada = connections.settings.get(ALIAS_REPLICA)
+        cls._trocar_replica(
+            {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": os.path.join(cls.pasta, "replica.sqlite3"),
+            }
+        )
+        with connections[ALIAS_REPLICA].schema_editor() as editor:
+            editor.create_model(Secretaria)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._trocar_replica(cls.replica_configurada)
+        shutil.rmtree(cls.pasta)
+
+    @staticmethod
+    def _trocar_replica(banco):
+        if ALIAS_REPLICA in connections.settings:
+            connections[ALIAS_REPLICA].close()
+            del connections[ALIAS_REPLICA]
+            del connections.settings[ALIAS_REPLICA]
+        if banco is not None:
+            connections.settings[ALIAS_REPLICA] = connections.configure_settings(
+                {**connections.settings, ALIAS_REPLICA: banco}
+            )[ALIAS_REPLICA]
+
+    @classmethod
+    def setUpTestData(cls):
+        Secretaria.objects.using(ALIAS_REPLICA).create(nome="Réplica", codigo="R")
+        Secretaria.objects.create(nome="Primário", codigo="P")
+
+    def setUp(self):
+        self.fabrica = RequestFactory()
+
+    @staticmethod
+    def _listar(_request):
+        return HttpResponse(
+            ", ".join(Secretaria.objects.values_list("nome", flat=True))
+        )
+
+    def test_leituras_dos_relatorios_na_replica(self):
+        view = ler_da_replica(self._listar)
+        self.assertEqual(view(self.fabrica.get("/")).content, "Réplica".encode())
+        self.assertEqual(view(self.fabrica.post("/")).content, "Primário".encode())
+        # Fora das views marcadas, e nas gravações, vale o primário
+        self.assertEqual(self._listar(None).content, "Primário".encode())
+        with usar_replica():
+            Secretaria.objects.create(nome="Nova", codigo="N")
+        self.assertTrue(Secretaria.objects.filter(nome="Nova").exists())
+
+        class Relatorio(LeituraReplicaMixin, TemplateView):
+            def get_template_names(self):
+                return engines["django"].from_string(
+                    "{% for s in secretarias %}{{ s.nome }}{% endfor %}"
+                )
+
+            def get_context_data(self, **kwargs):
+                # Avaliado só na renderização do template
+                return {"secretarias": Secretaria.objects.all()}
+
+        resposta = Relatorio.as_view()(self.fabrica.get("/"))
+        self.assertEqual(resposta.content, "Réplica".encode())
+
+    def test_sessao_fixada_no_primario_apos_post(self):
+        view = ler_da_replica(self._listar)
+        middleware = FixarPrimarioMiddleware(lambda _request: HttpResponse())
+        post = self.fabrica.post("/")
+        post.session = SessionStore()
+        middleware(post)
+
+        get = self.fabrica.get("/")
+        get.session = post.session
+        self.assertEqual(view(get).content, "Primário".encode())
+        with override_settings(REPLICA_FIXACAO_SEGUNDOS=-1):
+            middleware(post)
+        self.assertEqual(view(get).content, "Réplica".encode())
+
+    def test_sem_replica_le_do_primario(self):
+        view = ler_da_replica(self._listar)
+        with mock.patch("utils.replica.ALIAS_REPLICA", "inexistente"):
+            self.assertFalse(replica_disponivel())
+            self.assertEqual(view(self.fabrica.get("/")).content, "Primário".encode())
+        # Réplica espelhando o banco padrão (como nos testes)
+        with mock.patch.dict(
+            connections[ALIAS_REPLICA].settings_dict,
+            connections[DEFAULT_DB_ALIAS].settings_dict,
+        ):
+            self.assertFalse(replica_disponivel())
+
+
+class InicializacaoTest(SimpleTestCase):
+    def test_inicializacao_a_frio(self):
+        medicao = medir_inicializacao(repeticoes=2)
+        carregados = {modulo["modulo"] for modulo in medicao["modulos"]}
+        self.assertIn("api.config.wsgi", carregados)
+        for nome in MODULOS_SOB_DEMANDA:
+            self.assertNotIn(nome, carregados)
+        self.assertLess(
+            medicao["total"],
+            ORCAMENTO_MS,
+            "Acima do orçamento; veja manage.py perfil_inicializacao",
+        )
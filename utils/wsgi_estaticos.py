@@ -0,0 +1,195 @@
+"""Servidor WSGI de arquivos estáticos, à frente da aplicação Django.
+
+``ServidorEstaticos`` atende ``STATIC_URL`` diretamente a partir de
+``STATIC_ROOT`` (resultado do ``collectstatic``), sem passar por URLs,
+middlewares ou views:
+
+- o corpo é entregue com ``wsgi.file_wrapper`` (``sendfile`` no gunicorn, sem
+  cópia pelo Python);
+- escolhe a variante pré-comprimida ``.br``/``.gz`` conforme ``Accept-Encoding``;
+- responde ``304`` a ``If-None-Match`` e ``206`` a ``Range`` (um intervalo);
+- arquivos com hash no nome são marcados como imutáveis por um ano.
+
+Caminhos fora de ``STATIC_ROOT`` ou inexistentes seguem para o Django.
+"""
+
+import email.utils
+import mimetypes
+import os
+import re
+
+NOMES_COM_HASH = re.compile(r"\.[0-9a-f]{12}\.[^./]+$")
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+CACHE_CURTO = "public, max-age=60"
+CODIFICACOES = (("br", ".br"), ("gzip", ".gz"))
+TAMANHO_BLOCO = 64 * 1024
+INTERVALO = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class _Arquivo:
+    """Dados de um arquivo estático e de suas variantes comprimidas."""
+
+    def __init__(self, caminho, url):
+        self.caminho = caminho
+        tipo, _ = mimetypes.guess_type(url)
+        tipo = tipo or "application/octet-stream"
+        if tipo.startswith("text/") or tipo in ("application/javascript", "image/svg+xml"):
+            tipo += "; charset=utf-8"
+        self.tipo = tipo
+        self.cache = CACHE_IMUTAVEL if NOMES_COM_HASH.search(url) else CACHE_CURTO
+        self.variantes = {None: self._dados(caminho)}
+        for codificacao, sufixo in CODIFICACOES:
+            if os.path.isfile(caminho + sufixo):
+                self.variantes[codificacao] = self._dados(caminho + sufixo)
+
+    @staticmethod
+    def _dados(caminho):
+        estado = os.stat(caminho)
+        return {
+            "caminho": caminho,
+            "tamanho": estado.st_size,
+            "etag": f'"{int(estado.st_mtime):x}-{estado.st_size:x}"',
+            "modificado": email.utils.formatdate(estado.st_mtime, usegmt=True),
+        }
+
+    def variante(self, aceitas):
+        for codificacao, _ in CODIFICACOES:
+            if codificacao in self.variantes and codificacao in aceitas:
+                return codificacao, self.variantes[codificacao]
+        return None, self.variantes[None]
+
+
+def _codificacoes_aceitas(cabecalho):
+    aceitas = set()
+    for item in cabecalho.split(","):
+        nome, _, parametros = item.strip().partition(";")
+        if parametros.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            aceitas.add(nome.strip().lower())
+    return aceitas
+
+
+def _intervalo(cabecalho, tamanho):
+    """(inicio, fim) do intervalo pedido; None para ignorar; False se não satisfazível."""
+    encontrado = INTERVALO.match(cabecalho.strip())
+    if not encontrado or encontrado.groups() == ("", ""):
+        return None
+    inicio, fim = encontrado.groups()
+    if inicio == "":  # sufixo: últimos N bytes
+        inicio, fim = max(tamanho - int(fim), 0), tamanho - 1
+    else:
+        inicio, fim = int(inicio), min(int(fim), tamanho - 1) if fim else tamanho - 1
+    if inicio > fim or inicio >= tamanho:
+        return False
+    return inicio, fim
+
+
+def _ler(caminho, inicio, quantidade):
+    with open(caminho, "rb") as arquivo:
+        arquivo.seek(inicio)
+        while quantidade > 0:
+            bloco = arquivo.read(min(TAMANHO_BLOCO, quantidade))
+            if not bloco:
+                break
+            quantidade -= len(bloco)
+            yield bloco
+
+
+class ServidorEstaticos:
+    """Middleware WSGI que serve ``STATIC_URL`` a partir de ``STATIC_ROOT``."""
+
+    def __init__(self, aplicacao, raiz=None, prefixo=None):
+        if raiz is None or prefixo is None:
+            from django.conf import settings  # pylint: disable=import-outside-toplevel
+
+            raiz = settings.STATIC_ROOT if raiz is None else raiz
+            prefixo = settings.STATIC_URL if prefixo is None else prefixo
+        self.aplicacao = aplicacao
+        self.raiz = os.path.realpath(raiz) if raiz else None
+        self.prefixo = "/" + prefixo.strip("/") + "/"
+        self.arquivos = {}
+
+    def _arquivo(self, url):
+        # Os arquivos não mudam enquanto o processo roda (mudam a cada deploy)
+        if url not in self.arquivos:
+            caminho = os.path.realpath(os.path.join(self.raiz, url))
+            if not caminho.startswith(self.raiz + os.sep) or not os.path.isfile(caminho):
+                return None
+            self.arquivos[url] = _Arquivo(caminho, url)
+        return self.arquivos[url]
+
+    def __call__(self, environ, start_response):
+        caminho = environ.get("PATH_INFO", "")
+        metodo = environ.get("REQUEST_METHOD", "GET")
+        if not self.raiz or metodo not in ("GET", "HEAD") or not caminho.startswith(self.prefixo):
+            return self.aplicacao(environ, start_response)
+        arquivo = self._arquivo(caminho[len(self.prefixo) :])
+        if arquivo is None:
+            return self.aplicacao(environ, start_response)
+        return self._responder(arquivo, environ, start_response, metodo == "HEAD")
+
+    def _responder(self, arquivo, environ, start_response, cabecalho_apenas):
+        pedido_intervalo = environ.get("HTTP_RANGE", "")
+        # Intervalos são sempre sobre o arquivo original, sem compressão
+        aceitas = set()
+        if not pedido_intervalo:
+            aceitas = _codificacoes_aceitas(environ.get("HTTP_ACCEPT_ENCODING", ""))
+        codificacao, dados = arquivo.variante(aceitas)
+
+        cabecalhos = [
+            ("Content-Type", arquivo.tipo),
+            ("Cache-Control", arquivo.cache),
+            ("ETag", dados["etag"]),
+            ("Last-Modified", dados["modificado"]),
+            ("Accept-Ranges", "bytes"),
+        ]
+        if len(arquivo.variantes) > 1:
+            cabecalhos.append(("Vary", "Accept-Encoding"))
+        if codificacao:
+            cabecalhos.append(("Content-Encoding", codificacao))
+
+        se_nenhum = environ.get("HTTP_IF_NONE_MATCH", "")
+        etags = {etag.strip().removeprefix("W/") for etag in se_nenhum.split(",")}
+        if se_nenhum and ("*" in etags or dados["etag"] in etags):
+            start_response("304 Not Modified", cabecalhos)
+            return []
+
+        tamanho = dados["tamanho"]
+        intervalo = None
+        if pedido_intervalo and environ.get("HTTP_IF_RANGE", dados["etag"]) == dados["etag"]:
+            intervalo = _intervalo(pedido_intervalo, tamanho)
+        if intervalo is False:
+            start_response(
+                "416 Range Not Satisfiable",
+                [*cabecalhos, ("Content-Range", f"bytes */{tamanho}"), ("Content-Length", "0")],
+            )
+            return []
+
+        if intervalo:
+            inicio, fim = intervalo
+            quantidade = fim - inicio + 1
+            start_response(
+                "206 Partial Content",
+                [
+                    *cabecalhos,
+                    ("Content-Range", f"bytes {inicio}-{fim}/{tamanho}"),
+                    ("Content-Length", str(quantidade)),
+                ],
+            )
+            return [] if cabecalho_apenas else _ler(dados["caminho"], inicio, quantidade)
+
+        start_response("200 OK", [*cabecalhos, ("Content-Length", str(tamanho))])
+        if cabecalho_apenas:
+            return []
+        # Aberto além do retorno: o servidor (file_wrapper) ou _ler_e_fechar o
+        # lê durante o envio e o fecha ao final
+        corpo = open(dados["caminho"], "rb")  # noqa: SIM115  # pylint: disable=consider-using-with
+        envoltorio = environ.get("wsgi.file_wrapper")
+        if envoltorio is not None:
+            return envoltorio(corpo, TAMANHO_BLOCO)
+        return _ler_e_fechar(corpo)
+
+
+def _ler_e_fechar(arquivo):
+    with arquivo:
+        while bloco := arquivo.read(TAMANHO_BLOCO):
+            yield bloco